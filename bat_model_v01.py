@@ -7,8 +7,13 @@
 #       That makes you a bit "blind", because you only get the capacity fade of the cell, but don't see what it did.
 #       I suggest starting with the "regular" models until you are absolutely sure about what you do and that the
 #       results are legitimate. Then, you can compare the results with the fast model and continue there.
+#       bat_model_v01_fast.py uses the same model code as this file, but records into NullLog sinks (see LogSink). You
+#       can also pass NullLog / DecimatedLog / AggregatedLog objects as v_cell_df, i_cell_df, ... here directly.
 
+import abc
 import math
+import sys
+import types
 import typing
 import pandas as pd
 import numpy as np
@@ -35,7 +40,7 @@ C_TH_CELL = 30  # in J/K, rough estimation of the thermal capacity - regardless
 CAP_NOMINAL = 3  # in Ah, nominal capacity of the cell
 E_NOMINAL = 11  # in Wh, nominal energy of the cell
 V_NOMINAL = 3.6  # in V, nominal cell voltage
-R_TH_C_TH_CELL = R_TH_CELL * C_TH_CELL
+R_TH_C_TH_CELL = R_TH_CELL * C_TH_CELL  # derived -> CellModelParams recalculates it if R_TH_CELL/C_TH_CELL change
 T_0_DEGC_IN_K = 273.15  # 0°C in Kelvin
 
 # default values for the storage of the cell between production date and usage of the battery
@@ -49,6 +54,29 @@ STORAGE_TEMPERATURE_DEFAULT = 18  # in °C, average (or age-weighted) storage te
 T_REF_KELVIN = 25.0 + T_0_DEGC_IN_K  # reference temperature
 V_REF = 3.73  # reference voltage
 AGE_APPLY_PERIOD = 30  # in seconds, use average of this period for aging. If dt_resolution is larger, use the latter.
+REST_BLOCK_DECAY = 50.0  # maximum t / (R_TH_CELL * C_TH_CELL) evaluated at once in get_rest_temperature_profile
+ADAPTIVE_TOL_DEFAULT = (0.001, 0.01, 0.1)  # example for adaptive_tol of apply_cc_cv/apply_cp_cv: (SoC, V, T in K)
+ADAPTIVE_DT_MAX = 1200  # in seconds, maximum duration of an adaptive step (see run_cv_kernel_adaptive)
+V_LIM_EPS = 1e-9  # in V, cell voltage is regarded as limited by v_lim (CV phase) if abs(v_cell - v_lim) < V_LIM_EPS
+OCV_LIN_A = 3.3  # in V, OCV = OCV_LIN_A + OCV_LIN_B * soc in the linear part of the OCV curve (see get_ocv_from_soc)
+OCV_LIN_B = 0.9  # in V, slope of the linear part of the OCV curve
+OCV_LIN_SOC_MIN = 0.1326  # the OCV curve is linear for OCV_LIN_SOC_MIN <= soc <= OCV_LIN_SOC_MAX
+OCV_LIN_SOC_MAX = 0.935 - 0.065
+CV_BLOCK_MAX = 65536  # maximum number of steps evaluated at once in the vectorized CC/CV phases of run_cv_kernel
+TEMP_AMB_BLOCK = 1024  # minimum number of steps for which TempAmbSource interpolates the ambient temperature at once
+LOG_CAPACITY_INITIAL = 4096  # initial number of entries of a SeriesLog (capacity is doubled whenever it is full)
+ENVELOPE_BIN_COLUMNS = 7  # columns of the intervals of an EnvelopeLog: start of the interval, timestamp and value of
+#                            the minimum, timestamp and value of the maximum, sum of the values, number of steps
+CYCLE_SKIP_TOL_DEFAULT = 0.01  # tolerated relative drift of the capacity loss per cycle during a cycle skip (see
+#                                 run_cycles_skipping)
+CYCLE_SKIP_N_MAX = 100  # maximum number of cycles that are skipped (extrapolated) at once
+AGING_STATE_NAMES = ("q_loss_sei_total", "q_loss_cyclic_total", "q_loss_cyclic_low_total", "q_loss_plating_total",
+                     "Q_chg_total", "Q_dischg_total", "E_chg_total", "E_dischg_total")  # order of aging_states entries
+LUT_MAX_ERROR_DEFAULT = 1e-6  # maximum deviation of a LookupTable from the analytic curve (in units of the output)
+LUT_N_MIN = 1024  # initial number of intervals of a LookupTable (doubled until LUT_FALLBACK_SHARE_MAX is reached)
+LUT_N_MAX = 2**20  # maximum number of intervals of a LookupTable
+LUT_FALLBACK_SHARE_MAX = 0.01  # maximum share of LookupTable intervals in which the analytic function is used
+LUT_CHECK_FRACTIONS = (0.125, 0.25, 0.375, 0.5, 0.625, 0.75, 0.875)  # positions in each interval used for the error
 
 # SEI growth:
 AGE_S0 = 1.49e-9   # base SEI growth rate -> higher = faster SEI growth / more aging
@@ -74,6 +102,92 @@ AGE_P4 = 0.33     # aging dependency of effective res. (tipping behavior) -> hig
 AGE_P5 = 5.3e-8   # base plating rate -> higher = if plating occurs, lithium is plated faster
 AGE_P6 = 2.15     # C-rate dependency of plating rate (Cc^p6) -> higher = steeper dependency if C-rate > 1, lower if < 1
 
+# names of the parameters in CellModelParams (battery operation limits, resistance and thermal model, aging model)
+CELL_MODEL_PARAM_NAMES = ("V_CELL_MAX", "V_CELL_MIN", "I_CELL_MAX_CHG", "I_CELL_MIN_DISCHG", "R_CELL_0", "R_CELL_AGE",
+                          "R_TH_CELL", "C_TH_CELL", "CAP_NOMINAL", "V_NOMINAL", "T_REF_KELVIN", "V_REF",
+                          "AGE_APPLY_PERIOD", "AGE_S0", "AGE_S1", "AGE_S2", "AGE_S3", "AGE_W0", "AGE_W1", "AGE_W2",
+                          "AGE_W3", "AGE_C0", "AGE_C1", "AGE_C2", "AGE_C3", "AGE_P0", "AGE_P1", "AGE_P2", "AGE_P3",
+                          "AGE_P4", "AGE_P5", "AGE_P6")
+
+
+# Parameter set of the cell model. All functions that use one of the CELL_MODEL_PARAM_NAMES accept an optional params
+# argument (the last one) - if it is None, the current module constants above are used (see get_params). With this,
+# parameter sweeps, calibrations or batched runs can use many parameter sets in one process, e.g.:
+#   params = bat.CellModelParams(R_TH_CELL=3, AGE_S0=1.6e-9)
+#   cap_aged, aging_states, temp_cell, soc = bat.init(capacity, storage_days, storage_soc, storage_temp, params)
+#   ... = bat.apply_cc_cv(..., params=params)
+# Parameters that are not given are taken from the module constants at the time the object is created.
+# R_TH_C_TH_CELL (= R_TH_CELL * C_TH_CELL) is derived and updated whenever R_TH_CELL or C_TH_CELL are changed, so it
+# can't become stale (as it does when overwriting bat.R_TH_CELL after the import).
+class CellModelParams:
+    __slots__ = CELL_MODEL_PARAM_NAMES + ("R_TH_C_TH_CELL", "read_only")
+
+    def __init__(self, **kwargs):
+        for name in kwargs:
+            if name not in CELL_MODEL_PARAM_NAMES:
+                raise TypeError("unknown cell model parameter: %s" % name)
+        for name in CELL_MODEL_PARAM_NAMES:
+            object.__setattr__(self, name, kwargs.get(name, globals()[name]))
+        object.__setattr__(self, "R_TH_C_TH_CELL", self.R_TH_CELL * self.C_TH_CELL)
+        object.__setattr__(self, "read_only", False)
+
+    def __setattr__(self, name, value):
+        if self.read_only:
+            raise AttributeError("read-only cell model parameters, use params.copy(%s=...) instead" % name)
+        if name not in CELL_MODEL_PARAM_NAMES:
+            raise AttributeError("%s is not a (settable) cell model parameter" % name)
+        object.__setattr__(self, name, value)
+        if (name == "R_TH_CELL") or (name == "C_TH_CELL"):
+            object.__setattr__(self, "R_TH_C_TH_CELL", self.R_TH_CELL * self.C_TH_CELL)
+
+    def __repr__(self):
+        return "CellModelParams(%s)" % ", ".join("%s=%r" % (name, getattr(self, name))
+                                                 for name in CELL_MODEL_PARAM_NAMES)
+
+    def __eq__(self, other):
+        return (type(other) is CellModelParams) and (self.to_dict() == other.to_dict())
+
+    def copy(self, **kwargs):  # copy with some parameters changed, e.g., params.copy(AGE_S0=1.6e-9) -> not read-only
+        values = self.to_dict()
+        values.update(kwargs)
+        return CellModelParams(**values)
+
+    def freeze(self):  # make read-only (the object returned by get_params() is shared by all callers)
+        object.__setattr__(self, "read_only", True)
+        return self
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in CELL_MODEL_PARAM_NAMES}
+
+    def __getstate__(self):  # pickle (e.g., for multiprocessing) -> unpickled copies are not read-only
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        CellModelParams.__init__(self, **state)
+
+
+# module type that resets the cached default parameters (default_params, see get_params) whenever a cell model
+# parameter of the module is overwritten, e.g., bat_model_v01.R_TH_CELL = 3 in a use case model
+class CellModelModule(types.ModuleType):
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in CELL_MODEL_PARAM_NAMES:
+            super().__setattr__("default_params", None)
+
+
+sys.modules[__name__].__class__ = CellModelModule
+default_params = None  # CellModelParams object with the current module constants, created on demand by get_params
+
+
+# returns params, or (if params is None) a read-only CellModelParams object with the current module constants
+def get_params(params=None):
+    global default_params
+    if params is None:
+        if default_params is None:
+            default_params = CellModelParams().freeze()
+        return default_params
+    return params
+
 
 # states (if we want multithreading support, it might be the best to pass them back- and forth to the user function
 # instead of "storing" them here into a variable
@@ -126,7 +240,9 @@ AGE_P6 = 2.15     # C-rate dependency of plating rate (Cc^p6) -> higher = steepe
 #   p_cell_df       pandas.Series   actual cell power profile in W (over dt_df.index - informative, not needed)
 #   temp_cell_df    pandas.Series   cell (case) temperature profile in °C (over dt_df.index - informative, not needed)
 #   soc_df          pandas.Series   cell State of Charge [0...1] profile (over dt_df.index - informative, not needed)
-def get_aging_step(dt_df, i_set_df, p_set_df, temp_amb_df, cap_aged_begin, aging_states, temp_cell, soc):  # deprecated
+def get_aging_step(dt_df, i_set_df, p_set_df, temp_amb_df, cap_aged_begin, aging_states, temp_cell, soc,
+                   params=None):  # deprecated
+    params = get_params(params)
     if i_set_df is not None:
         use_power = False
         pi_set_df = i_set_df
@@ -137,7 +253,7 @@ def get_aging_step(dt_df, i_set_df, p_set_df, temp_amb_df, cap_aged_begin, aging
         return aging_states, cap_aged_begin, temp_cell, soc, None, None, None, None  # invalid user input
 
     # create empty data frames for V_cell, I_cell, P_cell, T_cell, get aged resistance
-    v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, r_cell = init_step(pi_set_df.index, cap_aged_begin)
+    v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, r_cell = init_step(pi_set_df.index, cap_aged_begin, params)
 
     v_cell, i_cell = np.nan, np.nan
     for ix, pi_set in pi_set_df.items():  # fastest iteration if we need index and value and can't vectorize
@@ -147,18 +263,19 @@ def get_aging_step(dt_df, i_set_df, p_set_df, temp_amb_df, cap_aged_begin, aging
 
         ocv = get_ocv_from_soc(soc)  # calculate OCV from SoC (at the beginning of the timestep)
         if use_power:  # pi_set is p_set -> calculate current
-            i_set = get_i_set_from_p_set(pi_set, ocv, r_cell)
+            i_set = get_i_set_from_p_set(pi_set, ocv, r_cell, params)
         else:  # pi_set is i_set -> only check if current is valid
-            i_set = get_limited_i_set(pi_set)
+            i_set = get_limited_i_set(pi_set, params)
 
         soc, v_cell, p_actual, temp_cell = (  # apply electrical and thermal cell model
-            cell_model(dt_df[ix], soc, ocv, i_set, temp_cell, temp_amb_df[ix], cap_aged_begin, r_cell))
+            cell_model(dt_df[ix], soc, ocv, i_set, temp_cell, temp_amb_df[ix], cap_aged_begin, r_cell, params))
 
         v_cell_df[ix], i_cell_df[ix], p_cell_df[ix], temp_cell_df[ix], soc_df[ix] =\
             v_cell, i_set, p_actual, temp_cell, soc  # store relevant values in Series
 
     # apply aging
-    cap_aged_end, aging_states = apply_aging(cap_aged_begin, aging_states, dt_df.sum(), v_cell, i_cell, temp_cell)
+    cap_aged_end, aging_states = apply_aging(cap_aged_begin, aging_states, dt_df.sum(), v_cell, i_cell, temp_cell,
+                                             params)
 
     return cap_aged_end, aging_states, temp_cell, soc, v_cell_df, i_cell_df, p_cell_df, temp_cell_df
 
@@ -187,11 +304,18 @@ def get_aging_step(dt_df, i_set_df, p_set_df, temp_amb_df, cap_aged_begin, aging
 #   i_lim           float           charging(+)/discharging(-) "constant current" (CC), i.e., maximum current
 #   i_cutoff        float           chg.(+)/dischg.(-) cut-off current in CV phase, end if abs(current) < abs(i_cutoff)
 #   temp_amb        float           ambient (or coolant) temperature in °C -> R_TH_CELL "between" temp_ambient/temp_cell
-#   FIXME add description for v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df
+#   v_cell_df, ...  SeriesLog       logs of v_cell, i_cell, p_cell, temp_cell, soc (to which the step is added):
+#                                   SeriesLog from init_empty_log() (fast, appended in place), other LogSink objects
+#                                   (e.g., NullLog from init_null_log() -> nothing recorded), pandas.Series, or None
 #   cap_aged        float           remaining usable capacity of the cell in Ah at start (cap_aged of last step)
 #   aging_states    arr. of floats  internal aging states (different aging types [0...1]), use aging_states of last step
 #   temp_cell       float           cell (case) temperature in °C at start (use temp_cell of the last time step)
 #   soc             float           State of Charge [0...1] of the cell at start (use soc of the last time step)
+#   t_end_max       None or float   (optional) timestamp in s at which the charging/discharging is stopped at the latest
+#   adaptive_tol    None or tuple   (optional) None: fixed steps of dt_resolution. (soc_tol, v_tol, temp_tol): adaptive
+#                                   steps (multiples of dt_resolution, see run_cv_kernel_adaptive) with this maximum
+#                                   local error of SoC [0...1], voltage in V and temperature in K (e.g., use
+#                                   ADAPTIVE_TOL_DEFAULT)
 # outputs:  cap_aged_end, aging_states, temp_cell, soc, v_cell_df, i_cell_df, p_cell_df, temp_cell_df
 #   cap_aged_end    float           remaining usable capacity of the cell in Ah after step (-> cap_aged_begin of next)
 #   aging_states    arr. of floats  internal aging states, use for next step
@@ -204,285 +328,132 @@ def get_aging_step(dt_df, i_set_df, p_set_df, temp_amb_df, cap_aged_begin, aging
 #   soc_df          pandas.Series   cell State of Charge [0...1] profile (over dt_df.index - informative, not needed)
 #   t_next          int or float    timestamp in s (e.g., unixtimestamp), can be used as t_start of next process
 def apply_cc_cv(t_start, dt_resolution, v_lim, i_lim, i_cutoff, temp_amb, v_cell_df, i_cell_df, p_cell_df, temp_cell_df,
-                soc_df, cap_aged, aging_states, temp_cell, soc, t_end_max=None):
-    if cap_aged <= 0.0:  # cell has no usable capacity anymore
-        return v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start
-    # check current
-    v_lim = get_limited_v_set(v_lim)
-    i_lim = get_limited_i_set(i_lim)
-
-    # estimate how long the charging/discharging process takes and create time index range that is definitely longer
-    max_duration_s = 2.0 * abs(cap_aged / i_lim) * 3600.0  # assume charging duration < 2x time for CC-chg. to 100%
-    # ixs = range(int(t_start), int(t_start + math.ceil(max_duration_s + dt_resolution)), int(dt_resolution))
-    t_end = t_start + max_duration_s
-    if t_end_max is not None:
-        if t_end > t_end_max:
-            t_end = t_end_max
-    # ixs = np.arange(t_start, t_end + dt_resolution, dt_resolution)
-    ixs = np.arange(t_start, t_end, dt_resolution)
-
-    # create empty data frames for V_cell, I_cell, P_cell, T_cell, get aged resistance
-    v_new, i_new, p_new, temp_new, soc_new, r_cell = init_step(ixs, cap_aged)
-
-    # temp_amb_use = temp_amb
-
-    i_cell, ix_last_used = np.nan, t_start
-    for ix in ixs:  # fastest iteration if we need the index and can't vectorize
-        ocv = get_ocv_from_soc(soc)  # calculate OCV from SoC (at the beginning of the timestep)
-        i_set = get_i_set_from_v_lim_i_lim(v_lim, i_lim, ocv, r_cell)
-        end_run = False
-        if i_lim > 0.0:
-            if i_set < i_cutoff:
-                end_run = True  # end of charge!
-        elif i_lim < 0.0:
-            if i_set > i_cutoff:
-                end_run = True  # end of discharge!
-        else:
-            end_run = True  # end, since i_lim = 0
-
-        if type(temp_amb) is pd.Series:
-            # temp_amb_use = get_nearest_value_from_df(temp_amb, ix, temp_amb_use)  we already have temp_amb[ix]!
-            temp_amb_use = temp_amb[ix]
-        else:
-            temp_amb_use = temp_amb
-
-        soc, v_cell, p_actual, temp_cell = (  # apply electrical and thermal cell model
-            cell_model(dt_resolution, soc, ocv, i_set, temp_cell, temp_amb_use, cap_aged, r_cell))
-
-        v_new[ix], i_new[ix], p_new[ix], temp_new[ix], soc_new[ix] =\
-            v_cell, i_set, p_actual, temp_cell, soc  # store relevant values in Series
-
-        ix_last_used = ix
-        if end_run:
-            break
-
-    # cut Series after ix_last_used
-    v_new = v_new.loc[t_start:ix_last_used]  # when using .loc[a:b], b is included
-    i_new = i_new.loc[t_start:ix_last_used]
-    p_new = p_new.loc[t_start:ix_last_used]
-    temp_new = temp_new.loc[t_start:ix_last_used]
-    soc_new = soc_new.loc[t_start:ix_last_used]
-
-    # apply aging
-    cap_aged, aging_states = apply_aging_df(cap_aged, aging_states, dt_resolution, v_new, i_new, temp_new)
-
-    if v_cell_df is None:
-        v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df = v_new, i_new, p_new, temp_new, soc_new
-    else:
-        v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df = append_dataframes(
-            [v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df], [v_new, i_new, p_new, temp_new, soc_new])
-
-    t_next = ix_last_used + dt_resolution
-    return v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_next
+                soc_df, cap_aged, aging_states, temp_cell, soc, t_end_max=None, adaptive_tol=None, params=None):
+    return run_cv(t_start, dt_resolution, v_lim, i_lim, False, i_cutoff, temp_amb, v_cell_df, i_cell_df, p_cell_df,
+                  temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_end_max, adaptive_tol, params)[:10]
 
 
 # FIXME documentation
 def apply_cp_cv(t_start, dt_resolution, v_lim, p_lim, i_cutoff, temp_amb, v_cell_df, i_cell_df, p_cell_df, temp_cell_df,
-                soc_df, cap_aged, aging_states, temp_cell, soc, t_end_max=None):
+                soc_df, cap_aged, aging_states, temp_cell, soc, t_end_max=None, adaptive_tol=None, params=None):
+    return run_cv(t_start, dt_resolution, v_lim, p_lim, True, i_cutoff, temp_amb, v_cell_df, i_cell_df, p_cell_df,
+                  temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_end_max, adaptive_tol, params)[:10]
+
+
+# apply_cc_cv (lim = i_lim, lim_is_power = False) / apply_cp_cv (lim = p_lim, lim_is_power = True). Additionally
+#   returns cut_off_limit_reached (True if the process ended because abs(current) < abs(i_cutoff), or if the cell has
+#   no usable capacity anymore).
+def run_cv(t_start, dt_resolution, v_lim, lim, lim_is_power, i_cutoff, temp_amb, v_cell_df, i_cell_df, p_cell_df,
+           temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_end_max=None, adaptive_tol=None,
+           params=None):
+    params = get_params(params)
     if cap_aged <= 0.0:  # cell has no usable capacity anymore
-        return v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start
+        return (v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start,
+                True)
     # check current
-    v_lim = get_limited_v_set(v_lim)
-
-    # estimate how long the charging/discharging process takes and create time index range that is definitely longer
-    # assume charging duration < 2x time for CP-chg. to 100%
-    max_duration_s = 2.0 * abs(cap_aged / (p_lim / V_NOMINAL)) * 3600.0
+    v_lim = get_limited_v_set(v_lim, params)
+
+    # estimate how long the charging/discharging process takes and determine a maximum duration that is surely longer
+    if lim_is_power:  # assume charging duration < 2x time for CP-chg. to 100%
+        max_duration_s = 2.0 * abs(cap_aged / (lim / params.V_NOMINAL)) * 3600.0
+    else:  # assume charging duration < 2x time for CC-chg. to 100%
+        lim = get_limited_i_set(lim, params)
+        max_duration_s = 2.0 * abs(cap_aged / lim) * 3600.0
     # ixs = range(int(t_start), int(t_start + math.ceil(max_duration_s + dt_resolution)), int(dt_resolution))
     t_end = t_start + max_duration_s
     if t_end_max is not None:
         if t_end > t_end_max:
             t_end = t_end_max
     # ixs = np.arange(t_start, t_end + dt_resolution, dt_resolution)
-    ixs = np.arange(t_start, t_end, dt_resolution)
-
-    # create empty data frames for V_cell, I_cell, P_cell, T_cell, get aged resistance
-    v_new, i_new, p_new, temp_new, soc_new, r_cell = init_step(ixs, cap_aged)
-
-    if type(temp_amb) is pd.Series:  # todo: consider explicitly providing temp_amb type as a parameter -> safer*
-        if temp_amb.shape[0] == len(ixs):  # same length -> copy ixs   (<-  *in rare scenarios, this could be a mistake)
-            temp_amb = pd.Series(temp_amb.values, index=ixs)
-        else:  # different length -> need interpolation (assume index is of same type)
-            temp_amb = interpolate_df(temp_amb, ixs)
-    else:
-        temp_amb = pd.Series(temp_amb, index=ixs)
-
-    # temp_amb_use = temp_amb
-
-    i_cell, ix_last_used = np.nan, t_start
-    for ix in ixs:  # fastest iteration if we need the index and can't vectorize
-        ocv = get_ocv_from_soc(soc)  # calculate OCV from SoC (at the beginning of the timestep)
-        i_set = get_i_set_from_v_lim_p_lim(v_lim, p_lim, ocv, r_cell)
-        end_run = False
-        if p_lim > 0.0:
-            if i_set < i_cutoff:
-                end_run = True  # end of charge!
-        elif p_lim < 0.0:
-            if i_set > i_cutoff:
-                end_run = True  # end of discharge!
-        else:
-            end_run = True  # end, since p_lim = 0
-
-        if type(temp_amb) is pd.Series:
-            # temp_amb_use = get_nearest_value_from_df(temp_amb, ix, temp_amb_use)  we already have temp_amb[ix]!
-            temp_amb_use = temp_amb[ix]
-        else:
-            temp_amb_use = temp_amb
-
-        soc, v_cell, p_actual, temp_cell = (  # apply electrical and thermal cell model
-            cell_model(dt_resolution, soc, ocv, i_set, temp_cell, temp_amb_use, cap_aged, r_cell))
-
-        v_new[ix], i_new[ix], p_new[ix], temp_new[ix], soc_new[ix] =\
-            v_cell, i_set, p_actual, temp_cell, soc  # store relevant values in Series
-
-        ix_last_used = ix
-        if end_run:
-            break
-
-    # cut Series after ix_last_used
-    v_new = v_new.loc[t_start:ix_last_used]  # when using .loc[a:b], b is included
-    i_new = i_new.loc[t_start:ix_last_used]
-    p_new = p_new.loc[t_start:ix_last_used]
-    temp_new = temp_new.loc[t_start:ix_last_used]
-    soc_new = soc_new.loc[t_start:ix_last_used]
+    # ixs = np.arange(t_start, t_end, dt_resolution)  -> only create the timestamps of the steps that are simulated
+    n_max = get_n_steps(t_start, t_end, dt_resolution)
+
+    # step on numpy arrays (index = step number), only create the pandas.Series once the charging process is complete
+    temp_amb_src = TempAmbSource(temp_amb, t_start, dt_resolution, n_max)
+    if adaptive_tol is None:  # fixed steps of dt_resolution
+        v_arr, i_arr, p_arr, temp_arr, soc_arr, n_used, temp_cell, soc, cut_off_limit_reached = run_cv_kernel(
+            n_max, dt_resolution, v_lim, lim, lim_is_power, i_cutoff, temp_amb_src, cap_aged, temp_cell, soc, params)
+        ixs_used = get_step_ixs(t_start, dt_resolution, np.arange(n_used))
+        dt_used = dt_resolution
+        dt_last = dt_resolution
+    else:  # adaptive steps (multiples of dt_resolution)
+        (k_arr, dt_used, v_arr, i_arr, p_arr, temp_arr, soc_arr, n_used, temp_cell, soc,
+         cut_off_limit_reached) = run_cv_kernel_adaptive(
+            n_max, dt_resolution, v_lim, lim, lim_is_power, i_cutoff, temp_amb_src, cap_aged, temp_cell, soc,
+            adaptive_tol, params)
+        ixs_used = get_step_ixs(t_start, dt_resolution, k_arr)
+        dt_last = dt_used[n_used - 1] if n_used > 0 else dt_resolution
+    ix_last_used = ixs_used[n_used - 1] if n_used > 0 else t_start
 
     # apply aging
-    cap_aged, aging_states = apply_aging_df(cap_aged, aging_states, dt_resolution, v_new, i_new, temp_new)
+    cap_aged, aging_states = apply_aging_arrays(cap_aged, aging_states, dt_used, ixs_used,
+                                                v_arr[:n_used], i_arr[:n_used], temp_arr[:n_used], params)
 
-    if v_cell_df is None:
-        v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df = v_new, i_new, p_new, temp_new, soc_new
-    else:
-        v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df = append_dataframes(
-            [v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df], [v_new, i_new, p_new, temp_new, soc_new])
+    v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df = record_step(
+        [v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df], ixs_used, v_arr, i_arr, p_arr, temp_arr, soc_arr)
 
-    t_next = ix_last_used + dt_resolution
-    return v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_next
+    t_next = ix_last_used + dt_last
+    return (v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_next,
+            cut_off_limit_reached)
 
 
 # FIXME documentation
 def apply_power_profile(t_start, dt_resolution, p_set_df, temp_amb,
-                        v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc):
-    if cap_aged <= 0.0:  # cell has no usable capacity anymore
-        return v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start
-
-    if type(p_set_df) is pd.Series:
-        p_set_df_use = p_set_df.copy()
-        p_set_df_use.index = p_set_df_use.index + t_start - p_set_df_use.index[0]
-    else:
-        ixs = np.arange(t_start, t_start + len(p_set_df) * dt_resolution, dt_resolution)  # t_start
-        p_set_df_use = pd.Series(p_set_df, index=ixs)
-    # create empty data frames for V_cell, I_cell, P_cell, T_cell, get aged resistance
-    v_new, i_new, p_new, temp_new, soc_new, r_cell = init_step(p_set_df_use.index, cap_aged)
-
-    ixs = p_set_df_use.index
-    if type(temp_amb) is pd.Series:  # todo: consider explicitly providing temp_amb type as a parameter -> safer*
-        if temp_amb.shape[0] == len(
-                ixs):  # same length -> copy ixs   (<-  *in rare scenarios, this could be a mistake)
-            temp_amb = pd.Series(temp_amb.values, index=ixs)
-        else:  # different length -> need interpolation (assume index is of same type)
-            temp_amb = interpolate_df(temp_amb, ixs)
-    else:
-        temp_amb = pd.Series(temp_amb, index=ixs)
-
-    # temp_amb_use = temp_amb
-
-    for ix, pi_set in p_set_df_use.items():  # fastest iteration if we need index and value and can't vectorize
-        ocv = get_ocv_from_soc(soc)  # calculate OCV from SoC (at the beginning of the timestep)
-        i_set = get_i_set_from_p_set(pi_set, ocv, r_cell)
-
-        if type(temp_amb) is pd.Series:
-            # temp_amb_use = get_nearest_value_from_df(temp_amb, ix, temp_amb_use)  we already have temp_amb[ix]!
-            temp_amb_use = temp_amb[ix]
-        else:
-            temp_amb_use = temp_amb
-
-        soc, v_cell, p_actual, temp_cell = (  # apply electrical and thermal cell model
-            cell_model(dt_resolution, soc, ocv, i_set, temp_cell, temp_amb_use, cap_aged, r_cell))
-
-        v_new[ix], i_new[ix], p_new[ix], temp_new[ix], soc_new[ix] =\
-            v_cell, i_set, p_actual, temp_cell, soc  # store relevant values in Series
-
-    # apply aging
-    cap_aged, aging_states = apply_aging_df(cap_aged, aging_states, dt_resolution, v_new, i_new, temp_new)
-
-    if v_cell_df is None:
-        v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df = v_new, i_new, p_new, temp_new, soc_new
-    else:
-        v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df = append_dataframes(
-            [v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df], [v_new, i_new, p_new, temp_new, soc_new])
-
-    t_next = v_cell_df.index[-1] + dt_resolution
-    return v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_next
+                        v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc,
+                        params=None):
+    return run_power_profile(t_start, dt_resolution, p_set_df, temp_amb, v_cell_df, i_cell_df, p_cell_df,
+                             temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, None, params)
 
 
 # FIXME documentation
 def apply_power_profile_soc_lim(t_start, dt_resolution, p_set_df, temp_amb,
                                 v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df,
-                                cap_aged, aging_states, temp_cell, soc, soc_min):
-    if cap_aged <= 0.0:  # cell has no usable capacity anymore
-        return v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start
-
-    if type(p_set_df) is pd.Series:
-        p_set_df_use = p_set_df.copy()
-        p_set_df_use.index = p_set_df_use.index + t_start - p_set_df_use.index[0]
-    else:
-        ixs = np.arange(t_start, t_start + len(p_set_df) * dt_resolution, dt_resolution)  # t_start
-        p_set_df_use = pd.Series(p_set_df, index=ixs)
-    # create empty data frames for V_cell, I_cell, P_cell, T_cell, get aged resistance
-    v_new, i_new, p_new, temp_new, soc_new, r_cell = init_step(p_set_df_use.index, cap_aged)
-
-    ixs = p_set_df_use.index
-    if type(temp_amb) is pd.Series:  # todo: consider explicitly providing temp_amb type as a parameter -> safer*
-        if temp_amb.shape[0] == len(
-                ixs):  # same length -> copy ixs   (<-  *in rare scenarios, this could be a mistake)
-            temp_amb = pd.Series(temp_amb.values, index=ixs)
-        else:  # different length -> need interpolation (assume index is of same type)
-            temp_amb = interpolate_df(temp_amb, ixs)
-    else:
-        temp_amb = pd.Series(temp_amb, index=ixs)
-
-    # temp_amb_use = temp_amb
+                                cap_aged, aging_states, temp_cell, soc, soc_min, params=None):
+    return run_power_profile(t_start, dt_resolution, p_set_df, temp_amb, v_cell_df, i_cell_df, p_cell_df,
+                             temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, soc_min, params)
 
-    for ix, pi_set in p_set_df_use.items():  # fastest iteration if we need index and value and can't vectorize
-        ocv = get_ocv_from_soc(soc)  # calculate OCV from SoC (at the beginning of the timestep)
-        if (soc < soc_min) and (pi_set < 0.0):  # discharging, but soc < limit => not allowed
-            i_set = 0.0
-        else:
-            i_set = get_i_set_from_p_set(pi_set, ocv, r_cell)
 
-        if type(temp_amb) is pd.Series:
-            # temp_amb_use = get_nearest_value_from_df(temp_amb, ix, temp_amb_use)  we already have temp_amb[ix]!
-            temp_amb_use = temp_amb[ix]
-        else:
-            temp_amb_use = temp_amb
+# apply_power_profile (soc_min = None) / apply_power_profile_soc_lim: p_set_df can be a list, a pandas.Series or a
+#   PowerProfile (prepared once, see PowerProfile) of power set-points, the time offset is given by t_start.
+def run_power_profile(t_start, dt_resolution, p_set_df, temp_amb, v_cell_df, i_cell_df, p_cell_df, temp_cell_df,
+                      soc_df, cap_aged, aging_states, temp_cell, soc, soc_min, params=None):
+    params = get_params(params)
+    if cap_aged <= 0.0:  # cell has no usable capacity anymore
+        return v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start
 
-        soc, v_cell, p_actual, temp_cell = (  # apply electrical and thermal cell model
-            cell_model(dt_resolution, soc, ocv, i_set, temp_cell, temp_amb_use, cap_aged, r_cell))
+    profile = get_power_profile(p_set_df, dt_resolution)
+    if profile.n == 0:  # nothing to do
+        return v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start
+    ixs = profile.get_ixs(t_start, dt_resolution)
+    r_cell = get_r_cell_from_cap_aged(cap_aged, params)
+    temp_amb_arr = get_temp_amb_array(temp_amb, ixs)  # float (constant) or one value per step (as before)
 
-        v_new[ix], i_new[ix], p_new[ix], temp_new[ix], soc_new[ix] =\
-            v_cell, i_set, p_actual, temp_cell, soc  # store relevant values in Series
+    v_arr, i_arr, p_arr, temp_arr, soc_arr, temp_cell, soc = run_power_profile_kernel(
+        profile.p_set_list, dt_resolution, temp_amb_arr, cap_aged, r_cell, temp_cell, soc, soc_min, params)
 
     # apply aging
-    cap_aged, aging_states = apply_aging_df(cap_aged, aging_states, dt_resolution, v_new, i_new, temp_new)
+    cap_aged, aging_states = apply_aging_arrays(cap_aged, aging_states, dt_resolution, ixs, v_arr, i_arr, temp_arr,
+                                                params)
 
-    if v_cell_df is None:
-        v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df = v_new, i_new, p_new, temp_new, soc_new
-    else:
-        v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df = append_dataframes(
-            [v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df], [v_new, i_new, p_new, temp_new, soc_new])
+    v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df = record_step(
+        [v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df], ixs, v_arr, i_arr, p_arr, temp_arr, soc_arr)
 
-    t_next = v_cell_df.index[-1] + dt_resolution
+    t_next = ixs[-1] + dt_resolution
     return v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_next
 
 
 # FIXME: documentation - important: v_min is measured AFTER a profile. The profile is repeated if v_max > ocv > v_min
 def apply_power_profile_repeat(t_start, dt_resolution, p_set_df, n_repeat_max, temp_amb, v_max, v_min, v_cell_df,
-                               i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc):
+                               i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc,
+                               params=None):
+    params = get_params(params)
     # avoid endless loops:
     if (((v_min is None) and (v_max is None) and (n_repeat_max is None))  # no stop condition --> endless loop
-            or ((v_min is not None) and (v_min < V_CELL_MIN))  # minimum voltage will never be reached --> endless loop
-            or ((v_max is not None) and (v_max > V_CELL_MAX))):  # maximum voltage will never be reached --> ...
-        return v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc
+            or ((v_min is not None) and (v_min < params.V_CELL_MIN))  # minimum voltage will never be reached --> ...
+            or ((v_max is not None) and (v_max > params.V_CELL_MAX))):  # maximum voltage will never be reached --> ...
+        return v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start, 0
 
+    p_set_df = get_power_profile(p_set_df, dt_resolution)  # prepare once for all repetitions
     n_rep = 0
     while True:
         ocv = get_ocv_from_soc(soc)
@@ -496,7 +467,7 @@ def apply_power_profile_repeat(t_start, dt_resolution, p_set_df, n_repeat_max, t
             break
         v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start = \
             apply_power_profile(t_start, dt_resolution, p_set_df, temp_amb, v_cell_df, i_cell_df, p_cell_df,
-                                temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc)
+                                temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, params)
         n_rep = n_rep + 1
 
     return v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start, n_rep
@@ -505,7 +476,9 @@ def apply_power_profile_repeat(t_start, dt_resolution, p_set_df, n_repeat_max, t
 # apply charge/discharge cycles to the cell  # FIXME add description
 def apply_cycles(n_cycles_max, t_start, t_end_max,  dt_resolution_active, dt_resolution_rest, v_max, v_min,
                  i_chg, i_dischg, i_chg_cutoff, i_dischg_cutoff, rest_duration, start_charging, temp_amb,
-                 v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc):
+                 v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc,
+                 params=None):
+    params = get_params(params)
     if t_end_max is not None:
         if t_start >= t_end_max:
             return v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, soc_df, cap_aged, aging_states, temp_cell, soc
@@ -521,12 +494,14 @@ def apply_cycles(n_cycles_max, t_start, t_end_max,  dt_resolution_active, dt_res
         # discharge to v_min with i_dischg (cutoff current: i_dischg_cutoff)
         v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start = \
             apply_cc_cv(t_start, dt_resolution_active, v_min, i_dischg, i_dischg_cutoff, temp_amb,
-                        v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc)
+                        v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc,
+                        params=params)
 
         # rest
         v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start = \
             apply_pause(t_start, dt_resolution_rest, rest_duration, temp_amb,
-                        v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc)
+                        v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc,
+                        params)
 
     i = 0
     # for i in range(n_cycles_max):
@@ -534,12 +509,13 @@ def apply_cycles(n_cycles_max, t_start, t_end_max,  dt_resolution_active, dt_res
         # charge to v_max with i_chg (cutoff current: i_chg_cutoff)
         v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start = \
             apply_cc_cv(t_start, dt_resolution_active, v_max, i_chg, i_chg_cutoff, temp_amb,
-                        v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc)
+                        v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc,
+                        params=params)
 
         # rest
         v_new, i_new, p_new, temp_new, soc_new, cap_aged, aging_states, temp_cell, soc, t_start = apply_pause(
             t_start, dt_resolution_rest, rest_duration, temp_amb, v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df,
-            cap_aged, aging_states, temp_cell, soc)
+            cap_aged, aging_states, temp_cell, soc, params)
 
         if cap_aged <= 0.0:  # cell has no usable capacity anymore
             break
@@ -559,12 +535,13 @@ def apply_cycles(n_cycles_max, t_start, t_end_max,  dt_resolution_active, dt_res
             # discharge to v_min with i_dischg (cutoff current: i_dischg_cutoff)
             v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start = \
                 apply_cc_cv(t_start, dt_resolution_active, v_min, i_dischg, i_dischg_cutoff, temp_amb, v_cell_df,
-                            i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc)
+                            i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc,
+                            params=params)
 
             # rest
             v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start = \
                 apply_pause(t_start, dt_resolution_rest, rest_duration, temp_amb, v_cell_df,
-                            i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc)
+                            i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, params)
 
             if cap_aged <= 0.0:  # cell has no usable capacity anymore
                 break
@@ -585,7 +562,9 @@ def apply_cycles(n_cycles_max, t_start, t_end_max,  dt_resolution_active, dt_res
 def apply_profile_cycles(n_charge_cycles_max, t_start, t_end_max,
                          dt_resolution_charging, dt_resolution_profile, dt_resolution_rest,
                          p_set_df, v_max, v_min, i_chg, i_chg_cutoff, rest_duration, start_charging, temp_amb,
-                         v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc):
+                         v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc,
+                         params=None):
+    params = get_params(params)
     if t_end_max is not None:
         if t_start >= t_end_max:
             return v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, soc_df, cap_aged, aging_states, temp_cell, soc
@@ -602,12 +581,12 @@ def apply_profile_cycles(n_charge_cycles_max, t_start, t_end_max,
         v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start, _ = \
             apply_power_profile_repeat(t_start, dt_resolution_profile, p_set_df, None, temp_amb, v_max, v_min,
                                        v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df,
-                                       cap_aged, aging_states, temp_cell, soc)
+                                       cap_aged, aging_states, temp_cell, soc, params)
 
         # rest
         v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start = \
             apply_pause(t_start, dt_resolution_rest, rest_duration, temp_amb, v_cell_df, i_cell_df, p_cell_df,
-                        temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc)
+                        temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, params)
 
         if cap_aged <= 0.0:  # cell has no usable capacity anymore
             return v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, soc_df, cap_aged, aging_states, temp_cell, soc
@@ -618,12 +597,12 @@ def apply_profile_cycles(n_charge_cycles_max, t_start, t_end_max,
         # charge to v_max with i_chg (cutoff current: i_chg_cutoff)
         v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start = \
             apply_cc_cv(t_start, dt_resolution_charging, v_max, i_chg, i_chg_cutoff, temp_amb, v_cell_df, i_cell_df,
-                        p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc)
+                        p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, params=params)
 
         # rest
         v_new, i_new, p_new, temp_new, soc_new, cap_aged, aging_states, temp_cell, soc, t_start = apply_pause(
             t_start, dt_resolution_rest, rest_duration, temp_amb, v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df,
-            cap_aged, aging_states, temp_cell, soc)
+            cap_aged, aging_states, temp_cell, soc, params)
 
         if cap_aged <= 0.0:  # cell has no usable capacity anymore
             break
@@ -644,12 +623,12 @@ def apply_profile_cycles(n_charge_cycles_max, t_start, t_end_max,
             v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start, _ =\
                 apply_power_profile_repeat(t_start, dt_resolution_profile, p_set_df, None, temp_amb, v_max, v_min,
                                            v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df,
-                                           cap_aged, aging_states, temp_cell, soc)
+                                           cap_aged, aging_states, temp_cell, soc, params)
 
             # rest
             v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start = \
                 apply_pause(t_start, dt_resolution_rest, rest_duration, temp_amb, v_cell_df, i_cell_df, p_cell_df,
-                            temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc)
+                            temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, params)
 
             if cap_aged <= 0.0:  # cell has no usable capacity anymore
                 break
@@ -667,9 +646,150 @@ def apply_profile_cycles(n_charge_cycles_max, t_start, t_end_max,
     return v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start
 
 
+# same as apply_cycles (without data frames), but cycles are skipped (extrapolated) while consecutive cycles age the
+#   cell almost identically -> see run_cycles_skipping. One cycle = apply_cycles with n_cycles_max = 1 (charge, rest,
+#   discharge, rest if start_charging, else discharge, rest, charge, rest) -> repeating it n times is the same as
+#   apply_cycles with n_cycles_max = n.
+# outputs:  cap_aged, aging_states, temp_cell, soc, t_start, n_cycles, n_cycles_skipped, error_bound
+#   (see run_cycles_skipping)
+def apply_cycles_skipping(n_cycles_max, t_start, t_end_max, dt_resolution_active, dt_resolution_rest, v_max, v_min,
+                          i_chg, i_dischg, i_chg_cutoff, i_dischg_cutoff, rest_duration, start_charging, temp_amb,
+                          cap_aged, aging_states, temp_cell, soc, tolerance=CYCLE_SKIP_TOL_DEFAULT, params=None):
+    params = get_params(params)
+
+    def apply_cycle(t_start_c, cap_aged_c, aging_states_c, temp_cell_c, soc_c):
+        _, _, _, _, _, cap_aged_c, aging_states_c, temp_cell_c, soc_c, t_start_c = apply_cycles(
+            1, t_start_c, None, dt_resolution_active, dt_resolution_rest, v_max, v_min, i_chg, i_dischg, i_chg_cutoff,
+            i_dischg_cutoff, rest_duration, start_charging, temp_amb, None, None, None, None, None,
+            cap_aged_c, aging_states_c, temp_cell_c, soc_c, params)
+        return cap_aged_c, aging_states_c, temp_cell_c, soc_c, t_start_c
+
+    return run_cycles_skipping(apply_cycle, n_cycles_max, t_start, t_end_max, cap_aged, aging_states, temp_cell, soc,
+                               tolerance)
+
+
+# same as apply_profile_cycles (without data frames), but cycles are skipped (extrapolated) -> see apply_cycles_skipping
+# outputs:  cap_aged, aging_states, temp_cell, soc, t_start, n_cycles, n_cycles_skipped, error_bound
+#   (see run_cycles_skipping)
+def apply_profile_cycles_skipping(n_charge_cycles_max, t_start, t_end_max,
+                                  dt_resolution_charging, dt_resolution_profile, dt_resolution_rest,
+                                  p_set_df, v_max, v_min, i_chg, i_chg_cutoff, rest_duration, start_charging, temp_amb,
+                                  cap_aged, aging_states, temp_cell, soc, tolerance=CYCLE_SKIP_TOL_DEFAULT,
+                                  params=None):
+    params = get_params(params)
+    p_set_df = get_power_profile(p_set_df, dt_resolution_profile)  # prepare once for all cycles
+
+    def apply_cycle(t_start_c, cap_aged_c, aging_states_c, temp_cell_c, soc_c):
+        _, _, _, _, _, cap_aged_c, aging_states_c, temp_cell_c, soc_c, t_start_c = apply_profile_cycles(
+            1, t_start_c, None, dt_resolution_charging, dt_resolution_profile, dt_resolution_rest, p_set_df,
+            v_max, v_min, i_chg, i_chg_cutoff, rest_duration, start_charging, temp_amb, None, None, None, None, None,
+            cap_aged_c, aging_states_c, temp_cell_c, soc_c, params)
+        return cap_aged_c, aging_states_c, temp_cell_c, soc_c, t_start_c
+
+    return run_cycles_skipping(apply_cycle, n_charge_cycles_max, t_start, t_end_max, cap_aged, aging_states,
+                               temp_cell, soc, tolerance)
+
+
+# repeat apply_cycle until n_cycles_max cycles are done, t_end_max is reached or the cell has no usable capacity anymore
+#   (like apply_cycles). Consecutive cycles age the cell almost identically, so the change of capacity and aging states
+#   per cycle (dx) is measured in simulated cycles and extrapolated over k skipped cycles, including its trend (change
+#   of dx per cycle, measured between two simulated cycles). The first cycle is not used (different initial state).
+#   k is limited such that the capacity loss per cycle changes by less than tolerance (relative) over the skipped
+#   cycles. After each skip, a cycle is simulated again and compared with the extrapolation: if the capacity loss per
+#   cycle deviates by more than tolerance, the next skip is halved (else it may be doubled, up to CYCLE_SKIP_N_MAX).
+#   The duration of the cycles (which decreases with the capacity) is extrapolated the same way (rounded to seconds).
+#   The last cycle before n_cycles_max/t_end_max is always simulated. Since the cell rests between cycles, temp_cell
+#   and soc at the end of a cycle are assumed to be periodic.
+# apply_cycle(t_start, cap_aged, aging_states, temp_cell, soc) -> cap_aged, aging_states, temp_cell, soc, t_next
+#   simulates one cycle.
+# outputs:  cap_aged, aging_states, temp_cell, soc, t_start, n_cycles, n_cycles_skipped, error_bound
+#   n_cycles            int     number of cycles (simulated + skipped)
+#   n_cycles_skipped    int     number of cycles that were extrapolated instead of simulated
+#   error_bound         float   estimated error of cap_aged in Ah caused by the skips: sum of k / 2 * |deviation of the
+#                               capacity loss of the cycle after a skip from its extrapolation| (the deviation is
+#                               assumed to grow linearly over the k skipped cycles)
+def run_cycles_skipping(apply_cycle, n_cycles_max, t_start, t_end_max, cap_aged, aging_states, temp_cell, soc,
+                        tolerance=CYCLE_SKIP_TOL_DEFAULT):
+    n_cycles = 0
+    n_cycles_skipped = 0
+    error_bound = 0.0
+    ref = None  # (n_cycles, dx, dt) of the last simulated cycle used as reference for the trend
+    k_max = CYCLE_SKIP_N_MAX
+    k_last = 0  # number of cycles skipped directly before the current cycle
+    while True:
+        if cap_aged <= 0.0:  # cell has no usable capacity anymore
+            break
+        if (n_cycles_max is not None) and (n_cycles >= n_cycles_max):
+            break
+        if (t_end_max is not None) and (t_start >= t_end_max):
+            break
+
+        x_prev = np.array([cap_aged, *aging_states], dtype=np.float64)
+        t_prev = t_start
+        cap_aged, aging_states, temp_cell, soc, t_start = apply_cycle(t_start, cap_aged, aging_states, temp_cell, soc)
+        n_cycles = n_cycles + 1
+        dx = np.array([cap_aged, *aging_states], dtype=np.float64) - x_prev
+        dt = t_start - t_prev
+        dcap = -dx[0]  # capacity loss per cycle
+        if (n_cycles == 1) or (dcap <= 0.0) or (dt <= 0):
+            ref = None  # first cycle, no aging or no progress -> nothing to extrapolate
+            k_last = 0
+            continue
+        if ref is None:
+            ref = (n_cycles, dx, dt)
+            continue
+
+        n_ref, dx_ref, dt_ref = ref
+        ddx = (dx - dx_ref) / (n_cycles - n_ref)  # trend: change of dx per cycle
+        ddt = (dt - dt_ref) / (n_cycles - n_ref)  # trend: change of the cycle duration per cycle
+        if k_last > 0:  # compare with the extrapolation of the last skip
+            deviation = abs(dcap - dcap_predicted)
+            error_bound = error_bound + k_last / 2 * deviation
+            if deviation > tolerance * dcap:
+                k_max = max(k_last // 2, 1)
+            else:
+                k_max = min(2 * k_last, CYCLE_SKIP_N_MAX)
+        ref = (n_cycles, dx, dt)
+        k_last = 0
+
+        # number of cycles that can be skipped
+        k = k_max
+        if ddx[0] != 0.0:
+            k = min(k, math.floor(tolerance * dcap / abs(ddx[0])))
+        if n_cycles_max is not None:
+            k = min(k, n_cycles_max - n_cycles - 1)
+        if t_end_max is not None:
+            while (k >= 1) and (t_start + k * dt + (k * (k + 1) / 2) * ddt >= t_end_max - dt):
+                k = k - 1
+        x_new = np.array([cap_aged, *aging_states], dtype=np.float64) + k * dx + (k * (k + 1) / 2) * ddx
+        while (k >= 1) and (x_new[0] <= 0.0):  # don't skip beyond 0 Ah
+            k = k // 2
+            x_new = np.array([cap_aged, *aging_states], dtype=np.float64) + k * dx + (k * (k + 1) / 2) * ddx
+        if k < 1:
+            continue
+
+        # skip k cycles
+        np.minimum(x_new[1:5], 1.0, out=x_new[1:5])  # rel. losses cannot be > 1
+        cap_aged = float(x_new[0])
+        if type(aging_states) is CellState:
+            aging_states.cap_aged = cap_aged
+            aging_states.set_aging_states(x_new[1:].tolist())
+        else:
+            aging_states = x_new[1:].tolist()
+        t_start = t_start + round(k * dt + (k * (k + 1) / 2) * ddt)
+        n_cycles = n_cycles + k
+        n_cycles_skipped = n_cycles_skipped + k
+        dcap_predicted = -(dx[0] + (k + 1) * ddx[0])  # capacity loss of the next (simulated) cycle
+        k_last = k
+
+    return cap_aged, aging_states, temp_cell, soc, t_start, n_cycles, n_cycles_skipped, error_bound
+
+
 def apply_checkup(t_start, dt_resolution_active, dt_resolution_rest, v_min_op, i_chg_op, i_dischg_op,
                   i_chg_cutoff_op, i_dischg_cutoff_op, temp_amb_op,
-                  v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc):
+                  v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc,
+                  params=None):
+    params = get_params(params)
     rest_duration = 5 * 60  # 5 minutes in s
     temp_change_duration = 45 * 60  # 45 minutes in s
     temp_wait_duration = 45 * 60  # 45 minutes in s
@@ -689,38 +809,40 @@ def apply_checkup(t_start, dt_resolution_active, dt_resolution_rest, v_min_op, i
     temp_amb_df = pd.Series(np.linspace(temp_amb_op, temp_amb_cu, num=n_temp_change, endpoint=False))
     v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start = \
         apply_pause(t_start, dt_resolution_rest, temp_change_duration, temp_amb_df, v_cell_df, i_cell_df, p_cell_df,
-                    temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc)
+                    temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, params)
 
     # wait for temperature stabilization
     v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start = \
         apply_pause(t_start, dt_resolution_rest, temp_wait_duration, temp_amb_cu, v_cell_df, i_cell_df, p_cell_df,
-                    temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc)
+                    temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, params)
 
     # PREPARE: discharge to v_prepare_set with operational current
     v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start = \
         apply_cc_cv(t_start, dt_resolution_active, v_prepare_set, i_dischg_op, i_dischg_cutoff_op, temp_amb_cu,
-                    v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc)
+                    v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc,
+                    params=params)
 
     # PREPARE: rest 5 minutes
     v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start = \
         apply_pause(t_start, dt_resolution_rest, rest_duration, temp_amb_cu, v_cell_df, i_cell_df, p_cell_df,
-                    temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc)
+                    temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, params)
 
     # PREPARE: discharge to v_min_cu with check-up current
     v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start = \
         apply_cc_cv(t_start, dt_resolution_active, v_min_cu, i_dischg_cu, i_dischg_cu_cutoff, temp_amb_cu, v_cell_df,
-                    i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc)
+                    i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, params=params)
 
     # PREPARE: rest 5 minutes
     v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start = \
         apply_pause(t_start, dt_resolution_rest, rest_duration, temp_amb_cu, v_cell_df, i_cell_df, p_cell_df,
-                    temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc)
+                    temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, params)
 
     # capacity check
     v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start = \
         apply_cycles(1, t_start, None,  dt_resolution_active, dt_resolution_rest, v_max_cu, v_min_cu,
                      i_chg_cu, i_dischg_cu, i_chg_cu_cutoff, i_dischg_cu_cutoff, rest_duration, True, temp_amb_cu,
-                     v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc)
+                     v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc,
+                     params)
 
     # charge to EIS points and wait
     for i_soc in range(len(soc_eis)):
@@ -728,24 +850,25 @@ def apply_checkup(t_start, dt_resolution_active, dt_resolution_rest, v_min_op, i
         ocv_target = get_ocv_from_soc(soc_eis[i_soc])
         v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start = \
             apply_cc_cv(t_start, dt_resolution_active, ocv_target, i_chg_cu, i_chg_cu_cutoff, temp_amb_cu, v_cell_df,
-                        i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc)
+                        i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc,
+                        params=params)
 
         # rest
         v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start = \
             apply_pause(t_start, dt_resolution_rest, rest_duration + duration_eis, temp_amb_cu, v_cell_df, i_cell_df,
-                        p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc)
+                        p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, params)
 
     # change temperature from RT to OT
     n_temp_change = math.ceil(temp_change_duration / dt_resolution_rest)
     temp_amb_df = pd.Series(np.linspace(temp_amb_cu, temp_amb_op, num=n_temp_change, endpoint=False))
     v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start = \
             apply_pause(t_start, dt_resolution_rest, temp_change_duration, temp_amb_df, v_cell_df, i_cell_df, p_cell_df,
-                        temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc)
+                        temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, params)
 
     # wait for temperature stabilization
     v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start = \
         apply_pause(t_start, dt_resolution_rest, temp_wait_duration, temp_amb_op, v_cell_df, i_cell_df, p_cell_df,
-                    temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc)
+                    temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, params)
 
     # discharge to EIS points and wait
     for i_soc in range(len(soc_eis) - 1, -1, -1):
@@ -753,17 +876,18 @@ def apply_checkup(t_start, dt_resolution_active, dt_resolution_rest, v_min_op, i
         ocv_target = get_ocv_from_soc(soc_eis[i_soc])
         v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start = \
             apply_cc_cv(t_start, dt_resolution_active, ocv_target, i_dischg_cu, i_dischg_cu_cutoff, temp_amb_op,
-                        v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc)
+                        v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc,
+                        params=params)
 
         # rest
         v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start = \
             apply_pause(t_start, dt_resolution_rest, rest_duration + duration_eis, temp_amb_op, v_cell_df, i_cell_df,
-                        p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc)
+                        p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, params)
 
     # FOLLOW-UP: charge to v_min_op with operational current
     v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start = \
         apply_cc_cv(t_start, dt_resolution_active, v_min_op, i_chg_op, i_chg_cutoff_op, temp_amb_op, v_cell_df,
-                    i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc)
+                    i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, params=params)
 
     return v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start
 
@@ -789,7 +913,9 @@ def apply_checkup(t_start, dt_resolution_active, dt_resolution_rest, v_min_op, i
 #   dt_resolution   int or float    temporal resolution of the micro-steps (at which soc and aging is evaluated)
 #   duration        int or float    duration in seconds, for which the cell shall rest
 #   temp_amb        float           ambient (or coolant) temperature in °C -> R_TH_CELL "between" temp_ambient/temp_cell
-#   FIXME add description for v_cell_df,
+#   v_cell_df, ...  SeriesLog       logs of v_cell, i_cell, p_cell, temp_cell, soc (to which the step is added):
+#                                   SeriesLog from init_empty_log() (fast, appended in place), other LogSink objects
+#                                   (e.g., NullLog from init_null_log() -> nothing recorded), pandas.Series, or None
 #   cap_aged        float           remaining usable capacity of the cell in Ah at start (cap_aged of last step)
 #   aging_states    arr. of floats  internal aging states (different aging types [0...1]), use aging_states of last step
 #   temp_cell       float           cell (case) temperature in °C at start (use temp_cell of the last time step)
@@ -806,7 +932,9 @@ def apply_checkup(t_start, dt_resolution_active, dt_resolution_rest, v_min_op, i
 #   soc_df          pandas.Series   cell State of Charge [0...1] profile (over dt_df.index - informative, not needed)
 #   t_next          int or float    timestamp in s (e.g., unixtimestamp), can be used as t_start of next process
 def apply_pause(t_start, dt_resolution, duration, temp_amb: typing.Union[int, float, pd.Series],
-                v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc):
+                v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc,
+                params=None):
+    params = get_params(params)
     if duration <= 0:
         return v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start
 
@@ -816,51 +944,32 @@ def apply_pause(t_start, dt_resolution, duration, temp_amb: typing.Union[int, fl
     ixs = np.arange(t_start, t_start + duration, dt_resolution)
     dt = dt_resolution
 
-    if type(temp_amb) is pd.Series:  # todo: consider explicitly providing temp_amb type as a parameter -> safer*
-        if temp_amb.shape[0] == len(ixs):  # same length -> copy ixs   (<-  *in rare scenarios, this could be a mistake)
-            temp_amb = pd.Series(temp_amb.values, index=ixs)
-        else:  # different length -> need interpolation (assume index is of same type)
-            temp_amb = interpolate_df(temp_amb, ixs)
-    else:
-        temp_amb = pd.Series(temp_amb, index=ixs)
-
-    # temp_amb_use = temp_amb
+    # durations of the steps -> the last step ends at (t_start + duration) and can be shorter than dt_resolution
+    dt_arr = np.full(len(ixs), dt_resolution, dtype=np.float64)
+    if ixs[-1] == t_last:
+        dt = t_start + duration - t_last
+        dt_arr[-1] = dt
 
-    # create pre-filled data frames for V_cell, I_cell, P_cell, T_cell, get ocv
-    v_new, i_new, p_new, temp_new, soc_new, v_cell = init_step_rest(ixs, soc)
-    for ix in ixs:  # fastest iteration if we need the index and can't vectorize
-        if ix == t_last:
-            dt = t_start + duration - t_last
-        else:
-            dt = dt_resolution
+    v_cell = get_ocv_from_soc(soc)  # calculate OCV from SoC (at the beginning of the timestep - stays constant)
 
-        if type(temp_amb) is pd.Series:
-            # temp_amb_use = get_nearest_value_from_df(temp_amb, ix, temp_amb_use)  we already have temp_amb[ix]!
-            temp_amb_use = temp_amb[ix]
-        else:
-            temp_amb_use = temp_amb
+    # apply thermal cell model (exact solution for the resting cell, evaluated for all timesteps at once)
+    temp_amb_arr = get_temp_amb_array(temp_amb, ixs)
+    temp_arr = get_rest_temperature_profile(temp_cell, temp_amb_arr, dt_arr, params)
+    temp_cell = float(temp_arr[-1])
 
-        # apply thermal cell model, store temperature in Series
-        temp_cell = cell_model_rest(dt, temp_cell, temp_amb_use)
-        temp_new[ix] = temp_cell
+    # apply (calendar) aging -> exact solution for each step (constant OCV, cell temperature at the end of the step)
+    cap_aged, aging_states = apply_calendar_aging_arrays(cap_aged, aging_states, dt_arr, v_cell, temp_arr, params)
 
-        # # calculate aging for every timestep
-        # cap_aged_end, aging_states = apply_aging(cap_aged, aging_states, dt_resolution, v_cell, 0.0, temp_cell)
+    # v_cell = OCV, i_cell = p_cell = 0 and soc are constant while resting
+    v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df = record_step(
+        [v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df], ixs, v_cell, 0.0, 0.0, temp_arr, soc)
 
-    # apply aging
-    cap_aged, aging_states = apply_aging_df(cap_aged, aging_states, dt_resolution, v_new, i_new, temp_new)
-
-    if v_cell_df is None:
-        v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df = v_new, i_new, p_new, temp_new, soc_new
-    else:
-        v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df = append_dataframes(
-            [v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df], [v_new, i_new, p_new, temp_new, soc_new])
-
-    t_next = v_cell_df.index[-1] + dt
+    t_next = ixs[-1] + dt
     return v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_next
 
 
-def get_i_set_from_p_set(p_set, ocv, r_cell):
+def get_i_set_from_p_set(p_set, ocv, r_cell, params=None):
+    params = get_params(params)
     # calculate set-point current for p_set (at the beginning of the timestep)
     i_set = (-ocv + math.sqrt(ocv**2 + 4.0 * r_cell * p_set)) / (2.0 * r_cell)
 
@@ -869,7 +978,7 @@ def get_i_set_from_p_set(p_set, ocv, r_cell):
         if i_set < 0.0:
             i_set = 0.0
         else:
-            i_max_chg = min((V_CELL_MAX - ocv) / r_cell, I_CELL_MAX_CHG)
+            i_max_chg = min((params.V_CELL_MAX - ocv) / r_cell, params.I_CELL_MAX_CHG)
             if i_set > i_max_chg:
                 if i_max_chg < 0.0:  # don't allow discharging when the cell should be charging
                     i_set = 0.0
@@ -879,7 +988,7 @@ def get_i_set_from_p_set(p_set, ocv, r_cell):
         if i_set > 0.0:
             i_set = 0.0
         else:
-            i_min_dischg = max((V_CELL_MIN - ocv) / r_cell, I_CELL_MIN_DISCHG)
+            i_min_dischg = max((params.V_CELL_MIN - ocv) / r_cell, params.I_CELL_MIN_DISCHG)
             if i_set < i_min_dischg:
                 if i_min_dischg > 0.0:  # don't allow charging when the cell should be discharging
                     i_set = 0.0
@@ -890,7 +999,7 @@ def get_i_set_from_p_set(p_set, ocv, r_cell):
     return i_set
 
 
-def get_i_set_from_v_lim_i_lim(v_lim, i_lim, ocv, r_cell):
+def get_i_set_from_v_lim_i_lim(v_lim, i_lim, ocv, r_cell, params=None):  # params: same signature as ..._p_lim
     # calculate set-point current for CC/CV charging
     i_set = i_lim
     if i_lim > 0.0:  # charging
@@ -917,7 +1026,8 @@ def get_i_set_from_v_lim_i_lim(v_lim, i_lim, ocv, r_cell):
     return i_set
 
 
-def get_i_set_from_v_lim_p_lim(v_lim, p_lim, ocv, r_cell):
+def get_i_set_from_v_lim_p_lim(v_lim, p_lim, ocv, r_cell, params=None):
+    params = get_params(params)
     # calculate set-point current for p_set (at the beginning of the timestep)
     i_p_lim = (-ocv + math.sqrt(ocv**2 + 4.0 * r_cell * p_lim)) / (2.0 * r_cell)
     i_v_lim = (v_lim - ocv) / r_cell
@@ -938,7 +1048,7 @@ def get_i_set_from_v_lim_p_lim(v_lim, p_lim, ocv, r_cell):
         if i_p_lim < 0.0:
             i_set = 0.0
         else:
-            i_max_chg = min((min(V_CELL_MAX, v_lim) - ocv) / r_cell, I_CELL_MAX_CHG)
+            i_max_chg = min((min(params.V_CELL_MAX, v_lim) - ocv) / r_cell, params.I_CELL_MAX_CHG)
             if i_p_lim > i_max_chg:
                 if i_max_chg < 0.0:  # don't allow discharging when the cell should be charging
                     i_set = 0.0
@@ -948,7 +1058,7 @@ def get_i_set_from_v_lim_p_lim(v_lim, p_lim, ocv, r_cell):
         if i_p_lim > 0.0:
             i_set = 0.0
         else:
-            i_min_dischg = max((V_CELL_MIN - ocv) / r_cell, I_CELL_MIN_DISCHG)
+            i_min_dischg = max((params.V_CELL_MIN - ocv) / r_cell, params.I_CELL_MIN_DISCHG)
             if i_p_lim < i_min_dischg:
                 if i_min_dischg > 0.0:  # don't allow charging when the cell should be discharging
                     i_set = 0.0
@@ -959,25 +1069,28 @@ def get_i_set_from_v_lim_p_lim(v_lim, p_lim, ocv, r_cell):
     return i_set
 
 
-def get_limited_i_set(i_set):
+def get_limited_i_set(i_set, params=None):
+    params = get_params(params)
     if i_set > 0.0:
-        if i_set > I_CELL_MAX_CHG:
-            i_set = I_CELL_MAX_CHG
+        if i_set > params.I_CELL_MAX_CHG:
+            i_set = params.I_CELL_MAX_CHG
     elif i_set < 0.0:
-        if i_set < I_CELL_MIN_DISCHG:
-            i_set = I_CELL_MIN_DISCHG
+        if i_set < params.I_CELL_MIN_DISCHG:
+            i_set = params.I_CELL_MIN_DISCHG
     return i_set
 
 
-def get_limited_v_set(v_set):
-    if v_set > V_CELL_MAX:
-        v_set = V_CELL_MAX
-    elif v_set < V_CELL_MIN:
-        v_set = V_CELL_MIN
+def get_limited_v_set(v_set, params=None):
+    params = get_params(params)
+    if v_set > params.V_CELL_MAX:
+        v_set = params.V_CELL_MAX
+    elif v_set < params.V_CELL_MIN:
+        v_set = params.V_CELL_MIN
     return v_set
 
 
-def cell_model(dt, soc, ocv, i_set, temp_cell, temp_ambient, cap_aged, r_cell):
+def cell_model(dt, soc, ocv, i_set, temp_cell, temp_ambient, cap_aged, r_cell, params=None):
+    params = get_params(params)
     # calculate new cell voltage, actual cell power and current (at the beginning of the timestep)
     dv_cell = r_cell * i_set
     v_cell = ocv + dv_cell
@@ -989,107 +1102,710 @@ def cell_model(dt, soc, ocv, i_set, temp_cell, temp_ambient, cap_aged, r_cell):
 
     # calculate thermal losses during the timestep and new cell temperature after the timestep
     p_loss = dv_cell * i_set  # R * I^2, but performance-optimized
-    temp_cell = temp_cell + ((temp_ambient + R_TH_CELL * p_loss - temp_cell) / R_TH_C_TH_CELL) * dt
+    temp_cell = temp_cell + ((temp_ambient + params.R_TH_CELL * p_loss - temp_cell) / params.R_TH_C_TH_CELL) * dt
+    return soc, v_cell, p_actual, temp_cell
+
+
+# same as cell_model, but the new cell temperature is calculated with the exact (exponential) solution of the thermal
+#   model for constant losses and ambient temperature during the timestep -> also stable if dt > 2 * R_TH_C_TH_CELL
+def cell_model_exact_temp(dt, soc, ocv, i_set, temp_cell, temp_ambient, cap_aged, r_cell, params=None):
+    params = get_params(params)
+    dv_cell = r_cell * i_set
+    v_cell = ocv + dv_cell
+    p_actual = v_cell * i_set
+    if cap_aged > 0.0:
+        soc = soc + i_set * dt / (cap_aged * 3600.0)
+    temp_steady = temp_ambient + params.R_TH_CELL * dv_cell * i_set  # steady-state temperature with losses R * I^2
+    temp_cell = temp_steady + (temp_cell - temp_steady) * math.exp(-dt / params.R_TH_C_TH_CELL)
     return soc, v_cell, p_actual, temp_cell
 
 
 # with i = 0 / p = 0 -> cell resting, temperature relaxing
-def cell_model_rest(dt, temp_cell, temp_ambient):
+def cell_model_rest(dt, temp_cell, temp_ambient, params=None):
+    params = get_params(params)
     # calculate new cell temperature after the timestep
     # temp_cell = temp_cell + ((temp_ambient - temp_cell) / R_TH_C_TH_CELL) * dt
     # return temp_cell
-    return temp_cell + ((temp_ambient - temp_cell) / R_TH_C_TH_CELL) * dt
-
-
-def init_step(ixs, cap_aged):
+    return temp_cell + ((temp_ambient - temp_cell) / params.R_TH_C_TH_CELL) * dt
+
+
+# with i = 0 / p = 0 -> cell resting, temperature relaxing. Exact (exponential) solution of the thermal model for a
+#   whole rest period with piecewise-constant ambient temperature: temp_amb[k] is applied during step k, which takes
+#   dt[k] seconds. Returns a numpy array with the cell temperature at the end of each step. In contrast to calling
+#   cell_model_rest() for each step (explicit Euler step), this is exact and also stable for dt > 2 * R_TH_C_TH_CELL.
+#   temp_cell       float           cell (case) temperature in °C at the start of the rest period
+#   temp_amb        float or array  ambient (or coolant) temperature in °C, array: one value per step
+#   dt              numpy.ndarray   duration of each step in s
+def get_rest_temperature_profile(temp_cell, temp_amb, dt, params=None):
+    params = get_params(params)
+    decay = np.cumsum(dt) / params.R_TH_C_TH_CELL  # cumulative relative decay (t / tau) at the end of each step
+    if type(temp_amb) is not np.ndarray:  # constant ambient temperature
+        return temp_amb + (temp_cell - temp_amb) * np.exp(-decay)
+
+    # temp[k + 1] = a[k] * temp[k] + (1 - a[k]) * temp_amb[k] with a[k] = exp(-dt[k] / tau), a linear recurrence:
+    # temp[n] = A[n] * (temp[0] + sum_j<n((1 - a[j]) * temp_amb[j] / A[j + 1])), A[n] = prod_i<n(a[i]) = exp(-decay).
+    # To avoid overflows of 1 / A[j + 1], this is evaluated in blocks in which the decay is limited to REST_BLOCK_DECAY.
+    temp_arr = np.empty(len(dt), dtype=np.float64)
+    input_arr = -np.expm1(-dt / params.R_TH_C_TH_CELL) * temp_amb  # (1 - a[j]) * temp_amb[j]
+    i_start = 0
+    while i_start < len(dt):
+        decay_start = decay[i_start - 1] if i_start > 0 else 0.0
+        i_end = np.searchsorted(decay, decay_start + REST_BLOCK_DECAY, side='right')
+        if i_end <= i_start + 1:  # a single step decays (more than) REST_BLOCK_DECAY -> evaluate it on its own
+            temp_cell = (temp_amb[i_start]
+                         + (temp_cell - temp_amb[i_start]) * math.exp(-dt[i_start] / params.R_TH_C_TH_CELL))
+            temp_arr[i_start] = temp_cell
+            i_start = i_start + 1
+            continue
+        decay_block = decay[i_start:i_end] - decay_start
+        temp_arr[i_start:i_end] = np.exp(-decay_block) * (
+            temp_cell + np.cumsum(input_arr[i_start:i_end] * np.exp(decay_block)))
+        temp_cell = temp_arr[i_end - 1]
+        i_start = i_end
+    return temp_arr
+
+
+def init_step(ixs, cap_aged, params=None):
     v_cell_df = pd.Series(0, index=ixs)
     i_cell_df = v_cell_df.copy()
     p_cell_df = v_cell_df.copy()
     temp_cell_df = v_cell_df.copy()
     soc_df = v_cell_df.copy()
 
-    r_cell = get_r_cell_from_cap_aged(cap_aged)
+    r_cell = get_r_cell_from_cap_aged(cap_aged, params)
     return v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, r_cell
 
 
-def init_step_rest(ixs, soc):
-    ocv = get_ocv_from_soc(soc)  # calculate OCV from SoC (at the beginning of the timestep - stays constant)
-    soc_df = pd.Series(soc, index=ixs)
-    v_cell_df = pd.Series(ocv, index=ixs)
-    i_cell_df = pd.Series(0.0, index=ixs)
-    p_cell_df = i_cell_df.copy()
-    temp_cell_df = i_cell_df.copy()
-    return v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, ocv
+# return ambient temperature for the time indexes ixs as a numpy array (one value per step), or as a float if temp_amb
+# is constant. A pandas.Series with the same length as ixs is used as is (see todo in apply_cp_cv), otherwise it is
+# interpolated to ixs.
+def get_temp_amb_array(temp_amb, ixs):
+    if type(temp_amb) is pd.Series:
+        if temp_amb.shape[0] == len(ixs):  # same length -> use values as they are
+            return temp_amb.values.astype(np.float64)
+        # different length -> need interpolation (assume index is of same type)
+        return interpolate_array(temp_amb, ixs)
+    return float(temp_amb)
+
+
+# stepping kernel of run_power_profile for the list of power set-points p_set_list (one per step of dt seconds). If
+#   soc_min is not None, discharging is not allowed while soc < soc_min (see apply_power_profile_soc_lim). temp_amb is a
+#   float or a numpy array with one value per step (see get_temp_amb_array).
+#   Returns numpy arrays of v_cell, i_cell, p_cell, temp_cell, soc after each step, and the last temp_cell and soc.
+def run_power_profile_kernel(p_set_list, dt, temp_amb, cap_aged, r_cell, temp_cell, soc, soc_min=None, params=None):
+    params = get_params(params)
+    n = len(p_set_list)
+    v_list, i_list, p_list, temp_list, soc_list = [0.0] * n, [0.0] * n, [0.0] * n, [0.0] * n, [0.0] * n
+    temp_amb_list = temp_amb.tolist() if (type(temp_amb) is np.ndarray) else None
+    temp_amb_use = temp_amb
+    for k in range(n):
+        pi_set = p_set_list[k]
+        ocv = get_ocv_from_soc(soc)  # calculate OCV from SoC (at the beginning of the timestep)
+        if (soc_min is not None) and (soc < soc_min) and (pi_set < 0.0):  # discharging, but soc < limit => not allowed
+            i_set = 0.0
+        else:
+            i_set = get_i_set_from_p_set(pi_set, ocv, r_cell, params)
 
+        if temp_amb_list is not None:
+            temp_amb_use = temp_amb_list[k]
 
-# FIXME documentation
-def apply_aging_df(cap_aged, aging_states, dt_resolution, v_cell_df, i_cell_df, temp_cell_df):
-    # resample to AGE_APPLY_PERIOD to apply aging
-    v_cell = v_cell_df.copy()  # not sure if this is necessary, but we don't want to alter the original data
-    i_cell = i_cell_df.copy()
-    temp_cell = temp_cell_df.copy()
-
-    # convert timestamp to datetime to apply stuff
-    try:
-        v_cell.index = pd.to_datetime(v_cell.index, unit="s", origin='unix')
-    except pd.errors.ParserError:  # Exception:
-        print("ParserError converting %s .. %s" % (str(v_cell.index[0]), str(v_cell.index[-1])))
-    except ValueError:  # Exception:
-        print("ValueError converting %s .. %s" % (str(v_cell.index[0]), str(v_cell.index[-1])))
-    i_cell.index = v_cell.index
-    temp_cell.index = v_cell.index
-    time_sum = pd.Series(dt_resolution, index=v_cell.index)
-
-    # resample with time_resolution (use averaging)
-    pd_resolution = f'%uS' % AGE_APPLY_PERIOD
-    v_cell = v_cell.resample(pd_resolution).mean()
-    i_cell = i_cell.resample(pd_resolution).mean()
-    temp_cell = temp_cell.resample(pd_resolution).mean()
-    time_sum = time_sum.resample(pd_resolution).sum()
-
-    # if dt_resolution > AGE_APPLY_PERIOD:
-    #     # -> fill with interpolation
-    #     v_cell = v_cell.interpolate("linear")
-    #     i_cell = i_cell.interpolate("linear")
-    #     temp_cell = temp_cell.interpolate("linear")
-    #     time_sum = time_sum.interpolate("linear")
-
-    # v_cell.index = (v_cell.index - pd.Timestamp("1970-01-01", tz='UTC')) // pd.Timedelta("1s")
-    v_cell.index = (v_cell.index - pd.Timestamp("1970-01-01")) // pd.Timedelta("1s")  # we did not introduce timezones
-    i_cell.index = v_cell.index
-    temp_cell.index = v_cell.index
-    time_sum.index = v_cell.index
-
-    for ix in v_cell.index:
-        # calculate aging for every timestep
-        if time_sum[ix] == 0:
-            continue  # dt_resolution > AGE_APPLY_PERIOD -->
-        cap_aged, aging_states = apply_aging(cap_aged, aging_states, time_sum[ix],
-                                             v_cell[ix], i_cell[ix], temp_cell[ix])
-
-    return cap_aged, aging_states
+        soc, v_cell, p_actual, temp_cell = (  # apply electrical and thermal cell model
+            cell_model(dt, soc, ocv, i_set, temp_cell, temp_amb_use, cap_aged, r_cell, params))
+
+        v_list[k], i_list[k], p_list[k], temp_list[k], soc_list[k] = v_cell, i_set, p_actual, temp_cell, soc
+    return (np.array(v_list), np.array(i_list), np.array(p_list), np.array(temp_list), np.array(soc_list),
+            temp_cell, soc)
+
+
+# Power profile (e.g., a driving profile from wltp_profiles) for apply_power_profile(_repeat/_soc_lim), prepared once:
+#   the power set-points are stored as a contiguous float64 array (p_set) and list (p_set_list, used by the stepping
+#   kernel), so they don't have to be converted to a pandas.Series with a shifted index in every call. The timestamps
+#   are only calculated from the scalar time offset t_start when the profile is applied (see get_ixs). Create the
+#   profiles once (e.g., as constants of a use case model) and pass them as p_set_df.
+#   p_set_df can be a list (one value per step of dt_resolution) or a pandas.Series (index: timestamps - only the
+#   differences to the first index are used, like in apply_power_profile). Metadata (for the dt_resolution given here):
+#   n (number of steps), duration (s), e_chg / e_dischg (Wh, >= 0: set-point energy charged / discharged).
+class PowerProfile:
+    __slots__ = ("p_set", "p_set_list", "n", "dt_resolution", "duration", "e_chg", "e_dischg", "_steps", "_ixs_src")
+
+    def __init__(self, p_set_df, dt_resolution):
+        if type(p_set_df) is pd.Series:
+            self.p_set = p_set_df.values.astype(np.float64)
+            self._ixs_src = p_set_df.index.values
+            self._steps = None
+        else:
+            self.p_set = np.array(p_set_df, dtype=np.float64)
+            self._ixs_src = None
+            self._steps = np.arange(self.p_set.shape[0])
+        self.p_set_list = self.p_set.tolist()
+        self.n = self.p_set.shape[0]
+        self.dt_resolution = dt_resolution
+        self.duration = self.n * dt_resolution
+        self.e_chg = float(np.sum(self.p_set[self.p_set > 0.0])) * dt_resolution / 3600.0
+        self.e_dischg = -float(np.sum(self.p_set[self.p_set < 0.0])) * dt_resolution / 3600.0
+
+    def __len__(self):
+        return self.n
+
+    # timestamps of the steps if the profile starts at t_start (same values as apply_power_profile used before)
+    def get_ixs(self, t_start, dt_resolution=None):
+        if self._steps is None:
+            return self._ixs_src + t_start - self._ixs_src[0]
+        if dt_resolution is None:
+            dt_resolution = self.dt_resolution
+        return get_step_ixs(t_start, dt_resolution, self._steps)
+
+
+# return p_set_df as a PowerProfile (p_set_df: PowerProfile -> used as it is, list/pandas.Series -> converted)
+def get_power_profile(p_set_df, dt_resolution):
+    if type(p_set_df) is PowerProfile:
+        return p_set_df
+    return PowerProfile(p_set_df, dt_resolution)
+
+
+# CC-CV / CP-CV stepping kernel used by apply_cc_cv and apply_cp_cv. Uses plain float math and numpy arrays with an
+#   integer step index instead of writing into pandas.Series for every micro-step. The caller can create pandas.Series
+#   from the output arrays (see get_step_dfs), or use the arrays directly.
+#   Phases that can be solved in closed form are evaluated for many steps at once (vectorized), so the step at which the
+#   next event occurs is found directly instead of stepping towards it one dt_resolution at a time:
+#     - CC phase of CC-CV: the current is constant -> the SoC increases linearly until the voltage limit is reached
+#       (CC -> CV transition), see run_cc_block
+#     - CV phase in the linear part of the OCV curve: the current decays geometrically until the cut-off current is
+#       reached, see run_cv_block
+#   All other steps (e.g., CP phase of CP-CV, CV phase in the nonlinear parts of the OCV curve) are simulated singly.
+#   The output arrays only contain the simulated steps (no arrays with n_max entries are allocated).
+# inputs:   n_max, dt_resolution, v_lim, lim, lim_is_power, i_cutoff, temp_amb, cap_aged, temp_cell, soc
+#   n_max           int             maximum number of steps (e.g., length of the index range of the charging process)
+#   lim             float           i_lim (CC-CV, lim_is_power = False) or p_lim (CP-CV, lim_is_power = True)
+#   temp_amb        TempAmbSource   ambient (or coolant) temperature in °C of the steps
+#   (see apply_cc_cv / apply_cp_cv for the other inputs)
+# outputs:  v_arr, i_arr, p_arr, temp_arr, soc_arr, n_used, temp_cell, soc, cut_off_limit_reached
+#   v/i/p/temp/soc_arr  numpy.ndarray   cell voltage/current/power/temperature/SoC for each simulated step
+#   n_used              int             number of steps that were simulated
+#   cut_off_limit_reached  bool         True if the process ended because the cut-off current was reached
+def run_cv_kernel(n_max, dt_resolution, v_lim, lim, lim_is_power, i_cutoff, temp_amb, cap_aged, temp_cell, soc,
+                  params=None):
+    params = get_params(params)
+    r_cell = get_r_cell_from_cap_aged(cap_aged, params)
+    soc = float(soc)
+    temp_cell = float(temp_cell)
+    dt = float(dt_resolution)
+
+    chunks = []  # list of (v_arr, i_arr, p_arr, temp_arr, soc_arr) of consecutive steps -> concatenated once at the end
+    k = 0
+    allow_cv_block = True
+    end_run = False
+    cut_off_limit_reached = False
+    while (k < n_max) and not end_run:
+        ocv = get_ocv_from_soc(soc)  # calculate OCV from SoC (at the beginning of the timestep)
+        i_set = get_cv_i_set(v_lim, lim, lim_is_power, ocv, r_cell, params)
+        if (cap_aged > 0.0) and not get_cv_end(lim, i_set, i_cutoff)[0]:
+            chunk = None
+            if (not lim_is_power) and (i_set == lim):  # CC phase
+                chunk, n_used, temp_cell, soc = run_cc_block(
+                    k, n_max, dt, v_lim, lim, temp_amb, cap_aged, r_cell, temp_cell, soc, params)
+            elif allow_cv_block and is_cv_block_possible(v_lim, ocv, i_set, r_cell, soc):  # CV, linear part of OCV
+                chunk, n_used, temp_cell, soc, end_run, cut_off_limit_reached = run_cv_block(
+                    k, n_max, dt, v_lim, lim, lim_is_power, i_cutoff, temp_amb, cap_aged, r_cell, temp_cell, soc,
+                    params)
+                allow_cv_block = (chunk is not None)  # not possible -> don't try again (e.g., dt_resolution too large)
+            if chunk is not None:
+                chunks.append(chunk)
+                k = k + n_used
+                continue
+
+        # simulate step by step until the end of the process, or until a phase is reached that can be vectorized
+        chunk, n_used, temp_cell, soc, end_run, cut_off_limit_reached = run_cv_steps(
+            k, n_max, dt, v_lim, lim, lim_is_power, i_cutoff, temp_amb, cap_aged, r_cell, temp_cell, soc,
+            allow_cv_block, params)
+        chunks.append(chunk)
+        k = k + n_used
+
+    if len(chunks) == 0:
+        v_arr = np.empty(0, dtype=np.float64)
+        return v_arr, v_arr.copy(), v_arr.copy(), v_arr.copy(), v_arr.copy(), 0, temp_cell, soc, cut_off_limit_reached
+    if len(chunks) == 1:
+        v_arr, i_arr, p_arr, temp_arr, soc_arr = chunks[0]
+    else:
+        v_arr, i_arr, p_arr, temp_arr, soc_arr = [np.concatenate(arrays) for arrays in zip(*chunks)]
+    return v_arr, i_arr, p_arr, temp_arr, soc_arr, k, temp_cell, soc, cut_off_limit_reached
+
+
+# check if the CC-CV/CP-CV process ends with the set-point current i_set (which is still applied for this step)
+# outputs:  end_run, cut_off_limit_reached
+def get_cv_end(lim, i_set, i_cutoff):
+    if lim > 0.0:
+        if i_set < i_cutoff:
+            return True, True  # end of charge!
+    elif lim < 0.0:
+        if i_set > i_cutoff:
+            return True, True  # end of discharge!
+    else:
+        return True, False  # end, since i_lim/p_lim = 0
+    return False, False
+
+
+# simulate single steps of run_cv_kernel, starting at step k. Stops after the end of the process, at n_max, or before a
+#   step that can be vectorized (CC phase of CC-CV or - if allow_cv_block - CV phase in the linear part of the OCV
+#   curve). At least one step is simulated. Returns the chunk of step arrays (see run_cv_kernel) and number of steps.
+def run_cv_steps(k, n_max, dt, v_lim, lim, lim_is_power, i_cutoff, temp_amb, cap_aged, r_cell, temp_cell, soc,
+                 allow_cv_block, params=None):
+    params = get_params(params)
+    v_list, i_list, p_list, temp_list, soc_list = [], [], [], [], []
+    k_start = k
+    end_run = False
+    cut_off_limit_reached = False
+    if lim_is_power:
+        get_i_set = get_i_set_from_v_lim_p_lim
+    else:
+        get_i_set = get_i_set_from_v_lim_i_lim
+    check_cv_block = allow_cv_block and (cap_aged > 0.0)
+    while (k < n_max) and not end_run:
+        k_blk_end = min(n_max, k + TEMP_AMB_BLOCK)
+        temp_amb_blk = temp_amb.get(k, k_blk_end)
+        temp_amb_is_array = (type(temp_amb_blk) is np.ndarray)
+        if temp_amb_is_array:
+            temp_amb_blk = temp_amb_blk.tolist()  # indexing a list returns Python floats -> faster scalar math
+        temp_amb_use = temp_amb_blk
+        for j in range(k_blk_end - k):
+            ocv = get_ocv_from_soc(soc)  # calculate OCV from SoC (at the beginning of the timestep)
+            i_set = get_i_set(v_lim, lim, ocv, r_cell, params)
+            if lim > 0.0:
+                if i_set < i_cutoff:
+                    end_run = True  # end of charge!
+                    cut_off_limit_reached = True
+            elif lim < 0.0:
+                if i_set > i_cutoff:
+                    end_run = True  # end of discharge!
+                    cut_off_limit_reached = True
+            else:
+                end_run = True  # end, since i_lim/p_lim = 0
+            if (k > k_start) and (not end_run):
+                if (((not lim_is_power) and (i_set == lim) and (cap_aged > 0.0))
+                        or (check_cv_block and (OCV_LIN_SOC_MIN <= soc <= OCV_LIN_SOC_MAX)
+                            and is_cv_block_possible(v_lim, ocv, i_set, r_cell, soc))):
+                    return ((np.array(v_list), np.array(i_list), np.array(p_list), np.array(temp_list),
+                             np.array(soc_list)), k - k_start, temp_cell, soc, False, False)
+
+            if temp_amb_is_array:
+                temp_amb_use = temp_amb_blk[j]
+
+            soc, v_cell, p_actual, temp_cell = (  # apply electrical and thermal cell model
+                cell_model(dt, soc, ocv, i_set, temp_cell, temp_amb_use, cap_aged, r_cell, params))
+
+            v_list.append(v_cell)
+            i_list.append(i_set)
+            p_list.append(p_actual)
+            temp_list.append(temp_cell)
+            soc_list.append(soc)
+            k = k + 1
+            if end_run:
+                break
+
+    return ((np.array(v_list), np.array(i_list), np.array(p_list), np.array(temp_list), np.array(soc_list)),
+            k - k_start, temp_cell, soc, end_run, cut_off_limit_reached)
+
+
+# vectorized CC phase of CC-CV (see run_cv_kernel), starting at step k with i_set = i_lim. The SoC increases linearly,
+#   so it is calculated for a block of steps at once (estimated to be long enough to reach the voltage limit). The CC
+#   phase ends at the first step at which the voltage limit would be exceeded (-> CC -> CV transition).
+#   Returns the chunk of step arrays and the number of steps in the CC phase within this block (>= 1).
+def run_cc_block(k, n_max, dt, v_lim, i_lim, temp_amb, cap_aged, r_cell, temp_cell, soc, params=None):
+    params = get_params(params)
+    d_soc = i_lim * dt / (cap_aged * 3600.0)  # SoC change per step (same as in cell_model)
+    dv_cell = r_cell * i_lim
+    # estimate number of steps until the voltage limit is reached (linear part of the OCV curve), use a bit more
+    n_est = ((v_lim - dv_cell - OCV_LIN_A) / OCV_LIN_B - soc) / d_soc
+    n_blk = int(min(max(n_est * 1.05 + 16.0, 16.0), n_max - k, CV_BLOCK_MAX))
+
+    soc_arr = np.full(n_blk + 1, d_soc)
+    soc_arr[0] = soc
+    np.cumsum(soc_arr, out=soc_arr)  # soc_arr[j] = SoC at the beginning of step k + j (sequential sum as in cell_model)
+    ocv_arr = get_ocv_from_soc_array(soc_arr[:-1])
+    i_v_lim_arr = (v_lim - ocv_arr) / r_cell
+    if i_lim > 0.0:
+        is_cc = (ocv_arr < v_lim) & (i_lim <= i_v_lim_arr)  # see get_i_set_from_v_lim_i_lim
+    else:
+        is_cc = (ocv_arr > v_lim) & (i_lim >= i_v_lim_arr)
+    n_used = n_blk
+    if not is_cc[-1] or not np.all(is_cc):
+        n_used = max(int(np.argmin(is_cc)), 1)  # first step that is not in the CC phase anymore
+
+    v_arr = ocv_arr[:n_used] + dv_cell
+    i_arr = np.full(n_used, float(i_lim))
+    p_arr = v_arr * i_lim
+    temp_arr, temp_cell = get_temp_cell_profile(temp_cell, temp_amb.get(k, k + n_used),
+                                                params.R_TH_CELL * (dv_cell * i_lim), n_used, dt, params)
+    soc = float(soc_arr[n_used])
+    return (v_arr, i_arr, p_arr, temp_arr, soc_arr[1:n_used + 1]), n_used, temp_cell, soc
+
+
+# True if the current of the CC-CV/CP-CV process is limited by v_lim (CV phase) and the SoC is in the linear part of the
+#   OCV curve -> the following steps can be vectorized with run_cv_block
+def is_cv_block_possible(v_lim, ocv, i_set, r_cell, soc):
+    return (OCV_LIN_SOC_MIN <= soc <= OCV_LIN_SOC_MAX) and (abs(ocv + r_cell * i_set - v_lim) < V_LIM_EPS)
+
+
+# vectorized CV phase in the linear part of the OCV curve (ocv = OCV_LIN_A + OCV_LIN_B * soc), starting at step k. The
+#   current i_set = (v_lim - ocv) / r_cell and the distance of the SoC to soc_inf (at which ocv = v_lim) decay
+#   geometrically with the factor q per step: soc[j] = soc_inf + (soc[0] - soc_inf) * q^j, i_set[j] = i_set[0] * q^j.
+#   Therefore, the step at which the cut-off current is reached can be calculated directly. The block ends at the
+#   cut-off step (included), at the end of the linear part of the OCV curve, or when the current is not limited by v_lim
+#   anymore (checked with the same conditions as in get_i_set_from_v_lim_i_lim / get_i_set_from_v_lim_p_lim).
+#   Returns the chunk of step arrays and the number of steps (>= 1), or chunk = None if the phase can't be vectorized.
+def run_cv_block(k, n_max, dt, v_lim, lim, lim_is_power, i_cutoff, temp_amb, cap_aged, r_cell, temp_cell, soc,
+                 params=None):
+    params = get_params(params)
+    q = 1.0 - OCV_LIN_B * dt / (r_cell * cap_aged * 3600.0)
+    if not (0.0 < q < 1.0):
+        return None, 0, temp_cell, soc, False, False  # dt_resolution too large for a monotonic decay -> step by step
+    soc_inf = (v_lim - OCV_LIN_A) / OCV_LIN_B
+    i_start = (v_lim - (OCV_LIN_A + OCV_LIN_B * soc)) / r_cell
+    # estimate number of steps until the cut-off current is reached, use a bit more
+    n_blk = CV_BLOCK_MAX
+    if (i_cutoff != 0.0) and (i_start != 0.0) and (0.0 < i_cutoff / i_start < 1.0):
+        n_blk = int(math.log(i_cutoff / i_start) / math.log(q) * 1.05) + 16
+    n_blk = min(n_blk, n_max - k, CV_BLOCK_MAX)
+
+    soc_arr = soc_inf + (soc - soc_inf) * np.power(q, np.arange(n_blk + 1, dtype=np.float64))
+    soc_arr[0] = soc
+    soc_start_arr = soc_arr[:-1]
+    ocv_arr = get_ocv_from_soc_array(soc_start_arr)
+    i_arr = (v_lim - ocv_arr) / r_cell
+    is_cv = (soc_start_arr >= OCV_LIN_SOC_MIN) & (soc_start_arr <= OCV_LIN_SOC_MAX)
+    if lim_is_power:
+        i_p_lim_arr = (-ocv_arr + np.sqrt(ocv_arr**2 + 4.0 * r_cell * lim)) / (2.0 * r_cell)
+        if lim > 0.0:
+            is_cv &= (i_p_lim_arr > i_arr) & (i_arr >= 0.0) & (i_arr <= params.I_CELL_MAX_CHG)
+        else:
+            i_min_dischg_arr = np.maximum((params.V_CELL_MIN - ocv_arr) / r_cell, params.I_CELL_MIN_DISCHG)
+            is_cv &= (i_p_lim_arr < i_arr) & (i_arr <= 0.0) & (i_p_lim_arr >= i_min_dischg_arr)
+    elif lim > 0.0:
+        is_cv &= (ocv_arr < v_lim) & (lim > i_arr)
+    else:
+        is_cv &= (ocv_arr > v_lim) & (lim < i_arr)
+    n_used = n_blk if is_cv[-1] and np.all(is_cv) else int(np.argmin(is_cv))
+    if n_used == 0:
+        return None, 0, temp_cell, soc, False, False
+
+    if lim > 0.0:
+        is_end = (i_arr[:n_used] < i_cutoff)
+    else:
+        is_end = (i_arr[:n_used] > i_cutoff)
+    end_run = bool(is_end[-1]) or bool(np.any(is_end))
+    if end_run:
+        n_used = int(np.argmax(is_end)) + 1  # the step at which the cut-off current is reached is still simulated
+
+    i_arr = i_arr[:n_used]
+    dv_arr = r_cell * i_arr
+    v_arr = ocv_arr[:n_used] + dv_arr
+    p_arr = v_arr * i_arr
+    heat_arr = params.R_TH_CELL * (dv_arr * i_arr)  # R_TH_CELL * p_loss, see cell_model
+    temp_arr, temp_cell = get_temp_cell_profile(temp_cell, temp_amb.get(k, k + n_used), heat_arr, n_used, dt, params)
+    soc = float(soc_arr[n_used])
+    return (v_arr, i_arr, p_arr, temp_arr, soc_arr[1:n_used + 1]), n_used, temp_cell, soc, end_run, end_run
+
+
+# ambient temperature of the steps k = 0, 1, ..., n_max - 1 of a process that starts at t_start with steps of
+#   dt_resolution (i.e., at the timestamps np.arange(t_start, t_end, dt_resolution) with n_max entries), see
+#   get_temp_amb_array. A pandas.Series is only interpolated for blocks of (at least TEMP_AMB_BLOCK) steps that are
+#   actually simulated, so no arrays covering the complete (estimated) maximum duration of the process are needed.
+class TempAmbSource:
+    __slots__ = ("_temp_amb", "_t_start", "_dt", "_is_const", "_is_array", "_blk", "_blk_start", "_blk_end")
+
+    def __init__(self, temp_amb, t_start, dt_resolution, n_max):
+        self._t_start = t_start
+        self._dt = dt_resolution
+        self._blk = None
+        self._blk_start = 0
+        self._blk_end = 0
+        self._is_const = (type(temp_amb) is not pd.Series)
+        self._is_array = False
+        if self._is_const:
+            self._temp_amb = float(temp_amb)
+        elif temp_amb.shape[0] == n_max:  # same length -> use values as they are (see get_temp_amb_array)
+            self._temp_amb = temp_amb.values.astype(np.float64)
+            self._is_array = True
+        else:  # different length -> need interpolation
+            self._temp_amb = temp_amb
+
+    # ambient temperature of the steps k_start ... k_end - 1: float (if constant) or numpy.ndarray
+    def get(self, k_start, k_end):
+        if self._is_const:
+            return self._temp_amb
+        if self._is_array:
+            return self._temp_amb[k_start:k_end]
+        if (k_start < self._blk_start) or (k_end > self._blk_end):
+            self._blk_start = k_start
+            self._blk_end = max(k_end, k_start + TEMP_AMB_BLOCK)
+            ixs = get_step_ixs(self._t_start, self._dt, np.arange(self._blk_start, self._blk_end))
+            self._blk = interpolate_array(self._temp_amb, ixs)
+        return self._blk[(k_start - self._blk_start):(k_end - self._blk_start)]
+
+    # ambient temperature of step k (float)
+    def get_value(self, k):
+        if self._is_const:
+            return self._temp_amb
+        return float(self.get(k, k + 1)[0])
+
+
+# number of steps of a process from t_start to t_end (excluded) with steps of dt_resolution, i.e., the length of
+#   np.arange(t_start, t_end, dt_resolution) - without creating it
+def get_n_steps(t_start, t_end, dt_resolution):
+    return max(int(math.ceil((t_end - t_start) / dt_resolution)), 0)
+
+
+# timestamps of the steps k (int or numpy array) of a process starting at t_start with steps of dt_resolution. Same
+#   values as np.arange(t_start, t_end, dt_resolution)[k] (which calculates t_start + k * delta)
+def get_step_ixs(t_start, dt_resolution, k):
+    delta = (t_start + dt_resolution) - t_start
+    return t_start + k * delta
+
+
+# cell temperature after each of n steps of dt seconds (explicit Euler steps, same results as calling cell_model for
+#   each step) with the ambient temperature temp_amb and the losses heat = R_TH_CELL * p_loss (float or numpy array).
+#   Returns the numpy array of temperatures and the last temperature.
+def get_temp_cell_profile(temp_cell, temp_amb, heat, n, dt, params=None):
+    params = get_params(params)
+    temp_amb_list = temp_amb.tolist() if (type(temp_amb) is np.ndarray) else [temp_amb] * n
+    heat_list = heat.tolist() if (type(heat) is np.ndarray) else [heat] * n
+    temp_list = [0.0] * n
+    for j in range(n):
+        temp_cell = temp_cell + ((temp_amb_list[j] + heat_list[j] - temp_cell) / params.R_TH_C_TH_CELL) * dt
+        temp_list[j] = temp_cell
+    return np.array(temp_list, dtype=np.float64), temp_cell
+
+
+# adaptive version of run_cv_kernel (used by apply_cc_cv and apply_cp_cv if adaptive_tol is not None). Instead of
+#   stepping with dt_resolution, it takes steps of m * dt_resolution (m = 1, 2, 4, ..., m * dt_resolution <=
+#   ADAPTIVE_DT_MAX), so all timestamps remain on the grid t_start + k * dt_resolution. The local error of a step is
+#   estimated by step doubling: one step of m * dt_resolution is compared to two steps of m / 2 * dt_resolution (which
+#   are used if the step is accepted). It is accepted if the difference of the SoC, of the (time-averaged) cell voltage
+#   and of the cell temperature are within soc_tol, v_tol and temp_tol, otherwise m is halved. m is doubled again if
+#   the error is small. Long, almost linear stretches of the CC/CP phase are thus simulated with few steps.
+#   Steps are also halved if the CC/CP -> CV transition or the cut-off current is reached within the step, so both
+#   events are found on the same grid as with fixed steps (the CV tail near i_cutoff automatically uses finer steps).
+#   The temperature is calculated with the exact solution of the thermal model for constant power and ambient
+#   temperature during the step (stable for long steps, see cell_model_exact_temp).
+#   Each accepted step of m / 2 * dt_resolution is one entry in the output arrays, k_arr contains its grid index k
+#   (-> timestamp ixs[k_arr]) and dt_arr its duration. apply_aging_arrays accepts dt_arr instead of dt_resolution, so
+#   the aging is still averaged over bins of AGE_APPLY_PERIOD (if the steps are longer, each bin contains one step).
+# inputs:   (see run_cv_kernel, temp_amb is a TempAmbSource), tol
+#   tol             tuple           (soc_tol, v_tol, temp_tol), maximum local error of SoC [0...1], V in V, T in K
+# outputs:  k_arr, dt_arr, v_arr, i_arr, p_arr, temp_arr, soc_arr, n_used, temp_cell, soc, cut_off_limit_reached
+#   k_arr           numpy.ndarray   grid index of each step (int), i.e., timestamp = t_start + k_arr * dt_resolution
+#   dt_arr          numpy.ndarray   duration of each step in s
+#   (see run_cv_kernel for the other outputs)
+def run_cv_kernel_adaptive(n_max, dt_resolution, v_lim, lim, lim_is_power, i_cutoff, temp_amb, cap_aged, temp_cell,
+                           soc, tol, params=None):
+    params = get_params(params)
+    soc_tol, v_tol, temp_tol = tol
+    r_cell = get_r_cell_from_cap_aged(cap_aged, params)
+    soc = float(soc)
+    temp_cell = float(temp_cell)
+    dt = float(dt_resolution)
+    m_max = 1
+    while 2 * m_max * dt <= ADAPTIVE_DT_MAX:
+        m_max = 2 * m_max
+
+    k_list, dt_list, v_list, i_list, p_list, temp_list, soc_list = [], [], [], [], [], [], []
+    ocv = get_ocv_from_soc(soc)
+    i_set = get_cv_i_set(v_lim, lim, lim_is_power, ocv, r_cell, params)
+    k = 0
+    m = 1
+    cut_off_limit_reached = False
+    while k < n_max:
+        end_run, cut_off_limit_reached = get_cv_end(lim, i_set, i_cutoff)
+
+        temp_amb_use = temp_amb.get_value(k)
+        if end_run:
+            m = 1  # last step always has dt_resolution (same as in run_cv_kernel)
+        while (m > 1) and ((m > m_max) or (k + m > n_max)):
+            m = m // 2
+        is_v_limited = (abs(ocv + r_cell * i_set - v_lim) < V_LIM_EPS)
+        step_accepted = False
+        while m > 1:
+            h = m // 2
+            temp_amb_half = temp_amb.get_value(k + h)
+            # one full step (m) and two half steps (h)
+            soc_m, v_m, p_m, temp_m = cell_model_exact_temp(
+                m * dt, soc, ocv, i_set, temp_cell, temp_amb_use, cap_aged, r_cell, params)
+            soc_1, v_1, p_1, temp_1 = cell_model_exact_temp(
+                h * dt, soc, ocv, i_set, temp_cell, temp_amb_use, cap_aged, r_cell, params)
+            ocv_1 = get_ocv_from_soc(soc_1)
+            i_1 = get_cv_i_set(v_lim, lim, lim_is_power, ocv_1, r_cell, params)
+            soc_2, v_2, p_2, temp_2 = cell_model_exact_temp(
+                h * dt, soc_1, ocv_1, i_1, temp_1, temp_amb_half, cap_aged, r_cell, params)
+            ocv_2 = get_ocv_from_soc(soc_2)
+            i_2 = get_cv_i_set(v_lim, lim, lim_is_power, ocv_2, r_cell, params)
+
+            # events within the step: CC/CP <-> CV transition or cut-off current -> use smaller steps
+            event = (((abs(ocv_1 + r_cell * i_1 - v_lim) < V_LIM_EPS) != is_v_limited)
+                     or ((abs(ocv_2 + r_cell * i_2 - v_lim) < V_LIM_EPS) != is_v_limited)
+                     or ((lim > 0.0) and ((i_1 < i_cutoff) or (i_2 < i_cutoff)))
+                     or ((lim < 0.0) and ((i_1 > i_cutoff) or (i_2 > i_cutoff))))
+            err = max(abs(soc_2 - soc_m) / soc_tol, 0.5 * abs(v_2 - v_m) / v_tol, abs(temp_2 - temp_m) / temp_tol)
+            if (not event) and (err <= 1.0):
+                k_list.extend((k, k + h))
+                dt_list.extend((h * dt, h * dt))
+                v_list.extend((v_1, v_2))
+                i_list.extend((i_set, i_1))
+                p_list.extend((p_1, p_2))
+                temp_list.extend((temp_1, temp_2))
+                soc_list.extend((soc_1, soc_2))
+                soc, temp_cell, ocv, i_set = soc_2, temp_2, ocv_2, i_2
+                k = k + m
+                if err < 0.25:  # local error ~ dt^2 -> doubling m will probably still be within the tolerance
+                    m = 2 * m
+                step_accepted = True
+                break
+            m = h
+
+        if step_accepted:
+            continue
+
+        # single step of dt_resolution
+        soc, v_cell, p_actual, temp_cell = cell_model_exact_temp(
+            dt, soc, ocv, i_set, temp_cell, temp_amb_use, cap_aged, r_cell, params)
+        k_list.append(k)
+        dt_list.append(dt)
+        v_list.append(v_cell)
+        i_list.append(i_set)
+        p_list.append(p_actual)
+        temp_list.append(temp_cell)
+        soc_list.append(soc)
+        k = k + 1
+        m = 2
+        if end_run:
+            break
+        ocv = get_ocv_from_soc(soc)
+        i_set = get_cv_i_set(v_lim, lim, lim_is_power, ocv, r_cell, params)
+
+    n_used = len(k_list)
+    return (np.array(k_list, dtype=np.int64), np.array(dt_list, dtype=np.float64), np.array(v_list, dtype=np.float64),
+            np.array(i_list, dtype=np.float64), np.array(p_list, dtype=np.float64),
+            np.array(temp_list, dtype=np.float64), np.array(soc_list, dtype=np.float64),
+            n_used, temp_cell, soc, cut_off_limit_reached)
+
+
+# set-point current of the CC-CV (lim_is_power = False, lim = i_lim) or CP-CV (lim_is_power = True, lim = p_lim) mode
+def get_cv_i_set(v_lim, lim, lim_is_power, ocv, r_cell, params=None):
+    if lim_is_power:
+        return get_i_set_from_v_lim_p_lim(v_lim, lim, ocv, r_cell, params)
+    return get_i_set_from_v_lim_i_lim(v_lim, lim, ocv, r_cell, params)
+
+
+# create the v/i/p/temp/soc pandas.Series of a process from the kernel arrays (only the first len(ixs) values are used)
+def get_step_dfs(ixs, v_arr, i_arr, p_arr, temp_arr, soc_arr):
+    n = len(ixs)
+    v_new = pd.Series(v_arr[:n], index=ixs, copy=False)
+    i_new = pd.Series(i_arr[:n], index=ixs, copy=False)
+    p_new = pd.Series(p_arr[:n], index=ixs, copy=False)
+    temp_new = pd.Series(temp_arr[:n], index=ixs, copy=False)
+    soc_new = pd.Series(soc_arr[:n], index=ixs, copy=False)
+    return v_new, i_new, p_new, temp_new, soc_new
+
+
+# apply aging for the v/i/temp_cell_df pandas.Series of a process, see apply_aging_arrays
+def apply_aging_df(cap_aged, aging_states, dt_resolution, v_cell_df, i_cell_df, temp_cell_df, params=None):
+    return apply_aging_arrays(cap_aged, aging_states, dt_resolution, v_cell_df.index.values,
+                              v_cell_df.values, i_cell_df.values, temp_cell_df.values, params)
+
+
+# apply aging for a process given as numpy arrays of timestamps t_arr [s] with voltage v_arr [V], current i_arr [A] and
+#   temperature temp_arr [°C] in each micro-step of dt_resolution seconds. The values are averaged over bins of
+#   AGE_APPLY_PERIOD seconds (aligned to multiples of AGE_APPLY_PERIOD, like pandas' resample('30S') of the unix time),
+#   and the aging is applied for each non-empty bin with a duration of (number of micro-steps in bin) * dt_resolution.
+#   If dt_resolution > AGE_APPLY_PERIOD, each bin contains one micro-step, i.e., aging is applied for every micro-step.
+#   dt_resolution can also be a numpy array with the duration of each micro-step (e.g., adaptive steps, see
+#   run_cv_kernel_adaptive). Then, the time-weighted average is used and the aging is applied for the sum of durations.
+def apply_aging_arrays(cap_aged, aging_states, dt_resolution, t_arr, v_arr, i_arr, temp_arr, params=None):
+    params = get_params(params)
+    n = len(t_arr)
+    if n == 0:
+        return cap_aged, aging_states
+    t_arr = np.asarray(t_arr)
+    v_arr = np.asarray(v_arr, dtype=np.float64)
+    i_arr = np.asarray(i_arr, dtype=np.float64)
+    temp_arr = np.asarray(temp_arr, dtype=np.float64)
+    order_ixs = None
+    if (n > 1) and np.any(t_arr[1:] < t_arr[:-1]):  # bins need to be contiguous -> sort (shouldn't be necessary)
+        order_ixs = np.argsort(t_arr, kind="stable")
+        t_arr, v_arr, i_arr, temp_arr = t_arr[order_ixs], v_arr[order_ixs], i_arr[order_ixs], temp_arr[order_ixs]
+
+    # integer bin id of each micro-step -> start of each non-empty bin and number of micro-steps in it
+    bin_ids = np.floor_divide(t_arr, params.AGE_APPLY_PERIOD)
+    bin_starts = np.flatnonzero(bin_ids[1:] != bin_ids[:-1]) + 1
+    bin_starts = np.concatenate(([0], bin_starts))
+    bin_counts = np.diff(np.append(bin_starts, n))
+
+    if type(dt_resolution) is np.ndarray:  # variable durations -> time-weighted average of each bin
+        dt_arr = dt_resolution.astype(np.float64)
+        if order_ixs is not None:
+            dt_arr = dt_arr[order_ixs]
+        time_sum = np.add.reduceat(dt_arr, bin_starts)
+        v_mean = (np.add.reduceat(v_arr * dt_arr, bin_starts) / time_sum).tolist()
+        i_mean = (np.add.reduceat(i_arr * dt_arr, bin_starts) / time_sum).tolist()
+        temp_mean = (np.add.reduceat(temp_arr * dt_arr, bin_starts) / time_sum).tolist()
+        time_sum = time_sum.tolist()
+    else:  # average of each bin
+        v_mean = (np.add.reduceat(v_arr, bin_starts) / bin_counts).tolist()
+        i_mean = (np.add.reduceat(i_arr, bin_starts) / bin_counts).tolist()
+        temp_mean = (np.add.reduceat(temp_arr, bin_starts) / bin_counts).tolist()
+        time_sum = (bin_counts * dt_resolution).tolist()
+
+    # calculate aging for every bin -> the states are updated in place (a list is only converted once, see CellState)
+    if type(aging_states) is CellState:
+        state = aging_states
+    else:
+        state = CellState(cap_aged, aging_states)
+    state.cap_aged = cap_aged
+    for k in range(len(time_sum)):
+        apply_aging_state(state, time_sum[k], v_mean[k], i_mean[k], temp_mean[k], params)
+
+    if state is aging_states:
+        return state.cap_aged, state
+    return state.cap_aged, state.get_aging_states()
 
 
 # update aging for the timestep dt [s] during which the cell voltage was v_cell [V], the cell current i_cell [A] and the
-# cell temperature temp_cell [°C]
-def apply_aging(cap_aged_begin, aging_states, dt, v_cell, i_cell, temp_cell):
-    if np.isnan(dt) or np.isnan(v_cell) or np.isnan(i_cell) or np.isnan(temp_cell) or (cap_aged_begin <= 0.0):
-        return cap_aged_begin, aging_states  # invalid input or already at 0 Ah
+# cell temperature temp_cell [°C]. aging_states can be a list or a CellState (which is updated in place and returned).
+def apply_aging(cap_aged_begin, aging_states, dt, v_cell, i_cell, temp_cell, params=None):
+    params = get_params(params)
+    if type(aging_states) is CellState:
+        aging_states.cap_aged = cap_aged_begin
+        apply_aging_state(aging_states, dt, v_cell, i_cell, temp_cell, params)
+        return aging_states.cap_aged, aging_states
+    state = CellState(cap_aged_begin, aging_states)
+    if not apply_aging_state(state, dt, v_cell, i_cell, temp_cell, params):
+        return cap_aged_begin, aging_states  # invalid input or already at 0 Ah -> unchanged (same object as before)
+    return state.cap_aged, state.get_aging_states()
+
+
+# same as apply_aging, but updates cap_aged and the aging states of the CellState object in place (no lists are created
+# or unpacked). Returns False if the state was not changed (invalid input or already at 0 Ah), True otherwise.
+def apply_aging_state(state, dt, v_cell, i_cell, temp_cell, params=None):
+    params = get_params(params)
+    cap_aged_begin = state.cap_aged
+    if math.isnan(dt) or math.isnan(v_cell) or math.isnan(i_cell) or math.isnan(temp_cell) or (cap_aged_begin <= 0.0):
+        return False  # invalid input or already at 0 Ah
     # else:
 
     temp_cell_kelvin = temp_cell + T_0_DEGC_IN_K
     dq_loss_step = 0.0
-    (q_loss_sei_total, q_loss_cyclic_total, q_loss_cyclic_low_total, q_loss_plating_total,
-     Q_chg_total, Q_dischg_total, E_chg_total, E_dischg_total) = aging_states
+    q_loss_sei_total = state.q_loss_sei_total
+    q_loss_cyclic_total = state.q_loss_cyclic_total
+    q_loss_cyclic_low_total = state.q_loss_cyclic_low_total
+    q_loss_plating_total = state.q_loss_plating_total
     q_loss_total = q_loss_sei_total + q_loss_cyclic_total + q_loss_cyclic_low_total + q_loss_plating_total
 
     # SEI layer growth
-    sei_force = (AGE_S0 * np.exp(AGE_S1 * (1.0 / temp_cell_kelvin - 1.0 / T_REF_KELVIN))
-                 * np.exp(AGE_S2 * (v_cell - V_REF)))
-    diff_sei = sei_force - AGE_S3 * q_loss_sei_total  # = loss rate (per second)
+    sei_force = (params.AGE_S0 * math.exp(params.AGE_S1 * (1.0 / temp_cell_kelvin - 1.0 / params.T_REF_KELVIN))
+                 * math.exp(params.AGE_S2 * (v_cell - params.V_REF)))
+    diff_sei = sei_force - params.AGE_S3 * q_loss_sei_total  # = loss rate (per second)
     if diff_sei > 0.0:  # SEI losses can only be increased, not decreased in this model
         dq_loss_sei = diff_sei * dt  # loss rate (per second) * time
-        q_loss_sei_total = min(q_loss_sei_total + dq_loss_sei, 1.0)  # relative losses cannot be > 1.0
+        state.q_loss_sei_total = min(q_loss_sei_total + dq_loss_sei, 1.0)  # relative losses cannot be > 1.0
         dq_loss_step = dq_loss_step + dq_loss_sei
 
     if i_cell != 0.0:
@@ -1097,11 +1813,11 @@ def apply_aging(cap_aged_begin, aging_states, dt, v_cell, i_cell, temp_cell):
         dQ = i_cell * dt / 3600.0  # A*s in Ah
         dE = dQ * v_cell
         if i_cell > 0.0:  # charging
-            Q_chg_total = Q_chg_total + dQ
-            E_chg_total = E_chg_total + dE
+            state.Q_chg_total = state.Q_chg_total + dQ
+            state.E_chg_total = state.E_chg_total + dE
         elif i_cell < 0.0:  # discharging
-            Q_dischg_total = Q_dischg_total - dQ
-            E_dischg_total = E_dischg_total - dE
+            state.Q_dischg_total = state.Q_dischg_total - dQ
+            state.E_dischg_total = state.E_dischg_total - dE
 
         # cyclic aging
         c_rate_rel = i_cell / cap_aged_begin  # i_cell in A, cap_aged_begin in Ah -> c_rate_rel in 1/h
@@ -1110,47 +1826,101 @@ def apply_aging(cap_aged_begin, aging_states, dt, v_cell, i_cell, temp_cell):
         # That means that the cumulated dq_abs would roughly be 3600 (no unit) for a full charge.
 
         # cyclic wearout
-        cyc_age_force = AGE_W0 * abs(v_cell - V_REF)  # * np.exp(AGE_W1 * max(q_loss_total - AGE_W2), 0)
-        if q_loss_total > AGE_W2:
-            cyc_age_force = cyc_age_force * np.exp(AGE_W1 * (q_loss_total - AGE_W2))
-        diff_cyc = cyc_age_force - AGE_W3 * q_loss_cyclic_total  # = loss rate (per charge in C-rate * s)
+        cyc_age_force = params.AGE_W0 * abs(v_cell - params.V_REF)  # * np.exp(AGE_W1 * max(q_loss_total - AGE_W2), 0)
+        if q_loss_total > params.AGE_W2:
+            cyc_age_force = cyc_age_force * math.exp(params.AGE_W1 * (q_loss_total - params.AGE_W2))
+        diff_cyc = cyc_age_force - params.AGE_W3 * q_loss_cyclic_total  # = loss rate (per charge in C-rate * s)
         if diff_cyc > 0.0:  # wearout losses can only be increased, not decreased in this model
             dq_loss_cyc = diff_cyc * dq_abs  # loss rate (per charge) * charge (C-rate * s)
-            q_loss_cyclic_total = min(q_loss_cyclic_total + dq_loss_cyc, 1.0)  # relative losses cannot be > 1.0
+            state.q_loss_cyclic_total = min(q_loss_cyclic_total + dq_loss_cyc, 1.0)  # relative losses cannot be > 1.0
             dq_loss_step = dq_loss_step + dq_loss_cyc
 
         # extra wearout at low voltages
-        if v_cell < AGE_C2:
-            low_age_force = AGE_C0 * np.exp(AGE_C1 * (1.0 / temp_cell_kelvin - 1.0 / T_REF_KELVIN)) * (AGE_C2 - v_cell)
-            diff_low = low_age_force - AGE_C3 * q_loss_cyclic_low_total  # = loss rate (per charge in C-rate * s)
+        if v_cell < params.AGE_C2:
+            low_age_force = (params.AGE_C0
+                             * math.exp(params.AGE_C1 * (1.0 / temp_cell_kelvin - 1.0 / params.T_REF_KELVIN))
+                             * (params.AGE_C2 - v_cell))
+            diff_low = low_age_force - params.AGE_C3 * q_loss_cyclic_low_total  # = loss rate (per charge in C-rate * s)
             if diff_low > 0.0:  # wearout losses at low voltages can only be increased, not decreased in this model
                 dq_loss_low = diff_low * dq_abs  # loss rate (per charge) * charge (C-rate * s)
-                q_loss_cyclic_low_total = min(q_loss_cyclic_low_total + dq_loss_low, 1.0)  # rel. losses cannot be > 1.0
+                state.q_loss_cyclic_low_total = min(q_loss_cyclic_low_total + dq_loss_low, 1.0)  # rel. loss <= 1.0
                 dq_loss_step = dq_loss_step + dq_loss_low
 
         if c_rate_rel > 0.0:  # charging: c_rate_rel = c_chg_rate_rel
             # lithium plating -> only when charging
-            r_eff = AGE_P0
-            if temp_cell_kelvin < AGE_P2:
-                r_eff = r_eff + (AGE_P1 * (AGE_P2 - temp_cell_kelvin))**AGE_P3
-            r_eff = r_eff * np.exp(AGE_P4 * q_loss_total)
+            r_eff = params.AGE_P0
+            if temp_cell_kelvin < params.AGE_P2:
+                r_eff = r_eff + (params.AGE_P1 * (params.AGE_P2 - temp_cell_kelvin))**params.AGE_P3
+            r_eff = r_eff * math.exp(params.AGE_P4 * q_loss_total)
             v_anode = get_v_anode_from_v_cell(v_cell)
             v_plating = v_anode - r_eff * c_rate_rel  # here: c_rate_rel = c_chg_rate_rel
             if v_plating < 0.0:
                 # plating can occur. lithium stripping and intercalation of plated lithium is not modeled
-                dq_plating = abs(v_plating) * AGE_P5 * dt * c_rate_rel**AGE_P6
-                q_loss_plating_total = min(q_loss_plating_total + dq_plating, 1.0)  # relative losses cannot be > 1.0
+                dq_plating = abs(v_plating) * params.AGE_P5 * dt * c_rate_rel**params.AGE_P6
+                state.q_loss_plating_total = min(q_loss_plating_total + dq_plating, 1.0)  # rel. losses cannot be > 1.0
                 dq_loss_step = dq_loss_step + dq_plating
 
-    dQ_loss_step = dq_loss_step * CAP_NOMINAL  # relative -> absolute losses in this timestep
-    cap_aged_end = max(cap_aged_begin - dQ_loss_step, 0.0)  # capacity cannot be < 0 Ah
-    aging_states = [q_loss_sei_total, q_loss_cyclic_total, q_loss_cyclic_low_total, q_loss_plating_total,
-                    Q_chg_total, Q_dischg_total, E_chg_total, E_dischg_total]
-    return cap_aged_end, aging_states
+    dQ_loss_step = dq_loss_step * params.CAP_NOMINAL  # relative -> absolute losses in this timestep
+    state.cap_aged = max(cap_aged_begin - dQ_loss_step, 0.0)  # capacity cannot be < 0 Ah
+    return True
+
+
+# calendar aging of a resting cell (i_cell = 0 -> only SEI growth) for dt seconds at the constant cell voltage
+#   v_cell [V] and cell temperature temp_cell [°C]. The SEI loss rate dq/dt = sei_force(T, V) - AGE_S3 * q (see
+#   apply_aging) is linear in q, so it is integrated exactly: q(t) = q_inf + (q_0 - q_inf) * exp(-AGE_S3 * t), with
+#   q_inf = sei_force / AGE_S3 (if q_0 >= q_inf, the SEI losses don't change). Unlike apply_aging (explicit Euler
+#   step), the result doesn't depend on the step size, so a long idle span can be applied at once. aging_states can be
+#   a list or a CellState (see apply_aging).
+def apply_calendar_aging(cap_aged, aging_states, dt, v_cell, temp_cell, params=None):
+    return apply_calendar_aging_arrays(cap_aged, aging_states, dt, v_cell, temp_cell, params)
+
+
+# same as apply_calendar_aging for consecutive segments of constant voltage and temperature: dt_arr [s], v_arr [V] and
+#   temp_arr [°C] are numpy arrays (one value per segment) or floats (same for all segments). Consecutive segments with
+#   the same SEI growth rate (e.g., cell temperature already in steady state) are merged, segments with NaN are skipped.
+def apply_calendar_aging_arrays(cap_aged, aging_states, dt_arr, v_arr, temp_arr, params=None):
+    params = get_params(params)
+    dt_arr, v_arr, temp_arr = np.broadcast_arrays(np.asarray(dt_arr, dtype=np.float64),
+                                                  np.asarray(v_arr, dtype=np.float64),
+                                                  np.asarray(temp_arr, dtype=np.float64))
+    dt_arr, v_arr, temp_arr = dt_arr.ravel(), v_arr.ravel(), temp_arr.ravel()
+    sei_force = (params.AGE_S0 * np.exp(params.AGE_S1 * (1.0 / (temp_arr + T_0_DEGC_IN_K) - 1.0 / params.T_REF_KELVIN))
+                 * np.exp(params.AGE_S2 * (v_arr - params.V_REF)))
+    valid = ~(np.isnan(dt_arr) | np.isnan(sei_force))
+    if not np.all(valid):
+        dt_arr, sei_force = dt_arr[valid], sei_force[valid]
+    if dt_arr.shape[0] == 0:
+        return cap_aged, aging_states
+    if dt_arr.shape[0] > 1:  # merge consecutive segments with the same rate
+        seg_starts = np.concatenate(([0], np.flatnonzero(sei_force[1:] != sei_force[:-1]) + 1))
+        dt_arr, sei_force = np.add.reduceat(dt_arr, seg_starts), sei_force[seg_starts]
+    q_inf_list = (sei_force / params.AGE_S3).tolist()
+    decay_list = np.exp(-params.AGE_S3 * dt_arr).tolist()
+
+    if type(aging_states) is CellState:
+        state = aging_states
+    else:
+        state = CellState(cap_aged, aging_states)
+    q_loss_sei_total = state.q_loss_sei_total
+    for k in range(len(q_inf_list)):
+        if cap_aged <= 0.0:
+            break  # already at 0 Ah
+        q_inf = q_inf_list[k]
+        if q_loss_sei_total < q_inf:  # SEI losses can only be increased, not decreased in this model
+            q_loss_sei_new = min(q_inf + (q_loss_sei_total - q_inf) * decay_list[k], 1.0)  # rel. losses cannot be > 1
+            cap_aged = max(cap_aged - (q_loss_sei_new - q_loss_sei_total) * params.CAP_NOMINAL, 0.0)  # cannot be < 0 Ah
+            q_loss_sei_total = q_loss_sei_new
+    state.q_loss_sei_total = q_loss_sei_total
+    state.cap_aged = cap_aged
 
+    if state is aging_states:
+        return cap_aged, state
+    return cap_aged, state.get_aging_states()
 
-def get_r_cell_from_cap_aged(cap_aged):
-    return R_CELL_0 + R_CELL_AGE * (1.0 - cap_aged / CAP_NOMINAL)
+
+def get_r_cell_from_cap_aged(cap_aged, params=None):
+    params = get_params(params)
+    return params.R_CELL_0 + params.R_CELL_AGE * (1.0 - cap_aged / params.CAP_NOMINAL)
 
 
 def check_plausibility():
@@ -1181,6 +1951,27 @@ def get_ocv_from_soc_df(soc_df):
     return lin_a + lin_b * soc_df + v_corr_low + v_corr_high  # v_ocv
 
 
+# same as get_ocv_from_soc, but for a numpy array of SoC values (same calculation steps -> same results)
+def get_ocv_from_soc_array(soc_arr):
+    # see "SoC OCV Curve at C_div_20 (0.15 A) for Python.xlsx"
+    lin_a = 3.3  # a
+    lin_b = 0.9  # b
+    low_ths = 0.1326
+    low_fac = 0.02  # d
+    low_exp = 28.0  # e
+    high_mid = 0.935  # f
+    high_delta = 0.065  # g
+    high_amp = 0.03  # h
+    v_ocv = lin_a + lin_b * soc_arr
+    cond_low = (soc_arr < low_ths)
+    if np.any(cond_low):
+        v_ocv = np.where(cond_low, v_ocv + low_fac * (1.0 - np.exp(low_exp * (low_ths - soc_arr))), v_ocv)
+    cond_high = (soc_arr > (high_mid - high_delta)) & ~cond_low
+    if np.any(cond_high):
+        v_ocv = np.where(cond_high, v_ocv + high_amp * (((soc_arr - high_mid) / high_delta)**2 - 1.0), v_ocv)
+    return v_ocv
+
+
 # return open circuit voltage [2.5...4.2] based on cell SoC [0...1] - approximation function primarily used internally.
 # soc and return value are floats. Also gives reasonable values for [-0.02...1.05] -> [1.85..4.31 V].
 def get_ocv_from_soc(soc):
@@ -1192,7 +1983,7 @@ def get_ocv_from_soc(soc):
     if soc < low_ths:
         low_fac = 0.02  # d
         low_exp = 28.0  # e
-        v_ocv = v_ocv + low_fac * (1.0 - np.exp(low_exp * (low_ths - soc)))
+        v_ocv = v_ocv + low_fac * (1.0 - math.exp(low_exp * (low_ths - soc)))
     else:
         high_mid = 0.935  # f
         high_delta = 0.065  # g
@@ -1279,6 +2070,158 @@ def get_v_anode_from_v_cell(v_cell):
     return v_anode
 
 
+# same as get_soc_from_ocv, but for a numpy array of OCV values
+def get_soc_from_ocv_array(ocv_arr):
+    # see "SoC OCV Curve at C_div_20 (0.15 A) for Python.xlsx"
+    lin_a = -(11.0/3.0)  # -3.666666667
+    lin_b = (10.0/9.0)  # 1.111111111
+    low_ths = 3.43
+    d = 0.144444444
+    e = 0.1493
+    f = 0.45
+    high_ths = 4.083
+    A = 7.100591716
+    B = -12.37810651
+    C = 9.477514793
+    soc_low = d - e * np.maximum(low_ths - ocv_arr, 0.0)**f
+    soc_high = (-B + np.sqrt(np.maximum(B * B - 4 * A * (C - ocv_arr), 0.0))) / (2 * A)
+    return np.where(ocv_arr < low_ths, soc_low, np.where(ocv_arr > high_ths, soc_high, lin_a + lin_b * ocv_arr))
+
+
+# same as get_v_anode_from_v_cell, but for a numpy array of cell voltages
+def get_v_anode_from_v_cell_array(v_cell_arr):
+    return get_v_anode_from_v_cell(pd.Series(v_cell_arr, copy=False)).values
+
+
+# Table-driven approximation of one of the curves above (e.g., get_ocv_from_soc): values on a dense uniform grid of
+# x_min ... x_max with linear interpolation -> index lookup in O(1), no exp/sqrt/power. The number of intervals is
+# doubled (LUT_N_MIN ... LUT_N_MAX) until the interpolation error is <= max_error in all but LUT_FALLBACK_SHARE_MAX of
+# the intervals. In the remaining intervals (e.g., at kinks of the piecewise curves, i.e., at the breakpoints, or where
+# the curve is too steep) and outside of x_min ... x_max, the analytic function is used, so the deviation from the
+# analytic curve is <= max_error everywhere (estimated at LUT_CHECK_FRACTIONS of each interval, see validate()).
+# Note: for single floats, the closed-form functions are about as fast as (or faster than) a table lookup in Python.
+#   The tables are faster for numpy arrays (e.g., in bat_model_v01_batch.py) and are a fixed-layout representation of
+#   the curves (y, dy: float64 arrays) that a compiled backend can use directly.
+class LookupTable:
+    __slots__ = ("name", "func", "func_array", "x_min", "x_max", "n", "dx", "inv_dx", "max_error",
+                 "y", "dy", "fallback", "y_list", "dy_list", "fallback_list")
+
+    def __init__(self, name, func, func_array, x_min, x_max, max_error=LUT_MAX_ERROR_DEFAULT, breakpoints=()):
+        self.name = name
+        self.func = func  # analytic function for a float
+        self.func_array = func_array  # analytic function for a numpy array
+        self.x_min = float(x_min)
+        self.x_max = float(x_max)
+        self.max_error = max_error
+        n = LUT_N_MIN
+        while True:
+            self.build(n, breakpoints)
+            if (np.mean(self.fallback) <= LUT_FALLBACK_SHARE_MAX) or (n * 2 > LUT_N_MAX):
+                break
+            n = n * 2
+
+    def build(self, n, breakpoints):
+        self.n = n
+        self.dx = (self.x_max - self.x_min) / n
+        self.inv_dx = 1.0 / self.dx
+        x = self.x_min + np.arange(n + 1) * self.dx
+        self.y = self.func_array(x).astype(np.float64)
+        self.dy = np.diff(self.y)
+        # estimated interpolation error of each interval -> use analytic function where it is too large (safety: 1/2)
+        fractions = np.array(LUT_CHECK_FRACTIONS)
+        x_chk = x[:-1, np.newaxis] + fractions[np.newaxis, :] * self.dx
+        y_chk = self.y[:-1, np.newaxis] + self.dy[:, np.newaxis] * fractions[np.newaxis, :]
+        err = np.max(np.abs(self.func_array(x_chk.ravel()).reshape(x_chk.shape) - y_chk), axis=1)
+        self.fallback = ~(err <= 0.5 * self.max_error)  # also True if err is NaN
+        for x_b in breakpoints:  # the curve has a kink/step at x_b -> interpolation in this interval is inaccurate
+            k = int(math.floor((x_b - self.x_min) * self.inv_dx))
+            self.fallback[max(k - 1, 0):min(k + 2, n)] = True  # also neighbors (rounding of x_b on the grid)
+        self.y_list = self.y.tolist()
+        self.dy_list = self.dy.tolist()
+        self.fallback_list = self.fallback.tolist()
+
+    def __call__(self, x):
+        if type(x) is pd.Series:
+            return pd.Series(self.get_array(x.values), index=x.index)
+        if type(x) is np.ndarray:
+            return self.get_array(x)
+        return self.get_value(x)
+
+    # x and return value are floats
+    def get_value(self, x):
+        u = (x - self.x_min) * self.inv_dx
+        if 0.0 <= u < self.n:
+            k = int(u)
+            if not self.fallback_list[k]:
+                return self.y_list[k] + self.dy_list[k] * (u - k)
+        return self.func(x)  # outside the table / inaccurate interval / NaN
+
+    # x and return value are numpy arrays
+    def get_array(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        if x.ndim == 0:
+            return np.float64(self.get_value(float(x)))
+        u = (x - self.x_min) * self.inv_dx
+        valid = (u >= 0.0) & (u < self.n)
+        k = np.where(valid, u, 0.0).astype(np.intp)
+        y = self.y[k] + self.dy[k] * (u - k)
+        use_func = ~valid | self.fallback[k]
+        if np.any(use_func):
+            y[use_func] = self.func_array(x[use_func])
+        return y
+
+    # compare the table with the analytic function at n_check points (default: 16 per interval, not aligned with the
+    #   grid or LUT_CHECK_FRACTIONS). Returns the maximum absolute deviation and the x at which it occurs.
+    def validate(self, n_check=None):
+        if n_check is None:
+            n_check = 16 * self.n
+        x = self.x_min + (np.arange(n_check) + 0.5 * (math.sqrt(5.0) - 1.0)) * ((self.x_max - self.x_min) / n_check)
+        dev = np.abs(self.get_array(x) - self.func_array(x))
+        i_max = int(np.argmax(dev))
+        return float(dev[i_max]), float(x[i_max])
+
+
+LOOKUP_TABLES = {}  # name -> LookupTable, see init_lookup_tables()
+
+
+# create the lookup tables for get_ocv_from_soc ("ocv_from_soc"), get_soc_from_ocv ("soc_from_ocv"), get_soe_from_soc
+#   ("soe_from_soc") and get_v_anode_from_v_cell ("v_anode_from_v_cell") with the given maximum deviation from the
+#   analytic curves and store them in LOOKUP_TABLES. Returns LOOKUP_TABLES.
+def init_lookup_tables(max_error=LUT_MAX_ERROR_DEFAULT):
+    LOOKUP_TABLES["ocv_from_soc"] = LookupTable(
+        "ocv_from_soc", get_ocv_from_soc, get_ocv_from_soc_array, -0.05, 1.1, max_error,
+        (OCV_LIN_SOC_MIN, OCV_LIN_SOC_MAX))
+    LOOKUP_TABLES["soc_from_ocv"] = LookupTable(
+        "soc_from_ocv", get_soc_from_ocv, get_soc_from_ocv_array, 2.0, 4.4, max_error, (3.43, 4.083))
+    LOOKUP_TABLES["soe_from_soc"] = LookupTable(
+        "soe_from_soc", get_soe_from_soc, get_soe_from_soc, -0.05, 1.1, max_error)
+    LOOKUP_TABLES["v_anode_from_v_cell"] = LookupTable(
+        "v_anode_from_v_cell", get_v_anode_from_v_cell, get_v_anode_from_v_cell_array, 2.0, 4.4, max_error,
+        (3.5, 3.65, 3.83, 4.095))
+    return LOOKUP_TABLES
+
+
+# return the LookupTable with the given name (see init_lookup_tables) -> creates the tables if necessary
+def get_lookup_table(name):
+    if name not in LOOKUP_TABLES:
+        init_lookup_tables()
+    return LOOKUP_TABLES[name]
+
+
+# validate all lookup tables (see LookupTable.validate). Returns a pandas.DataFrame with one row per table: maximum
+#   deviation from the analytic curve (max_dev) and where it occurs (x_at_max_dev), the error bound (max_error), the
+#   number of intervals (n) and the share of intervals in which the analytic function is used (fallback_share).
+def validate_lookup_tables(n_check=None):
+    if len(LOOKUP_TABLES) == 0:
+        init_lookup_tables()
+    rows = {}
+    for name, table in LOOKUP_TABLES.items():
+        max_dev, x_at_max_dev = table.validate(n_check)
+        rows[name] = {"max_dev": max_dev, "x_at_max_dev": x_at_max_dev, "max_error": table.max_error, "n": table.n,
+                      "fallback_share": float(np.mean(table.fallback))}
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
 # append / merge / stitch together a list of data frames
 def append_dataframes(df_array, df_new_array):
     for i in range(len(df_array)):
@@ -1286,23 +2229,542 @@ def append_dataframes(df_array, df_new_array):
     return df_array
 
 
+# timestamps of a log for the export (copy): int64 like the index of the pandas logs if all timestamps are whole
+# seconds (integer t_start and dt_resolution), otherwise float64. The LogSink buffers store them as float64.
+def get_log_index(ixs):
+    ixs = np.asarray(ixs)
+    ixs_int = ixs.astype(np.int64)
+    if np.array_equal(ixs_int, ixs):
+        return ixs_int
+    return ixs.astype(np.float64)
+
+
+# Log sinks ("recorders"): instead of None or a pandas.Series (-> a new / concatenated pandas.Series is returned), the
+# v_cell_df, i_cell_df, p_cell_df, temp_cell_df, and soc_df parameters of the apply_... functions can be LogSink
+# objects. The apply_... functions append the timestamps and values of each process step to them in place (see
+# record_step), so all variants share the same stepping code and only differ in what they keep:
+#   NullLog         nothing -> fastest, if only the capacity fade is needed (used by bat_model_v01_fast.py)
+#   SeriesLog       every step (full resolution)
+#   DecimatedLog    the first step of each interval of interval seconds (intervals aligned to multiples of interval)
+#   AggregatedLog   the mean value of the steps of each interval (timestamp = start of the interval)
+#   EnvelopeLog     every step of a recent time window and of flagged events, the min/max/mean of each interval before
+# All sinks provide index / values / len() like a pandas.Series and to_series() (see get_log_dfs) for the export.
+class LogSink(abc.ABC):
+    __slots__ = ()
+
+    # append ixs (timestamps, ascending) and values (array-like of the same length, or one float for all ixs)
+    @abc.abstractmethod
+    def append(self, ixs, values):
+        pass
+
+    # append a pandas.Series (e.g., v_new of a process step) to the log
+    def append_series(self, df):
+        self.append(df.index.values, df.values)
+
+    # convert to a pandas.Series (only use for export/plotting, values are copied)
+    def to_series(self):
+        return pd.Series(self.values.copy(), index=get_log_index(self.index))
+
+    # timestamps and values (numpy arrays) of the entries after t (ix > t), see get_log_since
+    def get_since(self, t):
+        ixs = self.index
+        i_first = np.searchsorted(ixs, t, side="right")
+        return ixs[i_first:], self.values[i_first:]
+
+    # timestamp and value of the last entry (nan, nan if empty), see get_log_last
+    def get_last(self):
+        if len(self) == 0:
+            return math.nan, math.nan
+        return self.index[-1], self.values[-1]
+
+
+# Log of one cell signal (e.g., v_cell) over time that can be used instead of a pandas.Series for the v_cell_df,
+# i_cell_df, p_cell_df, temp_cell_df, and soc_df parameters of the apply_... functions. Appending to a pandas.Series
+# (pd.concat) copies the whole Series every time, so logging a long simulation takes quadratic time. The SeriesLog
+# stores timestamps and values in numpy arrays that double their capacity when they are full (amortized O(1) per
+# entry). index / values / shape / len() work like for a pandas.Series, but index and values are (zero-copy) numpy
+# views of the filled part of the buffer. Use to_series() or get_log_dfs() to convert to pandas for the export.
+class SeriesLog(LogSink):
+    __slots__ = ("_ixs", "_values", "_n")
+
+    def __init__(self, capacity=LOG_CAPACITY_INITIAL):
+        capacity = max(int(capacity), 1)
+        self._ixs = np.empty(capacity, dtype=np.float64)
+        self._values = np.empty(capacity, dtype=np.float64)
+        self._n = 0
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def shape(self):
+        return (self._n,)
+
+    @property
+    def index(self):  # timestamps (numpy view, don't modify)
+        return self._ixs[:self._n]
+
+    @property
+    def values(self):  # logged values (numpy view, don't modify)
+        return self._values[:self._n]
+
+    # append ixs (timestamps) and values (array-like of the same length) to the log
+    def append(self, ixs, values):
+        n_new = len(ixs)
+        n_total = self._n + n_new
+        if n_total > self._ixs.shape[0]:
+            capacity = self._ixs.shape[0]
+            while capacity < n_total:
+                capacity = 2 * capacity
+            self._ixs = np.resize(self._ixs, capacity)  # copies filled part once -> amortized O(1) per entry
+            self._values = np.resize(self._values, capacity)
+        self._ixs[self._n:n_total] = ixs
+        self._values[self._n:n_total] = values
+        self._n = n_total
+
+
+# log sink that records nothing (see LogSink)
+class NullLog(LogSink):
+    __slots__ = ()
+
+    def __len__(self):
+        return 0
+
+    @property
+    def shape(self):
+        return (0,)
+
+    @property
+    def index(self):
+        return np.empty(0, dtype=np.float64)
+
+    @property
+    def values(self):
+        return np.empty(0, dtype=np.float64)
+
+    def append(self, ixs, values):
+        pass
+
+    def append_series(self, df):
+        pass
+
+
+# log sink that only keeps the first step of each interval of interval seconds, e.g., to plot long simulations with a
+# fixed temporal resolution (see LogSink). Steps are assigned to interval floor(ix / interval).
+class DecimatedLog(LogSink):
+    __slots__ = ("interval", "_log", "_bin_last")
+
+    def __init__(self, interval, capacity=LOG_CAPACITY_INITIAL):
+        self.interval = interval
+        self._log = SeriesLog(capacity)
+        self._bin_last = math.nan
+
+    def __len__(self):
+        return len(self._log)
+
+    @property
+    def shape(self):
+        return self._log.shape
+
+    @property
+    def index(self):  # timestamps (numpy view, don't modify)
+        return self._log.index
+
+    @property
+    def values(self):  # logged values (numpy view, don't modify)
+        return self._log.values
+
+    def append(self, ixs, values):
+        if len(ixs) == 0:
+            return
+        ixs = np.asarray(ixs, dtype=np.float64)
+        values = np.broadcast_to(np.asarray(values, dtype=np.float64), ixs.shape)
+        bins = np.floor_divide(ixs, self.interval)
+        keep = np.empty(bins.shape[0], dtype=bool)
+        keep[0] = (bins[0] != self._bin_last)
+        np.not_equal(bins[1:], bins[:-1], out=keep[1:])
+        self._log.append(ixs[keep], values[keep])
+        self._bin_last = bins[-1]
+
+
+# log sink that keeps the mean value of the steps of each interval of interval seconds (see LogSink). The timestamp of
+# an entry is the start of its interval (bin * interval). The last interval is still open (its mean can change when
+# more steps are appended) until a step of a later interval is appended.
+class AggregatedLog(LogSink):
+    __slots__ = ("interval", "_log", "_bin", "_sum", "_count")
+
+    def __init__(self, interval, capacity=LOG_CAPACITY_INITIAL):
+        self.interval = interval
+        self._log = SeriesLog(capacity)
+        self._bin = math.nan
+        self._sum = 0.0
+        self._count = 0
+
+    def __len__(self):
+        return len(self._log) + (self._count > 0)
+
+    @property
+    def shape(self):
+        return (len(self),)
+
+    @property
+    def index(self):  # timestamps (copy if the last interval is open)
+        if self._count == 0:
+            return self._log.index
+        return np.append(self._log.index, self._bin * self.interval)
+
+    @property
+    def values(self):  # mean values (copy if the last interval is open)
+        if self._count == 0:
+            return self._log.values
+        return np.append(self._log.values, self._sum / self._count)
+
+    def append(self, ixs, values):
+        n = len(ixs)
+        if n == 0:
+            return
+        ixs = np.asarray(ixs, dtype=np.float64)
+        values = np.broadcast_to(np.asarray(values, dtype=np.float64), ixs.shape)
+        bins = np.floor_divide(ixs, self.interval)
+        starts = np.flatnonzero(np.concatenate(([True], bins[1:] != bins[:-1])))  # first step of each interval
+        sums = np.add.reduceat(values, starts)
+        counts = np.diff(np.append(starts, n))
+        if bins[0] == self._bin:  # continue the open interval
+            sums[0] = sums[0] + self._sum
+            counts[0] = counts[0] + self._count
+        elif self._count > 0:  # open interval is complete
+            self._log.append([self._bin * self.interval], [self._sum / self._count])
+        if starts.shape[0] > 1:  # all but the last interval of this step are complete
+            self._log.append(bins[starts[:-1]] * self.interval, sums[:-1] / counts[:-1])
+        self._bin = bins[-1]
+        self._sum = float(sums[-1])
+        self._count = int(counts[-1])
+
+
+# log sink for long simulations (e.g., 20 years): the steps of the last recent_window seconds and all steps appended
+# while full_resolution is True (flagged events, e.g., a day of interest) are kept in full resolution. Older steps are
+# folded into intervals of interval seconds (aligned to multiples of interval), of which only the envelope is kept:
+# minimum and maximum (with their timestamps), and the mean. So the memory is bounded by the simulated time span
+# (~ span / interval), the recent window and the flagged events - not by the number of steps.
+# index / values / to_series() contain the full resolution steps and the minimum and maximum of each folded interval
+# at their timestamps, i.e., a line plot shows the same envelope as a plot of the full log. They are assembled in
+# every call -> use get_since() / get_last() while simulating, these are cheap and exact within the recent window.
+# get_envelope_df() returns the min/max/mean of each interval of the whole log (including the unfolded steps).
+class EnvelopeLog(LogSink):
+    __slots__ = ("interval", "recent_window", "full_resolution", "_ixs", "_values", "_flags", "_head", "_n",
+                 "_t_fold", "_kept", "_bins", "_n_bins")
+
+    def __init__(self, interval, recent_window=0.0, capacity=LOG_CAPACITY_INITIAL):
+        capacity = max(int(capacity), 1)
+        self.interval = interval
+        self.recent_window = recent_window
+        self.full_resolution = False  # set to True while logging an event that shall be kept in full resolution
+        self._ixs = np.empty(capacity, dtype=np.float64)  # steps that are not folded yet: [_head:_n]
+        self._values = np.empty(capacity, dtype=np.float64)
+        self._flags = np.empty(capacity, dtype=bool)  # True: appended while full_resolution was True
+        self._head = 0
+        self._n = 0
+        self._t_fold = -math.inf  # all steps before this timestamp are folded
+        self._kept = SeriesLog(capacity)  # folded steps that were flagged
+        self._bins = np.empty((max(capacity // 64, 1), ENVELOPE_BIN_COLUMNS), dtype=np.float64)  # folded intervals
+        self._n_bins = 0
+
+    def __len__(self):
+        bins = self._bins[:self._n_bins]
+        n_two = np.count_nonzero(bins[:, 1] != bins[:, 3])  # intervals with minimum and maximum at different steps
+        return self._n_bins + n_two + len(self._kept) + self._n - self._head
+
+    @property
+    def shape(self):
+        return (len(self),)
+
+    @property
+    def index(self):  # timestamps (assembled in every call)
+        return self.get_arrays()[0]
+
+    @property
+    def values(self):  # values (assembled in every call)
+        return self.get_arrays()[1]
+
+    def to_series(self):
+        ixs, values = self.get_arrays()
+        return pd.Series(values, index=get_log_index(ixs))
+
+    # timestamps and values of the log (see above) as numpy arrays
+    def get_arrays(self):
+        bins = self._bins[:self._n_bins]
+        two = (bins[:, 1] != bins[:, 3])
+        ixs = np.concatenate((bins[:, 1], bins[two, 3], self._kept.index))
+        values = np.concatenate((bins[:, 2], bins[two, 4], self._kept.values))
+        order = np.argsort(ixs, kind="stable")  # the unfolded steps are after all folded ones
+        return (np.concatenate((ixs[order], self._ixs[self._head:self._n])),
+                np.concatenate((values[order], self._values[self._head:self._n])))
+
+    # exact if t is within the recent window (t >= timestamp of the last step - recent_window), otherwise the folded
+    # intervals only contribute their minimum and maximum
+    def get_since(self, t):
+        if t < self._t_fold:
+            ixs, values = self.get_arrays()
+            i_first = np.searchsorted(ixs, t, side="right")
+            return ixs[i_first:], values[i_first:]
+        ixs = self._ixs[self._head:self._n]
+        i_first = np.searchsorted(ixs, t, side="right")
+        return ixs[i_first:], self._values[self._head + i_first:self._n]
+
+    def get_last(self):  # the last step is never folded
+        if self._n == self._head:
+            return math.nan, math.nan
+        return self._ixs[self._n - 1], self._values[self._n - 1]
+
+    # minimum, maximum and mean of each interval (pandas.DataFrame, index: start of the interval in s)
+    def get_envelope_df(self):
+        bins = self._bins[:self._n_bins]
+        ixs = np.concatenate((self._kept.index, self._ixs[self._head:self._n]))
+        if ixs.shape[0] > 0:
+            values = np.concatenate((self._kept.values, self._values[self._head:self._n]))
+            bins = np.concatenate((bins, get_envelope_bins(ixs, values, self.interval)))
+            bins = combine_envelope_bins(bins[np.argsort(bins[:, 0], kind="stable")])
+        return pd.DataFrame({"min": bins[:, 2], "max": bins[:, 4], "mean": bins[:, 5] / bins[:, 6]},
+                            index=pd.Index(get_log_index(bins[:, 0])))
+
+    def append(self, ixs, values):
+        n_new = len(ixs)
+        if n_new == 0:
+            return
+        n_total = self._n + n_new
+        if n_total > self._ixs.shape[0]:  # move the unfolded steps to the beginning, grow if more than half full
+            n_recent = self._n - self._head
+            capacity = self._ixs.shape[0]
+            while capacity < 2 * (n_recent + n_new):
+                capacity = 2 * capacity
+            ixs_old, values_old, flags_old = self._ixs, self._values, self._flags
+            self._ixs = np.empty(capacity, dtype=np.float64)
+            self._values = np.empty(capacity, dtype=np.float64)
+            self._flags = np.empty(capacity, dtype=bool)
+            self._ixs[:n_recent] = ixs_old[self._head:self._n]
+            self._values[:n_recent] = values_old[self._head:self._n]
+            self._flags[:n_recent] = flags_old[self._head:self._n]
+            self._head = 0
+            self._n = n_recent
+            n_total = n_recent + n_new
+        self._ixs[self._n:n_total] = ixs
+        self._values[self._n:n_total] = values
+        self._flags[self._n:n_total] = self.full_resolution
+        self._n = n_total
+
+        # fold the steps before the recent window (only complete intervals, and at least one interval at once)
+        t_fold = math.floor((self._ixs[n_total - 1] - self.recent_window) / self.interval) * self.interval
+        if self._ixs[self._head] < (t_fold - self.interval):
+            self.fold(t_fold)
+
+    # fold the unfolded steps before t_fold (a multiple of interval) into the envelope, or keep them if flagged
+    def fold(self, t_fold):
+        i_end = self._head + np.searchsorted(self._ixs[self._head:self._n], t_fold, side="left")
+        ixs = self._ixs[self._head:i_end]
+        values = self._values[self._head:i_end]
+        flags = self._flags[self._head:i_end]
+        if flags.any():
+            self._kept.append(ixs[flags], values[flags])
+            ixs = ixs[~flags]
+            values = values[~flags]
+        if ixs.shape[0] > 0:
+            bins = get_envelope_bins(ixs, values, self.interval)
+            if (self._n_bins > 0) and (bins[0, 0] == self._bins[self._n_bins - 1, 0]):  # continue the last interval
+                self._n_bins = self._n_bins - 1
+                bins = combine_envelope_bins(np.concatenate((self._bins[self._n_bins:self._n_bins + 1], bins)))
+            n_bins_total = self._n_bins + bins.shape[0]
+            if n_bins_total > self._bins.shape[0]:
+                capacity = self._bins.shape[0]
+                while capacity < n_bins_total:
+                    capacity = 2 * capacity
+                self._bins = np.resize(self._bins, (capacity, ENVELOPE_BIN_COLUMNS))  # keeps the filled rows
+            self._bins[self._n_bins:n_bins_total] = bins
+            self._n_bins = n_bins_total
+        self._head = i_end
+        self._t_fold = max(self._t_fold, t_fold)
+
+
+# envelope of the steps (ixs: ascending timestamps, values) in intervals of interval seconds, rows: see
+# ENVELOPE_BIN_COLUMNS
+def get_envelope_bins(ixs, values, interval):
+    t_bins = np.floor_divide(ixs, interval) * interval
+    if np.isnan(values).any():  # (slower) general case
+        return combine_envelope_bins(np.column_stack((t_bins, ixs, values, ixs, values, values,
+                                                      np.ones(ixs.shape[0]))))
+    starts = np.flatnonzero(np.concatenate(([True], t_bins[1:] != t_bins[:-1])))
+    counts = np.diff(np.append(starts, ixs.shape[0]))
+    bins = np.empty((starts.shape[0], ENVELOPE_BIN_COLUMNS), dtype=np.float64)
+    bins[:, 0] = t_bins[starts]
+    bins[:, 2] = np.minimum.reduceat(values, starts)
+    bins[:, 4] = np.maximum.reduceat(values, starts)
+    i_min = np.flatnonzero(values == np.repeat(bins[:, 2], counts))  # first step with the minimum of each interval
+    bins[:, 1] = ixs[i_min[np.searchsorted(i_min, starts)]]
+    i_max = np.flatnonzero(values == np.repeat(bins[:, 4], counts))
+    bins[:, 3] = ixs[i_max[np.searchsorted(i_max, starts)]]
+    bins[:, 5] = np.add.reduceat(values, starts)
+    bins[:, 6] = counts
+    return bins
+
+
+# combine the rows of bins (see ENVELOPE_BIN_COLUMNS, sorted by the start of the interval) with the same interval.
+# The minimum/maximum of the first row is used if several rows have the same minimum/maximum value.
+def combine_envelope_bins(bins):
+    n = bins.shape[0]
+    if n < 2:
+        return bins
+    is_start = np.concatenate(([True], bins[1:, 0] != bins[:-1, 0]))
+    starts = np.flatnonzero(is_start)
+    if starts.shape[0] == n:  # one row per interval
+        return bins
+    groups = np.cumsum(is_start)
+    i_min = np.lexsort((bins[:, 2], groups))[starts]  # sorted by interval, then value -> first row = minimum
+    i_max = np.lexsort((-bins[:, 4], groups))[starts]
+    combined = np.empty((starts.shape[0], ENVELOPE_BIN_COLUMNS), dtype=np.float64)
+    combined[:, 0] = bins[starts, 0]
+    combined[:, 1:3] = bins[i_min, 1:3]
+    combined[:, 3:5] = bins[i_max, 3:5]
+    combined[:, 5] = np.add.reduceat(bins[:, 5], starts)
+    combined[:, 6] = np.add.reduceat(bins[:, 6], starts)
+    return combined
+
+
+# append the step results (df_new_array: pandas.Series of the current process step) to the logs in df_array, which
+# can either be None (-> use step results), LogSink objects (-> append in place), or pandas.Series (-> concat)
+def append_step_dfs(df_array, df_new_array):
+    if df_array[0] is None:
+        return df_new_array
+    if isinstance(df_array[0], LogSink):
+        for i in range(len(df_array)):
+            df_array[i].append_series(df_new_array[i])
+        return df_array
+    return append_dataframes(df_array, df_new_array)
+
+
+# record the steps of a process (timestamps ixs, v/i/p/temp/soc: kernel arrays - only the first len(ixs) values are
+# used - or floats if constant during the process) in the logs in df_array (see append_step_dfs). LogSink objects get
+# the numpy arrays directly, pandas.Series are only created for None / pandas.Series logs.
+def record_step(df_array, ixs, v_arr, i_arr, p_arr, temp_arr, soc_arr):
+    n = len(ixs)
+    arrays = [v_arr, i_arr, p_arr, temp_arr, soc_arr]
+    if isinstance(df_array[0], LogSink):
+        for i in range(len(df_array)):
+            df_array[i].append(ixs, arrays[i] if np.ndim(arrays[i]) == 0 else arrays[i][:n])
+        return df_array
+    for i in range(len(arrays)):
+        if np.ndim(arrays[i]) == 0:
+            arrays[i] = np.full(n, arrays[i], dtype=np.float64)
+    return append_step_dfs(df_array, get_step_dfs(ixs, *arrays))
+
+
+# State of a cell with a fixed layout: cap_aged [Ah], temp_cell [°C], soc [0..1] and the internal aging states (see
+# AGING_STATE_NAMES). Aging updates the attributes in place (see apply_aging_state) instead of unpacking and rebuilding
+# the aging_states list in every aging step.
+# Compatibility with the existing functions: a CellState behaves like the aging_states list (len(), [i], iteration),
+# so it can be passed as aging_states to all apply_... functions. These update it in place and return the same object.
+# get_values() / set_values() convert from/to the positional (cap_aged, aging_states, temp_cell, soc) of init().
+# Note that temp_cell and soc are only updated by the user (e.g., with set_values), since the apply_... functions
+# return them separately. Use copy() if you want to store a snapshot of the state.
+class CellState:
+    __slots__ = ("cap_aged", "temp_cell", "soc") + AGING_STATE_NAMES
+
+    def __init__(self, cap_aged=CAP_INITIAL, aging_states=None, temp_cell=math.nan, soc=math.nan):
+        self.set_values(cap_aged, aging_states, temp_cell, soc)
+
+    def __len__(self):
+        return len(AGING_STATE_NAMES)
+
+    def __getitem__(self, i):
+        if type(i) is slice:
+            return self.get_aging_states()[i]
+        return getattr(self, AGING_STATE_NAMES[i])
+
+    def __setitem__(self, i, value):
+        setattr(self, AGING_STATE_NAMES[i], float(value))
+
+    def __iter__(self):
+        return iter(self.get_aging_states())
+
+    def __repr__(self):
+        return "CellState(cap_aged=%r, aging_states=%r, temp_cell=%r, soc=%r)" % self.get_values()
+
+    def get_aging_states(self):
+        return [getattr(self, name) for name in AGING_STATE_NAMES]
+
+    def set_aging_states(self, aging_states):
+        if aging_states is None:
+            aging_states = [0.0] * len(AGING_STATE_NAMES)
+        elif len(aging_states) != len(AGING_STATE_NAMES):
+            raise ValueError("aging_states needs %u entries, got %u" % (len(AGING_STATE_NAMES), len(aging_states)))
+        for i in range(len(AGING_STATE_NAMES)):
+            setattr(self, AGING_STATE_NAMES[i], float(aging_states[i]))
+
+    def get_values(self):
+        return self.cap_aged, self.get_aging_states(), self.temp_cell, self.soc
+
+    def set_values(self, cap_aged, aging_states, temp_cell, soc):
+        self.cap_aged = float(cap_aged)
+        self.set_aging_states(aging_states)
+        self.temp_cell = float(temp_cell)
+        self.soc = float(soc)
+
+    def copy(self):
+        return CellState(*self.get_values())
+
+    def to_array(self):  # float64 array [cap_aged, temp_cell, soc, aging states...], e.g., for batched/compiled models
+        return np.array([getattr(self, name) for name in self.__slots__], dtype=np.float64)
+
+    @classmethod
+    def from_array(cls, arr):
+        return cls(arr[0], arr[3:], arr[1], arr[2])
+
+
+# linear interpolation of the values of source_df (pandas.Series, index: timestamps) at the timestamps target_ixs
+#   (sorted, e.g., numpy array / pandas.Index / pandas.Series), returns a numpy array (float64). Before the first and
+#   after the last (non-NaN) value of source_df, this value is used (constant extrapolation), NaN values are ignored,
+#   i.e., same results as reindexing source_df to the union of both indexes, interpolate(method="index"), ffill(), and
+#   bfill(), but without building the union. If all target_ixs are timestamps of source_df (e.g., source_df is already
+#   on the step grid), its values are returned without copying (view - don't modify).
+def interpolate_array(source_df: pd.Series, target_ixs):
+    if not source_df.index.is_monotonic_increasing:
+        source_df = source_df.sort_index()
+    xp = source_df.index.values
+    fp = source_df.values
+    x = np.asarray(target_ixs)
+    n = x.shape[0]
+    if n == 0:
+        return np.empty(0, dtype=np.float64)
+    if fp.shape[0] == 0:
+        return np.full(n, np.nan)
+    i_lo = int(np.searchsorted(xp, x[0], side="left"))
+    i_hi = int(np.searchsorted(xp, x[-1], side="right"))
+    if (i_hi - i_lo == n) and (fp.dtype == np.float64) and np.array_equal(xp[i_lo:i_hi], x):  # on the grid
+        fp_roi = fp[i_lo:i_hi]
+        if not np.isnan(fp_roi).any():
+            return fp_roi
+    # only the values from the one before x[0] to the one after x[-1] are needed
+    i_lo = max(i_lo - 1, 0)
+    i_hi = min(i_hi + 1, fp.shape[0])
+    xp_roi = xp[i_lo:i_hi]
+    fp_roi = fp[i_lo:i_hi].astype(np.float64, copy=False)
+    valid = ~np.isnan(fp_roi)
+    if not valid.all():
+        if valid[0] and valid[-1]:  # NaN values inside -> ignore them
+            xp_roi, fp_roi = xp_roi[valid], fp_roi[valid]
+        else:  # the nearest valid values are further away -> use all valid values
+            valid = ~np.isnan(fp.astype(np.float64, copy=False))
+            if not valid.any():
+                return np.full(n, np.nan)
+            xp_roi, fp_roi = xp[valid], fp[valid].astype(np.float64, copy=False)
+    return np.interp(x, xp_roi, fp_roi)
+
+
+# linear interpolation of source_df (pandas.Series) at target_ixs, returns a pandas.Series with the (sorted, unique)
+#   target_ixs as the index - see interpolate_array
 def interpolate_df(source_df: pd.Series, target_ixs):
-    # # this could probably be optimized, but I don't have time now ...
-    # source_df.name = "data"
-    # source_df = source_df.astype(float)
-    # nan_df = pd.Series(np.nan, index=target_ixs, name="data")
-    # target_df = pd.merge(source_df, nan_df, how="outer", left_index=True, right_index=True)
-    # target_df.drop(columns="data_y", inplace=True)
-    # # target_df.rename(columns={"data_x": ""}, inplace=True)
-    # target_df = target_df["data_x"]
-    # # target_df = target_df.interpolate().ffill().bfill()  only works as intended when the index is spaced uniformly
-    # target_df = target_df.interpolate(method="index").ffill().bfill()
-    # target_df = target_df[target_df.index.isin(target_ixs)]
-
-    all_ixs = source_df.index.union(target_ixs)  # FIXME check if it works as intended
-    target_df = source_df.reindex(all_ixs).sort_index().interpolate(method="index").ffill().bfill()
-    target_df = target_df[target_df.index.isin(target_ixs)]
-    return target_df
+    x = np.asarray(target_ixs)
+    if (x.shape[0] > 1) and not (x[1:] > x[:-1]).all():  # not sorted / not unique
+        x = np.unique(x)
+    return pd.Series(interpolate_array(source_df, x), index=x, name=source_df.name)
 
 
 def get_nearest_value_from_df(df, ix, fallback_value):
@@ -1320,8 +2782,10 @@ def get_nearest_value_from_df(df, ix, fallback_value):
 def init(capacity_initial=CAP_INITIAL,
          storage_time_days=STORAGE_TIME_DEFAULT,
          storage_soc=STORAGE_SOC_DEFAULT,
-         storage_temperature=STORAGE_TEMPERATURE_DEFAULT
+         storage_temperature=STORAGE_TEMPERATURE_DEFAULT,
+         params=None
          ):
+    params = get_params(params)
     soc_begin = storage_soc
     temp_cell_begin = storage_temperature  # assume the cell is and remains in steady state at this temperature
     cap_aged_begin = capacity_initial
@@ -1338,13 +2802,23 @@ def init(capacity_initial=CAP_INITIAL,
                     Q_chg_total, Q_dischg_total, E_chg_total, E_dischg_total]
 
     v_cell = get_ocv_from_soc(soc_begin)
-    for i in range(storage_time_days):  # apply SEI aging to the cell for storage_time_days * 24 * 3600 seconds
-        cap_aged_begin, aging_states = apply_aging(
-            cap_aged_begin, aging_states, (24 * 60 * 60), v_cell, 0.0, temp_cell_begin)
+    if storage_time_days > 0:  # apply SEI aging to the cell for storage_time_days * 24 * 3600 seconds (at once)
+        cap_aged_begin, aging_states = apply_calendar_aging(
+            cap_aged_begin, aging_states, storage_time_days * (24 * 60 * 60), v_cell, temp_cell_begin, params)
 
     return cap_aged_begin, aging_states, temp_cell_begin, soc_begin
 
 
+# same as init(), but returns a CellState object. Use state.get_values() to get the values returned by init().
+def init_state(capacity_initial=CAP_INITIAL,
+               storage_time_days=STORAGE_TIME_DEFAULT,
+               storage_soc=STORAGE_SOC_DEFAULT,
+               storage_temperature=STORAGE_TEMPERATURE_DEFAULT,
+               params=None
+               ):
+    return CellState(*init(capacity_initial, storage_time_days, storage_soc, storage_temperature, params))
+
+
 def init_empty_df():
     data_type = float
     v_cell_df = pd.Series(dtype=data_type)
@@ -1353,3 +2827,56 @@ def init_empty_df():
     temp_cell_df = pd.Series(dtype=data_type)
     soc_df = pd.Series(dtype=data_type)
     return v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df
+
+
+# same as init_empty_df(), but returns SeriesLog objects (fast appending) instead of pandas.Series. Convert the logs to
+# pandas.Series with get_log_dfs() when the simulation is complete.
+def init_empty_log(capacity=LOG_CAPACITY_INITIAL):
+    v_cell_df = SeriesLog(capacity)
+    i_cell_df = SeriesLog(capacity)
+    p_cell_df = SeriesLog(capacity)
+    temp_cell_df = SeriesLog(capacity)
+    soc_df = SeriesLog(capacity)
+    return v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df
+
+
+# same as init_empty_log(), but returns NullLog objects (nothing is recorded, see LogSink)
+def init_null_log():
+    return NullLog(), NullLog(), NullLog(), NullLog(), NullLog()
+
+
+# same as init_empty_log(), but returns EnvelopeLog objects (memory bounded by the simulated time span, see EnvelopeLog)
+def init_envelope_log(interval, recent_window=0.0, capacity=LOG_CAPACITY_INITIAL):
+    v_cell_df = EnvelopeLog(interval, recent_window, capacity)
+    i_cell_df = EnvelopeLog(interval, recent_window, capacity)
+    p_cell_df = EnvelopeLog(interval, recent_window, capacity)
+    temp_cell_df = EnvelopeLog(interval, recent_window, capacity)
+    soc_df = EnvelopeLog(interval, recent_window, capacity)
+    return v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df
+
+
+# convert v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df to pandas.Series (if they are LogSink objects)
+def get_log_dfs(v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df):
+    df_array = [v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df]
+    for i in range(len(df_array)):
+        if isinstance(df_array[i], LogSink):
+            df_array[i] = df_array[i].to_series()
+    return df_array
+
+
+# timestamps and values (numpy arrays) of the entries of df (pandas.Series or LogSink) after t (ix > t), e.g., to
+# evaluate the last process step(s) during the simulation
+def get_log_since(df, t):
+    if isinstance(df, LogSink):
+        return df.get_since(t)
+    i_first = np.searchsorted(df.index.values, t, side="right")
+    return df.index.values[i_first:], df.values[i_first:]
+
+
+# timestamp and value of the last entry of df (pandas.Series or LogSink)
+def get_log_last(df):
+    if isinstance(df, LogSink):
+        return df.get_last()
+    if len(df) == 0:
+        return math.nan, math.nan
+    return df.index[-1], df.values[-1]
@@ -0,0 +1,757 @@
+# Batched ("ensemble") version of the battery degradation model in bat_model_v01.py -> more extended documentation there
+# Simulates N independent cells in lockstep. The cell states are held as numpy arrays over the cells:
+#   cap_aged        numpy.ndarray (N,)      remaining usable capacity of each cell in Ah
+#   aging_states    numpy.ndarray (8, N)    internal aging states, rows in the same order as the list in
+#                                           bat_model_v01.py
+#   temp_cell       numpy.ndarray (N,)      cell (case) temperature of each cell in °C
+#   soc             numpy.ndarray (N,)      State of Charge [0...1] of each cell
+#   t_start/t_next  numpy.ndarray (N,)      timestamp in s of each cell (the cells may be at different points in time)
+# Parameters of the apply_... functions (voltage/current/power limits, durations, ...) can be a scalar (same for all
+# cells) or an array with one value per cell. The optional "active" mask (bool array over the cells) selects the cells
+# that take part in a process - the other cells keep their state. Cells with cap_aged <= 0 and cells that hit the
+# cut-off current are masked out automatically while the process continues for the other cells.
+# Like the "..._fast.py" model, this model does not return a voltage/current/power/temperature profile of the cells.
+# Note: The model parameters (V_CELL_MAX, R_TH_CELL, AGE_..., ...) are taken from the optional params argument
+#       (bat_model_v01.CellModelParams, see there) of the functions. If it is None, they are read from bat_model_v01 at
+#       run time, i.e., changing bat_model_v01.R_TH_CELL in a use case model also affects this model.
+
+import math
+import pandas as pd
+import numpy as np
+
+import bat_model_v01 as bat
+
+N_AGING_STATES = 8  # q_loss_sei/cyclic/cyclic_low/plating_total, Q_chg/Q_dischg_total, E_chg/E_dischg_total
+# True: use bat.get_lookup_table(...) for the OCV and anode potential (deviation <= max_error)
+USE_LOOKUP_TABLES = False
+
+
+# return value as a float64 array with one value per cell (value: scalar or array with n_cells values)
+def get_cell_array(value, n_cells):
+    arr = np.asarray(value, dtype=np.float64)
+    if arr.ndim == 0:
+        return np.full(n_cells, float(arr), dtype=np.float64)
+    return arr.astype(np.float64, copy=True)
+
+
+# return the mask of cells that take part in a process: all cells (active = None) or the cells where active is True
+def get_active_mask(active, n_cells):
+    if active is None:
+        return np.ones(n_cells, dtype=bool)
+    return np.asarray(active, dtype=bool).copy()
+
+
+# return the ambient temperature of each cell for step k of a process (one value per cell). temp_amb can be:
+#   float/int       same constant ambient temperature for all cells
+#   numpy.ndarray   1D: constant ambient temperature per cell; 2D (steps, cells): per step and cell
+#   pandas.Series   like in bat_model_v01.py: if it has one value per step of the process (n_steps), the k-th value is
+#                   used, otherwise it is interpolated at the timestamp t_k of the step
+def get_temp_amb_step(temp_amb, k, t_k, n_steps):
+    if type(temp_amb) is pd.Series:
+        values = temp_amb.values.astype(np.float64, copy=False)  # no copy in each step if already float64
+        temp_amb_step = np.interp(t_k, temp_amb.index.values.astype(np.float64, copy=False), values)
+        same_len = (n_steps == values.shape[0])
+        if same_len.any():
+            temp_amb_step = np.where(same_len, values[min(k, values.shape[0] - 1)], temp_amb_step)
+        return temp_amb_step
+    if (type(temp_amb) is np.ndarray) and (temp_amb.ndim == 2):
+        return temp_amb[min(k, temp_amb.shape[0] - 1)]
+    return temp_amb
+
+
+# initialize variables to be used together with the batched battery aging model -> see init() in bat_model_v01.py
+def init(n_cells, capacity_initial=bat.CAP_INITIAL,
+         storage_time_days=bat.STORAGE_TIME_DEFAULT,
+         storage_soc=bat.STORAGE_SOC_DEFAULT,
+         storage_temperature=bat.STORAGE_TEMPERATURE_DEFAULT,
+         params=None
+         ):
+    params = bat.get_params(params)
+    soc_begin = get_cell_array(storage_soc, n_cells)
+    temp_cell_begin = get_cell_array(storage_temperature, n_cells)
+    cap_aged_begin = get_cell_array(capacity_initial, n_cells)
+    storage_time_days = np.broadcast_to(np.asarray(storage_time_days), (n_cells,))
+    aging_states = np.zeros((N_AGING_STATES, n_cells), dtype=np.float64)
+
+    v_cell = get_ocv_from_soc(soc_begin)
+    # apply SEI aging for storage_time_days * 24 * 3600 s (at once)
+    cap_aged_begin, aging_states = apply_calendar_aging(cap_aged_begin, aging_states,
+                                                        storage_time_days * float(24 * 60 * 60), v_cell,
+                                                        temp_cell_begin, storage_time_days > 0, params)
+
+    return cap_aged_begin, aging_states, temp_cell_begin, soc_begin
+
+
+# charge/discharge all (active) cells with CC-CV -> see apply_cc_cv() in bat_model_v01.py
+# outputs:  cap_aged, aging_states, temp_cell, soc, t_next, cut_off_limit_reached
+#   cut_off_limit_reached   numpy.ndarray (N,) of bool  True for cells where the process ended at the cut-off current
+def apply_cc_cv(t_start, dt_resolution, v_lim, i_lim, i_cutoff, temp_amb, cap_aged, aging_states, temp_cell, soc,
+                t_end_max=None, active=None, params=None):
+    return run_cv(t_start, dt_resolution, v_lim, i_lim, False, i_cutoff, temp_amb, cap_aged, aging_states,
+                  temp_cell, soc, t_end_max, active, params)
+
+
+# charge/discharge all (active) cells with CP-CV -> see apply_cp_cv() in bat_model_v01.py
+# outputs:  cap_aged, aging_states, temp_cell, soc, t_next, cut_off_limit_reached (see apply_cc_cv)
+def apply_cp_cv(t_start, dt_resolution, v_lim, p_lim, i_cutoff, temp_amb, cap_aged, aging_states, temp_cell, soc,
+                t_end_max=None, active=None, params=None):
+    return run_cv(t_start, dt_resolution, v_lim, p_lim, True, i_cutoff, temp_amb, cap_aged, aging_states,
+                  temp_cell, soc, t_end_max, active, params)
+
+
+# CC-CV / CP-CV for all (active) cells in lockstep, lim is i_lim (lim_is_power = False) or p_lim (lim_is_power = True)
+def run_cv(t_start, dt_resolution, v_lim, lim, lim_is_power, i_cutoff, temp_amb, cap_aged, aging_states, temp_cell,
+           soc, t_end_max, active, params):
+    params = bat.get_params(params)
+    n_cells = cap_aged.shape[0]
+    t_start = get_cell_array(t_start, n_cells)
+    v_lim = np.clip(get_cell_array(v_lim, n_cells), params.V_CELL_MIN, params.V_CELL_MAX)
+    lim = get_cell_array(lim, n_cells)
+    if not lim_is_power:
+        lim = np.clip(lim, params.I_CELL_MIN_DISCHG, params.I_CELL_MAX_CHG)
+    i_cutoff = get_cell_array(i_cutoff, n_cells)
+    temp_cell = get_cell_array(temp_cell, n_cells)
+    soc = get_cell_array(soc, n_cells)
+    running = get_active_mask(active, n_cells) & (cap_aged > 0.0)
+    t_next = t_start.copy()
+    cut_off_limit_reached = np.zeros(n_cells, dtype=bool)
+
+    # estimate how long the charging/discharging process takes -> maximum number of steps of each cell
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if lim_is_power:
+            max_duration_s = 2.0 * np.abs(cap_aged / (lim / params.V_NOMINAL)) * 3600.0
+        else:
+            max_duration_s = 2.0 * np.abs(cap_aged / lim) * 3600.0
+    max_duration_s[lim == 0.0] = dt_resolution  # a process with i_lim/p_lim = 0 ends in the first step
+    t_end = t_start + max_duration_s
+    if t_end_max is not None:
+        t_end = np.minimum(t_end, get_cell_array(t_end_max, n_cells))
+    n_max = np.maximum(np.ceil((t_end - t_start) / dt_resolution), 0)
+    t_next[running & (n_max == 0)] = t_start[running & (n_max == 0)] + dt_resolution  # see apply_cc_cv (no steps)
+    running = running & (n_max > 0)
+
+    # the electrical model uses the capacity at the beginning of the process
+    r_cell = bat.get_r_cell_from_cap_aged(cap_aged, params)
+    cap_aged_model = get_cap_aged_model(cap_aged)
+    bins = init_aging_bins(n_cells)
+    k = 0
+    while running.any():
+        t_k = t_start + k * dt_resolution
+        ocv = get_ocv_from_soc(soc)  # calculate OCV from SoC (at the beginning of the timestep)
+        if lim_is_power:
+            i_set = get_i_set_from_v_lim_p_lim(v_lim, lim, ocv, r_cell, params)
+        else:
+            i_set = get_i_set_from_v_lim_i_lim(v_lim, lim, ocv, r_cell)
+        cut_off = ((lim > 0.0) & (i_set < i_cutoff)) | ((lim < 0.0) & (i_set > i_cutoff))  # end of (dis)charge
+        end_run = cut_off | (lim == 0.0)  # also end, since i_lim/p_lim = 0
+
+        temp_amb_use = get_temp_amb_step(temp_amb, k, t_k, n_max)
+        soc_new, v_cell, _, temp_cell_new = (  # apply electrical and thermal cell model
+            cell_model(dt_resolution, soc, ocv, i_set, temp_cell, temp_amb_use, cap_aged_model, r_cell, params))
+        soc = np.where(running, soc_new, soc)
+        temp_cell = np.where(running, temp_cell_new, temp_cell)
+
+        cap_aged, aging_states = add_aging_step(bins, cap_aged, aging_states, dt_resolution, t_k, v_cell, i_set,
+                                                temp_cell, running, params)
+        t_next = np.where(running, t_k + dt_resolution, t_next)
+        cut_off_limit_reached = cut_off_limit_reached | (running & cut_off)
+        k = k + 1
+        running = running & ~end_run & (k < n_max)
+
+    cap_aged, aging_states = flush_aging_bins(bins, cap_aged, aging_states, dt_resolution, params=params)
+    return cap_aged, aging_states, temp_cell, soc, t_next, cut_off_limit_reached
+
+
+# apply the power profile p_set_df to all (active) cells -> see apply_power_profile() in bat_model_v01.py
+#   p_set_df        list, numpy.ndarray or pandas.Series: same profile for all cells, 2D numpy.ndarray (steps, cells):
+#                   one profile per cell, or a list of N profiles (can have different lengths)
+def apply_power_profile(t_start, dt_resolution, p_set_df, temp_amb, cap_aged, aging_states, temp_cell, soc,
+                        active=None, params=None):
+    params = bat.get_params(params)
+    n_cells = cap_aged.shape[0]
+    p_set_arr, n_steps = get_profile_array(p_set_df, n_cells)
+    t_start = get_cell_array(t_start, n_cells)
+    temp_cell = get_cell_array(temp_cell, n_cells)
+    soc = get_cell_array(soc, n_cells)
+    running = get_active_mask(active, n_cells) & (cap_aged > 0.0)
+    t_next = t_start.copy()
+
+    # the electrical model uses the capacity at the beginning of the process
+    r_cell = bat.get_r_cell_from_cap_aged(cap_aged, params)
+    cap_aged_model = get_cap_aged_model(cap_aged)
+    bins = init_aging_bins(n_cells)
+    for k in range(p_set_arr.shape[0]):
+        running = running & (k < n_steps)
+        if not running.any():
+            break
+        t_k = t_start + k * dt_resolution
+        ocv = get_ocv_from_soc(soc)  # calculate OCV from SoC (at the beginning of the timestep)
+        i_set = get_i_set_from_p_set(p_set_arr[k], ocv, r_cell, params)
+
+        temp_amb_use = get_temp_amb_step(temp_amb, k, t_k, n_steps)
+        soc_new, v_cell, _, temp_cell_new = (  # apply electrical and thermal cell model
+            cell_model(dt_resolution, soc, ocv, i_set, temp_cell, temp_amb_use, cap_aged_model, r_cell, params))
+        soc = np.where(running, soc_new, soc)
+        temp_cell = np.where(running, temp_cell_new, temp_cell)
+
+        cap_aged, aging_states = add_aging_step(bins, cap_aged, aging_states, dt_resolution, t_k, v_cell, i_set,
+                                                temp_cell, running, params)
+        t_next = np.where(running, t_k + dt_resolution, t_next)
+
+    cap_aged, aging_states = flush_aging_bins(bins, cap_aged, aging_states, dt_resolution, params=params)
+    return cap_aged, aging_states, temp_cell, soc, t_next
+
+
+# return the power profile(s) as a 2D array (steps, cells) and the number of steps of each cell
+# (see apply_power_profile)
+def get_profile_array(p_set_df, n_cells):
+    if type(p_set_df) is pd.Series:
+        p_set_df = p_set_df.values
+    if (type(p_set_df) is list) and (len(p_set_df) == n_cells) and (len(p_set_df) > 0)\
+            and all((type(p) is not float) and (type(p) is not int) for p in p_set_df):  # one profile per cell
+        n_steps = np.array([len(p) for p in p_set_df])
+        p_set_arr = np.zeros((int(np.max(n_steps)), n_cells), dtype=np.float64)
+        for i in range(n_cells):
+            p = p_set_df[i].values if type(p_set_df[i]) is pd.Series else p_set_df[i]
+            p_set_arr[:n_steps[i], i] = p
+        return p_set_arr, n_steps
+    p_set_arr = np.asarray(p_set_df, dtype=np.float64)
+    if p_set_arr.ndim == 1:  # same profile for all cells
+        p_set_arr = np.repeat(p_set_arr[:, np.newaxis], n_cells, axis=1)
+    return p_set_arr, np.full(n_cells, p_set_arr.shape[0])
+
+
+# repeat the power profile until the OCV reaches v_min or v_max -> see apply_power_profile_repeat() in bat_model_v01.py
+# outputs:  cap_aged, aging_states, temp_cell, soc, t_next, n_rep (numpy.ndarray (N,), number of repetitions per cell)
+def apply_power_profile_repeat(t_start, dt_resolution, p_set_df, n_repeat_max, temp_amb, v_max, v_min,
+                               cap_aged, aging_states, temp_cell, soc, active=None, params=None):
+    params = bat.get_params(params)
+    n_cells = cap_aged.shape[0]
+    t_start = get_cell_array(t_start, n_cells)
+    n_rep = np.zeros(n_cells, dtype=int)
+    running = get_active_mask(active, n_cells)
+    # avoid endless loops:
+    if (v_min is None) and (v_max is None) and (n_repeat_max is None):  # no stop condition --> endless loop
+        return cap_aged, aging_states, temp_cell, soc, t_start, n_rep
+    if v_min is not None:
+        v_min = get_cell_array(v_min, n_cells)
+        running = running & (v_min >= params.V_CELL_MIN)  # minimum voltage will never be reached --> endless loop
+    if v_max is not None:
+        v_max = get_cell_array(v_max, n_cells)
+        running = running & (v_max <= params.V_CELL_MAX)  # maximum voltage will never be reached --> ...
+
+    while True:
+        ocv = get_ocv_from_soc(soc)
+        if v_min is not None:
+            running = running & (ocv > v_min)
+        if v_max is not None:
+            running = running & (ocv < v_max)
+        if n_repeat_max is not None:
+            running = running & (n_rep < n_repeat_max)
+        running = running & (cap_aged > 0.0)  # cell has no usable capacity anymore
+        if not np.any(running):
+            break
+        cap_aged, aging_states, temp_cell, soc, t_start = apply_power_profile(
+            t_start, dt_resolution, p_set_df, temp_amb, cap_aged, aging_states, temp_cell, soc, running, params)
+        n_rep = n_rep + running
+
+    return cap_aged, aging_states, temp_cell, soc, t_start, n_rep
+
+
+# apply charge/discharge cycles to all (active) cells -> see apply_cycles() in bat_model_v01.py
+def apply_cycles(n_cycles_max, t_start, t_end_max,  dt_resolution_active, dt_resolution_rest, v_max, v_min,
+                 i_chg, i_dischg, i_chg_cutoff, i_dischg_cutoff, rest_duration, start_charging, temp_amb,
+                 cap_aged, aging_states, temp_cell, soc, active=None, params=None):
+    return run_cycles(n_cycles_max, t_start, t_end_max, dt_resolution_active, None, dt_resolution_rest, None,
+                      v_max, v_min, i_chg, i_dischg, i_chg_cutoff, i_dischg_cutoff, rest_duration, start_charging,
+                      temp_amb, cap_aged, aging_states, temp_cell, soc, active, params)
+
+
+# charge with CC-CV and discharge with a (driving) power profile -> see apply_profile_cycles() in bat_model_v01.py
+def apply_profile_cycles(n_charge_cycles_max, t_start, t_end_max,
+                         dt_resolution_charging, dt_resolution_profile, dt_resolution_rest,
+                         p_set_df, v_max, v_min, i_chg, i_chg_cutoff, rest_duration, start_charging, temp_amb,
+                         cap_aged, aging_states, temp_cell, soc, active=None, params=None):
+    return run_cycles(n_charge_cycles_max, t_start, t_end_max, dt_resolution_charging, dt_resolution_profile,
+                      dt_resolution_rest, p_set_df, v_max, v_min, i_chg, None, i_chg_cutoff, None, rest_duration,
+                      start_charging, temp_amb, cap_aged, aging_states, temp_cell, soc, active, params)
+
+
+# cycles for all (active) cells in lockstep: discharge with CC-CV (p_set_df is None) or with the power profile p_set_df
+def run_cycles(n_cycles_max, t_start, t_end_max, dt_resolution_active, dt_resolution_profile, dt_resolution_rest,
+               p_set_df, v_max, v_min, i_chg, i_dischg, i_chg_cutoff, i_dischg_cutoff, rest_duration, start_charging,
+               temp_amb, cap_aged, aging_states, temp_cell, soc, active, params):
+    params = bat.get_params(params)
+    n_cells = cap_aged.shape[0]
+    t_start = get_cell_array(t_start, n_cells)
+    running = get_active_mask(active, n_cells)
+    if t_end_max is not None:
+        t_end_max = get_cell_array(t_end_max, n_cells)
+        running = running & (t_start < t_end_max)
+    if (n_cycles_max is not None) and (n_cycles_max <= 0):
+        return cap_aged, aging_states, temp_cell, soc, t_start
+    running = running & (cap_aged > 0.0)  # cell has no usable capacity
+
+    def discharge_and_rest(cap_aged, aging_states, temp_cell, soc, t_start, mask):
+        if p_set_df is None:  # discharge to v_min with i_dischg (cutoff current: i_dischg_cutoff)
+            cap_aged, aging_states, temp_cell, soc, t_start, _ = apply_cc_cv(
+                t_start, dt_resolution_active, v_min, i_dischg, i_dischg_cutoff, temp_amb,
+                cap_aged, aging_states, temp_cell, soc, active=mask, params=params)
+        else:  # apply profiles until surpassing v_min
+            cap_aged, aging_states, temp_cell, soc, t_start, _ = apply_power_profile_repeat(
+                t_start, dt_resolution_profile, p_set_df, None, temp_amb, v_max, v_min,
+                cap_aged, aging_states, temp_cell, soc, mask, params)
+        # rest
+        cap_aged, aging_states, temp_cell, soc, t_start = apply_pause(
+            t_start, dt_resolution_rest, rest_duration, temp_amb, cap_aged, aging_states, temp_cell, soc, mask, params)
+        return cap_aged, aging_states, temp_cell, soc, t_start
+
+    if not start_charging:
+        cap_aged, aging_states, temp_cell, soc, t_start = discharge_and_rest(
+            cap_aged, aging_states, temp_cell, soc, t_start, running)
+        if p_set_df is not None:
+            running = running & (cap_aged > 0.0)  # cell has no usable capacity anymore
+
+    i = 0
+    while np.any(running):
+        # charge to v_max with i_chg (cutoff current: i_chg_cutoff)
+        cap_aged, aging_states, temp_cell, soc, t_start, _ = apply_cc_cv(
+            t_start, dt_resolution_active, v_max, i_chg, i_chg_cutoff, temp_amb,
+            cap_aged, aging_states, temp_cell, soc, active=running, params=params)
+
+        # rest
+        cap_aged, aging_states, temp_cell, soc, t_start = apply_pause(
+            t_start, dt_resolution_rest, rest_duration, temp_amb, cap_aged, aging_states, temp_cell, soc, running,
+            params)
+
+        running = running & (cap_aged > 0.0)  # cell has no usable capacity anymore
+
+        if not start_charging:
+            # check end condition
+            i = i + 1
+            if t_end_max is not None:
+                running = running & (t_start < t_end_max)
+            if (n_cycles_max is not None) and (i >= n_cycles_max):
+                break
+
+        discharging = running
+        if not start_charging:
+            discharging = running & ((n_cycles_max is not None) and (i < (n_cycles_max - 1)))
+            if t_end_max is not None:
+                discharging = discharging | (running & (t_start < t_end_max))
+        if np.any(discharging):
+            cap_aged, aging_states, temp_cell, soc, t_start = discharge_and_rest(
+                cap_aged, aging_states, temp_cell, soc, t_start, discharging)
+            running = running & (cap_aged > 0.0)  # cell has no usable capacity anymore
+
+        if start_charging:
+            # check end condition
+            i = i + 1
+            if t_end_max is not None:
+                running = running & (t_start < t_end_max)
+            if (n_cycles_max is not None) and (i >= n_cycles_max):
+                break
+
+    return cap_aged, aging_states, temp_cell, soc, t_start
+
+
+# apply a check-up to all (active) cells -> see apply_checkup() in bat_model_v01.py
+def apply_checkup(t_start, dt_resolution_active, dt_resolution_rest, v_min_op, i_chg_op, i_dischg_op,
+                  i_chg_cutoff_op, i_dischg_cutoff_op, temp_amb_op, cap_aged, aging_states, temp_cell, soc,
+                  active=None, params=None):
+    params = bat.get_params(params)
+    rest_duration = 5 * 60  # 5 minutes in s
+    temp_change_duration = 45 * 60  # 45 minutes in s
+    temp_wait_duration = 45 * 60  # 45 minutes in s
+    v_prepare_set = 2.6  # V
+    v_max_cu = 4.2  # V
+    v_min_cu = 2.5  # V
+    i_chg_cu = 1.0  # A
+    i_dischg_cu = -1.0  # A
+    i_chg_cu_cutoff = 0.15  # A
+    i_dischg_cu_cutoff = -0.15  # A
+    temp_amb_cu = 25  # in °C
+    soc_eis = [0.1, 0.3, 0.5, 0.7, 0.9]  # * 100%, nominal SoC for EIS and pulse
+    duration_eis = 30 * 60  # 30 minutes in s, EIS/pulse not modeled - cell rests for this period at the given SoCs
+
+    n_cells = cap_aged.shape[0]
+    active = get_active_mask(active, n_cells)
+    temp_amb_op = get_cell_array(temp_amb_op, n_cells)
+
+    # change temperature from OT to RT
+    n_temp_change = math.ceil(temp_change_duration / dt_resolution_rest)
+    temp_amb_arr = np.linspace(temp_amb_op, temp_amb_cu, num=n_temp_change, endpoint=False)  # (steps, cells)
+    cap_aged, aging_states, temp_cell, soc, t_start = apply_pause(
+        t_start, dt_resolution_rest, temp_change_duration, temp_amb_arr, cap_aged, aging_states, temp_cell, soc, active,
+        params)
+
+    # wait for temperature stabilization
+    cap_aged, aging_states, temp_cell, soc, t_start = apply_pause(
+        t_start, dt_resolution_rest, temp_wait_duration, temp_amb_cu, cap_aged, aging_states, temp_cell, soc, active,
+        params)
+
+    # PREPARE: discharge to v_prepare_set with operational current
+    cap_aged, aging_states, temp_cell, soc, t_start, _ = apply_cc_cv(
+        t_start, dt_resolution_active, v_prepare_set, i_dischg_op, i_dischg_cutoff_op, temp_amb_cu,
+        cap_aged, aging_states, temp_cell, soc, active=active, params=params)
+
+    # PREPARE: rest 5 minutes
+    cap_aged, aging_states, temp_cell, soc, t_start = apply_pause(
+        t_start, dt_resolution_rest, rest_duration, temp_amb_cu, cap_aged, aging_states, temp_cell, soc, active, params)
+
+    # PREPARE: discharge to v_min_cu with check-up current
+    cap_aged, aging_states, temp_cell, soc, t_start, _ = apply_cc_cv(
+        t_start, dt_resolution_active, v_min_cu, i_dischg_cu, i_dischg_cu_cutoff, temp_amb_cu,
+        cap_aged, aging_states, temp_cell, soc, active=active, params=params)
+
+    # PREPARE: rest 5 minutes
+    cap_aged, aging_states, temp_cell, soc, t_start = apply_pause(
+        t_start, dt_resolution_rest, rest_duration, temp_amb_cu, cap_aged, aging_states, temp_cell, soc, active, params)
+
+    # capacity check
+    cap_aged, aging_states, temp_cell, soc, t_start = apply_cycles(
+        1, t_start, None,  dt_resolution_active, dt_resolution_rest, v_max_cu, v_min_cu,
+        i_chg_cu, i_dischg_cu, i_chg_cu_cutoff, i_dischg_cu_cutoff, rest_duration, True, temp_amb_cu,
+        cap_aged, aging_states, temp_cell, soc, active, params)
+
+    # charge to EIS points and wait
+    for i_soc in range(len(soc_eis)):
+        # charge to soc_target
+        ocv_target = bat.get_ocv_from_soc(soc_eis[i_soc])
+        cap_aged, aging_states, temp_cell, soc, t_start, _ = apply_cc_cv(
+            t_start, dt_resolution_active, ocv_target, i_chg_cu, i_chg_cu_cutoff, temp_amb_cu,
+            cap_aged, aging_states, temp_cell, soc, active=active, params=params)
+
+        # rest
+        cap_aged, aging_states, temp_cell, soc, t_start = apply_pause(
+            t_start, dt_resolution_rest, rest_duration + duration_eis, temp_amb_cu,
+            cap_aged, aging_states, temp_cell, soc, active, params)
+
+    # change temperature from RT to OT
+    temp_amb_arr = np.linspace(np.full(n_cells, float(temp_amb_cu)), temp_amb_op, num=n_temp_change, endpoint=False)
+    cap_aged, aging_states, temp_cell, soc, t_start = apply_pause(
+        t_start, dt_resolution_rest, temp_change_duration, temp_amb_arr, cap_aged, aging_states, temp_cell, soc, active,
+        params)
+
+    # wait for temperature stabilization
+    cap_aged, aging_states, temp_cell, soc, t_start = apply_pause(
+        t_start, dt_resolution_rest, temp_wait_duration, temp_amb_op, cap_aged, aging_states, temp_cell, soc, active,
+        params)
+
+    # discharge to EIS points and wait
+    for i_soc in range(len(soc_eis) - 1, -1, -1):
+        # discharge to soc_target
+        ocv_target = bat.get_ocv_from_soc(soc_eis[i_soc])
+        cap_aged, aging_states, temp_cell, soc, t_start, _ = apply_cc_cv(
+            t_start, dt_resolution_active, ocv_target, i_dischg_cu, i_dischg_cu_cutoff, temp_amb_op,
+            cap_aged, aging_states, temp_cell, soc, active=active, params=params)
+
+        # rest
+        cap_aged, aging_states, temp_cell, soc, t_start = apply_pause(
+            t_start, dt_resolution_rest, rest_duration + duration_eis, temp_amb_op,
+            cap_aged, aging_states, temp_cell, soc, active, params)
+
+    # FOLLOW-UP: charge to v_min_op with operational current
+    cap_aged, aging_states, temp_cell, soc, t_start, _ = apply_cc_cv(
+        t_start, dt_resolution_active, v_min_op, i_chg_op, i_chg_cutoff_op, temp_amb_op,
+        cap_aged, aging_states, temp_cell, soc, active=active, params=params)
+
+    return cap_aged, aging_states, temp_cell, soc, t_start
+
+
+# let all (active) cells rest for duration seconds (scalar or one value per cell) -> see apply_pause() in
+# bat_model_v01.py. The cell temperature is updated with the exact solution of the thermal model for each step.
+def apply_pause(t_start, dt_resolution, duration, temp_amb, cap_aged, aging_states, temp_cell, soc, active=None,
+                params=None):
+    params = bat.get_params(params)
+    n_cells = cap_aged.shape[0]
+    t_start = get_cell_array(t_start, n_cells)
+    duration = get_cell_array(duration, n_cells)
+    temp_cell = get_cell_array(temp_cell, n_cells)
+    soc = get_cell_array(soc, n_cells)
+    resting = get_active_mask(active, n_cells) & (duration > 0)
+    t_next = t_start.copy()
+    if not resting.any():
+        return cap_aged, aging_states, temp_cell, soc, t_next
+
+    # number of steps of each cell -> the last step ends at (t_start + duration) and can be shorter than dt_resolution
+    n_steps = np.where(resting, np.ceil(duration / dt_resolution), 0).astype(int)
+    dt_last = duration - (n_steps - 1) * dt_resolution
+    v_cell = get_ocv_from_soc(soc)  # OCV stays constant while resting
+
+    decay = math.exp(-dt_resolution / params.R_TH_C_TH_CELL)  # exact temperature decay of a (full) step
+    decay_last = np.exp(-dt_last / params.R_TH_C_TH_CELL)
+    for k in range(int(np.max(n_steps))):
+        resting = resting & (k < n_steps)
+        t_k = t_start + k * dt_resolution
+        is_last = (k == (n_steps - 1))
+        temp_amb_use = get_temp_amb_step(temp_amb, k, t_k, n_steps)
+        temp_cell_new = temp_amb_use + (temp_cell - temp_amb_use) * np.where(is_last, decay_last, decay)
+        temp_cell = np.where(resting, temp_cell_new, temp_cell)
+
+        # calendar aging -> exact solution for the step (constant OCV, cell temperature at the end of the step)
+        cap_aged, aging_states = apply_calendar_aging(cap_aged, aging_states, np.where(is_last, dt_last, dt_resolution),
+                                                      v_cell, temp_cell, resting, params)
+        t_next = np.where(resting & is_last, t_k + dt_last, t_next)
+
+    return cap_aged, aging_states, temp_cell, soc, t_next
+
+
+# The micro-steps of each cell are averaged over bins of AGE_APPLY_PERIOD seconds (aligned to multiples of
+#   AGE_APPLY_PERIOD) before applying the aging, like in apply_aging_arrays() of bat_model_v01.py. Since the cells step
+#   in lockstep, the bins are accumulated on the fly and the aging of a cell is applied when it enters a new bin.
+# bins: [bin_id, n_steps, v_sum, i_sum, temp_sum], each a numpy.ndarray (N,)
+def init_aging_bins(n_cells):
+    return [np.full(n_cells, np.nan), np.zeros(n_cells), np.zeros(n_cells), np.zeros(n_cells), np.zeros(n_cells)]
+
+
+# add the micro-step at t_k (v_cell, i_cell, temp_cell) of the cells in mask to the bins (see init_aging_bins)
+def add_aging_step(bins, cap_aged, aging_states, dt_resolution, t_k, v_cell, i_cell, temp_cell, mask, params):
+    bin_id, n_steps, v_sum, i_sum, temp_sum = bins
+    bin_id_k = np.floor_divide(t_k, params.AGE_APPLY_PERIOD)
+    new_bin = mask & (bin_id_k != bin_id) & (n_steps > 0)
+    if new_bin.any():
+        cap_aged, aging_states = flush_aging_bins(bins, cap_aged, aging_states, dt_resolution, new_bin, params)
+    # update in place (np.where/np.add with out=...) -> faster than boolean indexing for small arrays
+    np.copyto(bin_id, bin_id_k, where=mask)
+    np.add(n_steps, mask, out=n_steps)
+    np.add(v_sum, v_cell, out=v_sum, where=mask)
+    np.add(i_sum, i_cell, out=i_sum, where=mask)
+    np.add(temp_sum, temp_cell, out=temp_sum, where=mask)
+    return cap_aged, aging_states
+
+
+# apply the aging of the (non-empty) bins of the cells in mask (default: all cells) and reset them
+def flush_aging_bins(bins, cap_aged, aging_states, dt_resolution, mask=None, params=None):
+    params = bat.get_params(params)
+    bin_id, n_steps, v_sum, i_sum, temp_sum = bins
+    flush = n_steps > 0
+    if mask is not None:
+        flush = flush & mask
+    if not flush.any():
+        return cap_aged, aging_states
+    n_div = np.where(flush, n_steps, 1.0)
+    cap_aged, aging_states = apply_aging(cap_aged, aging_states, n_steps * dt_resolution, v_sum / n_div,
+                                         i_sum / n_div, temp_sum / n_div, flush, params)
+    for arr in (n_steps, v_sum, i_sum, temp_sum):
+        np.copyto(arr, 0.0, where=flush)
+    return cap_aged, aging_states
+
+
+# update aging of the cells in mask (default: all cells) for the timestep dt [s] during which the cell voltage was
+# v_cell [V], the cell current i_cell [A] and the cell temperature temp_cell [°C] -> see apply_aging() in
+# bat_model_v01.py. All inputs are numpy arrays over the cells (dt can also be a scalar).
+def apply_aging(cap_aged_begin, aging_states, dt, v_cell, i_cell, temp_cell, mask=None, params=None):
+    params = bat.get_params(params)
+    valid = ~(np.isnan(dt) | np.isnan(v_cell) | np.isnan(i_cell) | np.isnan(temp_cell)) & (cap_aged_begin > 0.0)
+    if mask is not None:
+        valid = valid & mask
+    if not np.any(valid):
+        return cap_aged_begin, aging_states  # invalid input or already at 0 Ah
+    # else:
+
+    temp_cell_kelvin = temp_cell + bat.T_0_DEGC_IN_K
+    (q_loss_sei_total, q_loss_cyclic_total, q_loss_cyclic_low_total, q_loss_plating_total,
+     Q_chg_total, Q_dischg_total, E_chg_total, E_dischg_total) = aging_states
+    q_loss_total = q_loss_sei_total + q_loss_cyclic_total + q_loss_cyclic_low_total + q_loss_plating_total
+
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        # SEI layer growth
+        sei_force = (params.AGE_S0 * np.exp(params.AGE_S1 * (1.0 / temp_cell_kelvin - 1.0 / params.T_REF_KELVIN))
+                     * np.exp(params.AGE_S2 * (v_cell - params.V_REF)))
+        diff_sei = sei_force - params.AGE_S3 * q_loss_sei_total  # = loss rate (per second)
+        cond = valid & (diff_sei > 0.0)  # SEI losses can only be increased, not decreased in this model
+        dq_loss_sei = diff_sei * dt  # loss rate (per second) * time
+        q_loss_sei_total = np.where(cond, np.minimum(q_loss_sei_total + dq_loss_sei, 1.0), q_loss_sei_total)
+        dq_loss_step = np.where(cond, dq_loss_sei, 0.0)
+
+        cond_i = valid & (i_cell != 0.0)
+        if np.any(cond_i):
+            # capacity and energy throughput statistics
+            dQ = i_cell * dt / 3600.0  # A*s in Ah
+            dE = dQ * v_cell
+            cond = cond_i & (i_cell > 0.0)  # charging
+            Q_chg_total = np.where(cond, Q_chg_total + dQ, Q_chg_total)
+            E_chg_total = np.where(cond, E_chg_total + dE, E_chg_total)
+            cond = cond_i & (i_cell < 0.0)  # discharging
+            Q_dischg_total = np.where(cond, Q_dischg_total - dQ, Q_dischg_total)
+            E_dischg_total = np.where(cond, E_dischg_total - dE, E_dischg_total)
+
+            # cyclic aging
+            c_rate_rel = i_cell / cap_aged_begin  # i_cell in A, cap_aged_begin in Ah -> c_rate_rel in 1/h
+            dq_abs = np.abs(c_rate_rel) * dt
+
+            # cyclic wearout
+            cyc_age_force = params.AGE_W0 * np.abs(v_cell - params.V_REF)
+            cyc_age_force = np.where(q_loss_total > params.AGE_W2,
+                                     cyc_age_force * np.exp(params.AGE_W1 * (q_loss_total - params.AGE_W2)),
+                                     cyc_age_force)
+            diff_cyc = cyc_age_force - params.AGE_W3 * q_loss_cyclic_total  # = loss rate (per charge in C-rate * s)
+            cond = cond_i & (diff_cyc > 0.0)  # wearout losses can only be increased, not decreased in this model
+            dq_loss_cyc = diff_cyc * dq_abs  # loss rate (per charge) * charge (C-rate * s)
+            q_loss_cyclic_total = np.where(cond, np.minimum(q_loss_cyclic_total + dq_loss_cyc, 1.0),
+                                           q_loss_cyclic_total)
+            dq_loss_step = dq_loss_step + np.where(cond, dq_loss_cyc, 0.0)
+
+            # extra wearout at low voltages
+            cond_low = cond_i & (v_cell < params.AGE_C2)
+            if np.any(cond_low):
+                low_age_force = (params.AGE_C0
+                                 * np.exp(params.AGE_C1 * (1.0 / temp_cell_kelvin - 1.0 / params.T_REF_KELVIN))
+                                 * (params.AGE_C2 - v_cell))
+                diff_low = low_age_force - params.AGE_C3 * q_loss_cyclic_low_total  # = loss rate (per charge)
+                cond = cond_low & (diff_low > 0.0)  # wearout losses at low voltages can only be increased
+                dq_loss_low = diff_low * dq_abs  # loss rate (per charge) * charge (C-rate * s)
+                q_loss_cyclic_low_total = np.where(cond, np.minimum(q_loss_cyclic_low_total + dq_loss_low, 1.0),
+                                                   q_loss_cyclic_low_total)
+                dq_loss_step = dq_loss_step + np.where(cond, dq_loss_low, 0.0)
+
+            # lithium plating -> only when charging
+            cond_chg = cond_i & (c_rate_rel > 0.0)
+            if np.any(cond_chg):
+                r_eff = params.AGE_P0 + np.where(
+                    temp_cell_kelvin < params.AGE_P2,
+                    (params.AGE_P1 * np.maximum(params.AGE_P2 - temp_cell_kelvin, 0.0))**params.AGE_P3, 0.0)
+                r_eff = r_eff * np.exp(params.AGE_P4 * q_loss_total)
+                v_anode = get_v_anode_from_v_cell(v_cell)
+                v_plating = v_anode - r_eff * c_rate_rel  # here: c_rate_rel = c_chg_rate_rel
+                cond = cond_chg & (v_plating < 0.0)
+                # plating can occur. lithium stripping and intercalation of plated lithium is not modeled
+                dq_plating = np.abs(v_plating) * params.AGE_P5 * dt * np.maximum(c_rate_rel, 0.0)**params.AGE_P6
+                q_loss_plating_total = np.where(cond, np.minimum(q_loss_plating_total + dq_plating, 1.0),
+                                                q_loss_plating_total)
+                dq_loss_step = dq_loss_step + np.where(cond, dq_plating, 0.0)
+
+    dQ_loss_step = dq_loss_step * params.CAP_NOMINAL  # relative -> absolute losses in this timestep
+    cap_aged_end = np.where(valid, np.maximum(cap_aged_begin - dQ_loss_step, 0.0), cap_aged_begin)  # cannot be < 0 Ah
+    aging_states = np.array([q_loss_sei_total, q_loss_cyclic_total, q_loss_cyclic_low_total, q_loss_plating_total,
+                             Q_chg_total, Q_dischg_total, E_chg_total, E_dischg_total], dtype=np.float64)
+    return cap_aged_end, aging_states
+
+
+# calendar aging of the resting cells in mask (default: all cells) for dt [s] at the constant cell voltage v_cell [V]
+# and cell temperature temp_cell [°C] (exact solution) -> see apply_calendar_aging() in bat_model_v01.py. All inputs
+# are numpy arrays over the cells (dt, v_cell and temp_cell can also be scalars).
+def apply_calendar_aging(cap_aged_begin, aging_states, dt, v_cell, temp_cell, mask=None, params=None):
+    params = bat.get_params(params)
+    valid = ~(np.isnan(dt) | np.isnan(v_cell) | np.isnan(temp_cell)) & (cap_aged_begin > 0.0)
+    if mask is not None:
+        valid = valid & mask
+    if not np.any(valid):
+        return cap_aged_begin, aging_states  # invalid input or already at 0 Ah
+    # else:
+
+    q_loss_sei_total = aging_states[0]
+    with np.errstate(over='ignore', invalid='ignore'):
+        temp_cell_kelvin = temp_cell + bat.T_0_DEGC_IN_K
+        sei_force = (params.AGE_S0 * np.exp(params.AGE_S1 * (1.0 / temp_cell_kelvin - 1.0 / params.T_REF_KELVIN))
+                     * np.exp(params.AGE_S2 * (v_cell - params.V_REF)))
+        q_inf = sei_force / params.AGE_S3
+        cond = valid & (q_loss_sei_total < q_inf)  # SEI losses can only be increased, not decreased in this model
+        q_loss_sei_new = np.minimum(q_inf + (q_loss_sei_total - q_inf) * np.exp(-params.AGE_S3 * dt), 1.0)
+    q_loss_sei_new = np.where(cond, q_loss_sei_new, q_loss_sei_total)
+
+    dQ_loss = (q_loss_sei_new - q_loss_sei_total) * params.CAP_NOMINAL  # relative -> absolute losses
+    cap_aged_end = np.maximum(cap_aged_begin - dQ_loss, 0.0)  # capacity cannot be < 0 Ah
+    aging_states = aging_states.copy()
+    aging_states[0] = q_loss_sei_new
+    return cap_aged_end, aging_states
+
+
+# electrical and thermal cell model for all cells -> see cell_model() in bat_model_v01.py. Use get_cap_aged_model() for
+# cap_aged, so the SoC of cells without usable capacity stays constant.
+def cell_model(dt, soc, ocv, i_set, temp_cell, temp_ambient, cap_aged, r_cell, params):
+    # calculate new cell voltage, actual cell power and current (at the beginning of the timestep)
+    dv_cell = r_cell * i_set
+    v_cell = ocv + dv_cell
+    p_actual = v_cell * i_set
+
+    # calculate new SoC (at the end of the timestamp)
+    soc = soc + i_set * dt / (cap_aged * 3600.0)  # soc in %, i-set in A, dt in s, cap_aged in Ah
+
+    # calculate thermal losses during the timestep and new cell temperature after the timestep
+    p_loss = dv_cell * i_set  # R * I^2, but performance-optimized
+    temp_cell = temp_cell + ((temp_ambient + params.R_TH_CELL * p_loss - temp_cell) / params.R_TH_C_TH_CELL) * dt
+    return soc, v_cell, p_actual, temp_cell
+
+
+# return cap_aged for cell_model(): np.inf for cells with cap_aged <= 0 -> SoC of these cells is not changed
+def get_cap_aged_model(cap_aged):
+    return np.where(cap_aged > 0.0, cap_aged, np.inf)
+
+
+# set-point current for the power p_set for all cells -> see get_i_set_from_p_set() in bat_model_v01.py
+def get_i_set_from_p_set(p_set, ocv, r_cell, params):
+    # calculate set-point current for p_set (at the beginning of the timestep)
+    i_set = (-ocv + np.sqrt(np.maximum(ocv**2 + 4.0 * r_cell * p_set, 0.0))) / (2.0 * r_cell)
+
+    # calculate I_max_chg for V_CELL_MAX and I_min_dischg for V_CELL_MIN, limit i_cell if necessary
+    # (don't allow discharging when the cell should be charging and vice versa)
+    i_max_chg = np.minimum((params.V_CELL_MAX - ocv) / r_cell, params.I_CELL_MAX_CHG)
+    i_set_chg = np.minimum(np.maximum(i_set, 0.0), np.maximum(i_max_chg, 0.0))
+    i_min_dischg = np.maximum((params.V_CELL_MIN - ocv) / r_cell, params.I_CELL_MIN_DISCHG)
+    i_set_dischg = np.maximum(np.minimum(i_set, 0.0), np.minimum(i_min_dischg, 0.0))
+    return np.where(p_set > 0.0, i_set_chg, np.where(p_set < 0.0, i_set_dischg, 0.0))
+
+
+# set-point current for CC/CV for all cells -> see get_i_set_from_v_lim_i_lim() in bat_model_v01.py
+def get_i_set_from_v_lim_i_lim(v_lim, i_lim, ocv, r_cell):
+    i_v_lim = (v_lim - ocv) / r_cell
+    i_set_chg = np.where(ocv >= v_lim, 0.0, np.minimum(i_lim, i_v_lim))  # charging, 0 if charging level is reached
+    i_set_dischg = np.where(ocv <= v_lim, 0.0, np.maximum(i_lim, i_v_lim))  # discharging, 0 if level is reached
+    return np.where(i_lim > 0.0, i_set_chg, np.where(i_lim < 0.0, i_set_dischg, 0.0))
+
+
+# set-point current for CP/CV for all cells -> see get_i_set_from_v_lim_p_lim() in bat_model_v01.py
+def get_i_set_from_v_lim_p_lim(v_lim, p_lim, ocv, r_cell, params):
+    i_p_lim = (-ocv + np.sqrt(np.maximum(ocv**2 + 4.0 * r_cell * p_lim, 0.0))) / (2.0 * r_cell)
+    i_v_lim = (v_lim - ocv) / r_cell
+    i_set = np.where(i_p_lim > 0.0, np.minimum(i_p_lim, i_v_lim), np.maximum(i_p_lim, i_v_lim))
+
+    # calculate I_max_chg for V_CELL_MAX and I_min_dischg for V_CELL_MIN, limit i_cell if necessary
+    i_max_chg = np.minimum((np.minimum(params.V_CELL_MAX, v_lim) - ocv) / r_cell, params.I_CELL_MAX_CHG)
+    i_set_chg = np.where(i_p_lim < 0.0, 0.0, np.where(i_p_lim > i_max_chg, np.maximum(i_max_chg, 0.0), i_set))
+    i_min_dischg = np.maximum((params.V_CELL_MIN - ocv) / r_cell, params.I_CELL_MIN_DISCHG)
+    i_set_dischg = np.where(i_p_lim > 0.0, 0.0,
+                            np.where(i_p_lim < i_min_dischg, np.minimum(i_min_dischg, 0.0), i_set))
+    return np.where(p_lim > 0.0, i_set_chg, np.where(p_lim < 0.0, i_set_dischg, 0.0))
+
+
+# return open circuit voltage based on cell SoC for all cells -> see get_ocv_from_soc() in bat_model_v01.py
+def get_ocv_from_soc(soc):
+    if USE_LOOKUP_TABLES:
+        return bat.get_lookup_table("ocv_from_soc").get_array(soc)
+    # see "SoC OCV Curve at C_div_20 (0.15 A) for Python.xlsx"
+    lin_a = 3.3  # a
+    lin_b = 0.9  # b
+    low_ths = 0.1326
+    low_fac = 0.02  # d
+    low_exp = 28.0  # e
+    high_mid = 0.935  # f
+    high_delta = 0.065  # g
+    high_amp = 0.03  # h
+    v_ocv = lin_a + lin_b * soc
+    v_corr_low = low_fac * (1.0 - np.exp(low_exp * np.maximum(low_ths - soc, 0.0)))
+    v_corr_high = high_amp * (((soc - high_mid) / high_delta)**2 - 1.0)
+    return np.where(soc < low_ths, v_ocv + v_corr_low,
+                    np.where(soc > (high_mid - high_delta), v_ocv + v_corr_high, v_ocv))
+
+
+# return estimated anode potential [V] based on cell voltage [V] for all cells -> see bat_model_v01.py
+def get_v_anode_from_v_cell(v_cell):
+    if USE_LOOKUP_TABLES:
+        return bat.get_lookup_table("v_anode_from_v_cell").get_array(v_cell)
+    V1 = 4.095
+    V2 = 3.83
+    V3 = 3.65
+    V4 = 3.5
+    C1 = 2.5
+    M1 = 0.59047619
+    C2 = 0.082
+    C3 = 0.890555556
+    M3 = 0.211111111
+    C4 = 0.12
+    C5 = 2.15
+    M5 = 0.58
+    return np.where(v_cell > V2, np.where(v_cell > V1, C1 - M1 * v_cell, C2),
+                    np.where(v_cell > V4, np.where(v_cell > V3, C3 - M3 * v_cell, C4), C5 - M5 * v_cell))
@@ -0,0 +1,454 @@
+# Benchmark suite for the battery model (bat_model_v01.py) and the hot paths of the EV use case model
+# (use_case_model_EV_modular_v01.py). Each benchmark runs a fixed workload on synthetic inputs (no input data files
+# needed) and reports the runtime, simulated steps per second, simulated days per second, and the peak memory.
+# The results are stored as a .json file (see BENCHMARK_RESULT_DIR), so they can be compared between commits:
+#   python benchmark_model_v01.py                                      # run all benchmarks, store results
+#   python benchmark_model_v01.py --filter apply_cp_cv apply_pause     # only run benchmarks containing these names
+#   python benchmark_model_v01.py --compare benchmark_results/<older>.json   # report regressions compared to older run
+# With --compare, the exit code is 1 if a benchmark got slower by more than REGRESSION_TOLERANCE.
+# The EV use case benchmarks (simulate_day_*, ev_year) import use_case_model_EV_modular_v01.py and input_data_helper.py,
+# which need their libraries (see requirements.txt). Use --no-ev to only run the battery model benchmarks.
+# ev_year simulates a whole year and takes several minutes per run - use --repeat 1 --no-memory for a quick check.
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import datetime
+import platform
+import subprocess
+import tracemalloc
+import logging as std_logging
+import numpy as np
+import pandas as pd
+
+import bat_model_v01 as bat
+import driving_profile_helper as drv
+import scenario_helper as sc
+
+
+BENCHMARK_RESULT_DIR = "benchmark_results"
+BENCHMARK_FILENAME = "benchmark_%s_%s.json"  # % (commit, date)
+BENCHMARK_VERSION = 1  # increase if the workloads change -> results of different versions are not comparable
+REPEAT_DEFAULT = 5  # run each benchmark this often and use the fastest run (the peak memory is measured in extra run)
+REGRESSION_TOLERANCE = 0.1  # 0.1 = report a regression if a benchmark is more than 10 % slower than before
+SEED = 1234  # seed of the random generators (driving times, ...) -> all runs simulate the same
+TIMEZONE = 'Europe/Berlin'
+
+# synthetic inputs: all input data covers the simulated days (plus a margin for history/forecast of the grid signals)
+SIM_YEAR = 2023  # before input_data_helper.EL_GEN_DEMAND_DROP_DATA_START -> no shifting of the input data needed
+INPUT_DATE_START = datetime.date(SIM_YEAR - 1, 12, 1)
+INPUT_DATE_STOP = datetime.date(SIM_YEAR + 1, 1, 31)
+INPUT_FREQUENCY_DURATION = 24 * 60 * 60  # in s, one day of 1 s frequency data, used as ring buffer
+SIM_DAY_START = datetime.date(SIM_YEAR, 6, 5)  # Monday, first day of the simulate_day_* benchmarks
+SIM_DAY_TYPES = [drv.day_type.WORK_DAY] * 5 + [drv.day_type.FREE_DAY, drv.day_type.NO_CAR_USE_DAY,
+                                               drv.day_type.TRIP_DAY, drv.day_type.NO_CAR_USE_DAY]
+
+# battery model workloads
+T_START = 1685916000  # Mon Jun 05 2023 00:00:00 GMT+0200
+DT_ACTIVE = 30  # in s, like T_RESOLUTION_ACTIVE of the EV use case
+DT_CC_CV = 10  # in s
+DT_PROFILE = 1  # in s, like T_RESOLUTION_PROFILE
+DT_REST = 300  # in s, like T_RESOLUTION_REST
+N_INIT = 10000  # number of bat.init() calls
+N_CYCLES = 25  # number of charge/discharge cycles of apply_cp_cv / apply_cc_cv
+P_CHG_CELL = 10.5 * bat.wltp_profiles.P_EV_KW_TO_P_CELL_W  # 11 kW AC charging
+I_CHG_CELL = 3.0  # in A
+V_LIM_CHG = bat.get_ocv_from_soc(0.9)
+V_LIM_DISCHG = bat.get_ocv_from_soc(0.1)
+I_CUTOFF = bat.CAP_NOMINAL / 20.0
+N_PROFILE_REPEAT = 48  # maximum repetitions of the WLTP profiles (like DRIVING_PROFILE_TRIP_REPEAT)
+N_PROFILE_DISCHARGES = 10  # discharge the full cell this often with the repeated WLTP profile
+PAUSE_DURATION = 365 * 24 * 60 * 60  # in s
+AGING_DURATION = 7 * 24 * 60 * 60  # in s, duration of the 1 s profile of apply_aging_df
+
+
+# --- synthetic inputs -------------------------------------------------------------------------------------------------
+# unix timestamps (int64) from date_start to date_stop (including the whole day) with steps of dt seconds
+def get_unix_ixs(date_start, date_stop, dt):
+    t_u0 = pd.Timestamp("1970-01-01", tz='UTC')
+    ts_start = (pd.Timestamp(date_start, tz=TIMEZONE) - t_u0) // pd.Timedelta("1s")
+    ts_stop = (pd.Timestamp(date_stop + datetime.timedelta(days=1), tz=TIMEZONE) - t_u0) // pd.Timedelta("1s")
+    return np.arange(ts_start, ts_stop, dt, dtype=np.int64)
+
+
+# daily (phase 0 at midnight UTC) and yearly sine waves of the unix timestamps ixs
+def get_daily_yearly(ixs):
+    daily = np.sin((ixs % 86400) / 86400.0 * 2.0 * np.pi - 0.5 * np.pi)  # minimum at 00:00, maximum at 12:00
+    yearly = np.sin((ixs % 31557600) / 31557600.0 * 2.0 * np.pi - 0.5 * np.pi)  # minimum in January
+    return daily, yearly
+
+
+# returns the input_data of the EV use case (see run_models in use_case_model_EV_modular_v01.py) with synthetic but
+# plausible values in the same format as the input_data_helper.load_... functions (index: unix timestamps)
+def get_synthetic_input_data(date_start=INPUT_DATE_START, date_stop=INPUT_DATE_STOP, seed=SEED):
+    import input_data_helper  # only needed for the EV use case benchmarks
+    rng = np.random.default_rng(seed)
+
+    ixs = get_unix_ixs(date_start, date_stop, 600)  # 10 minutes, like the DWD data
+    daily, yearly = get_daily_yearly(ixs)
+    temp_ambient = pd.Series(10.0 + 9.0 * yearly + 4.0 * daily + rng.normal(0.0, 1.0, ixs.shape[0]), index=ixs)
+
+    ixs = get_unix_ixs(date_start, date_stop, 3600)  # hourly
+    daily, yearly = get_daily_yearly(ixs)
+    electricity_price = pd.Series(12.0 - 4.0 * daily + 2.0 * yearly + rng.normal(0.0, 2.0, ixs.shape[0]), index=ixs)
+    electricity_emissions = pd.Series(400.0 - 80.0 * daily - 40.0 * yearly + rng.normal(0.0, 20.0, ixs.shape[0]),
+                                      index=ixs)
+
+    ixs = get_unix_ixs(date_start, date_start, 1)[:INPUT_FREQUENCY_DURATION]  # 1 s
+    grid_frequency = pd.Series(50.0 + 0.03 * np.sin(ixs / 900.0) + rng.normal(0.0, 0.005, ixs.shape[0]), index=ixs)
+
+    ixs = get_unix_ixs(date_start, date_stop, 30)  # 30 s, like the HTW household load profile
+    daily, _ = get_daily_yearly(ixs)
+    load_profile = pd.Series(np.abs(400.0 + 250.0 * daily + rng.normal(0.0, 100.0, ixs.shape[0])), index=ixs)
+
+    ixs = get_unix_ixs(date_start, date_stop, 900)  # 15 minutes, like the SMARD data
+    daily, yearly = get_daily_yearly(ixs)
+    n = ixs.shape[0]
+    rel = {input_data_helper.GEN_PV: np.clip(daily, 0.0, None) * (0.5 - 0.2 * yearly),
+           input_data_helper.GEN_WIND_ONSHORE: np.clip(0.25 + 0.1 * yearly + rng.normal(0.0, 0.1, n), 0.0, 1.0),
+           input_data_helper.GEN_WIND_OFFSHORE: np.clip(0.4 + 0.1 * yearly + rng.normal(0.0, 0.1, n), 0.0, 1.0),
+           input_data_helper.GEN_BIOMASS: np.full(n, 0.55),
+           input_data_helper.GEN_HYDRO: np.full(n, 0.35)}
+    installed = {input_data_helper.GEN_PV: 70.0, input_data_helper.GEN_WIND_ONSHORE: 60.0,  # in GW
+                 input_data_helper.GEN_WIND_OFFSHORE: 8.0, input_data_helper.GEN_BIOMASS: 9.0,
+                 input_data_helper.GEN_HYDRO: 5.0}
+    el_gen_dem_df = pd.DataFrame(index=ixs, dtype=np.float64)
+    for gen, col in input_data_helper.el_gen_renewable_rel_columns.items():
+        el_gen_dem_df[col] = rel.get(gen)
+    for gen, col in input_data_helper.el_gen_renewable_installed_columns.items():
+        el_gen_dem_df[col] = installed.get(gen)
+    demand_gw = 55.0 + 10.0 * daily - 5.0 * yearly  # relative demand: GW_momentary / GWh_year
+    el_gen_dem_df[input_data_helper.el_demand_column] = (
+            demand_gw / (input_data_helper.get_demand_from_year(SIM_YEAR)
+                         * input_data_helper.el_gen_demand_yearly_conversion_mul))
+    return temp_ambient, electricity_price, electricity_emissions, grid_frequency, load_profile, el_gen_dem_df
+
+
+# --- battery model benchmarks -----------------------------------------------------------------------------------------
+# each benchmark function gets the input_data (None for the battery model benchmarks) and returns the number of
+# simulated steps (or calls, None if unknown) and the simulated time in s. The whole function is measured (small setup).
+
+def get_temp_ambient_ser():
+    ixs = np.arange(T_START - 86400, T_START + PAUSE_DURATION + 2 * 86400, 600, dtype=np.int64)
+    daily, yearly = get_daily_yearly(ixs)
+    return pd.Series(10.0 + 9.0 * yearly + 4.0 * daily, index=ixs)
+
+
+def bench_init(_input_data):
+    for _ in range(N_INIT):
+        bat.init()
+    return N_INIT, 0.0
+
+
+# charge/discharge cycles with apply_cp_cv (like the EV charging at home) or apply_cc_cv
+def bench_cv(use_cp):
+    temp_amb = get_temp_ambient_ser()
+    cap_aged, aging_states, temp_cell, soc = bat.init(storage_soc=0.1)
+    v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df = bat.init_empty_log()
+    t = T_START
+    for _ in range(N_CYCLES):
+        for v_lim, sign in ((V_LIM_CHG, 1.0), (V_LIM_DISCHG, -1.0)):
+            if use_cp:
+                fun, dt, lim = bat.apply_cp_cv, DT_ACTIVE, sign * P_CHG_CELL
+            else:
+                fun, dt, lim = bat.apply_cc_cv, DT_CC_CV, sign * I_CHG_CELL
+            (v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t) = \
+                fun(t, dt, v_lim, lim, sign * I_CUTOFF, temp_amb, v_cell_df, i_cell_df, p_cell_df, temp_cell_df,
+                    soc_df, cap_aged, aging_states, temp_cell, soc)
+    return len(v_cell_df), t - T_START
+
+
+def bench_cp_cv(_input_data):
+    return bench_cv(True)
+
+
+def bench_cc_cv(_input_data):
+    return bench_cv(False)
+
+
+# WLTP driving profile (repeated until empty, like long-distance trips in the EV use case), starting with a full cell
+def bench_power_profile(profile):
+    p_set = bat.PowerProfile(profile, DT_PROFILE)
+    cap_aged, aging_states, temp_cell, _ = bat.init()
+    v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df = bat.init_empty_log()
+    t = T_START
+    for _ in range(N_PROFILE_DISCHARGES):
+        (v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t) = \
+            bat.apply_power_profile_repeat(t, DT_PROFILE, p_set, N_PROFILE_REPEAT, 25.0, None, V_LIM_DISCHG,
+                                           v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df,
+                                           cap_aged, aging_states, temp_cell, 1.0)[:10]
+    return len(v_cell_df), t - T_START
+
+
+def bench_power_profile_full(_input_data):
+    return bench_power_profile(bat.wltp_profiles.full)
+
+
+def bench_power_profile_extra_high(_input_data):
+    return bench_power_profile(bat.wltp_profiles.extra_high)
+
+
+# resting cell with a varying ambient temperature (interpolated to the steps)
+def bench_pause(_input_data):
+    temp_amb = get_temp_ambient_ser()
+    cap_aged, aging_states, temp_cell, soc = bat.init(storage_soc=0.8)
+    v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df = bat.init_empty_log()
+    (v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t) = \
+        bat.apply_pause(T_START, DT_REST, PAUSE_DURATION, temp_amb, v_cell_df, i_cell_df, p_cell_df, temp_cell_df,
+                        soc_df, cap_aged, aging_states, temp_cell, soc)
+    return len(v_cell_df), t - T_START
+
+
+def bench_aging_df(_input_data):
+    ixs = np.arange(T_START, T_START + AGING_DURATION, DT_PROFILE, dtype=np.float64)
+    daily, _ = get_daily_yearly(ixs)
+    v_cell_df = pd.Series(3.7 + 0.3 * daily, index=ixs)
+    i_cell_df = pd.Series(2.0 * np.sin(ixs / 600.0), index=ixs)
+    temp_cell_df = pd.Series(25.0 + 5.0 * daily, index=ixs)
+    cap_aged, aging_states, _, _ = bat.init()
+    bat.apply_aging_df(cap_aged, aging_states, DT_PROFILE, v_cell_df, i_cell_df, temp_cell_df)
+    return ixs.shape[0], float(AGING_DURATION)
+
+
+# --- EV use case benchmarks -------------------------------------------------------------------------------------------
+def get_ev_module():
+    import use_case_model_EV_modular_v01 as ev  # needs the libraries for plotting/logging
+    ev.logging.log.setLevel(std_logging.WARNING)  # no debug output for every simulated day
+    return ev
+
+
+def get_grid_input_data(ev, input_data):
+    temp_ambient, electricity_price, electricity_emissions, grid_frequency, load_profile, el_gen_dem_df = input_data
+    return {ev.COL_INPUT_DATA_T: temp_ambient,
+            ev.COL_INPUT_DATA_PRICE: electricity_price,
+            ev.COL_INPUT_DATA_EMISSIONS: electricity_emissions,
+            ev.COL_INPUT_DATA_FREQUENCY: grid_frequency,
+            ev.COL_INPUT_DATA_LOAD_PROFILE: load_profile,
+            ev.COL_INPUT_DATA_EL_GEN_DEM: el_gen_dem_df}
+
+
+# scenario of the EV use case with the charging strategy chg_strat at home (None: first scenario of SCENARIO_LIST)
+def get_ev_scenario(ev, chg_strat, date_start, date_stop):
+    scenario = ev.SCENARIO_LIST[0].copy()
+    scenario[sc.ID] = 0
+    scenario[sc.SIM_START] = date_start
+    scenario[sc.SIM_STOP] = date_stop
+    if chg_strat is not None:
+        scenario[sc.HOME] = {sc.CHG_STRATEGY: chg_strat, sc.CHG_P: ev.P_CHG_EV_AC_STD_KW,
+                             sc.CHG_V_LIM: ev.V_CHG_LIMIT_80, sc.CHG_I_CO: ev.I_CHG_CUTOFF_C_20}
+        if chg_strat not in [sc.CHG_STRAT.EARLY, sc.CHG_STRAT.LATE]:  # all others need a lower SoC limit
+            scenario[sc.HOME][sc.CHG_SOC_LOW] = ev.SOC_THS_40
+        scenario[sc.WORK] = scenario[sc.WORK].copy()
+        for key in [sc.CHG_SOC_LOW, sc.CHG_P, sc.CHG_V_LIM, sc.CHG_I_CO]:
+            scenario[sc.WORK].pop(key, None)
+        scenario[sc.WORK][sc.CHG_STRATEGY] = sc.CHG_STRAT.NONE  # only charge at home (and on trips)
+    if not sc.validate_scenario_list([scenario]):
+        raise ValueError("invalid benchmark scenario for charging strategy %s" % str(chg_strat))
+    return scenario
+
+
+# simulate the days car_usage_days (pandas.Series, index: day (pd.Timestamp), value: drv.day_type) of the scenario,
+# like model_scenario in use_case_model_EV_modular_v01.py (without plots, log export, and checkpoints)
+def simulate_ev_days(ev, scenario, car_usage_days, input_data):
+    import input_data_helper
+    random.seed(SEED)
+    grid_input_data = get_grid_input_data(ev, input_data)
+    t_u0 = pd.Timestamp("1970-01-01", tz='UTC')
+    ts_min_roi = (car_usage_days.index[0] - t_u0) // pd.Timedelta("1s")
+    ts_max_roi = (car_usage_days.index[-1] + datetime.timedelta(days=1) - t_u0) // pd.Timedelta("1s")
+    temp_ambient_df = grid_input_data[ev.COL_INPUT_DATA_T]
+    ts_resolution = temp_ambient_df.index[1] - temp_ambient_df.index[0]
+    temp_ambient_df = input_data_helper.get_temperature_data(
+        temp_ambient_df, np.arange(ts_min_roi, ts_max_roi, ts_resolution), True)
+    grid_input_data[ev.COL_INPUT_DATA_GRID_SIGNALS] = ev.get_grid_signal_timeline(scenario, grid_input_data, ts_min_roi,
+                                                                               ts_max_roi)
+    grid_input_data[ev.COL_INPUT_DATA_GRID_SIGNAL_EXTREMA] = {}
+
+    cap_aged, aging_states, temp_cell, soc = bat.init()
+    if ev.LOG_ENVELOPE_INTERVAL is None:
+        v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df = bat.init_empty_log()
+        p_grid_df = pd.Series(dtype=np.float64)
+    else:
+        v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df = bat.init_envelope_log(
+            ev.LOG_ENVELOPE_INTERVAL, ev.LOG_FULL_RESOLUTION_WINDOW)
+        p_grid_df = bat.EnvelopeLog(ev.LOG_ENVELOPE_INTERVAL, ev.LOG_FULL_RESOLUTION_WINDOW)
+    grid_params = [0.0] * 13
+    driving_distance = 0.0
+    num_infos, num_warnings, num_errors = 0, 0, 0
+    t_start = car_usage_days.index[0].timestamp()
+    t_begin = t_start
+    for date, car_usage_day_type in car_usage_days.items():
+        (cap_aged, aging_states, temp_cell, soc, v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, t_start,
+         p_grid_df, grid_params, driving_distance, num_infos, num_warnings, num_errors) = \
+            ev.simulate_day(scenario, date, t_start, car_usage_day_type, temp_ambient_df, cap_aged, aging_states,
+                            temp_cell, soc, v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, p_grid_df,
+                            grid_input_data, grid_params, driving_distance, num_infos, num_warnings, num_errors)
+    if num_errors > 0:
+        raise RuntimeError("%u errors while simulating scenario %u" % (num_errors, scenario[sc.ID]))
+    return None, t_start - t_begin
+
+
+def get_bench_simulate_day(chg_strat):
+    def bench_simulate_day(input_data):
+        ev = get_ev_module()
+        days = pd.date_range(SIM_DAY_START, periods=len(SIM_DAY_TYPES), freq="D", tz=TIMEZONE)
+        car_usage_days = pd.Series(SIM_DAY_TYPES, index=days)
+        date_stop = SIM_DAY_START + datetime.timedelta(days=len(SIM_DAY_TYPES) - 1)
+        scenario = get_ev_scenario(ev, chg_strat, SIM_DAY_START, date_stop)
+        return simulate_ev_days(ev, scenario, car_usage_days, input_data)
+    return bench_simulate_day
+
+
+def bench_ev_year(input_data):
+    ev = get_ev_module()
+    date_start = datetime.date(SIM_YEAR, 1, 1)
+    date_stop = datetime.date(SIM_YEAR, 12, 31)
+    random.seed(SEED)
+    car_usage_days = drv.get_car_usage_days_v01(date_start, date_stop, TIMEZONE)
+    scenario = get_ev_scenario(ev, None, date_start, date_stop)
+    return simulate_ev_days(ev, scenario, car_usage_days, input_data)
+
+
+# (name, function, uses_ev_model)
+BENCHMARKS = [("bat_init", bench_init, False),
+              ("apply_cp_cv", bench_cp_cv, False),
+              ("apply_cc_cv", bench_cc_cv, False),
+              ("apply_power_profile_wltp_full", bench_power_profile_full, False),
+              ("apply_power_profile_wltp_extra_high", bench_power_profile_extra_high, False),
+              ("apply_pause", bench_pause, False),
+              ("apply_aging_df", bench_aging_df, False)]
+BENCHMARKS += [("simulate_day_%s" % strat.name, get_bench_simulate_day(strat), True)
+               for strat in sc.CHG_STRAT if strat != sc.CHG_STRAT.NONE]
+BENCHMARKS += [("ev_year", bench_ev_year, True)]
+
+
+# --- running, storing, and comparing ----------------------------------------------------------------------------------
+# run benchmark fun repeat times, returns the result dict of the fastest run (and the peak memory of an extra run if
+# measure_memory is True - tracemalloc makes this run a few times slower)
+def run_benchmark(fun, input_data, repeat, measure_memory=True):
+    runtime = None
+    n_steps, t_sim = None, 0.0
+    for _ in range(repeat):
+        np.random.seed(SEED)
+        random.seed(SEED)
+        t0 = time.perf_counter()
+        n_steps, t_sim = fun(input_data)
+        dt = time.perf_counter() - t0
+        if (runtime is None) or (dt < runtime):
+            runtime = dt
+    peak_mem = None
+    if measure_memory:
+        tracemalloc.start()  # slows down the run -> separate run for the memory
+        fun(input_data)
+        peak_mem = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    sim_days = t_sim / 86400.0
+    return {"runtime_s": runtime,
+            "steps": n_steps,
+            "steps_per_s": (n_steps / runtime) if (n_steps is not None) else None,
+            "simulated_days": sim_days,
+            "simulated_days_per_s": (sim_days / runtime) if (sim_days > 0.0) else None,
+            "peak_memory_mb": peak_mem}
+
+
+def get_commit():
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL,
+                                         cwd=os.path.dirname(os.path.abspath(__file__)))
+        return commit.decode().strip()
+    except (OSError, subprocess.CalledProcessError):  # no git (repository)
+        return None
+
+
+def run(names=None, use_ev=True, repeat=REPEAT_DEFAULT, measure_memory=True):
+    benchmarks = [(name, fun, is_ev) for name, fun, is_ev in BENCHMARKS
+                  if (use_ev or not is_ev) and ((names is None) or any(n in name for n in names))]
+    input_data = None
+    if any(is_ev for _, _, is_ev in benchmarks):
+        input_data = get_synthetic_input_data()
+    results = {}
+    for name, fun, is_ev in benchmarks:
+        print("%-45s ..." % name, end="", flush=True)
+        result = run_benchmark(fun, input_data if is_ev else None, repeat, measure_memory)
+        results[name] = result
+        print("\r%-45s %s" % (name, get_result_text(result)), flush=True)
+    return {"version": BENCHMARK_VERSION,
+            "commit": get_commit(),
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "results": results}
+
+
+def get_result_text(result):
+    text = "%9.3f s" % result["runtime_s"]
+    if result["steps_per_s"] is not None:
+        text = text + "  %12.0f steps/s" % result["steps_per_s"]
+    else:
+        text = text + "  %20s" % ""
+    if result["simulated_days_per_s"] is not None:
+        text = text + "  %10.2f days/s" % result["simulated_days_per_s"]
+    else:
+        text = text + "  %17s" % ""
+    if result["peak_memory_mb"] is not None:
+        text = text + "  %8.1f MB" % result["peak_memory_mb"]
+    return text
+
+
+def save_results(report, filename=None):
+    if filename is None:
+        os.makedirs(BENCHMARK_RESULT_DIR, exist_ok=True)
+        date = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        filename = os.path.join(BENCHMARK_RESULT_DIR, BENCHMARK_FILENAME % (report["commit"] or "unknown", date))
+    with open(filename, "w") as file:
+        json.dump(report, file, indent=2)
+    return filename
+
+
+# print the runtimes of report compared to baseline (both: see run()), returns the names of the regressions
+def compare_results(report, baseline, tolerance=REGRESSION_TOLERANCE):
+    if baseline.get("version") != report["version"]:
+        print("Warning: benchmark versions differ (%s vs. %s) - the workloads might not be comparable"
+              % (str(baseline.get("version")), str(report["version"])))
+    print("\nComparison to %s (%s):" % (str(baseline.get("commit")), str(baseline.get("date"))))
+    regressions = []
+    for name, result in report["results"].items():
+        if name not in baseline["results"]:
+            continue
+        runtime_old = baseline["results"][name]["runtime_s"]
+        ratio = result["runtime_s"] / runtime_old
+        note = ""
+        if ratio > (1.0 + tolerance):
+            note = "REGRESSION"
+            regressions.append(name)
+        elif ratio < (1.0 - tolerance):
+            note = "faster"
+        print("%-45s %9.3f s -> %9.3f s  (x%.2f)  %s" % (name, runtime_old, result["runtime_s"], ratio, note))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="benchmark the battery model and the EV use case model")
+    parser.add_argument("--filter", nargs="+", default=None,
+                        help="only run benchmarks whose name contains one of these strings")
+    parser.add_argument("--no-ev", action="store_true", help="don't run the EV use case benchmarks")
+    parser.add_argument("--repeat", type=int, default=REPEAT_DEFAULT, help="runs per benchmark (fastest is used)")
+    parser.add_argument("--no-memory", action="store_true", help="don't measure the peak memory (saves one run)")
+    parser.add_argument("--output", default=None, help="result .json file (default: see BENCHMARK_RESULT_DIR)")
+    parser.add_argument("--compare", default=None, help="result .json file of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE,
+                        help="relative slowdown reported as regression with --compare (0.1 = 10 %%)")
+    args = parser.parse_args()
+
+    benchmark_report = run(args.filter, not args.no_ev, args.repeat, not args.no_memory)
+    print("Results saved to %s" % save_results(benchmark_report, args.output))
+    if args.compare is not None:
+        with open(args.compare, "r") as baseline_file:
+            if len(compare_results(benchmark_report, json.load(baseline_file), args.tolerance)) > 0:
+                sys.exit(1)
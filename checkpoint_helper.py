@@ -0,0 +1,65 @@
+# helper functions to save and load checkpoints of long simulations (e.g., of use_case_model_EV_modular_v01.py), so a
+# simulation that crashed or was preempted can be resumed from its last checkpoint instead of starting over.
+# A checkpoint is a tuple of values (e.g., cell state, logs, random generator state, ...) that is pickled to
+#   <filename_base>.checkpoint
+# The file is written to a temporary file first and then renamed, so a crash while saving keeps the previous checkpoint.
+# When the simulation is complete, set_completed() replaces the checkpoint by a marker file <filename_base>.done.
+# Note: checkpoints are only meant to be loaded with the same version of the scripts (and the libraries) - pickle files
+# can execute code when loaded, so only load checkpoints that you created yourself.
+
+import os
+import pickle
+
+CHECKPOINT_VERSION = 1  # increase if the content of the checkpoints changes -> older checkpoints can't be loaded
+CHECKPOINT_EXTENSION = ".checkpoint"
+COMPLETED_EXTENSION = ".done"
+TEMP_EXTENSION = ".tmp"
+
+
+# save values (tuple of picklable objects) as the checkpoint of filename_base (replaces the previous checkpoint)
+def save_checkpoint(filename_base, values):
+    directory = os.path.dirname(filename_base)
+    if (directory != "") and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+    filename = filename_base + CHECKPOINT_EXTENSION
+    filename_temp = filename + TEMP_EXTENSION
+    with open(filename_temp, "wb") as file:
+        pickle.dump((CHECKPOINT_VERSION, values), file, protocol=pickle.HIGHEST_PROTOCOL)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(filename_temp, filename)  # atomic
+
+
+# returns the values of the checkpoint of filename_base, or None if there is no checkpoint
+def load_checkpoint(filename_base):
+    filename = filename_base + CHECKPOINT_EXTENSION
+    if not os.path.exists(filename):
+        return None
+    with open(filename, "rb") as file:
+        version, values = pickle.load(file)
+    if version != CHECKPOINT_VERSION:
+        raise ValueError("checkpoint %s has version %u, expected %u - can't resume"
+                         % (filename, version, CHECKPOINT_VERSION))
+    return values
+
+
+# mark the simulation of filename_base as completed (and delete its checkpoint)
+def set_completed(filename_base):
+    directory = os.path.dirname(filename_base)
+    if (directory != "") and not os.path.exists(directory):  # no checkpoint saved yet (e.g., short simulation)
+        os.makedirs(directory, exist_ok=True)
+    with open(filename_base + COMPLETED_EXTENSION, "w") as file:
+        file.write("completed\n")
+    if os.path.exists(filename_base + CHECKPOINT_EXTENSION):
+        os.remove(filename_base + CHECKPOINT_EXTENSION)
+
+
+def is_completed(filename_base):
+    return os.path.exists(filename_base + COMPLETED_EXTENSION)
+
+
+# delete the checkpoint and completed marker of filename_base (e.g., when starting the simulation from the beginning)
+def clear_checkpoint(filename_base):
+    for extension in [CHECKPOINT_EXTENSION, COMPLETED_EXTENSION]:
+        if os.path.exists(filename_base + extension):
+            os.remove(filename_base + extension)
@@ -0,0 +1,407 @@
+# Golden-equivalence check of the battery model variants: runs the same workloads (sequences of operations like CP-CV
+# charging, driving profiles, pauses, cycles and check-ups) through the reference model (bat_model_v01.py) and the other
+# backends (bat_model_v01_fast.py, bat_model_v01_batch.py, ...) and compares the final cell state (cap_aged, all
+# aging_states, soc, temp_cell and t) and - optionally - the logged trajectories of each operation.
+# The final states of the reference are also compared with the stored golden snapshots (GOLDEN_FILENAME), so changes
+# of the reference results themselves are detected as well (bat_model_v01_fast.py uses the same model engine, so it
+# always matches the reference). The snapshots are a list: the results of the original model ("baseline"), followed by
+# one snapshot per documented change of the model results (name and description in the file). The reference is compared
+# with the last snapshot; the deviation from the baseline is reported.
+#   python equivalence_model_v01.py                                 # check all backends with all workloads
+#   python equivalence_model_v01.py --backends fast --workloads pause # only check some backends/workloads
+#   python equivalence_model_v01.py --logs --rtol 1e-6 --atol 1e-9  # also compare the logs, other tolerances
+#   python equivalence_model_v01.py --add-golden NAME DESCRIPTION   # store the current reference results as snapshot
+# A value is equal if abs(value - reference) <= atol + rtol * abs(reference) (like numpy.isclose). The exit code is 1 if
+# any value differs. New engines are added with a run_... function (see run_fast) and an entry in BACKENDS - it gets
+# a workload and returns the final state and the logs of each operation (None for logs that the engine doesn't record).
+# Operations that a backend doesn't support raise NotImplementedError and are reported as skipped. Only add a golden
+# snapshot if the model results were changed on purpose, and describe why they changed.
+
+import os
+import sys
+import json
+import argparse
+import numpy as np
+import pandas as pd
+
+import bat_model_v01 as bat
+import bat_model_v01_fast as bat_fast
+import bat_model_v01_batch as bat_batch
+
+
+REFERENCE_BACKEND = "ref"
+GOLDEN_BACKEND = "golden"  # label of the comparison of the reference with the golden snapshot
+GOLDEN_FILENAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), "equivalence_model_v01_golden.json")
+ABS_TOL_DEFAULT = 1e-12  # absolute tolerance (capacity in Ah, aging states in Ah, SoC in 0...1, temperature in °C)
+REL_TOL_DEFAULT = 1e-9  # relative tolerance
+LOG_NAMES = ("v_cell", "i_cell", "p_cell", "temp_cell", "soc")
+STATE_NAMES = ("cap_aged",) + bat.AGING_STATE_NAMES + ("soc", "temp_cell", "t")
+N_DIFF_SHOW = 3  # show the first N_DIFF_SHOW differing samples of a log
+
+T_START = 1685916000  # Mon Jun 05 2023 00:00:00 GMT+0200
+DT_ACTIVE = 30  # in s
+DT_CC_CV = 10  # in s
+DT_PROFILE = 1  # in s
+DT_REST = 300  # in s
+P_CHG_CELL = 10.5 * bat.wltp_profiles.P_EV_KW_TO_P_CELL_W  # 11 kW AC charging
+I_CHG_CELL = 3.0  # in A
+I_DISCHG_CELL = -3.0  # in A
+I_CUTOFF = bat.CAP_NOMINAL / 20.0
+V_LIM_CHG = bat.get_ocv_from_soc(0.9)
+V_LIM_DISCHG = bat.get_ocv_from_soc(0.1)
+DAY = 24 * 60 * 60  # in s
+
+# operations of the workloads (tuples, the first entry is the operation name, t and the cell state are passed on):
+#   ("cp_cv", dt, v_lim, p_lim, i_cutoff)                           -> apply_cp_cv
+#   ("cc_cv", dt, v_lim, i_lim, i_cutoff)                           -> apply_cc_cv
+#   ("profile", dt, p_set_df)                                       -> apply_power_profile
+#   ("profile_repeat", dt, p_set_df, n_repeat_max, v_max, v_min)    -> apply_power_profile_repeat
+#   ("pause", dt, duration)                                         -> apply_pause
+#   ("cycles", n_cycles, dt_active, dt_rest, v_max, v_min, i_chg, i_dischg, i_cutoff, rest_duration)  -> apply_cycles
+#   ("checkup", dt_active, dt_rest, v_min_op, i_chg_op, i_dischg_op, i_chg_cutoff_op, i_dischg_cutoff_op, temp_amb_op)
+#                                                                   -> apply_checkup
+
+
+# ambient temperature with a daily (and slow seasonal) variation (10 minutes resolution, like the DWD data)
+def get_temp_ambient_ser(duration):
+    ixs = np.arange(T_START - DAY, T_START + duration + 2 * DAY, 600, dtype=np.int64)
+    daily = np.sin((ixs % DAY) / DAY * 2.0 * np.pi - 0.5 * np.pi)
+    seasonal = np.sin((ixs - T_START) / (365.25 * DAY) * 2.0 * np.pi)
+    return pd.Series(18.0 + 8.0 * seasonal + 5.0 * daily, index=ixs)
+
+
+# workloads: name -> (storage_soc, temp_amb, list of operations). Each workload starts with init(storage_soc=...).
+def get_workloads():
+    temp_amb_ser = get_temp_ambient_ser(30 * DAY)
+    cp_cv_day = [("cp_cv", DT_ACTIVE, V_LIM_CHG, P_CHG_CELL, I_CUTOFF), ("pause", DT_REST, 6 * 3600),
+                 ("profile", DT_PROFILE, bat.wltp_profiles.full), ("pause", DT_REST, 8 * 3600),
+                 ("profile", DT_PROFILE, bat.wltp_profiles.full), ("pause", DT_REST, 8 * 3600)]
+    return {
+        "cp_cv": (0.1, 25.0, [("cp_cv", DT_ACTIVE, V_LIM_CHG, P_CHG_CELL, I_CUTOFF),
+                              ("cp_cv", DT_ACTIVE, V_LIM_DISCHG, -P_CHG_CELL, -I_CUTOFF)] * 3),
+        "cc_cv": (0.1, 25.0, [("cc_cv", DT_CC_CV, V_LIM_CHG, I_CHG_CELL, I_CUTOFF),
+                              ("cc_cv", DT_CC_CV, V_LIM_DISCHG, I_DISCHG_CELL, -I_CUTOFF)] * 3),
+        "profile": (0.9, 25.0, [("profile", DT_PROFILE, bat.wltp_profiles.full),
+                                ("profile", DT_PROFILE, bat.wltp_profiles.extra_high)]),
+        "profile_repeat": (1.0, 25.0, [("profile_repeat", DT_PROFILE, bat.wltp_profiles.full, 48, None, V_LIM_DISCHG),
+                                       ("cp_cv", DT_ACTIVE, V_LIM_CHG, P_CHG_CELL, I_CUTOFF)]),
+        "pause": (0.8, temp_amb_ser, [("pause", DT_REST, 30 * DAY)]),
+        "pause_odd_duration": (0.5, 30.0, [("pause", DT_REST, 12345), ("pause", DT_REST, 299)]),
+        "ev_days": (0.5, temp_amb_ser, cp_cv_day * 5),
+        "cycles": (0.5, 25.0, [("cycles", 3, DT_CC_CV, DT_REST, bat.V_CELL_MAX, bat.V_CELL_MIN, I_CHG_CELL,
+                                I_DISCHG_CELL, I_CUTOFF, -I_CUTOFF, 1800)]),
+        "checkup": (0.5, 25.0, [("checkup", DT_CC_CV, DT_REST, bat.V_CELL_MIN, I_CHG_CELL, I_DISCHG_CELL, I_CUTOFF,
+                                 -I_CUTOFF, 25.0)]),
+    }
+
+
+# --- backends ---------------------------------------------------------------------------------------------------------
+# each run_... function gets a workload and returns (state, op_logs):
+#   state       tuple of floats in the order of STATE_NAMES (cap_aged, 8 aging states, soc, temp_cell, t)
+#   op_logs     list (one entry per operation) of dicts: log name (see LOG_NAMES) -> pandas.Series (missing: not logged)
+
+def get_state(cap_aged, aging_states, temp_cell, soc, t):
+    return (float(cap_aged),) + tuple(float(a) for a in aging_states) + (float(soc), float(temp_cell), float(t))
+
+
+# reference: bat_model_v01.py with all logs
+def run_ref(workload):
+    storage_soc, temp_amb, operations = workload
+    cap_aged, aging_states, temp_cell, soc = bat.init(storage_soc=storage_soc)
+    t = T_START
+    op_logs = []
+    for op in operations:
+        logs = bat.init_empty_log()
+        name, args = op[0], op[1:]
+        if name == "cp_cv":
+            dt, v_lim, p_lim, i_cutoff = args
+            res = bat.apply_cp_cv(t, dt, v_lim, p_lim, i_cutoff, temp_amb, *logs, cap_aged, aging_states, temp_cell,
+                                  soc)
+        elif name == "cc_cv":
+            dt, v_lim, i_lim, i_cutoff = args
+            res = bat.apply_cc_cv(t, dt, v_lim, i_lim, i_cutoff, temp_amb, *logs, cap_aged, aging_states, temp_cell,
+                                  soc)
+        elif name == "profile":
+            dt, p_set_df = args
+            res = bat.apply_power_profile(t, dt, p_set_df, temp_amb, *logs, cap_aged, aging_states, temp_cell, soc)
+        elif name == "profile_repeat":
+            dt, p_set_df, n_repeat_max, v_max, v_min = args
+            res = bat.apply_power_profile_repeat(t, dt, p_set_df, n_repeat_max, temp_amb, v_max, v_min, *logs,
+                                                 cap_aged, aging_states, temp_cell, soc)[:10]
+        elif name == "pause":
+            dt, duration = args
+            res = bat.apply_pause(t, dt, duration, temp_amb, *logs, cap_aged, aging_states, temp_cell, soc)
+        elif name == "cycles":
+            n_cycles, dt_active, dt_rest, v_max, v_min, i_chg, i_dischg, i_chg_cutoff, i_dischg_cutoff, rest = args
+            res = bat.apply_cycles(n_cycles, t, None, dt_active, dt_rest, v_max, v_min, i_chg, i_dischg, i_chg_cutoff,
+                                   i_dischg_cutoff, rest, True, temp_amb, *logs, cap_aged, aging_states, temp_cell, soc)
+        elif name == "checkup":
+            res = bat.apply_checkup(t, *args, *logs, cap_aged, aging_states, temp_cell, soc)
+        else:
+            raise NotImplementedError("operation '%s'" % name)
+        logs, (cap_aged, aging_states, temp_cell, soc, t) = res[:5], res[5:10]
+        op_logs.append({LOG_NAMES[i]: logs[i].to_series() for i in range(len(LOG_NAMES))})
+    return get_state(cap_aged, aging_states, temp_cell, soc, t), op_logs
+
+
+# bat_model_v01_fast.py: only the power is logged (apply_cp_cv, apply_power_profile)
+def run_fast(workload):
+    storage_soc, temp_amb, operations = workload
+    cap_aged, aging_states, temp_cell, soc = bat_fast.init(storage_soc=storage_soc)
+    t = T_START
+    op_logs = []
+    for op in operations:
+        name, args = op[0], op[1:]
+        logs = {}
+        if name == "cp_cv":
+            dt, v_lim, p_lim, i_cutoff = args
+            cap_aged, aging_states, temp_cell, soc, t, p_cell_df, _ = bat_fast.apply_cp_cv(
+                t, dt, v_lim, p_lim, i_cutoff, temp_amb, None, cap_aged, aging_states, temp_cell, soc)
+            logs["p_cell"] = p_cell_df
+        elif name == "profile":
+            dt, p_set_df = args
+            cap_aged, aging_states, temp_cell, soc, t, p_new = bat_fast.apply_power_profile(
+                t, dt, p_set_df, temp_amb, cap_aged, aging_states, temp_cell, soc)
+            if p_new is not None:
+                logs["p_cell"] = p_new
+        elif name == "profile_repeat":
+            dt, p_set_df, n_repeat_max, v_max, v_min = args
+            cap_aged, aging_states, temp_cell, soc, t, _ = bat_fast.apply_power_profile_repeat(
+                t, dt, p_set_df, n_repeat_max, temp_amb, v_max, v_min, cap_aged, aging_states, temp_cell, soc)
+        elif name == "pause":
+            dt, duration = args
+            cap_aged, aging_states, temp_cell, soc, t = bat_fast.apply_pause(
+                t, dt, duration, temp_amb, cap_aged, aging_states, temp_cell, soc)
+        else:
+            raise NotImplementedError("operation '%s'" % name)
+        op_logs.append(logs)
+    return get_state(cap_aged, aging_states, temp_cell, soc, t), op_logs
+
+
+# bat_model_v01_batch.py with a single cell (nothing is logged)
+def run_batch(workload):
+    storage_soc, temp_amb, operations = workload
+    cap_aged, aging_states, temp_cell, soc = bat_batch.init(1, storage_soc=storage_soc)
+    t = T_START
+    for op in operations:
+        name, args = op[0], op[1:]
+        if name == "cp_cv":
+            dt, v_lim, p_lim, i_cutoff = args
+            res = bat_batch.apply_cp_cv(t, dt, v_lim, p_lim, i_cutoff, temp_amb, cap_aged, aging_states, temp_cell, soc)
+        elif name == "cc_cv":
+            dt, v_lim, i_lim, i_cutoff = args
+            res = bat_batch.apply_cc_cv(t, dt, v_lim, i_lim, i_cutoff, temp_amb, cap_aged, aging_states, temp_cell, soc)
+        elif name == "profile":
+            dt, p_set_df = args
+            res = bat_batch.apply_power_profile(t, dt, p_set_df, temp_amb, cap_aged, aging_states, temp_cell, soc)
+        elif name == "profile_repeat":
+            dt, p_set_df, n_repeat_max, v_max, v_min = args
+            res = bat_batch.apply_power_profile_repeat(t, dt, p_set_df, n_repeat_max, temp_amb, v_max, v_min,
+                                                       cap_aged, aging_states, temp_cell, soc)
+        elif name == "pause":
+            dt, duration = args
+            res = bat_batch.apply_pause(t, dt, duration, temp_amb, cap_aged, aging_states, temp_cell, soc)
+        elif name == "cycles":
+            n_cycles, dt_active, dt_rest, v_max, v_min, i_chg, i_dischg, i_chg_cutoff, i_dischg_cutoff, rest = args
+            res = bat_batch.apply_cycles(n_cycles, t, None, dt_active, dt_rest, v_max, v_min, i_chg, i_dischg,
+                                         i_chg_cutoff, i_dischg_cutoff, rest, True, temp_amb, cap_aged, aging_states,
+                                         temp_cell, soc)
+        elif name == "checkup":
+            res = bat_batch.apply_checkup(t, *args, cap_aged, aging_states, temp_cell, soc)
+        else:
+            raise NotImplementedError("operation '%s'" % name)
+        cap_aged, aging_states, temp_cell, soc, t = res[:5]
+    return get_state(cap_aged[0], aging_states[:, 0], temp_cell[0], soc[0], t[0]), [{} for _ in operations]
+
+
+BACKENDS = {REFERENCE_BACKEND: run_ref, "fast": run_fast, "batch": run_batch}
+
+
+# --- comparison -------------------------------------------------------------------------------------------------------
+# returns the absolute and relative difference (relative to the reference, inf if the reference is 0 and value isn't)
+def get_diff(value, reference):
+    diff = abs(value - reference)
+    if diff == 0.0:
+        return 0.0, 0.0
+    return diff, (diff / abs(reference)) if reference != 0.0 else float("inf")
+
+
+def is_close(value, reference, atol, rtol):
+    return abs(value - reference) <= (atol + rtol * abs(reference))
+
+
+# compare the final state -> returns a list of (name, value, reference, abs. diff, rel. diff, ok)
+def compare_states(state, state_ref, atol, rtol):
+    rows = []
+    for name, value, reference in zip(STATE_NAMES, state, state_ref):
+        diff_abs, diff_rel = get_diff(value, reference)
+        rows.append((name, value, reference, diff_abs, diff_rel, is_close(value, reference, atol, rtol)))
+    return rows
+
+
+# compare the logs of each operation that both backends recorded -> returns a list of text lines describing the
+# differences (empty if all compared logs are equal) and the number of compared logs
+def compare_logs(op_logs, op_logs_ref, operations, atol, rtol):
+    lines = []
+    n_compared = 0
+    for k in range(len(operations)):
+        for name in LOG_NAMES:
+            ser, ser_ref = op_logs[k].get(name), op_logs_ref[k].get(name)
+            if (ser is None) or (ser_ref is None):
+                continue
+            n_compared = n_compared + 1
+            label = "op %u (%s), %s log" % (k, operations[k][0], name)
+            if ser.shape[0] != ser_ref.shape[0]:
+                lines.append("%s: %u samples instead of %u" % (label, ser.shape[0], ser_ref.shape[0]))
+                continue
+            ixs = np.asarray(ser.index, dtype=np.float64)
+            ixs_ref = np.asarray(ser_ref.index, dtype=np.float64)
+            if not np.array_equal(ixs, ixs_ref):
+                i = int(np.argmax(ixs != ixs_ref))
+                lines.append("%s: timestamps differ, first at sample %u: %s instead of %s"
+                             % (label, i, ixs[i], ixs_ref[i]))
+                continue
+            values = ser.values.astype(np.float64)
+            values_ref = ser_ref.values.astype(np.float64)
+            bad = ~np.isclose(values, values_ref, rtol=rtol, atol=atol, equal_nan=True)
+            if bad.any():
+                diff = np.abs(values - values_ref)
+                lines.append("%s: %u of %u samples differ, max. abs. diff. %.3e" % (label, np.count_nonzero(bad),
+                                                                                     bad.shape[0], np.nanmax(diff)))
+                for i in np.flatnonzero(bad)[:N_DIFF_SHOW]:
+                    lines.append("    t = %s: %.12g instead of %.12g" % (ixs[i], values[i], values_ref[i]))
+    return lines, n_compared
+
+
+def get_state_table(rows, show_all):
+    lines = ["    %-24s %22s %22s %11s %11s" % ("value", "backend", "reference", "abs. diff", "rel. diff")]
+    for name, value, reference, diff_abs, diff_rel, ok in rows:
+        if show_all or not ok:
+            lines.append("  %s %-24s %22.15g %22.15g %11.3e %11.3e" % (" " if ok else "!", name, value, reference,
+                                                                        diff_abs, diff_rel))
+    return "\n".join(lines)
+
+
+# --- golden snapshots -------------------------------------------------------------------------------------------------
+# returns the list of snapshots (dicts with "name", "description" and "states": workload name -> state name -> value)
+def load_golden(filename=GOLDEN_FILENAME):
+    with open(filename, "r") as f:
+        return json.load(f)["snapshots"]
+
+
+def get_golden_state(snapshot, workload_name):
+    state = snapshot["states"].get(workload_name)
+    if state is None:
+        return None
+    return tuple(state[name] for name in STATE_NAMES)
+
+
+# run all workloads with the reference and append the final states as a new snapshot to the golden file
+def add_golden(name, description, filename=GOLDEN_FILENAME):
+    snapshots = load_golden(filename) if os.path.isfile(filename) else []
+    if any(snapshot["name"] == name for snapshot in snapshots):
+        raise ValueError("golden snapshot '%s' already exists" % name)
+    states = {}
+    for workload_name, workload in get_workloads().items():
+        state, _ = run_ref(workload)
+        states[workload_name] = {STATE_NAMES[i]: state[i] for i in range(len(STATE_NAMES))}
+    snapshots.append({"name": name, "description": description, "states": states})
+    with open(filename, "w") as f:
+        json.dump({"snapshots": snapshots}, f, indent=2)
+        f.write("\n")
+
+
+def print_golden_deviations(snapshots):
+    print("golden snapshot: %s, documented deviations from the %s results:" % (snapshots[-1]["name"],
+                                                                               snapshots[0]["name"]))
+    for snapshot in snapshots[1:]:
+        print("  - %s: %s" % (snapshot["name"], snapshot["description"]))
+
+
+# compare the final state of the reference with the last golden snapshot -> returns True if it matches (or if the
+# workload is not in the snapshot)
+def check_golden(workload_name, state_ref, snapshots, atol, rtol, verbose):
+    label = "%-20s %-8s" % (workload_name, GOLDEN_BACKEND)
+    state_golden = get_golden_state(snapshots[-1], workload_name)
+    if state_golden is None:
+        print("%s skipped (not in the golden snapshot, see --add-golden)" % label)
+        return True
+    rows = compare_states(state_ref, state_golden, atol, rtol)
+    ok = all(row[5] for row in rows)
+    state_baseline = get_golden_state(snapshots[0], workload_name)
+    baseline_text = ""
+    if (len(snapshots) > 1) and (state_baseline is not None):
+        max_rel_baseline = max(get_diff(value, reference)[1] for value, reference in zip(state_ref, state_baseline))
+        baseline_text = ", to %s: %.3e" % (snapshots[0]["name"], max_rel_baseline)
+    print("%s %s  (max. rel. diff. of the state: %.3e%s)" % (label, "OK      " if ok else "MISMATCH",
+                                                             max(row[4] for row in rows), baseline_text))
+    if verbose or not ok:
+        print(get_state_table(rows, verbose))
+    return ok
+
+
+# run all workloads with the reference and the selected backends -> returns the number of mismatches
+def run(backend_names, workload_names, atol, rtol, check_logs, verbose, snapshots=None):
+    workloads = get_workloads()
+    n_mismatch = 0
+    if snapshots is not None:
+        print_golden_deviations(snapshots)
+    for workload_name in workload_names:
+        workload = workloads[workload_name]
+        state_ref, op_logs_ref = run_ref(workload)
+        if (snapshots is not None) and not check_golden(workload_name, state_ref, snapshots, atol, rtol, verbose):
+            n_mismatch = n_mismatch + 1
+        for backend_name in backend_names:
+            label = "%-20s %-8s" % (workload_name, backend_name)
+            try:
+                state, op_logs = BACKENDS[backend_name](workload)
+            except NotImplementedError as e:
+                print("%s skipped (not supported: %s)" % (label, e))
+                continue
+            rows = compare_states(state, state_ref, atol, rtol)
+            log_lines, n_logs = compare_logs(op_logs, op_logs_ref, workload[2], atol, rtol) if check_logs else ([], 0)
+            ok = all(row[5] for row in rows) and (len(log_lines) == 0)
+            max_rel = max(row[4] for row in rows)
+            print("%s %s  (max. rel. diff. of the state: %.3e%s)"
+                  % (label, "OK      " if ok else "MISMATCH", max_rel,
+                     (", %u logs compared" % n_logs) if check_logs else ""))
+            if verbose or not all(row[5] for row in rows):
+                print(get_state_table(rows, verbose))
+            for line in log_lines:
+                print("  ! " + line)
+            if not ok:
+                n_mismatch = n_mismatch + 1
+    return n_mismatch
+
+
+def main():
+    workload_names = list(get_workloads().keys())
+    backend_names = [name for name in BACKENDS.keys() if name != REFERENCE_BACKEND]
+    parser = argparse.ArgumentParser(description="compare the battery model backends with the reference model")
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS.keys()), default=backend_names,
+                        help="backends to compare with the reference (%s)" % REFERENCE_BACKEND)
+    parser.add_argument("--workloads", nargs="+", choices=workload_names, default=workload_names)
+    parser.add_argument("--atol", type=float, default=ABS_TOL_DEFAULT, help="absolute tolerance")
+    parser.add_argument("--rtol", type=float, default=REL_TOL_DEFAULT, help="relative tolerance")
+    parser.add_argument("--logs", action="store_true", help="also compare the logged trajectories")
+    parser.add_argument("--verbose", action="store_true", help="show all values, not only the differing ones")
+    parser.add_argument("--no-golden", action="store_true", help="don't compare the reference with the golden snapshot")
+    parser.add_argument("--add-golden", nargs=2, metavar=("NAME", "DESCRIPTION"),
+                        help="store the reference results as new golden snapshot (after intended model changes)")
+    args = parser.parse_args()
+
+    if args.add_golden is not None:
+        add_golden(args.add_golden[0], args.add_golden[1])
+        print("golden snapshot '%s' added to %s" % (args.add_golden[0], GOLDEN_FILENAME))
+        return
+    snapshots = None if args.no_golden else load_golden()
+    n_mismatch = run(args.backends, args.workloads, args.atol, args.rtol, args.logs, args.verbose, snapshots)
+    if n_mismatch > 0:
+        print("%u mismatch(es) (atol = %g, rtol = %g)" % (n_mismatch, args.atol, args.rtol))
+        sys.exit(1)
+    print("all backends match the reference%s (atol = %g, rtol = %g)"
+          % ("" if snapshots is None else ", the reference matches the golden snapshot", args.atol, args.rtol))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,10 @@
 #
 # ToDo: Please also have a look at the other ToDo's --> adjust paths...
 
+import os
 import datetime
 import math
+import hashlib
 # import pyarrow as pa
 from pyarrow import csv
 import pandas as pd
@@ -19,6 +21,12 @@ TIMEZONE_DEFAULT = 'Europe/Berlin'
 
 input_data_dir = "D:\\bat\\analysis\\use_case_models\\input_data\\"  # ToDo: adjust to path of your data
 
+# preprocessing cache: the load_... functions store their result (parsed, resampled, unix timestamp index, ...) as a
+#   binary .npz file in INPUT_DATA_CACHE_DIR and use it instead of parsing the .csv files again, as long as the source
+#   files (path, size, modification time) and the loader options didn't change (see load_cached)
+INPUT_DATA_CACHE_DIR = input_data_dir + "cache\\"  # None: don't use a cache (always parse the .csv files)
+INPUT_DATA_CACHE_VERSION = 1  # increase if a read_... function changes -> all older cache files are ignored
+
 # temperature data from 01.01.2010 to 13.03.2024 (or now)
 #   if earlier/later data is needed, shift looked-up date by 12, 24, 36, ... years
 temperature_data_file = input_data_dir + "weather_temperature\\data_OBS_DEU_PT10M_T2M_4177.csv"  # ToDo: adjust filename
@@ -151,6 +159,18 @@ EL_GEN_INST_COLS = list(el_gen_renewable_installed_columns.values())
 EL_GEN_OUTPUT_COLS = list(el_gen_renewable_rel_columns.keys())
 EL_GEN_DEM_OUTPUT_COLS = EL_GEN_OUTPUT_COLS + [GEN_REN_TOTAL, DEMAND, RESIDUAL_LOAD]
 
+# grid signal timeline (see get_grid_signal_timeline): grid signals of a scenario, precomputed for the whole simulation
+GRID_SIGNAL_RESIDUAL_LOAD = RESIDUAL_LOAD  # in GW
+GRID_SIGNAL_EMISSIONS = "Emissions"  # in gCO2eq/kWh, historic data if available, else estimated from the residual load
+GRID_SIGNAL_PRICE = "Price"  # in ct/kWh, historic data if available, else estimated from the residual load
+GRID_SIGNAL_EMISSIONS_GRID_ENERGY = "Emissions of grid energy"  # in gCO2eq/kWh, used to calculate the emissions of the
+#   grid energy: like GRID_SIGNAL_EMISSIONS if the scenario isn't shifted to the future, else always estimated
+GRID_SIGNAL_PRICE_GRID_ENERGY = "Price of grid energy"  # in ct/kWh, used to calculate the electricity cost: repeated
+#   historic price data if the scenario isn't shifted to the future, else always estimated
+GRID_SIGNAL_PV = "PV (relative)"  # relative PV generation (multiply with the peak power)
+GRID_SIGNAL_COLS = [GRID_SIGNAL_RESIDUAL_LOAD, GRID_SIGNAL_EMISSIONS, GRID_SIGNAL_PRICE,
+                    GRID_SIGNAL_EMISSIONS_GRID_ENERGY, GRID_SIGNAL_PRICE_GRID_ENERGY, GRID_SIGNAL_PV]
+
 
 # household load data from 01.01.2010 to 31.12.2010
 # https://solar.htw-berlin.de/elektrische-lastprofile-fuer-wohngebaeude/
@@ -171,8 +191,13 @@ load_profile_data_columns = {load_profile_timestamp_column: "int", load_profile_
 load_profile_data_sep = ","
 
 
-# load temperature data from file and return it
+# load temperature data from file (or the cache) and return it
 def load_temperature_data(output_timezone=TIMEZONE_DEFAULT, as_unixtimestamp=True):
+    return load_cached(read_temperature_data, [temperature_data_file], (output_timezone, as_unixtimestamp),
+                       (temperature_data_columns, temperature_data_sep))
+
+
+def read_temperature_data(output_timezone=TIMEZONE_DEFAULT, as_unixtimestamp=True):
     # ToDo: if you receive a warning like:
     #   pyarrow.lib.ArrowInvalid: CSV parse error: Expected 6 columns, got 7:
     #   "OBS_DEU_PT10M_T2M","4177","2010-01-01T00:00:00","6.7","111","3",
@@ -208,8 +233,14 @@ def get_temperature_data(data_df, time_series, is_unix_timestamp=True):
     return get_transformed_data(data_df, time_series, is_unix_timestamp, shift_years=12)
 
 
-# load electricity emission data from file and return it.
+# load electricity emission data from file (or the cache) and return it.
 def load_emission_data(data_source="Agora"):
+    return load_cached(read_emission_data, [emission_agora_data_file, emission_co2mon_data_file], (data_source,),
+                       (emission_agora_data_columns, emission_agora_data_sep, emission_co2mon_data_columns,
+                        emission_co2mon_data_sep))
+
+
+def read_emission_data(data_source="Agora"):
     if data_source == "Agora":
         emission_df = pd.read_csv(emission_agora_data_file, header=0, sep=emission_agora_data_sep,
                                   usecols=list(emission_agora_data_columns.keys()), dtype=emission_agora_data_columns)
@@ -287,8 +318,13 @@ def get_emission_data(data_df, time_series, data_source="Agora", is_unix_timesta
         return emission_df
 
 
-# load frequency data from file and return it
+# load frequency data from file (or the cache) and return it
 def load_freq_data(output_timezone=TIMEZONE_DEFAULT, as_unixtimestamp=True):
+    return load_cached(read_freq_data, [frequency_data_file], (output_timezone, as_unixtimestamp),
+                       (frequency_data_columns, frequency_time_origin, frequency_data_sep, frequency_decimal_sep))
+
+
+def read_freq_data(output_timezone=TIMEZONE_DEFAULT, as_unixtimestamp=True):
     # ---
     # too slow:
     # freq_df = pd.read_csv(frequency_data_file, header=0, sep=frequency_data_sep, decimal=frequency_decimal_sep,
@@ -334,8 +370,15 @@ def get_freq_data(data_df, time_series, is_unix_timestamp=True):
     return get_transformed_data(data_df, time_series, is_unix_timestamp, shift_years=None)
 
 
-# load electricity price data from file and return it
+# load electricity price data from file (or the cache) and return it
 def load_electricity_price_data(data_source="Agora", output_timezone=TIMEZONE_DEFAULT, as_unixtimestamp=True):
+    return load_cached(read_electricity_price_data, [el_price_agora_data_file, el_price_smard_data_file],
+                       (data_source, output_timezone, as_unixtimestamp),
+                       (el_price_agora_data_columns, el_price_agora_data_sep, el_price_agora_conversion_divisor,
+                        el_price_smard_data_columns, el_price_smard_data_sep, el_price_smard_conversion_divisor))
+
+
+def read_electricity_price_data(data_source="Agora", output_timezone=TIMEZONE_DEFAULT, as_unixtimestamp=True):
     if data_source == "Agora":
         price_df = pd.read_csv(el_price_agora_data_file, header=0, sep=el_price_agora_data_sep,
                                usecols=list(el_price_agora_data_columns.keys()), dtype=el_price_agora_data_columns)
@@ -435,9 +478,19 @@ def get_price_data(data_df, time_series, data_source="Agora", is_unix_timestamp=
         return price_df
 
 
-# load electricity generation and demand data from file, convert it into relative data (% of the installed generation
-# capacity or annual electricity demand used) and return it
+# load electricity generation and demand data from file (or the cache), convert it into relative data (% of the
+# installed generation capacity or annual electricity demand used) and return it
 def load_el_gen_dem_data():
+    source_files = [el_gen_demand_base_dir + file for file in el_gen_renewable_rel_files.values()]
+    source_files = source_files + [el_gen_demand_base_dir + el_gen_installed_data_file,
+                                   el_gen_demand_base_dir + el_demand_data_file]
+    return load_cached(read_el_gen_dem_data, source_files, (),
+                       (el_gen_renewable_rel_columns, el_gen_renewable_installed_columns, el_demand_column,
+                        el_gen_demand_data_sep, EL_GEN_DEMAND_DROP_DATA_START, el_gen_demand_abs_conversion_divisor,
+                        el_gen_demand_yearly_conversion_mul, el_gen_tz_origin, el_demand_yearly.to_dict()))
+
+
+def read_el_gen_dem_data():
     # load relative generation power data
     gen_rel_df = pd.DataFrame(dtype=np.float64)
     for gen, file in el_gen_renewable_rel_files.items():
@@ -744,9 +797,99 @@ def get_price_estimate_based_on_residual_load(residual_load_df):  # residual_loa
     return price_df  # in ct/kWh
 
 
+# precompute the grid signals (see GRID_SIGNAL_COLS) of a scenario for the whole simulation time ts_min ... ts_max (unix
+# timestamps, add a margin for the look-back/-ahead of the charging strategies) once, instead of calling
+# get_el_gen_dem_data, get_emission_data, get_price_data, and get_el_gen_pv_data for every charging process. Returns a
+# pandas.DataFrame with a regular index in the resolution of the generation/demand data (el_gen_dem_df) -> use
+# get_grid_signal to look up the values at any time in O(1). The values are the same as the ones of the get_...
+# functions (which hold the input data between its steps), since all data (and the year shifts) is aligned to this
+# resolution.
+def get_grid_signal_timeline(el_gen_dem_df, emission_df, price_df, ts_min, ts_max, scale_shift_years=0,
+                             timezone=TIMEZONE_DEFAULT):
+    dt = el_gen_dem_df.index[1] - el_gen_dem_df.index[0]
+    ts_from = ts_min - (ts_min % dt)
+    ixs = pd.Index(np.arange(ts_from, ts_max + dt, dt))
+    timeline_df = pd.DataFrame(dtype=np.float64, columns=GRID_SIGNAL_COLS, index=ixs)
+
+    residual_load = get_el_gen_dem_data(el_gen_dem_df, ixs, scale_shift_years=scale_shift_years,
+                                        timezone=timezone)[RESIDUAL_LOAD]
+    timeline_df[GRID_SIGNAL_RESIDUAL_LOAD] = residual_load.values
+    timeline_df[GRID_SIGNAL_EMISSIONS] = get_emission_data(emission_df, ixs, residual_load=residual_load).values
+    timeline_df[GRID_SIGNAL_PRICE] = get_price_data(price_df, ixs, residual_load=residual_load).values
+    if scale_shift_years == 0:
+        # we don't transform historic energy demand/generation to future scenarios --> use historic emissions if
+        # available, use estimations if no data is available for the time
+        timeline_df[GRID_SIGNAL_EMISSIONS_GRID_ENERGY] = timeline_df[GRID_SIGNAL_EMISSIONS]
+        timeline_df[GRID_SIGNAL_PRICE_GRID_ENERGY] = get_price_data(price_df, ixs).values
+    else:
+        # we shift renewable generation installation capacity to the future
+        # -> useless to use emission data of the past, use estimated data for all entries
+        timeline_df[GRID_SIGNAL_EMISSIONS_GRID_ENERGY] = get_emission_estimate_based_on_residual_load(
+            residual_load).values
+        timeline_df[GRID_SIGNAL_PRICE_GRID_ENERGY] = get_price_estimate_based_on_residual_load(residual_load).values
+    timeline_df[GRID_SIGNAL_PV] = get_el_gen_pv_data(el_gen_dem_df, ixs).values
+    return timeline_df
+
+
+# return the values of the column col of the grid signal timeline (see get_grid_signal_timeline) at the times in
+# time_series (unix timestamps: pandas.Index, pandas.Series with the timestamps as values, or numpy array) as a
+# pandas.Series with the same index as time_series. Values are held between the steps of the timeline.
+def get_grid_signal(timeline_df, col, time_series):
+    if type(time_series) is pd.Series:
+        ixs = time_series.index
+    else:
+        ixs = pd.Index(time_series)
+    return pd.Series(timeline_df[col].values[get_grid_signal_pos(timeline_df, time_series)], index=ixs)
+
+
+# positions of the times in time_series in the grid signal timeline (the step before or at the time)
+def get_grid_signal_pos(timeline_df, time_series):
+    ts_from = timeline_df.index[0]
+    dt = timeline_df.index[1] - ts_from
+    pos = (np.asarray(time_series, dtype=np.float64) - ts_from) // dt
+    return np.clip(pos, 0, timeline_df.shape[0] - 1).astype(np.int64)
+
+
+# sliding-window extrema of the column col of the grid signal timeline: returns (min_arr, max_arr) with the minimum and
+# maximum of the values at the steps i, i + stride, ..., i + (n_samples - 1) * stride for each step i of the timeline.
+# Use with get_grid_signal_pos to get the extrema of n_samples values, sampled every stride steps from a time on, in
+# O(1) (e.g., the best/worst grid conditions of the last days). Like get_grid_signal, steps after the end of the
+# timeline use its last value. NaN values are ignored (like pandas.Series.min/max).
+def get_grid_signal_window_extrema(timeline_df, col, n_samples, stride=1):
+    values = timeline_df[col].values
+    n_values = values.shape[0]
+    values = np.concatenate([values, np.full((n_samples - 1) * stride, values[-1])])
+    min_arr = np.empty(n_values, dtype=np.float64)
+    max_arr = np.empty(n_values, dtype=np.float64)
+    for phase in range(min(stride, n_values)):  # the windows starting at phase, phase + stride, ... use the same values
+        n_phase = len(range(phase, n_values, stride))
+        min_arr[phase::stride] = get_sliding_extremum(values[phase::stride], n_samples, np.fmin)[:n_phase]
+        max_arr[phase::stride] = get_sliding_extremum(values[phase::stride], n_samples, np.fmax)[:n_phase]
+    return min_arr, max_arr
+
+
+# sliding-window minimum (fun = np.fmin) or maximum (fun = np.fmax): result[i] = extremum of values[i:i + width], the
+# values after the end are the last value. Uses prefix/suffix extrema in blocks of width values (van Herk/Gil-Werman
+# algorithm) -> O(1) per value independent of the width, like a monotonic deque but vectorized with numpy.
+def get_sliding_extremum(values, width, fun):
+    n_values = values.shape[0]
+    n_blocks = -(-(n_values + width - 1) // width)  # ceil -> the window of each value ends in a block
+    blocks = np.full(n_blocks * width, values[-1], dtype=np.float64)
+    blocks[:n_values] = values
+    blocks = blocks.reshape(n_blocks, width)
+    prefix = fun.accumulate(blocks, axis=1).ravel()  # extremum from the start of the block to the value
+    suffix = fun.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()  # ... from the value to the end of the block
+    return fun(suffix[:n_values], prefix[width - 1:width - 1 + n_values])
+
+
 #
-# load (household) load profile data from file and return it
+# load (household) load profile data from file (or the cache) and return it
 def load_load_profile_data():  # output_timezone=TIMEZONE_DEFAULT
+    return load_cached(read_load_profile_data, [load_profile_data_file], (),
+                       (load_profile_data_columns, load_profile_data_sep))
+
+
+def read_load_profile_data():
     temp_df = pd.read_csv(load_profile_data_file, header=0, sep=load_profile_data_sep,  # engine="pyarrow",
                           usecols=list(load_profile_data_columns.keys()), dtype=load_profile_data_columns)
     temp_df.set_index(load_profile_timestamp_column, drop=True, inplace=True)
@@ -770,6 +913,94 @@ def get_load_profile_data(data_df, time_series, is_unix_timestamp=True):
     return get_transformed_data(data_df, time_series, is_unix_timestamp, shift_years=1, preserve_weekday=True)
 
 
+# returns read_fun(*args) (pandas.Series/DataFrame, or None), using the cache in INPUT_DATA_CACHE_DIR if possible.
+#   source_files    list of the files read by read_fun -> the cache is invalid if one of them changed (size,
+#                   modification time) or was added/removed
+#   key_options     settings used by read_fun (e.g., column names, separators) that aren't in args -> part of the key
+def load_cached(read_fun, source_files, args=(), key_options=()):
+    if INPUT_DATA_CACHE_DIR is None:
+        return read_fun(*args)
+    cache_filename = get_cache_filename(read_fun.__name__, source_files, args, key_options)
+    if os.path.exists(cache_filename):
+        # noinspection PyBroadException
+        try:
+            return read_cache_file(cache_filename)
+        except Exception:  # e.g., file was truncated -> parse the .csv files again
+            print("Error reading input data cache file %s - parsing source files:\n%s"
+                  % (cache_filename, traceback.format_exc()))
+    data_df = read_fun(*args)
+    # noinspection PyBroadException
+    try:
+        write_cache_file(cache_filename, data_df)
+    except Exception:  # e.g., no write permission -> works without cache, but slower
+        print("Error writing input data cache file %s:\n%s" % (cache_filename, traceback.format_exc()))
+    return data_df
+
+
+# file name of the cache file for read_fun_name with the source files (path, size, mod. time), args, and key_options
+def get_cache_filename(read_fun_name, source_files, args, key_options):
+    file_states = []
+    for filename in source_files:
+        if os.path.exists(filename):
+            stat = os.stat(filename)
+            file_states.append((os.path.abspath(filename), stat.st_size, stat.st_mtime_ns))
+        else:
+            file_states.append((os.path.abspath(filename), None, None))
+    key = repr((INPUT_DATA_CACHE_VERSION, read_fun_name, file_states, args, key_options))
+    return INPUT_DATA_CACHE_DIR + "%s_%s.npz" % (read_fun_name, hashlib.sha1(key.encode("utf-8")).hexdigest()[:20])
+
+
+# store data_df (pandas.Series with a numeric or DatetimeIndex, DataFrame with numeric columns, or None) as .npz file
+def write_cache_file(cache_filename, data_df):
+    directory = os.path.dirname(cache_filename)
+    if (directory != "") and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+    if data_df is None:
+        arrays = {"kind": np.array("none")}
+    else:
+        index = data_df.index
+        arrays = {"index_tz": np.array("" if getattr(index, "tz", None) is None else str(index.tz)),
+                  "index_freq": np.array(getattr(index, "freqstr", None) or "")}
+        if getattr(index, "tz", None) is not None:
+            arrays["index"] = index.asi8.view("M8[ns]")  # in UTC
+        else:
+            arrays["index"] = index.values
+        if type(data_df) is pd.Series:
+            arrays["kind"] = np.array("series")
+            arrays["values"] = data_df.values
+            arrays["name"] = np.array([] if data_df.name is None else [data_df.name])
+        else:
+            arrays["kind"] = np.array("frame")
+            arrays["columns"] = np.array(list(data_df.columns))
+            for i_col in range(data_df.shape[1]):
+                arrays["values_%u" % i_col] = data_df.iloc[:, i_col].values
+    filename_temp = cache_filename + ".tmp"
+    with open(filename_temp, "wb") as file:
+        np.savez(file, **arrays)
+    os.replace(filename_temp, cache_filename)  # atomic -> no partially written cache files
+
+
+def read_cache_file(cache_filename):
+    with np.load(cache_filename, allow_pickle=False) as arrays:
+        kind = str(arrays["kind"])
+        if kind == "none":
+            return None
+        index = pd.Index(arrays["index"])
+        index_tz = str(arrays["index_tz"])
+        if index_tz != "":
+            index = pd.DatetimeIndex(index).tz_localize("UTC").tz_convert(index_tz)
+        index_freq = str(arrays["index_freq"])
+        if index_freq != "":
+            index = pd.DatetimeIndex(index, freq=index_freq)
+        if kind == "series":
+            name = arrays["name"]
+            return pd.Series(arrays["values"], index=index, name=name[0].item() if name.shape[0] > 0 else None)
+        columns = list(arrays["columns"])
+        data_df = pd.DataFrame({i_col: arrays["values_%u" % i_col] for i_col in range(len(columns))}, index=index)
+        data_df.columns = [col.item() for col in columns]
+        return data_df
+
+
 # for debugging only: visualization and several tests with the input data
 def test():
     tz = TIMEZONE_DEFAULT
@@ -0,0 +1,131 @@
+# tests of the pure helper functions of input_data_helper.py (bugs in these would only show up as slightly wrong
+# simulation results). Run with: python -m pytest input_data_helper_test.py
+
+import os
+import numpy as np
+import pandas as pd
+
+import input_data_helper
+
+N_RANDOM_CASES = 300
+SEED = 0
+
+
+# --- sliding-window extrema (get_sliding_extremum, get_grid_signal_window_extrema) ------------------------------------
+# brute-force reference of get_grid_signal_window_extrema: min/max (ignoring NaN, like pandas) of the n_samples values
+# at i, i + stride, ..., where positions after the end of the timeline use the last value
+def get_window_extrema_brute_force(values, n_samples, stride):
+    n_values = values.shape[0]
+    min_arr = np.empty(n_values)
+    max_arr = np.empty(n_values)
+    for i in range(n_values):
+        window = pd.Series(values[np.clip(i + np.arange(n_samples) * stride, 0, n_values - 1)])
+        min_arr[i] = window.min()
+        max_arr[i] = window.max()
+    return min_arr, max_arr
+
+
+def get_random_values(rng, n_values, nan_share=0.1):
+    values = rng.normal(size=n_values)
+    values[rng.random(n_values) < nan_share] = np.nan
+    return values
+
+
+def test_sliding_extremum():
+    rng = np.random.default_rng(SEED)
+    for _ in range(N_RANDOM_CASES):
+        values = get_random_values(rng, rng.integers(1, 80))
+        width = rng.integers(1, 30)
+        min_ref, max_ref = get_window_extrema_brute_force(values, width, 1)
+        np.testing.assert_array_equal(input_data_helper.get_sliding_extremum(values, width, np.fmin), min_ref)
+        np.testing.assert_array_equal(input_data_helper.get_sliding_extremum(values, width, np.fmax), max_ref)
+
+
+def test_grid_signal_window_extrema():
+    rng = np.random.default_rng(SEED + 1)
+    for _ in range(N_RANDOM_CASES):
+        n_values = rng.integers(1, 60)
+        n_samples = rng.integers(1, 20)
+        stride = rng.integers(1, 5)
+        values = get_random_values(rng, n_values)
+        timeline_df = pd.DataFrame({"signal": values}, index=np.arange(n_values) * 900)
+        min_arr, max_arr = input_data_helper.get_grid_signal_window_extrema(timeline_df, "signal", n_samples, stride)
+        min_ref, max_ref = get_window_extrema_brute_force(values, n_samples, stride)
+        np.testing.assert_array_equal(min_arr, min_ref)
+        np.testing.assert_array_equal(max_arr, max_ref)
+
+
+def test_grid_signal_window_extrema_nan():
+    values = np.array([np.nan, np.nan, 1.0, np.nan, -2.0, np.nan, np.nan])
+    timeline_df = pd.DataFrame({"signal": values}, index=np.arange(values.shape[0]) * 3600)
+    min_arr, max_arr = input_data_helper.get_grid_signal_window_extrema(timeline_df, "signal", 2, 1)
+    np.testing.assert_array_equal(min_arr, [np.nan, 1.0, 1.0, -2.0, -2.0, np.nan, np.nan])
+    np.testing.assert_array_equal(max_arr, [np.nan, 1.0, 1.0, -2.0, -2.0, np.nan, np.nan])
+
+
+# --- input data cache (load_cached, write_cache_file, read_cache_file) ------------------------------------------------
+def get_cache_test_data():
+    ixs = np.arange(1000, dtype=np.int64) * 900 + 1685916000
+    rng = np.random.default_rng(SEED)
+    return {
+        "series_unix": pd.Series(rng.random(1000), index=ixs, name="Temperature"),
+        "series_float32": pd.Series(rng.random(1000).astype(np.float32), index=ixs, name="FREQUENCY_[HZ]"),
+        "series_no_name": pd.Series(rng.random(10), index=ixs[:10]),
+        "series_tz": pd.Series(rng.random(1000), name="Price",  # includes the change to summer/winter time
+                               index=pd.date_range("2023-03-25", periods=1000, freq="H", tz="Europe/Berlin")),
+        "series_naive": pd.Series(rng.random(100), index=pd.date_range("2023-10-28", periods=100, freq="10min")),
+        "frame_float": pd.DataFrame({"a": np.r_[np.nan, rng.random(999)], "b": rng.random(1000)},
+                                    index=ixs.astype(np.uint64)),
+        "frame_int": pd.DataFrame({2023: np.arange(1000, dtype=np.int64), 2024: np.arange(1000, dtype=np.int32)},
+                                  index=ixs),
+        "none": None,
+    }
+
+
+def assert_data_equal(data_df, expected_df):
+    if expected_df is None:
+        assert data_df is None
+    elif type(expected_df) is pd.Series:
+        pd.testing.assert_series_equal(data_df, expected_df, check_index_type=True, check_freq=True)
+    else:
+        pd.testing.assert_frame_equal(data_df, expected_df, check_index_type=True, check_column_type=True)
+
+
+def test_cache_file_round_trip(tmp_path):
+    for name, data_df in get_cache_test_data().items():
+        cache_filename = str(tmp_path / (name + ".npz"))
+        input_data_helper.write_cache_file(cache_filename, data_df)
+        assert_data_equal(input_data_helper.read_cache_file(cache_filename), data_df)
+
+
+def test_load_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(input_data_helper, "INPUT_DATA_CACHE_DIR", str(tmp_path / "cache") + os.sep)
+    source_file = tmp_path / "source.csv"
+    source_file.write_text("x")
+    n_calls = []
+
+    def read_data(name):
+        n_calls.append(name)
+        data_df = get_cache_test_data()[name]
+        return None if data_df is None else data_df.copy()
+
+    for name, data_df in get_cache_test_data().items():
+        assert_data_equal(input_data_helper.load_cached(read_data, [str(source_file)], (name,)), data_df)  # miss
+        assert_data_equal(input_data_helper.load_cached(read_data, [str(source_file)], (name,)), data_df)  # hit
+    assert len(n_calls) == len(get_cache_test_data())
+
+    # other loader options or a changed source file -> parsed again
+    input_data_helper.load_cached(read_data, [str(source_file)], ("series_unix",), key_options=("other",))
+    assert len(n_calls) == len(get_cache_test_data()) + 1
+    source_file.write_text("changed")
+    input_data_helper.load_cached(read_data, [str(source_file)], ("series_unix",))
+    assert len(n_calls) == len(get_cache_test_data()) + 2
+
+    # unreadable cache file -> parsed again (and the cache file is replaced)
+    cache_filename = input_data_helper.get_cache_filename(read_data.__name__, [str(source_file)], ("series_unix",), ())
+    with open(cache_filename, "w") as file:
+        file.write("truncated")
+    data_df = input_data_helper.load_cached(read_data, [str(source_file)], ("series_unix",))
+    assert_data_equal(data_df, get_cache_test_data()["series_unix"])
+    assert len(n_calls) == len(get_cache_test_data()) + 3
+    assert_data_equal(input_data_helper.read_cache_file(cache_filename), get_cache_test_data()["series_unix"])
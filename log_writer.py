@@ -0,0 +1,210 @@
+# Streaming export of the result logs (e.g., of the use_case_model_EV_modular_v01.py simulations) into files that are
+# partitioned by scenario and year:
+#   <path>/scenario=<scenario_id>/year=<year>/<filename>.<parquet|arrow|csv>
+# Instead of keeping all logs in memory until the end of a (multi-year) simulation and writing one huge .csv file, the
+# simulation writes the rows of each completed day (or month, ...) with write(). Rows are collected until there are at
+# least rows_per_group rows (or the year changes) and then written as one Parquet row group / Arrow IPC record batch /
+# block of .csv lines. With background=True, a thread does the conversion and writing while the simulation continues
+# (at most QUEUE_SIZE_MAX groups are waiting, so the memory is bounded).
+# The partitioned directory can be read by pandas/pyarrow, e.g., the year 2030 of scenario 5:
+#   pd.read_parquet(path, filters=[("scenario", "=", 5), ("year", "=", 2030)])  # -> only reads these files
+# Parquet and Arrow IPC need pyarrow (see requirements.txt), .csv doesn't.
+# Checkpoints (e.g., to resume a simulation that crashed or was preempted): checkpoint() closes the open file, so all
+# rows written so far are in complete files, and returns the state (filenames, part) to pass to the constructor of the
+# writer that continues. It writes the following rows into new files: <filename>_part<part>.<...>. If the resumed
+# simulation writes the same rows again (deterministic simulation), the files written after the checkpoint are
+# replaced.
+
+import os
+import queue
+import threading
+import numpy as np
+import pandas as pd
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # only needed for FORMAT_PARQUET and FORMAT_ARROW
+    pa = None
+    pq = None
+
+
+FORMAT_PARQUET = "parquet"  # Parquet file, one row group per written group
+FORMAT_ARROW = "arrow"  # Arrow IPC file (random access), one record batch per written group
+FORMAT_CSV = "csv"  # .csv file, appended group by group (slow, large files - use for small exports only)
+FORMATS = [FORMAT_PARQUET, FORMAT_ARROW, FORMAT_CSV]
+
+COL_TIMESTAMP = "timestamp"  # name of the (unix) timestamp column in s, which is the index of the written DataFrames
+ROWS_PER_GROUP_DEFAULT = 65536  # minimum number of rows of a row group (the last group of a year can be smaller)
+QUEUE_SIZE_MAX = 4  # maximum number of groups waiting to be written in the background
+PARQUET_COMPRESSION = "zstd"  # compression of the Parquet files ("snappy", "zstd", "gzip", None, ...)
+CSV_SEP = ";"
+CSV_FLOAT_FORMAT = "%.4f"
+
+
+# writes the rows of DataFrames (index: unix timestamp in s, columns: columns -> missing columns are written as NaN,
+# other columns are ignored) into the partitioned files, see above. Rows have to be written in chronological order.
+class PartitionedLogWriter:
+    def __init__(self, path, scenario_id, filename, columns, file_format=FORMAT_PARQUET, timezone="UTC",
+                 rows_per_group=ROWS_PER_GROUP_DEFAULT, background=False, state=None):
+        if file_format not in FORMATS:
+            raise ValueError("unknown file_format '%s', use one of: %s" % (file_format, ", ".join(FORMATS)))
+        if (file_format != FORMAT_CSV) and (pa is None):
+            raise ImportError("pyarrow is needed to write %s files (pip install pyarrow), or use FORMAT_CSV"
+                              % file_format)
+        self.path = path
+        self.scenario_id = scenario_id
+        self.filename = filename
+        self.columns = list(columns)
+        self.file_format = file_format
+        self.timezone = timezone  # the year of a row is determined in this timezone
+        self.rows_per_group = rows_per_group
+        self.filenames = []  # files written so far
+        self.part = 0  # number of checkpoints -> part of the filename
+        if state is not None:
+            self.filenames, self.part = list(state[0]), state[1]
+        self._year = None  # year of the collected rows / currently open file
+        self._chunks = []  # collected DataFrames of this year
+        self._n_rows = 0
+        self._file = None  # open writer (pq.ParquetWriter / pa.ipc.RecordBatchFileWriter) or .csv filename
+        self._sink = None  # open pa.OSFile of the Arrow IPC writer
+        self._schema = None
+        if pa is not None:
+            self._schema = pa.schema([(COL_TIMESTAMP, pa.float64())] + [(col, pa.float64()) for col in self.columns])
+        self._queue = None
+        self._thread = None
+        self._error = None
+        if background:
+            self._queue = queue.Queue(maxsize=QUEUE_SIZE_MAX)
+            self._thread = threading.Thread(target=self.run_background, daemon=True)
+            self._thread.start()
+
+    # file of the year (creates the partition directories)
+    def get_filename(self, year):
+        directory = os.path.join(self.path, "scenario=%u" % self.scenario_id, "year=%04u" % year)
+        os.makedirs(directory, exist_ok=True)
+        if self.part == 0:
+            return os.path.join(directory, "%s.%s" % (self.filename, self.file_format))
+        return os.path.join(directory, "%s_part%03u.%s" % (self.filename, self.part, self.file_format))
+
+    # collect the rows of df and write them when there are enough (or the year changes)
+    def write(self, df):
+        if df.shape[0] == 0:
+            return
+        df = df.reindex(columns=self.columns)  # fixed layout for all groups
+        years = pd.to_datetime(df.index.values, unit="s", origin='unix', utc=True).tz_convert(self.timezone).year
+        if (years[0] == years[-1]) and (years[0] == self._year):  # usual case: same year -> collect
+            self._chunks.append(df)
+            self._n_rows = self._n_rows + df.shape[0]
+        else:
+            for year in pd.unique(years):
+                if year != self._year:
+                    self.flush()
+                    self.put(year, None)  # close the file of the previous year
+                    self._year = year
+                self._chunks.append(df[years == year])
+                self._n_rows = self._n_rows + self._chunks[-1].shape[0]
+        if self._n_rows >= self.rows_per_group:
+            self.flush()
+
+    # write the collected rows as one group
+    def flush(self):
+        if self._n_rows == 0:
+            return
+        if len(self._chunks) == 1:
+            group_df = self._chunks[0]
+        else:
+            group_df = pd.concat(self._chunks)
+        self._chunks = []
+        self._n_rows = 0
+        self.put(self._year, group_df)
+
+    # write everything and close the open file, returns the state to continue with (filenames, part) - see above
+    def checkpoint(self):
+        self.flush()
+        self.put(None, None)
+        if self._thread is not None:
+            self._queue.join()  # wait until everything is written
+        self.raise_error()
+        self._year = None  # -> a new file will be opened
+        self.part = self.part + 1
+        return list(self.filenames), self.part
+
+    # write everything and close the files (and the background thread). Returns the written filenames.
+    def close(self):
+        self.flush()
+        self.put(None, None)
+        if self._thread is not None:
+            self._queue.put(None)  # stop thread
+            self._thread.join()
+            self._thread = None
+        self.raise_error()
+        return self.filenames
+
+    # pass (year, group_df) to the background thread or write it directly. group_df None: close the open file.
+    def put(self, year, group_df):
+        self.raise_error()
+        if self._thread is None:
+            self.write_group(year, group_df)
+        else:
+            self._queue.put((year, group_df))
+
+    def run_background(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                break
+            if self._error is None:  # don't write anything after an error, but empty the queue (put() must not block)
+                # noinspection PyBroadException
+                try:
+                    self.write_group(*item)
+                except Exception as e:
+                    self._error = e
+            self._queue.task_done()
+
+    def raise_error(self):
+        if self._error is not None:
+            error = self._error
+            self._error = None
+            raise error
+
+    def write_group(self, year, group_df):
+        if group_df is None:
+            self.close_file()
+            return
+        if self._file is None:
+            filename = self.get_filename(year)
+            if filename not in self.filenames:
+                self.filenames.append(filename)
+            if self.file_format == FORMAT_PARQUET:
+                self._file = pq.ParquetWriter(filename, self._schema, compression=PARQUET_COMPRESSION)
+            elif self.file_format == FORMAT_ARROW:
+                self._sink = pa.OSFile(filename, "wb")
+                self._file = pa.ipc.new_file(self._sink, self._schema)
+            else:
+                group_df.to_csv(filename, index=True, index_label=COL_TIMESTAMP, sep=CSV_SEP,
+                                float_format=CSV_FLOAT_FORMAT)
+                self._file = filename
+                return
+        if self.file_format == FORMAT_CSV:
+            group_df.to_csv(self._file, mode="a", header=False, index=True, sep=CSV_SEP,
+                            float_format=CSV_FLOAT_FORMAT)
+            return
+        arrays = [pa.array(group_df.index.values.astype(np.float64))]
+        for col in self.columns:
+            arrays.append(pa.array(group_df[col].values.astype(np.float64)))
+        batch = pa.RecordBatch.from_arrays(arrays, schema=self._schema)
+        if self.file_format == FORMAT_PARQUET:
+            self._file.write_table(pa.Table.from_batches([batch]), row_group_size=batch.num_rows)  # one row group
+        else:
+            self._file.write_batch(batch)
+
+    def close_file(self):
+        if self._file is None:
+            return
+        if self.file_format != FORMAT_CSV:
+            self._file.close()
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+        self._file = None
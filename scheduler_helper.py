@@ -0,0 +1,100 @@
+# helper functions to run independent jobs (e.g., the scenarios of use_case_model_EV_modular_v01.py) in parallel worker
+# processes. The jobs are submitted to a concurrent.futures.ProcessPoolExecutor (one future per job), the main process
+# waits for the futures as they complete (no polling) and collects one JobResult per job. An exception in a job (or a
+# crashed worker process) is returned as a JobResult with level ERROR and the traceback, the other jobs continue.
+# Data that is the same for all jobs (e.g., the input data) should be passed once per worker with initializer/initargs
+# instead of with every job.
+
+import os
+import traceback
+import concurrent.futures
+import logging as std_logging
+
+N_WORKERS_RESERVED = 0  # number of processors to leave free (e.g., 1 to keep a desktop system responsive)
+
+
+# result of a job: job_id (e.g., scenario ID), level (logging level: INFO, WARNING, ERROR) and msg (summary message) for
+#   the report, value: any picklable result of the job (None if not needed), error: traceback text if the job failed
+class JobResult:
+    def __init__(self, job_id, level, msg, value=None, error=None):
+        self.job_id = job_id
+        self.level = level
+        self.msg = msg
+        self.value = value
+        self.error = error
+
+    def __repr__(self):
+        return "JobResult(%s, %s, %s)" % (repr(self.job_id), std_logging.getLevelName(self.level), repr(self.msg))
+
+
+# number of processors this process may use (respects the CPU affinity, e.g., of a cluster job, if available)
+def get_cpu_count():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+# number of worker processes for n_jobs jobs: n_workers_max (None: number of available processors minus
+#   N_WORKERS_RESERVED), but not more than the number of jobs and at least 1
+def get_n_workers(n_jobs, n_workers_max=None):
+    if n_workers_max is None:
+        n_workers_max = get_cpu_count() - N_WORKERS_RESERVED
+    return max(min(n_workers_max, n_jobs), 1)
+
+
+# run fun(job, *args) for each job in jobs with n_workers worker processes and return the list of JobResult objects (in
+#   the order of jobs). fun should return a JobResult (any other return value is stored as JobResult.value).
+#   job_ids         list of the IDs of the jobs (for the report if a job fails), None: index in jobs
+#   initializer     function that is called with initargs once in each worker process before the first job (e.g., to
+#                   store data that is the same for all jobs in a global variable), None: not needed
+#   on_done         function that is called with (result, n_done, n_jobs) in the main process when a job is done
+# With n_workers = 1, the jobs are run in the main process one after another (e.g., for debugging).
+def run_jobs(fun, jobs, n_workers, args=(), job_ids=None, initializer=None, initargs=(), on_done=None):
+    n_jobs = len(jobs)
+    if job_ids is None:
+        job_ids = list(range(n_jobs))
+    results = [None] * n_jobs
+    if n_jobs == 0:
+        return results
+
+    if n_workers <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for i_job in range(n_jobs):
+            try:
+                results[i_job] = get_job_result(job_ids[i_job], fun(jobs[i_job], *args))
+            except Exception as e:
+                results[i_job] = get_error_result(job_ids[i_job], e)
+            if on_done is not None:
+                on_done(results[i_job], i_job + 1, n_jobs)
+        return results
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=n_workers, initializer=initializer,
+                                                initargs=initargs) as executor:
+        futures = {executor.submit(fun, jobs[i_job], *args): i_job for i_job in range(n_jobs)}
+        n_done = 0
+        for future in concurrent.futures.as_completed(futures):
+            i_job = futures[future]
+            try:
+                results[i_job] = get_job_result(job_ids[i_job], future.result())
+            except Exception as e:  # exception in the job, or the worker process crashed (BrokenProcessPool)
+                results[i_job] = get_error_result(job_ids[i_job], e, False)
+            n_done = n_done + 1
+            if on_done is not None:
+                on_done(results[i_job], n_done, n_jobs)
+    return results
+
+
+def get_job_result(job_id, value):
+    if type(value) is JobResult:
+        return value
+    return JobResult(job_id, std_logging.INFO, "Job %s done" % str(job_id), value)
+
+
+# local_traceback: False for exceptions of futures -> only the traceback of the worker process is relevant (the
+#   exception has it as __cause__), not the one of future.result() in the main process
+def get_error_result(job_id, exception, local_traceback=True):
+    tb = exception.__traceback__ if local_traceback else None
+    error = "".join(traceback.format_exception(type(exception), exception, tb))
+    return JobResult(job_id, std_logging.ERROR, "Job %s failed - Python Error:\n%s" % (str(job_id), error),
+                     error=error)
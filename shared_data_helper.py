@@ -0,0 +1,112 @@
+# helper functions to share large, read-only pandas data (e.g., the input data of use_case_model_EV_modular_v01.py:
+# temperature, price, emissions, 1 s grid frequency, load profile, generation/demand) with worker processes without
+# copying it into every process. share_data() copies the index and the values of each pandas.Series/DataFrame once into
+# a multiprocessing.shared_memory block and returns a small, picklable description of it. attach_data() (in the worker)
+# creates pandas objects that are zero-copy views of the shared blocks. Other objects (e.g., None, objects with a
+# non-numeric index or mixed column types, and small objects) are passed as they are (pickled).
+# Important: the shared data must not be modified by the workers (all processes see the same memory) -> the attached
+# arrays are read-only, so in-place changes (e.g., fillna(inplace=True)) raise a ValueError. Copy the object first.
+# Call release_data() in the main process when the workers are done, to free the shared memory.
+
+import numpy as np
+import pandas as pd
+from multiprocessing import shared_memory
+
+SHARED_MIN_BYTES = 64 * 1024  # objects smaller than this are pickled instead of shared (not worth a shared block)
+
+attached_blocks = []  # shared memory blocks attached in this process (must stay open while the views are used)
+
+
+# descriptions of the shared objects (picklable):
+#   ("series", index, values, name)             index/values: (block name, shape, dtype) of the shared array
+#   ("frame", index, values, columns)           values: (n_columns, n_rows) array, column-wise like pandas' blocks
+#   ("object", obj)                             obj: passed as it is
+
+# copy the values of data_dict (dict: key -> pandas.Series, pandas.DataFrame, or other object) to shared memory
+# outputs: shared_dict (dict: key -> description, pass to attach_data in the workers), blocks (list of the created
+#   shared memory blocks, pass to release_data when the workers are done)
+def share_data(data_dict):
+    shared_dict = {}
+    blocks = []
+    for key, obj in data_dict.items():
+        if is_shareable(obj):
+            index_desc = share_array(np.asarray(obj.index.values), blocks)
+            if type(obj) is pd.Series:
+                shared_dict[key] = ("series", index_desc, share_array(obj.values, blocks), obj.name)
+            else:
+                values_desc = share_array(np.ascontiguousarray(obj.values.T), blocks)
+                shared_dict[key] = ("frame", index_desc, values_desc, obj.columns)
+        else:
+            shared_dict[key] = ("object", obj)
+    return shared_dict, blocks
+
+
+# returns True if obj is a pandas.Series or a DataFrame with one numeric dtype and a numeric index, that is large enough
+def is_shareable(obj):
+    if type(obj) is pd.Series:
+        dtypes = [obj.dtype]
+    elif type(obj) is pd.DataFrame:
+        dtypes = list(set(obj.dtypes))
+        if len(dtypes) != 1:
+            return False
+    else:
+        return False
+    n_bytes = obj.memory_usage(index=True, deep=False)
+    if type(obj) is pd.DataFrame:
+        n_bytes = n_bytes.sum()
+    if n_bytes < SHARED_MIN_BYTES:
+        return False
+    return all(is_numeric_dtype(dt) for dt in dtypes + [obj.index.dtype])
+
+
+def is_numeric_dtype(dtype):
+    return isinstance(dtype, np.dtype) and (dtype.kind in "iufb")
+
+
+# copy arr to a new shared memory block (appended to blocks) and return its description (block name, shape, dtype)
+def share_array(arr, blocks):
+    block = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    blocks.append(block)
+    view = np.ndarray(arr.shape, dtype=arr.dtype, buffer=block.buf)
+    view[...] = arr
+    view.flags.writeable = False
+    return block.name, arr.shape, arr.dtype.str
+
+
+# returns a dict with the same keys as shared_dict (see share_data) and pandas objects that use the shared memory
+def attach_data(shared_dict):
+    data_dict = {}
+    for key, desc in shared_dict.items():
+        if desc[0] == "series":
+            _, index_desc, values_desc, name = desc
+            data_dict[key] = pd.Series(attach_array(values_desc), index=pd.Index(attach_array(index_desc), copy=False),
+                                       name=name, copy=False)
+        elif desc[0] == "frame":
+            _, index_desc, values_desc, columns = desc
+            data_dict[key] = pd.DataFrame(attach_array(values_desc).T, columns=columns, copy=False,
+                                          index=pd.Index(attach_array(index_desc), copy=False))
+        else:
+            data_dict[key] = desc[1]
+    return data_dict
+
+
+def attach_array(desc):
+    name, shape, dtype = desc
+    block = shared_memory.SharedMemory(name=name)
+    attached_blocks.append(block)
+    arr = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    arr.flags.writeable = False  # shared with all other processes -> accidental writes raise an error
+    return arr
+
+
+# free the shared memory blocks created by share_data (call in the main process when the workers are done)
+def release_data(blocks):
+    for block in blocks:
+        try:
+            block.close()
+        except BufferError:  # still used in this process (e.g., attached without worker processes) -> closed at exit
+            pass
+        try:
+            block.unlink()
+        except FileNotFoundError:
+            pass
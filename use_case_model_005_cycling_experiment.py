@@ -15,6 +15,7 @@ import datetime
 from enum import IntEnum
 
 import bat_model_v01 as bat
+import bat_model_v01_batch as bat_batch
 import result_plot
 
 
@@ -56,6 +57,12 @@ N_CHECKUPS_MAX = 3  # for testing and debugging (much shorter simulation time)
 FIRST_CHECKUP_INTERVAL_S = (7 * 24 * 3600)  # interval between the first and the second CU
 NEXT_CHECKUP_INTERVAL_S = (21 * 24 * 3600)  # interval between all following check-ups
 CYCLING_PAUSE = 5 * 60  # in seconds, pause after charging/discharging operations
+USE_BATCH_MODEL = False  # True: simulate all cells of an aging type in lockstep with bat_model_v01_batch.py (pays off
+#                          for many cells, e.g., N_CHECKUPS_MAX = 28 or more conditions), False: one cell at a time
+USE_CYCLE_SKIPPING = False  # True: extrapolate the aging of (almost) identical cycles between the check-ups instead of
+#                             simulating every cycle (see bat.run_cycles_skipping - much faster, the estimated error is
+#                             printed for each cell), False: simulate every cycle. Not used with USE_BATCH_MODEL.
+CYCLE_SKIP_TOLERANCE = bat.CYCLE_SKIP_TOL_DEFAULT  # see bat.run_cycles_skipping
 
 # general settings:
 I_CHG_CAL = 1.0  # in A, charging current used for calendar aging cells (to reach the desired voltage)
@@ -227,14 +234,22 @@ def run():
     combined_df_append_struct = pd.DataFrame(dtype=np.float64, columns=CSV_EXPORT_COLUMNS)
 
     # calendar aging
+    if USE_BATCH_MODEL:
+        print("Simulating all %u CAL cells" % (N_TEMP * N_SOC))
+        age_temp_arr, age_v_arr = zip(*[(TEMP_OT_ARR[i_t], V_CAL_AGE_ARR[i_soc])
+                                        for i_t in range(N_TEMP) for i_soc in range(N_SOC)])
+        batch_results = iter(run_aging_batch(age_type.CALENDAR, age_temp_arr, age_v_arr, age_v_arr, None, None))
     for i_t in range(len(cap_remaining_arr.get(age_type.CALENDAR, []))):  # for all temperatures
         age_temp = TEMP_OT_ARR[i_t]
         for i_soc in range(N_SOC):  # for all SoCs/voltages
             age_v = V_CAL_AGE_ARR[i_soc]
             age_soc = SOC_CAL_AGE_ARR[i_soc]
             i = i + 1
-            print("Simulating CAL %u°C %u%% (progress: %.1f %%)" % (age_temp, age_soc, i / N_TOTAL * 100))
-            cap_aged_df, aging_states_df = run_calendar_aging(age_temp, age_v)
+            if USE_BATCH_MODEL:
+                cap_aged_df, aging_states_df = next(batch_results)
+            else:
+                print("Simulating CAL %u°C %u%% (progress: %.1f %%)" % (age_temp, age_soc, i / N_TOTAL * 100))
+                cap_aged_df, aging_states_df = run_calendar_aging(age_temp, age_v)
             cap_remaining_arr[age_type.CALENDAR][i_t][i_soc] = cap_aged_df
             aging_states_arr[age_type.CALENDAR][i_t][i_soc] = aging_states_df
 
@@ -259,6 +274,14 @@ def run():
             combined_df = pd.concat([combined_df, combined_df_append], axis=0)
 
     # cyclic aging
+    if USE_BATCH_MODEL:
+        print("Simulating all %u CYC cells" % (N_TEMP * N_SOC_RANGES * N_C_RATES))
+        age_temp_arr, age_v_min_arr, age_v_max_arr, age_i_chg_arr, age_i_dischg_arr = zip(*[
+            (TEMP_OT_ARR[i_t], V_CYC_MIN_MAX_AGE_ARR[i_sr][0], V_CYC_MIN_MAX_AGE_ARR[i_sr][1],
+             I_CYC_DISCHG_CHG_ARR[i_cr][1], I_CYC_DISCHG_CHG_ARR[i_cr][0])
+            for i_t in range(N_TEMP) for i_sr in range(N_SOC_RANGES) for i_cr in range(N_C_RATES)])
+        batch_results = iter(run_aging_batch(age_type.CYCLIC, age_temp_arr, age_v_min_arr, age_v_max_arr,
+                                             age_i_chg_arr, age_i_dischg_arr))
     for i_t in range(len(cap_remaining_arr.get(age_type.CYCLIC, []))):  # for all temperatures
         age_temp = TEMP_OT_ARR[i_t]
         for i_soc_range in range(N_SOC_RANGES):  # for all SoC/voltage ranges
@@ -267,9 +290,13 @@ def run():
             for i_c_rate in range(N_C_RATES):  # for all C-rate combinations
                 age_c_rate = I_CYC_DISCHG_CHG_ARR[i_c_rate]
                 i = i + 1
-                print("Simulating CYC %u°C %u-%u%% +%u/-%u A (progress: %.1f %%)"
-                      % (age_temp, age_soc_range[0], age_soc_range[1], age_c_rate[1], age_c_rate[0], i / N_TOTAL * 100))
-                cap_aged_df, aging_states_df = run_cyclic_aging(age_temp, age_v_range, age_c_rate)
+                if USE_BATCH_MODEL:
+                    cap_aged_df, aging_states_df = next(batch_results)
+                else:
+                    print("Simulating CYC %u°C %u-%u%% +%u/-%u A (progress: %.1f %%)"
+                          % (age_temp, age_soc_range[0], age_soc_range[1], age_c_rate[1], age_c_rate[0],
+                             i / N_TOTAL * 100))
+                    cap_aged_df, aging_states_df = run_cyclic_aging(age_temp, age_v_range, age_c_rate)
                 cap_remaining_arr[age_type.CYCLIC][i_t][i_soc_range][i_c_rate] = cap_aged_df
                 aging_states_arr[age_type.CYCLIC][i_t][i_soc_range][i_c_rate] = aging_states_df
 
@@ -294,6 +321,14 @@ def run():
                 combined_df = pd.concat([combined_df, combined_df_append], axis=0)
 
     # profile aging
+    if USE_BATCH_MODEL:
+        print("Simulating all %u PRF cells" % (N_TEMP * N_PROFILES))
+        age_temp_arr, age_v_min_arr, age_v_max_arr, age_i_chg_arr, age_i_dischg_arr, age_profile_arr = zip(*[
+            (TEMP_OT_ARR[i_t], V_PRF_MIN_MAX_AGE_ARR[i_prf][0], V_PRF_MIN_MAX_AGE_ARR[i_prf][1],
+             I_PRF_DISCHG_CHG_ARR[i_prf][1], I_PRF_DISCHG_CHG_ARR[i_prf][0], PROFILE_AGE_ARR[i_prf])
+            for i_t in range(N_TEMP) for i_prf in range(N_PROFILES)])
+        batch_results = iter(run_aging_batch(age_type.PROFILE, age_temp_arr, age_v_min_arr, age_v_max_arr,
+                                             age_i_chg_arr, age_i_dischg_arr, list(age_profile_arr)))
     for i_t in range(len(cap_remaining_arr.get(age_type.PROFILE, []))):  # for all temperatures
         age_temp = TEMP_OT_ARR[i_t]
         for i_prf in range(N_PROFILES):  # for all driving profile/C-rate/SoC limit combinations
@@ -302,9 +337,12 @@ def run():
             age_profile = PROFILE_AGE_ARR[i_prf]
             age_c_rate = I_PRF_DISCHG_CHG_ARR[i_prf]
             i = i + 1
-            print("Simulating PRF %u°C #%u (%u-%u%% +%u A) (progress: %.1f %%)"
-                  % (age_temp, i_prf, age_soc_range[0], age_soc_range[1], age_c_rate[1], i / N_TOTAL * 100))
-            cap_aged_df, aging_states_df = run_profile_aging(age_temp, age_v_range, age_profile, age_c_rate)
+            if USE_BATCH_MODEL:
+                cap_aged_df, aging_states_df = next(batch_results)
+            else:
+                print("Simulating PRF %u°C #%u (%u-%u%% +%u A) (progress: %.1f %%)"
+                      % (age_temp, i_prf, age_soc_range[0], age_soc_range[1], age_c_rate[1], i / N_TOTAL * 100))
+                cap_aged_df, aging_states_df = run_profile_aging(age_temp, age_v_range, age_profile, age_c_rate)
             cap_remaining_arr[age_type.PROFILE][i_t][i_prf] = cap_aged_df
             aging_states_arr[age_type.PROFILE][i_t][i_prf] = aging_states_df
 
@@ -411,12 +449,20 @@ def run_cyclic_aging(age_temp, age_v_range, age_c_rate):
     cap_aged_df[t_start] = cap_aged
     aging_states_df.loc[t_start, :] = aging_states
 
+    skip_stats = [0, 0, 0.0]  # n_cycles, n_cycles_skipped, error_bound (if USE_CYCLE_SKIPPING)
     for i_cu in range(2, N_CHECKUPS_MAX + 1):
         # cyclic aging
-        _, _, _, _, _, cap_aged, aging_states, temp_cell, soc, t_start = bat.apply_cycles(
-            None, t_start, t_next_cu, T_RESOLUTION_ACTIVE, T_RESOLUTION_REST, age_v_range[1], age_v_range[0],
-            age_c_rate[1], age_c_rate[0], I_CHG_CUTOFF_CYC, I_DISCHG_CUTOFF_CYC, CYCLING_PAUSE, True, age_temp,
-            None, None, None, None, None, cap_aged, aging_states, temp_cell, soc)
+        if USE_CYCLE_SKIPPING:
+            cap_aged, aging_states, temp_cell, soc, t_start, *skip_result = bat.apply_cycles_skipping(
+                None, t_start, t_next_cu, T_RESOLUTION_ACTIVE, T_RESOLUTION_REST, age_v_range[1], age_v_range[0],
+                age_c_rate[1], age_c_rate[0], I_CHG_CUTOFF_CYC, I_DISCHG_CUTOFF_CYC, CYCLING_PAUSE, True, age_temp,
+                cap_aged, aging_states, temp_cell, soc, CYCLE_SKIP_TOLERANCE)
+            skip_stats = [a + b for a, b in zip(skip_stats, skip_result)]
+        else:
+            _, _, _, _, _, cap_aged, aging_states, temp_cell, soc, t_start = bat.apply_cycles(
+                None, t_start, t_next_cu, T_RESOLUTION_ACTIVE, T_RESOLUTION_REST, age_v_range[1], age_v_range[0],
+                age_c_rate[1], age_c_rate[0], I_CHG_CUTOFF_CYC, I_DISCHG_CUTOFF_CYC, CYCLING_PAUSE, True, age_temp,
+                None, None, None, None, None, cap_aged, aging_states, temp_cell, soc)
 
         if cap_aged < C_REMAINING_CU_END:
             break
@@ -433,6 +479,8 @@ def run_cyclic_aging(age_temp, age_v_range, age_c_rate):
         if cap_aged < C_REMAINING_CU_END:
             break
 
+    if USE_CYCLE_SKIPPING:
+        print("  %u cycles, %u of them skipped, estimated error of the remaining capacity: %.2e Ah" % tuple(skip_stats))
     return cap_aged_df, aging_states_df
 
 
@@ -448,13 +496,22 @@ def run_profile_aging(age_temp, age_v_range, age_profile, age_c_rate):
     cap_aged_df[t_start] = cap_aged
     aging_states_df.loc[t_start, :] = aging_states
 
+    skip_stats = [0, 0, 0.0]  # n_cycles, n_cycles_skipped, error_bound (if USE_CYCLE_SKIPPING)
     for i_cu in range(2, N_CHECKUPS_MAX + 1):
         # profile aging
-        _, _, _, _, _, cap_aged, aging_states, temp_cell, soc, t_start = bat.apply_profile_cycles(
-            None, t_start, t_next_cu,
-            T_RESOLUTION_ACTIVE, T_RESOLUTION_PROFILE, T_RESOLUTION_REST, age_profile, age_v_range[1], age_v_range[0],
-            age_c_rate[1], I_CHG_CUTOFF_CYC, CYCLING_PAUSE, True, age_temp,
-            None, None, None, None, None, cap_aged, aging_states, temp_cell, soc)
+        if USE_CYCLE_SKIPPING:
+            cap_aged, aging_states, temp_cell, soc, t_start, *skip_result = bat.apply_profile_cycles_skipping(
+                None, t_start, t_next_cu,
+                T_RESOLUTION_ACTIVE, T_RESOLUTION_PROFILE, T_RESOLUTION_REST, age_profile, age_v_range[1],
+                age_v_range[0], age_c_rate[1], I_CHG_CUTOFF_CYC, CYCLING_PAUSE, True, age_temp,
+                cap_aged, aging_states, temp_cell, soc, CYCLE_SKIP_TOLERANCE)
+            skip_stats = [a + b for a, b in zip(skip_stats, skip_result)]
+        else:
+            _, _, _, _, _, cap_aged, aging_states, temp_cell, soc, t_start = bat.apply_profile_cycles(
+                None, t_start, t_next_cu,
+                T_RESOLUTION_ACTIVE, T_RESOLUTION_PROFILE, T_RESOLUTION_REST, age_profile, age_v_range[1],
+                age_v_range[0], age_c_rate[1], I_CHG_CUTOFF_CYC, CYCLING_PAUSE, True, age_temp,
+                None, None, None, None, None, cap_aged, aging_states, temp_cell, soc)
 
         # check-up
         t_next_cu = t_start + NEXT_CHECKUP_INTERVAL_S
@@ -468,9 +525,90 @@ def run_profile_aging(age_temp, age_v_range, age_profile, age_c_rate):
         if cap_aged < C_REMAINING_CU_END:
             break
 
+    if USE_CYCLE_SKIPPING:
+        print("  %u cycles, %u of them skipped, estimated error of the remaining capacity: %.2e Ah" % tuple(skip_stats))
     return cap_aged_df, aging_states_df
 
 
+# run experiment for all cells of one aging type in lockstep using bat_model_v01_batch.py (see USE_BATCH_MODEL).
+# The cells are operated like in run_calendar_aging(), run_cyclic_aging() and run_profile_aging(). Inputs are lists with
+# one value per cell (age_v_min/max_arr: calendar aging voltage for calendar aging cells, age_i_chg/dischg_arr and
+# age_profile_arr: None for calendar aging cells, age_profile_arr: None for cyclic aging cells).
+# Returns a list of (cap_aged_df, aging_states_df) tuples, one for each cell.
+def run_aging_batch(cell_age_type, age_temp_arr, age_v_min_arr, age_v_max_arr, age_i_chg_arr, age_i_dischg_arr,
+                    age_profile_arr=None):
+    n_cells = len(age_temp_arr)
+    age_temp_arr = np.array(age_temp_arr, dtype=np.float64)
+    age_v_min_arr = np.array(age_v_min_arr, dtype=np.float64)
+    age_v_max_arr = np.array(age_v_max_arr, dtype=np.float64)
+    if cell_age_type == age_type.CALENDAR:
+        age_i_chg_arr, age_i_dischg_arr = I_CHG_CAL, I_DISCHG_CAL
+        i_chg_cutoff, i_dischg_cutoff = I_CHG_CUTOFF_CAL, I_DISCHG_CUTOFF_CAL
+    else:
+        age_i_chg_arr = np.array(age_i_chg_arr, dtype=np.float64)
+        age_i_dischg_arr = np.array(age_i_dischg_arr, dtype=np.float64)
+        i_chg_cutoff, i_dischg_cutoff = I_CHG_CUTOFF_CYC, I_DISCHG_CUTOFF_CYC
+
+    # initialize cells (see init_experiment_cell)
+    cap_aged, aging_states, temp_cell, soc = bat_batch.init(n_cells, storage_time_days=CELL_STORAGE_TIME_DAYS,
+                                                            storage_soc=CELL_STORAGE_SOC,
+                                                            storage_temperature=CELL_STORAGE_TEMPERATURE)
+    t_start = np.full(n_cells, EXPERIMENT_START_TIMESTAMP, dtype=np.float64)
+    cap_aged, aging_states, temp_cell, soc, t_start = bat_batch.apply_pause(
+        t_start, T_RESOLUTION_REST, (2 * 3600), TEMP_RT, cap_aged, aging_states, temp_cell, soc)
+
+    results = []
+    for _ in range(n_cells):
+        aging_states_df = pd.DataFrame(columns=[COL_Q_LOSS_SEI, COL_Q_LOSS_CYC, COL_Q_LOSS_LOW, COL_Q_LOSS_PLA,
+                                                COL_Q_CHG_TOTAL, COL_Q_DISCHG_TOTAL, COL_E_CHG_TOTAL,
+                                                COL_E_DISCHG_TOTAL], dtype=np.float64)
+        results.append((pd.Series(dtype=np.float64), aging_states_df))
+    running = np.ones(n_cells, dtype=bool)
+
+    def checkup_and_record(cap_aged, aging_states, temp_cell, soc, t_start):
+        cap_aged, aging_states, temp_cell, soc, t_start = bat_batch.apply_checkup(
+            t_start, T_RESOLUTION_ACTIVE, T_RESOLUTION_REST, age_v_min_arr, age_i_chg_arr, age_i_dischg_arr,
+            i_chg_cutoff, i_dischg_cutoff, age_temp_arr, cap_aged, aging_states, temp_cell, soc, running)
+        for i_cell in np.flatnonzero(running):
+            results[i_cell][0][t_start[i_cell]] = cap_aged[i_cell]
+            results[i_cell][1].loc[t_start[i_cell], :] = aging_states[:, i_cell]
+        return cap_aged, aging_states, temp_cell, soc, t_start
+
+    # initial check-up
+    t_next_cu = t_start + FIRST_CHECKUP_INTERVAL_S
+    cap_aged, aging_states, temp_cell, soc, t_start = checkup_and_record(
+        cap_aged, aging_states, temp_cell, soc, t_start)
+
+    for i_cu in range(2, N_CHECKUPS_MAX + 1):
+        print("  check-up %u/%u, %u cells remaining" % (i_cu, N_CHECKUPS_MAX, np.count_nonzero(running)))
+        if cell_age_type == age_type.CALENDAR:  # calendar aging
+            cap_aged, aging_states, temp_cell, soc, t_start = bat_batch.apply_pause(
+                t_start, T_RESOLUTION_REST, (t_next_cu - t_start), age_temp_arr,
+                cap_aged, aging_states, temp_cell, soc, running)
+        elif cell_age_type == age_type.CYCLIC:  # cyclic aging
+            cap_aged, aging_states, temp_cell, soc, t_start = bat_batch.apply_cycles(
+                None, t_start, t_next_cu, T_RESOLUTION_ACTIVE, T_RESOLUTION_REST, age_v_max_arr, age_v_min_arr,
+                age_i_chg_arr, age_i_dischg_arr, I_CHG_CUTOFF_CYC, I_DISCHG_CUTOFF_CYC, CYCLING_PAUSE, True,
+                age_temp_arr, cap_aged, aging_states, temp_cell, soc, running)
+            running = running & (cap_aged >= C_REMAINING_CU_END)
+        else:  # profile aging
+            cap_aged, aging_states, temp_cell, soc, t_start = bat_batch.apply_profile_cycles(
+                None, t_start, t_next_cu, T_RESOLUTION_ACTIVE, T_RESOLUTION_PROFILE, T_RESOLUTION_REST,
+                age_profile_arr, age_v_max_arr, age_v_min_arr, age_i_chg_arr, I_CHG_CUTOFF_CYC, CYCLING_PAUSE, True,
+                age_temp_arr, cap_aged, aging_states, temp_cell, soc, running)
+
+        # check-up
+        t_next_cu = np.where(running, t_start + NEXT_CHECKUP_INTERVAL_S, t_next_cu)
+        cap_aged, aging_states, temp_cell, soc, t_start = checkup_and_record(
+            cap_aged, aging_states, temp_cell, soc, t_start)
+
+        running = running & (cap_aged >= C_REMAINING_CU_END)
+        if not running.any():
+            break
+
+    return results
+
+
 # generate all empty figure templates
 def generate_result_figures(cap_remaining_arr, aging_states_arr):  # FIXME: aging_states_arr not implemented yet
     # generate empty figures
@@ -43,9 +43,9 @@ T_RESOLUTION_ACTIVE = 15  # in seconds, temporal resolution for modeling an acti
 T_RESOLUTION_PROFILE = 1  # in seconds, temporal resolution for modeling a profile aging cell (discharging) -> need 1s!
 T_RESOLUTION_REST = 300  # in seconds, temporal resolution for modeling a resting cell (idle)
 
-DRIVING_PROFILE_WORK = bat.wltp_profiles.full
-DRIVING_PROFILE_FREE = bat.wltp_profiles.low + bat.wltp_profiles.medium
-DRIVING_PROFILE_TRIP = bat.wltp_profiles.extra_high
+DRIVING_PROFILE_WORK = bat.PowerProfile(bat.wltp_profiles.full, T_RESOLUTION_PROFILE)  # prepared once
+DRIVING_PROFILE_FREE = bat.PowerProfile(bat.wltp_profiles.low + bat.wltp_profiles.medium, T_RESOLUTION_PROFILE)
+DRIVING_PROFILE_TRIP = bat.PowerProfile(bat.wltp_profiles.extra_high, T_RESOLUTION_PROFILE)
 DRIVING_PROFILE_TRIP_REPEAT = 48  # repeat driving_profile_trip 48x
 TRIP_V_MIN = bat.get_ocv_from_soc(0.1)  # recharge if ocv < voltage at 10 % SoC
 
@@ -83,7 +83,7 @@ COL_ARR_AGING_STATES = [COL_Q_LOSS_SEI, COL_Q_LOSS_CYC, COL_Q_LOSS_LOW, COL_Q_LO
 def run():
     cap_aged, aging_states, temp_cell, soc = bat.init()  # init battery
     car_usage_days = drv.get_car_usage_days_v01(DATE_START, SIMULATION_YEARS, TIMEZONE)  # init simulation period
-    v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df = bat.init_empty_df()
+    v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df = bat.init_empty_log()  # fast appending, see SeriesLog
     temp_ambient_df = input_data_helper.load_temperature_data(TIMEZONE, True)
     cap_aged_df = pd.Series(np.nan, index=car_usage_days.index)
     aging_states_df = pd.DataFrame(np.nan, columns=COL_ARR_AGING_STATES, index=car_usage_days.index)
@@ -107,6 +107,10 @@ def run():
     aging_states_df.loc[t_start, COL_Q_LOSS_LOW] = aging_states[I_COL_Q_LOSS_LOW]
     aging_states_df.loc[t_start, COL_Q_LOSS_PLA] = aging_states[I_COL_Q_LOSS_PLA]
 
+    # convert logs to pandas.Series (only once, at the end of the simulation)
+    v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df = bat.get_log_dfs(
+        v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df)
+
     # save data
     run_timestring = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     export_filename_csv = EXPORT_FILENAME + "_" + run_timestring + ".csv"
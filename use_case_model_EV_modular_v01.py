@@ -1,9 +1,9 @@
-import time
 import math
+import random
+import argparse
 import numpy as np
 import pandas as pd
 import datetime
-import multiprocessing
 import os
 import traceback
 
@@ -12,6 +12,10 @@ import driving_profile_helper as drv
 import scenario_helper as sc
 import input_data_helper
 import result_plot
+import log_writer
+import checkpoint_helper
+import scheduler_helper
+import shared_data_helper
 import logger
 
 
@@ -29,13 +33,30 @@ OPEN_IN_BROWSER = False  # True  # when simulating multiple years, the browser m
 EXPORT_HTML = False  # True  # when simulating multiple years, this might take long and cause memory errors
 EXPORT_IMAGE = None  # "png" - Check failed: message->data_num_bytes() <= Channel::kMaximumMessageSize - IPC message ...
 EXPORT_FILENAME_BASE = "use_case_model_007_modular_driving_sc%03u"
+# streaming export of the logs (cell, grid power, capacity, aging states) while simulating, see log_writer.py:
+# None: export one .csv file per scenario at the end of the simulation (needs all logs in memory). Otherwise, e.g.,
+# log_writer.FORMAT_PARQUET / FORMAT_ARROW / FORMAT_CSV: each simulated day is appended to a file per scenario and year
+# in EXPORT_PATH + LOG_EXPORT_DIR (use together with LOG_ENVELOPE_INTERVAL to keep the memory bounded)
+LOG_EXPORT_FORMAT = None
+LOG_EXPORT_DIR = "use_case_model_007_modular_driving_logs"
+LOG_EXPORT_BACKGROUND = True  # write the files in a background thread while simulating the next days
+# checkpoints: save the state of the simulation (cell, logs, random generator, ...) every CHECKPOINT_INTERVAL_DAYS
+# simulated days in EXPORT_PATH + CHECKPOINT_DIR, so it can be continued with "--resume" (e.g., after a crash or when
+# the job was preempted) with identical results. None: no checkpoints. Each checkpoint contains the complete logs in
+# the memory -> only use together with LOG_ENVELOPE_INTERVAL (bounded logs), and LOG_EXPORT_FORMAT if the
+# full-resolution logs are needed. Otherwise, saving the growing logs over and over again takes very long.
+CHECKPOINT_INTERVAL_DAYS = None  # e.g., 30
+CHECKPOINT_DIR = "use_case_model_007_modular_driving_checkpoints"
+LOG_EXPORT_KEYS = ["P_grid [kW]", "P_cell [W]", "I_cell [A]", "V_cell [V]", "SoC_cell [0..1]", "T_cell [degC]",
+                   "Remaining capacity [Ah]"]  # column names of the exported logs (+ aging states)
 
 # multiprocessing settings
-# NUMBER_OF_PROCESSORS_TO_USE = max(multiprocessing.cpu_count() - 1, 1)  # leave one free -> for high performant systems
-# NUMBER_OF_PROCESSORS_TO_USE = math.ceil(multiprocessing.cpu_count() / 2)  # use half of the processors -> ...medium...
-NUMBER_OF_PROCESSORS_TO_USE = 2  # use two processor
+# NUMBER_OF_PROCESSORS_TO_USE = max(scheduler_helper.get_cpu_count() - 1, 1)  # leave one free -> for high perf. systems
+# NUMBER_OF_PROCESSORS_TO_USE = math.ceil(scheduler_helper.get_cpu_count() / 2)  # use half of the processors -> medium
+# NUMBER_OF_PROCESSORS_TO_USE = 2  # use two processor
 # NUMBER_OF_PROCESSORS_TO_USE = 1  # only use one processor --> use this if you have a low-performant system
-modeling_task_queue = multiprocessing.Queue()
+NUMBER_OF_PROCESSORS_TO_USE = None  # one process per available processor (see scheduler_helper.get_n_workers)
+worker_input_data = None  # input data of the scenarios (views of shared memory), set in each worker by init_worker()
 
 
 # logging_filename = "H:\\Luh\\bat\\analysis\\use_case_models\\log\\use_case_model_007.txt"
@@ -73,22 +94,35 @@ SIM_DATE_STOP_DEFAULT = datetime.date(2044, 12, 31)
 # SIM_DATE_STOP_DEFAULT = datetime.date(2025, 7, 9) # FIXME !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
 SIM_DATE_STOP_FREQ_CTRL = SIM_DATE_STOP_DEFAULT
 
-# workaround for huge plots when using frequency control that will throw a memory error
+# workaround for huge plots when using frequency control that will throw a memory error (with LOG_ENVELOPE_INTERVAL,
+# the cell and grid power logs stay small, but the grid frequency input data is still plotted in 1 s resolution)
 MINIMAL_FREQUENCY_CONTROL_PLOT = True
 
+# logs of the cell (voltage, current, power, temperature, SoC) and grid power for long (e.g., 20-year) simulations:
+# None: log every step (bat.SeriesLog) -> might not fit in the memory. Otherwise, use bat.EnvelopeLog: steps older than
+# LOG_FULL_RESOLUTION_WINDOW are reduced to the min/max/mean of each interval of LOG_ENVELOPE_INTERVAL seconds (the plot
+# and .csv contain the min and max) -> memory is bounded by the simulated time span instead of the number of steps
+LOG_ENVELOPE_INTERVAL = None  # in s, e.g., 900
+LOG_FULL_RESOLUTION_WINDOW = 21 * 24 * 60 * 60  # in s, has to be longer than the longest charging process (the cell
+#                                                 power of the process is evaluated afterward in calc_grid_params_...)
+LOG_FULL_RESOLUTION_DATES = []  # days that are logged in full resolution, e.g., [datetime.date(2030, 7, 1), ...]
+
 USE_COMMON_DRIVING_DAYS = True  # if True, use same driving days in all scenarios (using SIM_DATE_START/STOP_DEFAULT)
 
 T_RESOLUTION_ACTIVE = 30  # 15  # in seconds, temporal resolution for modeling an active cell (charging, discharging)
 T_RESOLUTION_PROFILE = 1  # in seconds, temporal resolution for modeling a profile aging cell (discharging) -> need 1s
 #                           since the profiles have this resolution. Change resolution of profiles when changing this.
 T_RESOLUTION_REST = 300  # in seconds, temporal resolution for modeling a resting cell (idle)
+ACTIVE_ADAPTIVE_TOL = None  # None: charge with fixed steps of T_RESOLUTION_ACTIVE, or use adaptive steps with this
+#                             tolerance, e.g., bat.ADAPTIVE_TOL_DEFAULT (see bat.apply_cp_cv) -> fewer steps per charge
 
 # --- driving profiles: workday, free day (leisure / shopping / other activity...), trip (holiday / long 1-way trip) ---
-DRIVING_PROFILE_WORK = bat.wltp_profiles.full
+# (prepared once as bat.PowerProfile objects, so apply_power_profile(_repeat) doesn't convert the lists in every call)
+DRIVING_PROFILE_WORK = bat.PowerProfile(bat.wltp_profiles.full, T_RESOLUTION_PROFILE)
 DRIVING_PROFILE_WORK_DISTANCE = bat.wltp_profiles.full_distance
-DRIVING_PROFILE_FREE = bat.wltp_profiles.low + bat.wltp_profiles.medium
+DRIVING_PROFILE_FREE = bat.PowerProfile(bat.wltp_profiles.low + bat.wltp_profiles.medium, T_RESOLUTION_PROFILE)
 DRIVING_PROFILE_FREE_DISTANCE = bat.wltp_profiles.low_distance + bat.wltp_profiles.medium_distance
-DRIVING_PROFILE_TRIP = bat.wltp_profiles.extra_high
+DRIVING_PROFILE_TRIP = bat.PowerProfile(bat.wltp_profiles.extra_high, T_RESOLUTION_PROFILE)
 DRIVING_PROFILE_TRIP_DISTANCE = bat.wltp_profiles.extra_high_distance
 
 # driving profiles - long-distance trip settings
@@ -96,7 +130,8 @@ DRIVING_PROFILE_TRIP_REPEAT = 48  # repeat DRIVING_PROFILE_TRIP 48x
 TRIP_V_MIN = bat.get_ocv_from_soc(0.1)  # in V, recharge if ocv < voltage at 10 % SoC
 # TEMP_TRIP_MIN / TEMP_FAST_CHARGING -> determine the "ambient" temperature. It is assumed the thermal management system
 # of the battery can do this. The effective R_TH between the cell and the ambient temperature is bat.R_TH_CELL and can
-# also be overwritten here, e.g.: bat.R_TH_CELL = 10
+# also be overwritten here, e.g.: bat.R_TH_CELL = 10 (R_TH_C_TH_CELL is derived from it when the model runs), or passed
+# as a parameter set to the bat.apply_... functions, e.g.: params=bat.CellModelParams(R_TH_CELL=10)
 TEMP_TRIP_MIN = 15  # in °C, if battery colder than this during long trips, let therm. management heat ambient to this T
 
 driving_distances = {
@@ -178,6 +213,12 @@ SOC_THS_25 = 0.25
 
 # charging optimization
 CHG_OPTIMIZE_INTERVAL_S = 5 * 60  # in seconds, align to intervals of this duration (5 * 60 = 5 minutes)
+GRID_CONDITION_LOOK_BACK_S = 6 * 24 * 60 * 60  # in s, V1G/V2G strategies compare the grid signal with its best/worst
+GRID_CONDITION_LOOK_AHEAD_S = 1 * 24 * 60 * 60  # value from this long ago to this long ahead ("forecast")
+GRID_SIGNAL_MARGIN_BEFORE_S = 7 * 24 * 60 * 60  # in s, precompute grid signals from this long before the first day
+#   (> GRID_CONDITION_LOOK_BACK_S, see calculate_relative_grid_conditions)
+GRID_SIGNAL_MARGIN_AFTER_S = 3 * 24 * 60 * 60  # in s, ... to this long after the last day
+#   (> GRID_CONDITION_LOOK_AHEAD_S, charging until the departure on the next day)
 
 # home / work PV system peak power (only one power value is supported for all scenarios and locations, sorry)
 PV_POWER_PEAK_KW = 10  # in kW
@@ -750,6 +791,8 @@ COL_INPUT_DATA_EMISSIONS = "electricity_emissions"
 COL_INPUT_DATA_FREQUENCY = "grid_frequency"
 COL_INPUT_DATA_EL_GEN_DEM = "electricity_generation_and_demand"
 COL_INPUT_DATA_LOAD_PROFILE = "load_profile"
+COL_INPUT_DATA_GRID_SIGNALS = "grid_signals"  # grid signal timeline of the scenario, see get_grid_signal_timeline()
+COL_INPUT_DATA_GRID_SIGNAL_EXTREMA = "grid_signal_extrema"  # sliding-window extrema, see get_grid_signal_window()
 # COL_INPUT_DATA_PV = "pv"
 COL_DRIVING_DAYS = "driving days"
 COL_DATE_START = "start date"
@@ -769,41 +812,30 @@ BASE_SETTINGS_TEXT = \
         CHG_EFFICIENCY, PREFERENCE_TO_CHARGE, PREFERENCE_TO_DISCHARGE_BASE_FACTOR, str(PREFERENCE_TO_DISCHARGE)))
 
 
-def run():
+# resume: continue the scenarios from their last checkpoint (see CHECKPOINT_INTERVAL_DAYS), skip completed scenarios
+def run(resume=False):
     start_timestamp = datetime.datetime.now()
     logging.log.info(os.path.basename(__file__))
-    report_manager = multiprocessing.Manager()
-    report_queue = report_manager.Queue()
 
     logging.log.debug(BASE_SETTINGS_TEXT)
+    if resume and (CHECKPOINT_INTERVAL_DAYS is None):
+        logging.log.warning("resume requested, but CHECKPOINT_INTERVAL_DAYS is None -> starting all scenarios again")
 
-    run_models(report_queue)
+    results = run_models(resume)
 
     logging.log.info("\n\n========== All tasks ended - summary ==========\n")
-    while True:
-        if (report_queue is None) or report_queue.empty():
-            break  # no more reports
-
-        try:
-            report_item = report_queue.get_nowait()
-        except multiprocessing.queues.Empty:
-            break  # no more reports
-
-        if report_item is None:
-            break  # no more reports
-
-        report_msg = report_item["msg"]
-        report_level = report_item["level"]
-        logging.log.log(level=report_level, msg=report_msg)
+    for result in results:
+        logging.log.log(level=result.level, msg=result.msg)
 
     stop_timestamp = datetime.datetime.now()
     logging.log.info("\nScript runtime: %s h:mm:ss.ms" % str(stop_timestamp - start_timestamp))
 
 
-def run_models(report_queue):
+# outputs: list of scheduler_helper.JobResult (one per scenario, in the order of SCENARIO_LIST)
+def run_models(resume=False):
     # check validity of scenario definition
     if not sc.validate_scenario_list(SCENARIO_LIST):
-        return
+        return []
 
     # load input data
     logging.log.info("Loading input data...")
@@ -837,7 +869,11 @@ def run_models(report_queue):
                   COL_INPUT_DATA_FREQUENCY: grid_frequency,
                   COL_INPUT_DATA_LOAD_PROFILE: load_profile,
                   COL_INPUT_DATA_EL_GEN_DEM: el_gen_dem_df}
+    # place the input data in shared memory once -> the worker processes use it without copies (see init_worker)
+    shared_input_data, shared_blocks = shared_data_helper.share_data(input_data)
+    del input_data, temp_ambient, electricity_price, electricity_emissions, grid_frequency, load_profile, el_gen_dem_df
 
+    jobs = []
     if USE_COMMON_DRIVING_DAYS:
         date_start = SIM_DATE_START_DEFAULT
         date_stop = SIM_DATE_STOP_DEFAULT
@@ -851,524 +887,585 @@ def run_models(report_queue):
                 this_date_stop = scenario.get(sc.SIM_STOP)
             else:
                 this_date_stop = SIM_DATE_STOP_DEFAULT
-            modeling_task_queue.put({COL_SCENARIO: scenario, COL_INPUT_DATA: input_data,
-                                     COL_DRIVING_DAYS: car_usage_days,
-                                     COL_DATE_START: this_date_start, COL_DATE_STOP: this_date_stop})
+            jobs.append({COL_SCENARIO: scenario, COL_DRIVING_DAYS: car_usage_days,
+                         COL_DATE_START: this_date_start, COL_DATE_STOP: this_date_stop})
     else:
         for scenario in SCENARIO_LIST:
-            modeling_task_queue.put({COL_SCENARIO: scenario, COL_INPUT_DATA: input_data})
-    total_queue_size = modeling_task_queue.qsize()
-
-    # Create processes
-    processes = []
-    logging.log.info("Starting processes to extend LOG data...")
-    num_processors = min(NUMBER_OF_PROCESSORS_TO_USE, total_queue_size)
-    for processor_number in range(0, num_processors):
-        logging.log.debug("  Starting process %u" % processor_number)
-        processes.append(multiprocessing.Process(
-            target=modeling_thread, args=(processor_number, modeling_task_queue, report_queue, total_queue_size)))
-    for processor_number in range(0, num_processors):
-        processes[processor_number].start()
-    for processor_number in range(0, num_processors):
-        processes[processor_number].join()
-        logging.log.debug("Joined process %u" % processor_number)
-
-
-def modeling_thread(processor_number, job_queue, thread_report_queue, total_queue_size):
-    time.sleep(1)  # sometimes the thread is called before task_queue is ready? wait a few seconds here.
-    retry_counter = 0
-    remaining_size = 1
-    while True:
-        try:
-            remaining_size = job_queue.qsize()
-            job = job_queue.get(block=False)
-        except multiprocessing.queues.Empty:
-            if remaining_size > 0:
-                if retry_counter < 100:
-                    retry_counter = retry_counter + 1
-                    time.sleep(1)
-                    continue
-                else:
-                    break
-            else:
-                break  # no more files
-
-        if job is None:
-            break  # no more files
-
-        retry_counter = 0
-
-        # --- initialize and load variables ----------------------------------------------------------------------------
-        num_infos = 0
-        num_warnings = 0
-        num_errors = 0
-        scenario = job[COL_SCENARIO]
-        input_data = job[COL_INPUT_DATA]
-
-        sc_id = scenario[sc.ID]
-        # simulation_years = scenario[sc.SIM_YEARS]
-
-        progress = 0.0
-        if total_queue_size > 0:
-            progress = (1.0 - remaining_size / total_queue_size) * 100.0
-        logging.log.info("Thread %u scenario %u starting... (progress: %.1f %%)" % (processor_number, sc_id, progress))
-
-        # --- scenario modeling ----------------------------------------------------------------------------------------
-        cap_aged, aging_states, temp_cell, soc = bat.init()  # init battery
-        if USE_COMMON_DRIVING_DAYS:
-            car_usage_days = job[COL_DRIVING_DAYS]
-            date_start = job[COL_DATE_START]
-            date_stop = job[COL_DATE_STOP]
+            jobs.append({COL_SCENARIO: scenario})
+
+    # simulate the scenarios in parallel -> each worker process attaches the shared input data once
+    n_workers = scheduler_helper.get_n_workers(len(jobs), NUMBER_OF_PROCESSORS_TO_USE)
+    logging.log.info("Simulating %u scenarios with %u processes..." % (len(jobs), n_workers))
+    try:
+        return scheduler_helper.run_jobs(model_scenario, jobs, n_workers, args=(resume,),
+                                         job_ids=[scenario[sc.ID] for scenario in SCENARIO_LIST],
+                                         initializer=init_worker, initargs=(shared_input_data,),
+                                         on_done=report_progress)
+    finally:
+        shared_data_helper.release_data(shared_blocks)
+
+
+# attach the shared input data (same for all scenarios, see shared_data_helper) in the worker process
+def init_worker(shared_input_data):
+    global worker_input_data
+    worker_input_data = shared_data_helper.attach_data(shared_input_data)
+
+
+def report_progress(result, n_done, n_jobs):
+    logging.log.info("Scenario %s finished (%u/%u, progress: %.1f %%)"
+                     % (str(result.job_id), n_done, n_jobs, n_done / n_jobs * 100.0))
+    if result.error is not None:  # otherwise, the scenario already logged its result
+        logging.log.log(level=result.level, msg=result.msg)
+
+
+# simulate one scenario (job: see run_models, the input data is in worker_input_data) in a worker process
+# outputs: scheduler_helper.JobResult with the summary of the scenario for the report
+def model_scenario(job, resume=False):
+    # --- initialize and load variables --------------------------------------------------------------------------------
+    num_infos = 0
+    num_warnings = 0
+    num_errors = 0
+    scenario = job[COL_SCENARIO]
+    input_data = worker_input_data
+
+    sc_id = scenario[sc.ID]
+    # simulation_years = scenario[sc.SIM_YEARS]
+
+    logging.log.info("Process %u: scenario %u starting..." % (os.getpid(), sc_id))
+
+    checkpoint_filename = None
+    checkpoint = None
+    if CHECKPOINT_INTERVAL_DAYS is not None:
+        checkpoint_filename = EXPORT_PATH + CHECKPOINT_DIR + os.sep + EXPORT_FILENAME_BASE % sc_id
+        if not resume:
+            checkpoint_helper.clear_checkpoint(checkpoint_filename)
+        elif checkpoint_helper.is_completed(checkpoint_filename):
+            msg = "Scenario %u was already completed - skipped" % sc_id
+            logging.log.info("Process %u: %s" % (os.getpid(), msg))
+            return scheduler_helper.JobResult(sc_id, logger.INFO, msg)
         else:
-            # init simulation period
-            date_start = scenario[sc.SIM_START]
-            date_stop = scenario[sc.SIM_STOP]
-            car_usage_days = drv.get_car_usage_days_v01(date_start, date_stop, TIMEZONE)
-        v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df = bat.init_empty_df()
-        p_grid_df = p_cell_df.copy()
-        driving_distance = 0.0
-
-        # get temperature data in region of interest (might use data of another year if year not available in input)
-        temp_ambient_df = input_data[COL_INPUT_DATA_T]
-        t_u0 = pd.Timestamp("1970-01-01", tz='UTC')
-        datetime_min = car_usage_days.index[0]
-        datetime_max = car_usage_days.index[-1] + datetime.timedelta(days=1)
-        ts_min_roi = (datetime_min - t_u0) // pd.Timedelta("1s")
-        ts_max_roi = (datetime_max - t_u0) // pd.Timedelta("1s")
-        ts_resolution = temp_ambient_df.index[1] - temp_ambient_df.index[0]
-        ts = np.arange(ts_min_roi, ts_max_roi, ts_resolution)
-        temp_ambient_df = input_data_helper.get_temperature_data(temp_ambient_df, ts, True)
-
-        # load_profile_df = input_data[COL_INPUT_DATA_LOAD_PROFILE]
-        # ts_resolution = load_profile_df.index[1] - load_profile_df.index[0]
-        # ts = np.arange(ts_min_roi, ts_max_roi, ts_resolution)
-        # load_profile_df = input_data_helper.get_load_profile_data(temp_ambient_df, ts, True)
-
-        grid_input_data = {COL_INPUT_DATA_T: input_data[COL_INPUT_DATA_T],
-                           COL_INPUT_DATA_PRICE: input_data[COL_INPUT_DATA_PRICE],
-                           COL_INPUT_DATA_EMISSIONS: input_data[COL_INPUT_DATA_EMISSIONS],
-                           COL_INPUT_DATA_FREQUENCY: input_data[COL_INPUT_DATA_FREQUENCY],
-                           COL_INPUT_DATA_LOAD_PROFILE: input_data[COL_INPUT_DATA_LOAD_PROFILE],
-                           COL_INPUT_DATA_EL_GEN_DEM: input_data[COL_INPUT_DATA_EL_GEN_DEM]}
-        # cap_aged_df = pd.Series(np.nan, index=car_usage_days.index)
-        cap_aged_df = pd.Series(dtype=np.float64)
-        # aging_states_df = pd.DataFrame(np.nan, columns=COL_ARR_AGING_STATES, index=car_usage_days.index)
-        aging_states_df = pd.DataFrame(dtype=np.float64, columns=COL_ARR_AGING_STATES)
-        # E_grid, el_cost, emissions,
-        #   E_grid_chg, el_cost_chg, emissions_chg,
-        #   E_grid_dischg, el_cost_dischg, emissions_dischg
-        # el_cost(_chg/dischg) in ct, emissions(_chg/dischg) in g, E_grid(_chg/dischg) in kWh, residual/excess in GW
-        grid_params = [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
-        t_start = car_usage_days.index[0].timestamp()
-        for date, car_usage_day_type in car_usage_days.items():
-            this_date = date.date()
-            if this_date < date_start:
-                continue
-            elif this_date > date_stop:
-                break
-            cap_aged_df.loc[t_start] = cap_aged
-            aging_states_df.loc[t_start, COL_Q_LOSS_SEI] = aging_states[I_COL_Q_LOSS_SEI]
-            aging_states_df.loc[t_start, COL_Q_LOSS_CYC] = aging_states[I_COL_Q_LOSS_CYC]
-            aging_states_df.loc[t_start, COL_Q_LOSS_LOW] = aging_states[I_COL_Q_LOSS_LOW]
-            aging_states_df.loc[t_start, COL_Q_LOSS_PLA] = aging_states[I_COL_Q_LOSS_PLA]
-
-            aging_states_df.loc[t_start, COL_Q_CHG_TOTAL] = aging_states[I_COL_Q_CHG_TOTAL]
-            aging_states_df.loc[t_start, COL_Q_DISCHG_TOTAL] = aging_states[I_COL_Q_DISCHG_TOTAL]
-            aging_states_df.loc[t_start, COL_E_CHG_TOTAL] = aging_states[I_COL_E_CHG_TOTAL]
-            aging_states_df.loc[t_start, COL_E_DISCHG_TOTAL] = aging_states[I_COL_E_DISCHG_TOTAL]
-
-            # noinspection PyTypeChecker
-            (cap_aged, aging_states, temp_cell, soc, v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, t_start,
-             p_grid_df, grid_params, driving_distance, num_infos, num_warnings, num_errors) = \
-                simulate_day(scenario, date, t_start, car_usage_day_type, temp_ambient_df, cap_aged, aging_states,
-                             temp_cell, soc, v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, p_grid_df,
-                             grid_input_data, grid_params, driving_distance, num_infos, num_warnings, num_errors)
-
-        # date = car_usage_days.index[-1] + datetime.timedelta(days=1)
-        # date = pd.Timestamp(ts_input=p_cell_df.index[-1], tz=TIMEZONE, unit="s") + datetime.timedelta(days=1)
-        # date = (pd.to_datetime(p_cell_df.index[-1], unit="s", origin='unix', utc=True).tz_convert(TIMEZONE)
-        #         + datetime.timedelta(days=1))
-        # date = pd.Timestamp(ts_input=p_cell_df.index[-1], tz=TIMEZONE, unit="s")  # use last timestamp
+            checkpoint = checkpoint_helper.load_checkpoint(checkpoint_filename)
+
+    # --- scenario modeling --------------------------------------------------------------------------------------------
+    cap_aged, aging_states, temp_cell, soc = bat.init()  # init battery
+    if USE_COMMON_DRIVING_DAYS:
+        car_usage_days = job[COL_DRIVING_DAYS]
+        date_start = job[COL_DATE_START]
+        date_stop = job[COL_DATE_STOP]
+    else:
+        # init simulation period
+        date_start = scenario[sc.SIM_START]
+        date_stop = scenario[sc.SIM_STOP]
+        car_usage_days = drv.get_car_usage_days_v01(date_start, date_stop, TIMEZONE)
+    if checkpoint is not None:  # use the same (random) driving days as before
+        car_usage_days, date_start, date_stop = checkpoint[0:3]
+    if LOG_ENVELOPE_INTERVAL is None:
+        v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df = bat.init_empty_log()  # fast appending (SeriesLog)
+        p_grid_df = pd.Series(dtype=np.float64)
+    else:
+        v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df = bat.init_envelope_log(
+            LOG_ENVELOPE_INTERVAL, LOG_FULL_RESOLUTION_WINDOW)
+        p_grid_df = bat.EnvelopeLog(LOG_ENVELOPE_INTERVAL, LOG_FULL_RESOLUTION_WINDOW)
+    driving_distance = 0.0
+    log_export = None
+    log_export_filename = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M")
+    log_export_state = None
+    t_exported = -math.inf  # everything up to this timestamp was exported
+    if checkpoint is not None:
+        log_export_filename, log_export_state, t_exported = checkpoint[3:6]
+    if LOG_EXPORT_FORMAT is not None:
+        log_export = log_writer.PartitionedLogWriter(
+            EXPORT_PATH + LOG_EXPORT_DIR, sc_id, log_export_filename, LOG_EXPORT_KEYS + COL_ARR_AGING_STATES,
+            LOG_EXPORT_FORMAT, TIMEZONE, background=LOG_EXPORT_BACKGROUND, state=log_export_state)
+
+    # get temperature data in region of interest (might use data of another year if year not available in input)
+    temp_ambient_df = input_data[COL_INPUT_DATA_T]
+    t_u0 = pd.Timestamp("1970-01-01", tz='UTC')
+    datetime_min = car_usage_days.index[0]
+    datetime_max = car_usage_days.index[-1] + datetime.timedelta(days=1)
+    ts_min_roi = (datetime_min - t_u0) // pd.Timedelta("1s")
+    ts_max_roi = (datetime_max - t_u0) // pd.Timedelta("1s")
+    ts_resolution = temp_ambient_df.index[1] - temp_ambient_df.index[0]
+    ts = np.arange(ts_min_roi, ts_max_roi, ts_resolution)
+    temp_ambient_df = input_data_helper.get_temperature_data(temp_ambient_df, ts, True)
+
+    # load_profile_df = input_data[COL_INPUT_DATA_LOAD_PROFILE]
+    # ts_resolution = load_profile_df.index[1] - load_profile_df.index[0]
+    # ts = np.arange(ts_min_roi, ts_max_roi, ts_resolution)
+    # load_profile_df = input_data_helper.get_load_profile_data(temp_ambient_df, ts, True)
+
+    grid_input_data = {COL_INPUT_DATA_T: input_data[COL_INPUT_DATA_T],
+                       COL_INPUT_DATA_PRICE: input_data[COL_INPUT_DATA_PRICE],
+                       COL_INPUT_DATA_EMISSIONS: input_data[COL_INPUT_DATA_EMISSIONS],
+                       COL_INPUT_DATA_FREQUENCY: input_data[COL_INPUT_DATA_FREQUENCY],
+                       COL_INPUT_DATA_LOAD_PROFILE: input_data[COL_INPUT_DATA_LOAD_PROFILE],
+                       COL_INPUT_DATA_EL_GEN_DEM: input_data[COL_INPUT_DATA_EL_GEN_DEM]}
+    grid_input_data[COL_INPUT_DATA_GRID_SIGNALS] = get_grid_signal_timeline(scenario, grid_input_data, ts_min_roi,
+                                                                            ts_max_roi)
+    grid_input_data[COL_INPUT_DATA_GRID_SIGNAL_EXTREMA] = {}  # filled when used
+    # cap_aged_df = pd.Series(np.nan, index=car_usage_days.index)
+    cap_aged_df = pd.Series(dtype=np.float64)
+    # aging_states_df = pd.DataFrame(np.nan, columns=COL_ARR_AGING_STATES, index=car_usage_days.index)
+    aging_states_df = pd.DataFrame(dtype=np.float64, columns=COL_ARR_AGING_STATES)
+    # E_grid, el_cost, emissions,
+    #   E_grid_chg, el_cost_chg, emissions_chg,
+    #   E_grid_dischg, el_cost_dischg, emissions_dischg
+    # el_cost(_chg/dischg) in ct, emissions(_chg/dischg) in g, E_grid(_chg/dischg) in kWh, residual/excess in GW
+    grid_params = [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+    t_start = car_usage_days.index[0].timestamp()
+    n_days = 0  # number of simulated days
+    date_checkpoint = None  # last day simulated before the checkpoint
+    if checkpoint is not None:
+        (date_checkpoint, n_days, cap_aged, aging_states, temp_cell, soc, t_start, v_cell_df, i_cell_df, p_cell_df,
+         temp_cell_df, soc_df, p_grid_df, cap_aged_df, aging_states_df, grid_params, driving_distance, num_infos,
+         num_warnings, num_errors, random_state) = checkpoint[6:]
+        random.setstate(random_state)
+        logging.log.info("Process %u: scenario %u resuming after %s" % (os.getpid(), sc_id, date_checkpoint))
+    for date, car_usage_day_type in car_usage_days.items():
+        this_date = date.date()
+        if this_date < date_start:
+            continue
+        elif this_date > date_stop:
+            break
+        elif (date_checkpoint is not None) and (this_date <= date_checkpoint):
+            continue  # already simulated
         cap_aged_df.loc[t_start] = cap_aged
         aging_states_df.loc[t_start, COL_Q_LOSS_SEI] = aging_states[I_COL_Q_LOSS_SEI]
         aging_states_df.loc[t_start, COL_Q_LOSS_CYC] = aging_states[I_COL_Q_LOSS_CYC]
         aging_states_df.loc[t_start, COL_Q_LOSS_LOW] = aging_states[I_COL_Q_LOSS_LOW]
         aging_states_df.loc[t_start, COL_Q_LOSS_PLA] = aging_states[I_COL_Q_LOSS_PLA]
-        Qc_tot = aging_states[I_COL_Q_CHG_TOTAL]
-        Qd_tot = aging_states[I_COL_Q_DISCHG_TOTAL]
-        Ec_tot = aging_states[I_COL_E_CHG_TOTAL]
-        Ed_tot = aging_states[I_COL_E_DISCHG_TOTAL]
-        aging_states_df.loc[t_start, COL_Q_CHG_TOTAL] = Qc_tot
-        aging_states_df.loc[t_start, COL_Q_DISCHG_TOTAL] = Qd_tot
-        aging_states_df.loc[t_start, COL_E_CHG_TOTAL] = Ec_tot
-        aging_states_df.loc[t_start, COL_E_DISCHG_TOTAL] = Ed_tot
-        EFC_tot = (Qc_tot + Qd_tot) / 2.0 / bat.CAP_NOMINAL
 
+        aging_states_df.loc[t_start, COL_Q_CHG_TOTAL] = aging_states[I_COL_Q_CHG_TOTAL]
+        aging_states_df.loc[t_start, COL_Q_DISCHG_TOTAL] = aging_states[I_COL_Q_DISCHG_TOTAL]
+        aging_states_df.loc[t_start, COL_E_CHG_TOTAL] = aging_states[I_COL_E_CHG_TOTAL]
+        aging_states_df.loc[t_start, COL_E_DISCHG_TOTAL] = aging_states[I_COL_E_DISCHG_TOTAL]
+
+        if LOG_ENVELOPE_INTERVAL is not None:
+            full_resolution = (this_date in LOG_FULL_RESOLUTION_DATES)
+            for log in [v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, p_grid_df]:
+                log.full_resolution = full_resolution
+
+        # noinspection PyTypeChecker
+        (cap_aged, aging_states, temp_cell, soc, v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, t_start,
+         p_grid_df, grid_params, driving_distance, num_infos, num_warnings, num_errors) = \
+            simulate_day(scenario, date, t_start, car_usage_day_type, temp_ambient_df, cap_aged, aging_states,
+                         temp_cell, soc, v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, p_grid_df,
+                         grid_input_data, grid_params, driving_distance, num_infos, num_warnings, num_errors)
+
+        if log_export is not None:  # export the day
+            t_exported = export_logs(log_export, t_exported, p_grid_df, p_cell_df, i_cell_df, v_cell_df, soc_df,
+                                     temp_cell_df, cap_aged_df, aging_states_df)
+
+        n_days = n_days + 1
+        if (checkpoint_filename is not None) and (n_days % CHECKPOINT_INTERVAL_DAYS == 0):
+            if log_export is not None:
+                log_export_state = log_export.checkpoint()  # the exported logs are complete files now
+            checkpoint_helper.save_checkpoint(checkpoint_filename, (
+                car_usage_days, date_start, date_stop, log_export_filename, log_export_state, t_exported,
+                this_date, n_days, cap_aged, aging_states, temp_cell, soc, t_start, v_cell_df, i_cell_df,
+                p_cell_df, temp_cell_df, soc_df, p_grid_df, cap_aged_df, aging_states_df, grid_params,
+                driving_distance, num_infos, num_warnings, num_errors, random.getstate()))
+
+    # convert logs to pandas.Series (only once, at the end of the simulation)
+    v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df = bat.get_log_dfs(
+        v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df)
+
+    # date = car_usage_days.index[-1] + datetime.timedelta(days=1)
+    # date = pd.Timestamp(ts_input=p_cell_df.index[-1], tz=TIMEZONE, unit="s") + datetime.timedelta(days=1)
+    # date = (pd.to_datetime(p_cell_df.index[-1], unit="s", origin='unix', utc=True).tz_convert(TIMEZONE)
+    #         + datetime.timedelta(days=1))
+    # date = pd.Timestamp(ts_input=p_cell_df.index[-1], tz=TIMEZONE, unit="s")  # use last timestamp
+    cap_aged_df.loc[t_start] = cap_aged
+    aging_states_df.loc[t_start, COL_Q_LOSS_SEI] = aging_states[I_COL_Q_LOSS_SEI]
+    aging_states_df.loc[t_start, COL_Q_LOSS_CYC] = aging_states[I_COL_Q_LOSS_CYC]
+    aging_states_df.loc[t_start, COL_Q_LOSS_LOW] = aging_states[I_COL_Q_LOSS_LOW]
+    aging_states_df.loc[t_start, COL_Q_LOSS_PLA] = aging_states[I_COL_Q_LOSS_PLA]
+    Qc_tot = aging_states[I_COL_Q_CHG_TOTAL]
+    Qd_tot = aging_states[I_COL_Q_DISCHG_TOTAL]
+    Ec_tot = aging_states[I_COL_E_CHG_TOTAL]
+    Ed_tot = aging_states[I_COL_E_DISCHG_TOTAL]
+    aging_states_df.loc[t_start, COL_Q_CHG_TOTAL] = Qc_tot
+    aging_states_df.loc[t_start, COL_Q_DISCHG_TOTAL] = Qd_tot
+    aging_states_df.loc[t_start, COL_E_CHG_TOTAL] = Ec_tot
+    aging_states_df.loc[t_start, COL_E_DISCHG_TOTAL] = Ed_tot
+    EFC_tot = (Qc_tot + Qd_tot) / 2.0 / bat.CAP_NOMINAL
+
+    if log_export is not None:
+        export_logs(log_export, t_exported, p_grid_df, p_cell_df, i_cell_df, v_cell_df, soc_df, temp_cell_df,
+                    cap_aged_df, aging_states_df)
+        export_filenames = log_export.close()
+        logging.log.debug("Scenario %u: exported logs to %s" % (sc_id, ", ".join(export_filenames)))
+
+    if isinstance(p_grid_df, bat.LogSink):
+        # find indexes of p_cell_df that are not available in p_grid_df -> fill them with 0 (the folded intervals of an
+        # EnvelopeLog can contain the same timestamp more than once -> append instead of reindexing)
+        p_grid_df = p_grid_df.to_series()
+        new_ixs = p_cell_df.index[~p_cell_df.index.isin(p_grid_df.index)]
+        p_grid_df = pd.concat([p_grid_df, pd.Series(0.0, index=new_ixs)]).sort_index(kind="stable")
+    else:
         # find indexes of p_cell_df that are not available in p_grid_df -> fill them with 0
         p_cell_ixs = p_cell_df.index
         p_grid_ixs = p_grid_df.index
         new_ixs = p_cell_ixs[~p_cell_ixs.isin(p_grid_ixs)]
         all_ixs = p_grid_ixs.union(new_ixs)
         p_grid_df = p_grid_df.reindex(all_ixs)
-        p_grid_df[new_ixs] = 0.0
+        p_grid_df.loc[new_ixs] = 0.0
         p_grid_df.sort_index(inplace=True)
 
-        # el_cost, emissions, E_grid_chg, el_cost_chg, emissions_chg, E_grid_dischg, el_cost_dischg, emissions_dischg
-        # el_cost(_chg/dischg) in ct, emissions(_chg/dischg) in g, E_grid_chg/dischg in kWh
-        (E_grid, el_cost, emissions, E_grid_chg, el_cost_chg, emissions_chg, t_residual_chg_s, residual_chg,
-         E_grid_dischg, el_cost_dischg, emissions_dischg, t_residual_dischg_s, residual_dischg) = grid_params
-        if E_grid_chg != 0.0:
-            el_cost_chg_avg = el_cost_chg / E_grid_chg  # in ct/kWh
-            emissions_chg_avg = emissions_chg / E_grid_chg  # in gCO2eq/kWh
-        else:
-            el_cost_chg_avg = 0.0
-            emissions_chg_avg = 0.0
-        if E_grid_dischg != 0.0:
-            el_cost_dischg_avg = el_cost_dischg / E_grid_dischg  # in ct/kWh
-            emissions_dischg_avg = emissions_dischg / E_grid_dischg  # in gCO2eq/kWh
-        else:
-            el_cost_dischg_avg = 0.0
-            emissions_dischg_avg = 0.0
-        el_cost_EUR = el_cost / 100.0  # ct in €
-        emissions_kg = emissions / 1000.0  # g in kg
-
-        avg_residual_chg_GW = 0.0  # average residual load (>0) or excess energy (<0) when charging or discharging
-        if t_residual_chg_s != 0.0:
-            avg_residual_chg_GW = residual_chg / t_residual_chg_s
-        avg_residual_dischg_GW = 0.0
-        if t_residual_dischg_s != 0.0:
-            avg_residual_dischg_GW = residual_dischg / t_residual_dischg_s
-
-        Qc_tot_kAh = Qc_tot / 1000.0
-        Qd_tot_kAh = Qd_tot / 1000.0
-        Ec_tot_kWh = Ec_tot / 1000.0
-        Ed_tot_kWh = Ed_tot / 1000.0
-
-        # summary
-        use_case_name = USE_CASE_NAME % sc_id
-        run_timestring = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M")
-        # %s - result (%s) - cell: Qc/d: %.2f/%.2f kAh (%.1f EFC), Ec/d: %.2f/%.2f kWh<br>
-        # grid: E<sub>c/d</sub>: %.0f/%.0f kWh, %.2f € (%.1f/%.1f ct/kWh), CO<sub>2</sub>: %.1f kg (%.0f/%.0f g/kWh)
-        # , avg. res. load: (%.1f/%.1f GW), %.0f km tot.
-        plot_title = TITLE_RE % (use_case_name, run_timestring, Qc_tot_kAh, Qd_tot_kAh, EFC_tot, Ec_tot_kWh, Ed_tot_kWh,
-                                 E_grid_chg, E_grid_dischg, el_cost_EUR, el_cost_chg_avg, el_cost_dischg_avg,
-                                 emissions_kg, emissions_chg_avg, emissions_dischg_avg,
-                                 avg_residual_chg_GW, avg_residual_dischg_GW, driving_distance)
-
-        # --- print result to console/log in case saving doesn't work (e.g., because plot too large) -------------------
-        plot_title_details = sc.get_scenario_subtitle(scenario)
-        log_stat = ("Remaining capacity: %.4f Ah (simulation from %s to %s)"
-                    % (cap_aged, str(date_start), str(date_stop)))
-        result_string = ("\n   %s\n   %s   %s\n" % (plot_title.replace("<br>", "\n   "),
-                                                    plot_title_details.replace("<br>", "\n   "), log_stat))
-        logging.log.debug(("Scenario %u:" % sc_id) + result_string)
-
-        # --- save result data to csv ----------------------------------------------------------------------------------
-        filename_base = EXPORT_FILENAME_BASE % sc_id + "_" + run_timestring
-        export_filename_csv = filename_base + ".csv"
-        csv_dataframes = [p_grid_df, p_cell_df, i_cell_df, v_cell_df, soc_df, temp_cell_df, cap_aged_df]
-        csv_keys = ["P_grid [kW]", "P_cell [W]", "I_cell [A]", "V_cell [V]", "SoC_cell [0..1]",
-                    "T_cell [degC]", "Remaining capacity [Ah]"]
-        csv_ixs = p_grid_df.index
-
-        # ---------- optional .csv exports - comment out if not needed ----------
-        # # 0. generate residual load
-        # scale_shift_years = 0
-        # if sc.SHIFT_BY_YEARS in scenario:
-        #     scale_shift_years = scenario.get(sc.SHIFT_BY_YEARS)
-        # gen_dem_in_df = grid_input_data.get(COL_INPUT_DATA_EL_GEN_DEM)
-        # gen_dem_df = input_data_helper.get_el_gen_dem_data(gen_dem_in_df, csv_ixs, scale_shift_years=scale_shift_years)
-        # residual_df = gen_dem_df[input_data_helper.RESIDUAL_LOAD]
-
-        # # 1. save electricity price/cost
-        # price_df = grid_input_data.get(COL_INPUT_DATA_PRICE)
-        # price_df = input_data_helper.get_price_data(price_df, csv_ixs, residual_load=residual_df)
-        # csv_dataframes.append(price_df)
-        # csv_keys.append("Electricity price [ct/kWh]")
-
-        # # 2. save emissions
-        # emission_df = grid_input_data.get(COL_INPUT_DATA_EMISSIONS)
-        # emission_df = input_data_helper.get_emission_data(emission_df, csv_ixs, residual_load=residual_df)
-        # csv_dataframes.append(emission_df)
-        # csv_keys.append("Emissions [gCO2eq/kWh]")
-
-        # # 3. save renewables and residual load
-        # biomass_df = gen_dem_df[input_data_helper.GEN_BIOMASS]
-        # hydro_df = gen_dem_df[input_data_helper.GEN_HYDRO]
-        # wind_onshore_df = gen_dem_df[input_data_helper.GEN_WIND_OFFSHORE]
-        # wind_offshore_df = gen_dem_df[input_data_helper.GEN_WIND_ONSHORE]
-        # pv_df = gen_dem_df[input_data_helper.GEN_PV]
-        # load_df = gen_dem_df[input_data_helper.DEMAND]
-        # csv_dataframes.extend([biomass_df, hydro_df, wind_onshore_df, wind_offshore_df, pv_df, load_df, residual_df])
-        # csv_keys.extend(["Biomass [GW]", "Hydropower [GW]", "Wind onshore [GW]", "Wind offshore [GW]", "PV [GW]",
-        #                  "Demand [GW]", "Residual load [GW]"])
-
-        # # 4. save frequency (doesn't need 0. / residual load)
-        # frequency_df = grid_input_data.get(COL_INPUT_DATA_FREQUENCY)
-        # frequency_df = input_data_helper.get_freq_data(frequency_df, csv_ixs)
-        # csv_dataframes.append(frequency_df)
-        # csv_keys.append("Grid frequency [Hz]")
-
-        # # 5. save local PV power and demand (load profile)
-        # pv_df = input_data_helper.get_el_gen_pv_data(gen_dem_in_df, csv_ixs) * PV_POWER_PEAK_KW
-        # load_profile_df = grid_input_data.get(COL_INPUT_DATA_LOAD_PROFILE)
-        # load_df = input_data_helper.get_load_profile_data(load_profile_df, csv_ixs)
-        # csv_dataframes.extend([pv_df, load_df])
-        # csv_keys.extend(["PV system [kW]", "Load profile [kW]"])
-
-        # ---------- end of optional .csv exports ----------
-
+    # el_cost, emissions, E_grid_chg, el_cost_chg, emissions_chg, E_grid_dischg, el_cost_dischg, emissions_dischg
+    # el_cost(_chg/dischg) in ct, emissions(_chg/dischg) in g, E_grid_chg/dischg in kWh
+    (E_grid, el_cost, emissions, E_grid_chg, el_cost_chg, emissions_chg, t_residual_chg_s, residual_chg,
+     E_grid_dischg, el_cost_dischg, emissions_dischg, t_residual_dischg_s, residual_dischg) = grid_params
+    if E_grid_chg != 0.0:
+        el_cost_chg_avg = el_cost_chg / E_grid_chg  # in ct/kWh
+        emissions_chg_avg = emissions_chg / E_grid_chg  # in gCO2eq/kWh
+    else:
+        el_cost_chg_avg = 0.0
+        emissions_chg_avg = 0.0
+    if E_grid_dischg != 0.0:
+        el_cost_dischg_avg = el_cost_dischg / E_grid_dischg  # in ct/kWh
+        emissions_dischg_avg = emissions_dischg / E_grid_dischg  # in gCO2eq/kWh
+    else:
+        el_cost_dischg_avg = 0.0
+        emissions_dischg_avg = 0.0
+    el_cost_EUR = el_cost / 100.0  # ct in €
+    emissions_kg = emissions / 1000.0  # g in kg
+
+    avg_residual_chg_GW = 0.0  # average residual load (>0) or excess energy (<0) when charging or discharging
+    if t_residual_chg_s != 0.0:
+        avg_residual_chg_GW = residual_chg / t_residual_chg_s
+    avg_residual_dischg_GW = 0.0
+    if t_residual_dischg_s != 0.0:
+        avg_residual_dischg_GW = residual_dischg / t_residual_dischg_s
+
+    Qc_tot_kAh = Qc_tot / 1000.0
+    Qd_tot_kAh = Qd_tot / 1000.0
+    Ec_tot_kWh = Ec_tot / 1000.0
+    Ed_tot_kWh = Ed_tot / 1000.0
+
+    # summary
+    use_case_name = USE_CASE_NAME % sc_id
+    run_timestring = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M")
+    # %s - result (%s) - cell: Qc/d: %.2f/%.2f kAh (%.1f EFC), Ec/d: %.2f/%.2f kWh<br>
+    # grid: E<sub>c/d</sub>: %.0f/%.0f kWh, %.2f € (%.1f/%.1f ct/kWh), CO<sub>2</sub>: %.1f kg (%.0f/%.0f g/kWh)
+    # , avg. res. load: (%.1f/%.1f GW), %.0f km tot.
+    plot_title = TITLE_RE % (use_case_name, run_timestring, Qc_tot_kAh, Qd_tot_kAh, EFC_tot, Ec_tot_kWh, Ed_tot_kWh,
+                             E_grid_chg, E_grid_dischg, el_cost_EUR, el_cost_chg_avg, el_cost_dischg_avg,
+                             emissions_kg, emissions_chg_avg, emissions_dischg_avg,
+                             avg_residual_chg_GW, avg_residual_dischg_GW, driving_distance)
+
+    # --- print result to console/log in case saving doesn't work (e.g., because plot too large) -----------------------
+    plot_title_details = sc.get_scenario_subtitle(scenario)
+    log_stat = ("Remaining capacity: %.4f Ah (simulation from %s to %s)"
+                % (cap_aged, str(date_start), str(date_stop)))
+    result_string = ("\n   %s\n   %s   %s\n" % (plot_title.replace("<br>", "\n   "),
+                                                plot_title_details.replace("<br>", "\n   "), log_stat))
+    logging.log.debug(("Scenario %u:" % sc_id) + result_string)
+
+    # --- save result data to csv --------------------------------------------------------------------------------------
+    filename_base = EXPORT_FILENAME_BASE % sc_id + "_" + run_timestring
+    export_filename_csv = filename_base + ".csv"
+    csv_dataframes = [p_grid_df, p_cell_df, i_cell_df, v_cell_df, soc_df, temp_cell_df, cap_aged_df]
+    csv_keys = LOG_EXPORT_KEYS.copy()
+    csv_ixs = p_grid_df.index
+
+    # ---------- optional .csv exports - comment out if not needed ----------
+    # # 0. generate residual load
+    # scale_shift_years = 0
+    # if sc.SHIFT_BY_YEARS in scenario:
+    #     scale_shift_years = scenario.get(sc.SHIFT_BY_YEARS)
+    # gen_dem_in_df = grid_input_data.get(COL_INPUT_DATA_EL_GEN_DEM)
+    # gen_dem_df = input_data_helper.get_el_gen_dem_data(gen_dem_in_df, csv_ixs, scale_shift_years=scale_shift_years)
+    # residual_df = gen_dem_df[input_data_helper.RESIDUAL_LOAD]
+
+    # # 1. save electricity price/cost
+    # price_df = grid_input_data.get(COL_INPUT_DATA_PRICE)
+    # price_df = input_data_helper.get_price_data(price_df, csv_ixs, residual_load=residual_df)
+    # csv_dataframes.append(price_df)
+    # csv_keys.append("Electricity price [ct/kWh]")
+
+    # # 2. save emissions
+    # emission_df = grid_input_data.get(COL_INPUT_DATA_EMISSIONS)
+    # emission_df = input_data_helper.get_emission_data(emission_df, csv_ixs, residual_load=residual_df)
+    # csv_dataframes.append(emission_df)
+    # csv_keys.append("Emissions [gCO2eq/kWh]")
+
+    # # 3. save renewables and residual load
+    # biomass_df = gen_dem_df[input_data_helper.GEN_BIOMASS]
+    # hydro_df = gen_dem_df[input_data_helper.GEN_HYDRO]
+    # wind_onshore_df = gen_dem_df[input_data_helper.GEN_WIND_OFFSHORE]
+    # wind_offshore_df = gen_dem_df[input_data_helper.GEN_WIND_ONSHORE]
+    # pv_df = gen_dem_df[input_data_helper.GEN_PV]
+    # load_df = gen_dem_df[input_data_helper.DEMAND]
+    # csv_dataframes.extend([biomass_df, hydro_df, wind_onshore_df, wind_offshore_df, pv_df, load_df, residual_df])
+    # csv_keys.extend(["Biomass [GW]", "Hydropower [GW]", "Wind onshore [GW]", "Wind offshore [GW]", "PV [GW]",
+    #                  "Demand [GW]", "Residual load [GW]"])
+
+    # # 4. save frequency (doesn't need 0. / residual load)
+    # frequency_df = grid_input_data.get(COL_INPUT_DATA_FREQUENCY)
+    # frequency_df = input_data_helper.get_freq_data(frequency_df, csv_ixs)
+    # csv_dataframes.append(frequency_df)
+    # csv_keys.append("Grid frequency [Hz]")
+
+    # # 5. save local PV power and demand (load profile)
+    # pv_df = input_data_helper.get_el_gen_pv_data(gen_dem_in_df, csv_ixs) * PV_POWER_PEAK_KW
+    # load_profile_df = grid_input_data.get(COL_INPUT_DATA_LOAD_PROFILE)
+    # load_df = input_data_helper.get_load_profile_data(load_profile_df, csv_ixs)
+    # csv_dataframes.extend([pv_df, load_df])
+    # csv_keys.extend(["PV system [kW]", "Load profile [kW]"])
+
+    # ---------- end of optional .csv exports ----------
+
+    if log_export is None:  # otherwise already exported while simulating
         data_df = pd.concat(csv_dataframes, axis=1,
                             keys=csv_keys)
         data_df = pd.concat([data_df, aging_states_df], axis=1)
+        data_df.index = bat.get_log_index(data_df.index)  # integer timestamps if all are whole seconds
         data_df.to_csv(EXPORT_PATH + export_filename_csv, index=True, index_label="timestamp",
                        sep=";", float_format="%.4f")  # , na_rep="nan")
 
-        # --- evaluate what to plot ------------------------------------------------------------------------------------
-        chg_strat_arr = []
-        for loc in sc.LOCATION_ARRAY:
-            if loc in scenario:
-                sc_loc = scenario.get(loc)
-                if sc.CHG_STRATEGY in sc_loc:
-                    chg_strat_arr.append(sc_loc.get(sc.CHG_STRATEGY))
-
-        plot_ren = False
-        if PLOT_REN == 2:
-            plot_ren = True
-        elif PLOT_REN == 1:
-            for chg_strat in chg_strat_arr:
-                if (chg_strat == sc.CHG_STRAT.V1G_OPT_REN) or (chg_strat == sc.CHG_STRAT.V2G_OPT_REN):
-                    plot_ren = True
-                    break
-
-        plot_emissions = False
-        if PLOT_EMISSIONS == 2:
-            plot_emissions = True
-        elif PLOT_EMISSIONS == 1:
-            for chg_strat in chg_strat_arr:
-                if (chg_strat == sc.CHG_STRAT.V1G_OPT_EMISSION) or (chg_strat == sc.CHG_STRAT.V2G_OPT_EMISSION):
-                    plot_emissions = True
-                    break
-
-        plot_price = False
-        if PLOT_PRICE == 2:
-            plot_price = True
-        elif PLOT_PRICE == 1:
-            for chg_strat in chg_strat_arr:
-                if (chg_strat == sc.CHG_STRAT.V1G_OPT_COST) or (chg_strat == sc.CHG_STRAT.V2G_OPT_COST):
-                    plot_price = True
-                    break
-
-        plot_frequency = False
-        if PLOT_FREQUENCY == 2:
-            plot_frequency = True
-        elif PLOT_FREQUENCY == 1:
-            for chg_strat in chg_strat_arr:
-                if chg_strat == sc.CHG_STRAT.V2G_OPT_FREQ:
-                    plot_frequency = True
-                    break
-
-        plot_pv_load = False
-        if PLOT_PV_LOAD == 2:
-            plot_pv_load = True
-        elif PLOT_PV_LOAD == 1:
-            for chg_strat in chg_strat_arr:
-                if chg_strat == sc.CHG_STRAT.V2G_OPT_PV:
-                    plot_pv_load = True
-                    break
-
-        minimal_plot = False
-        if MINIMAL_FREQUENCY_CONTROL_PLOT:
-            for chg_strat in chg_strat_arr:
-                if chg_strat == sc.CHG_STRAT.V2G_OPT_FREQ:
-                    minimal_plot = True
-                    break
-
-        if minimal_plot:
-            subplot_titles = RESULT_SUBPLOT_TITLES_MINIMAL.copy()
-            subplot_yaxis_titles = RESULT_SUBPLOT_YAXIS_TITLES_MINIMAL.copy()
-            subplot_yaxis_lim = RESULT_SUBPLOT_YAXIS_LIM_MINIMAL.copy()
-        else:
-            subplot_titles = RESULT_SUBPLOT_TITLES.copy()
-            subplot_yaxis_titles = RESULT_SUBPLOT_YAXIS_TITLES.copy()
-            subplot_yaxis_lim = RESULT_SUBPLOT_YAXIS_LIM.copy()
-            if plot_ren:
-                subplot_titles.append(None)
-                subplot_yaxis_titles.append("Power [GW]")
-                subplot_yaxis_lim.append(None)
-            if plot_emissions:
-                subplot_titles.append(None)
-                subplot_yaxis_titles.append("Emiss. [gCO<sub>2,eq</sub>/kWh]")
-                subplot_yaxis_lim.append(None)
-            if plot_price:
-                subplot_titles.append(None)
-                subplot_yaxis_titles.append("Price [ct/kWh]")
-                subplot_yaxis_lim.append(None)
-            if plot_frequency:
-                subplot_titles.append(None)
-                subplot_yaxis_titles.append("Grid frequency [Hz]")
-                subplot_yaxis_lim.append(None)
-            if plot_pv_load:
-                subplot_titles.append(None)
-                subplot_yaxis_titles.append("PV/demand power [kW]")
-                subplot_yaxis_lim.append(None)
-
-        # --- generate plot --------------------------------------------------------------------------------------------
-        if OPEN_IN_BROWSER or EXPORT_HTML or ((EXPORT_IMAGE is not None) and (EXPORT_IMAGE != "")):
-            # noinspection PyBroadException
-            try:
-                result_fig = result_plot.generate_base_figure(
-                    len(subplot_titles), 1, plot_title, subplot_titles, subplot_yaxis_titles,
-                    plot_title_details=plot_title_details, y_lim_arr=subplot_yaxis_lim)
-
-                x_data = pd.to_datetime(p_cell_df.index, unit="s", origin='unix', utc=True).tz_convert(TIMEZONE)
-                x_data_cap = pd.to_datetime(cap_aged_df.index, unit="s", origin='unix', utc=True).tz_convert(TIMEZONE)
-                # text_data_cap = x_data_cap.strftime('%Y-%m-%d %H:%M:%S')
-                # text_data_cap = x_data_cap
-                # text_data_cap = None
-                i_row = 0
-                if not minimal_plot:
-                    result_plot.add_result_trace(result_fig, i_row, 0, x_data, p_grid_df.values,
-                                                 result_plot.COLOR_P_GRID, False, True, None, TIMEZONE, False)
-                    i_row = i_row + 1
+    # --- evaluate what to plot ----------------------------------------------------------------------------------------
+    chg_strat_arr = []
+    for loc in sc.LOCATION_ARRAY:
+        if loc in scenario:
+            sc_loc = scenario.get(loc)
+            if sc.CHG_STRATEGY in sc_loc:
+                chg_strat_arr.append(sc_loc.get(sc.CHG_STRATEGY))
+
+    plot_ren = False
+    if PLOT_REN == 2:
+        plot_ren = True
+    elif PLOT_REN == 1:
+        for chg_strat in chg_strat_arr:
+            if (chg_strat == sc.CHG_STRAT.V1G_OPT_REN) or (chg_strat == sc.CHG_STRAT.V2G_OPT_REN):
+                plot_ren = True
+                break
 
-                result_plot.add_result_trace(result_fig, i_row, 0, x_data, p_cell_df.values,
-                                             result_plot.COLOR_P_CELL, False, True, None, TIMEZONE, False)
+    plot_emissions = False
+    if PLOT_EMISSIONS == 2:
+        plot_emissions = True
+    elif PLOT_EMISSIONS == 1:
+        for chg_strat in chg_strat_arr:
+            if (chg_strat == sc.CHG_STRAT.V1G_OPT_EMISSION) or (chg_strat == sc.CHG_STRAT.V2G_OPT_EMISSION):
+                plot_emissions = True
+                break
+
+    plot_price = False
+    if PLOT_PRICE == 2:
+        plot_price = True
+    elif PLOT_PRICE == 1:
+        for chg_strat in chg_strat_arr:
+            if (chg_strat == sc.CHG_STRAT.V1G_OPT_COST) or (chg_strat == sc.CHG_STRAT.V2G_OPT_COST):
+                plot_price = True
+                break
+
+    plot_frequency = False
+    if PLOT_FREQUENCY == 2:
+        plot_frequency = True
+    elif PLOT_FREQUENCY == 1:
+        for chg_strat in chg_strat_arr:
+            if chg_strat == sc.CHG_STRAT.V2G_OPT_FREQ:
+                plot_frequency = True
+                break
+
+    plot_pv_load = False
+    if PLOT_PV_LOAD == 2:
+        plot_pv_load = True
+    elif PLOT_PV_LOAD == 1:
+        for chg_strat in chg_strat_arr:
+            if chg_strat == sc.CHG_STRAT.V2G_OPT_PV:
+                plot_pv_load = True
+                break
+
+    minimal_plot = False
+    if MINIMAL_FREQUENCY_CONTROL_PLOT:
+        for chg_strat in chg_strat_arr:
+            if chg_strat == sc.CHG_STRAT.V2G_OPT_FREQ:
+                minimal_plot = True
+                break
+
+    if minimal_plot:
+        subplot_titles = RESULT_SUBPLOT_TITLES_MINIMAL.copy()
+        subplot_yaxis_titles = RESULT_SUBPLOT_YAXIS_TITLES_MINIMAL.copy()
+        subplot_yaxis_lim = RESULT_SUBPLOT_YAXIS_LIM_MINIMAL.copy()
+    else:
+        subplot_titles = RESULT_SUBPLOT_TITLES.copy()
+        subplot_yaxis_titles = RESULT_SUBPLOT_YAXIS_TITLES.copy()
+        subplot_yaxis_lim = RESULT_SUBPLOT_YAXIS_LIM.copy()
+        if plot_ren:
+            subplot_titles.append(None)
+            subplot_yaxis_titles.append("Power [GW]")
+            subplot_yaxis_lim.append(None)
+        if plot_emissions:
+            subplot_titles.append(None)
+            subplot_yaxis_titles.append("Emiss. [gCO<sub>2,eq</sub>/kWh]")
+            subplot_yaxis_lim.append(None)
+        if plot_price:
+            subplot_titles.append(None)
+            subplot_yaxis_titles.append("Price [ct/kWh]")
+            subplot_yaxis_lim.append(None)
+        if plot_frequency:
+            subplot_titles.append(None)
+            subplot_yaxis_titles.append("Grid frequency [Hz]")
+            subplot_yaxis_lim.append(None)
+        if plot_pv_load:
+            subplot_titles.append(None)
+            subplot_yaxis_titles.append("PV/demand power [kW]")
+            subplot_yaxis_lim.append(None)
+
+    # --- generate plot ------------------------------------------------------------------------------------------------
+    if OPEN_IN_BROWSER or EXPORT_HTML or ((EXPORT_IMAGE is not None) and (EXPORT_IMAGE != "")):
+        # noinspection PyBroadException
+        try:
+            result_fig = result_plot.generate_base_figure(
+                len(subplot_titles), 1, plot_title, subplot_titles, subplot_yaxis_titles,
+                plot_title_details=plot_title_details, y_lim_arr=subplot_yaxis_lim)
+
+            x_data_cap = pd.to_datetime(cap_aged_df.index, unit="s", origin='unix', utc=True).tz_convert(TIMEZONE)
+            # text_data_cap = x_data_cap.strftime('%Y-%m-%d %H:%M:%S')
+            # text_data_cap = x_data_cap
+            # text_data_cap = None
+            i_row = 0
+            if not minimal_plot:
+                result_plot.add_result_trace(result_fig, i_row, 0, get_plot_x_data(p_grid_df), p_grid_df.values,
+                                             result_plot.COLOR_P_GRID, False, True, None, TIMEZONE, False)
                 i_row = i_row + 1
 
-                if minimal_plot:
-                    result_plot.add_result_trace(result_fig, i_row, 0, x_data, soc_df.values,
-                                                 result_plot.COLOR_SOC_CELL, False, True, None, TIMEZONE, False)
-                    i_row = i_row + 1
-                elif PLOT_VI:
-                    result_plot.add_result_trace(result_fig, i_row, 0, x_data, i_cell_df.values,
-                                                 result_plot.COLOR_I_CELL, False, True, None, TIMEZONE, False)
-                    i_row = i_row + 1
-                    result_plot.add_result_trace(result_fig, i_row, 0, x_data, v_cell_df.values,
-                                                 result_plot.COLOR_V_CELL, False, True, None, TIMEZONE, False)
-                    i_row = i_row + 1
-                    result_plot.add_result_trace(result_fig, i_row, 0, x_data, soc_df.values,
-                                                 result_plot.COLOR_SOC_CELL, False, True, None, TIMEZONE, False)
-                    i_row = i_row + 1
-                    result_plot.add_result_trace(result_fig, i_row, 0, x_data, temp_cell_df.values,
-                                                 result_plot.COLOR_T_CELL, False, True, None, TIMEZONE, False)
+            result_plot.add_result_trace(result_fig, i_row, 0, get_plot_x_data(p_cell_df), p_cell_df.values,
+                                         result_plot.COLOR_P_CELL, False, True, None, TIMEZONE, False)
+            i_row = i_row + 1
+
+            if minimal_plot:
+                result_plot.add_result_trace(result_fig, i_row, 0, get_plot_x_data(soc_df), soc_df.values,
+                                             result_plot.COLOR_SOC_CELL, False, True, None, TIMEZONE, False)
+                i_row = i_row + 1
+            elif PLOT_VI:
+                result_plot.add_result_trace(result_fig, i_row, 0, get_plot_x_data(i_cell_df), i_cell_df.values,
+                                             result_plot.COLOR_I_CELL, False, True, None, TIMEZONE, False)
+                i_row = i_row + 1
+                result_plot.add_result_trace(result_fig, i_row, 0, get_plot_x_data(v_cell_df), v_cell_df.values,
+                                             result_plot.COLOR_V_CELL, False, True, None, TIMEZONE, False)
+                i_row = i_row + 1
+                result_plot.add_result_trace(result_fig, i_row, 0, get_plot_x_data(soc_df), soc_df.values,
+                                             result_plot.COLOR_SOC_CELL, False, True, None, TIMEZONE, False)
+                i_row = i_row + 1
+                result_plot.add_result_trace(result_fig, i_row, 0, get_plot_x_data(temp_cell_df), temp_cell_df.values,
+                                             result_plot.COLOR_T_CELL, False, True, None, TIMEZONE, False)
+                i_row = i_row + 1
+            else:
+                result_plot.add_result_trace(result_fig, i_row, 0, get_plot_x_data(soc_df), soc_df.values,
+                                             result_plot.COLOR_SOC_CELL, False, True, None, TIMEZONE, False)
+                i_row = i_row + 1
+                result_plot.add_result_trace(result_fig, i_row, 0, get_plot_x_data(temp_cell_df), temp_cell_df.values,
+                                             result_plot.COLOR_T_CELL, False, True, None, TIMEZONE, False)
+                i_row = i_row + 1
+
+            result_plot.add_result_trace(result_fig, i_row, 0, x_data_cap, cap_aged_df.values,
+                                         result_plot.COLOR_SOH_CAP, True, True, None, TIMEZONE, False)
+            i_row = i_row + 1
+
+            t_1 = p_cell_df.index[0]
+            t_2 = p_cell_df.index[-1]
+            if (plot_ren or plot_emissions or plot_price or plot_pv_load) and not minimal_plot:
+                # el_gen_dem_roi = pd.Series(dtype=np.float64)
+                emission_df = pd.Series(dtype=np.float64)
+                price_df = pd.Series(dtype=np.float64)
+                # pv_df = pd.Series(dtype=np.float64)
+                # load_profile_df = pd.Series(dtype=np.float64)
+
+                scale_shift_years = 0
+                if sc.SHIFT_BY_YEARS in scenario:
+                    scale_shift_years = scenario.get(sc.SHIFT_BY_YEARS)
+                gen_dem_df = grid_input_data.get(COL_INPUT_DATA_EL_GEN_DEM)
+
+                ren_dt = gen_dem_df.index[1] - gen_dem_df.index[0]
+                ren_ixs = pd.Index(np.arange(t_1, t_2 + ren_dt, ren_dt))
+                combined_ixs = ren_ixs.copy()
+                emission_ixs = pd.Index([])
+                price_ixs = pd.Index([])
+                # load_profile_ixs = pd.Index([])
+                # pv_ixs = pd.Index([])
+                if plot_emissions:
+                    emission_df = grid_input_data.get(COL_INPUT_DATA_EMISSIONS)
+                    emission_dt = emission_df.index[1] - emission_df.index[0]
+                    emission_ixs = pd.Index(np.arange(t_1, t_2 + emission_dt, emission_dt))
+                    combined_ixs = combined_ixs.append(emission_ixs).drop_duplicates().sort_values()
+                if plot_price:
+                    price_df = grid_input_data.get(COL_INPUT_DATA_PRICE)
+                    price_dt = price_df.index[1] - price_df.index[0]
+                    price_ixs = pd.Index(np.arange(t_1, t_2 + price_dt, price_dt))
+                    combined_ixs = combined_ixs.append(price_ixs).drop_duplicates().sort_values()
+
+                el_gen_dem_combined = input_data_helper.get_el_gen_dem_data(gen_dem_df, combined_ixs,
+                                                                            scale_shift_years=scale_shift_years)
+                residual_combined = el_gen_dem_combined[input_data_helper.RESIDUAL_LOAD]
+                el_gen_dem_plot_ren = el_gen_dem_combined.loc[ren_ixs, :]
+                if plot_ren:
+                    result_plot.add_generation_and_demand_trace(result_fig, i_row, 0, el_gen_dem_plot_ren,
+                                                                False, True, None, TIMEZONE, False)
                     i_row = i_row + 1
-                else:
-                    result_plot.add_result_trace(result_fig, i_row, 0, x_data, soc_df.values,
-                                                 result_plot.COLOR_SOC_CELL, False, True, None, TIMEZONE, False)
+                if plot_emissions:
+                    residual_emissions = residual_combined[emission_ixs]
+                    emissions_plot = input_data_helper.get_emission_data(emission_df, emission_ixs,
+                                                                         residual_load=residual_emissions)
+                    em_x = pd.to_datetime(emissions_plot.index,
+                                          unit="s", origin='unix', utc=True).tz_convert(TIMEZONE)
+                    result_plot.add_result_trace(result_fig, i_row, 0, em_x, emissions_plot.values,
+                                                 result_plot.COLOR_EMISSIONS, False, True, None, TIMEZONE, False)
                     i_row = i_row + 1
-                    result_plot.add_result_trace(result_fig, i_row, 0, x_data, temp_cell_df.values,
-                                                 result_plot.COLOR_T_CELL, False, True, None, TIMEZONE, False)
+                if plot_price:
+                    residual_price = residual_combined[price_ixs]
+                    price_plot = input_data_helper.get_price_data(price_df, price_ixs, residual_load=residual_price)
+                    pr_x = pd.to_datetime(price_plot.index, unit="s", origin='unix', utc=True).tz_convert(TIMEZONE)
+                    result_plot.add_result_trace(result_fig, i_row, 0, pr_x, price_plot.values,
+                                                 result_plot.COLOR_PRICE, False, True, None, TIMEZONE, False)
                     i_row = i_row + 1
+                if plot_pv_load:
+                    # load the load profile data
+                    load_profile_df = grid_input_data.get(COL_INPUT_DATA_LOAD_PROFILE)
+                    load_profile_dt = load_profile_df.index[1] - load_profile_df.index[0]
+                    load_profile_ixs = pd.Index(np.arange(t_1, t_2 + load_profile_dt, load_profile_dt))
+                    combined_ixs = combined_ixs.append(load_profile_ixs).drop_duplicates().sort_values()
+                    combined_ixs = combined_ixs.append(p_grid_df.index).drop_duplicates().sort_values()
 
-                result_plot.add_result_trace(result_fig, i_row, 0, x_data_cap, cap_aged_df.values,
-                                             result_plot.COLOR_SOH_CAP, True, True, None, TIMEZONE, False)
-                i_row = i_row + 1
+                    # load PV base data, scale to PV_POWER_PEAK_KW kWp, generate data at the indexes that are needed
+                    pv_plot = input_data_helper.get_el_gen_pv_data(gen_dem_df, combined_ixs) * PV_POWER_PEAK_KW
+                    load_profile_plot = input_data_helper.get_load_profile_data(load_profile_df, combined_ixs)
 
-                t_1 = p_cell_df.index[0]
-                t_2 = p_cell_df.index[-1]
-                if (plot_ren or plot_emissions or plot_price or plot_pv_load) and not minimal_plot:
-                    # el_gen_dem_roi = pd.Series(dtype=np.float64)
-                    emission_df = pd.Series(dtype=np.float64)
-                    price_df = pd.Series(dtype=np.float64)
-                    # pv_df = pd.Series(dtype=np.float64)
-                    # load_profile_df = pd.Series(dtype=np.float64)
-
-                    scale_shift_years = 0
-                    if sc.SHIFT_BY_YEARS in scenario:
-                        scale_shift_years = scenario.get(sc.SHIFT_BY_YEARS)
-                    gen_dem_df = grid_input_data.get(COL_INPUT_DATA_EL_GEN_DEM)
-
-                    ren_dt = gen_dem_df.index[1] - gen_dem_df.index[0]
-                    ren_ixs = pd.Index(np.arange(t_1, t_2 + ren_dt, ren_dt))
-                    combined_ixs = ren_ixs.copy()
-                    emission_ixs = pd.Index([])
-                    price_ixs = pd.Index([])
-                    # load_profile_ixs = pd.Index([])
-                    # pv_ixs = pd.Index([])
-                    if plot_emissions:
-                        emission_df = grid_input_data.get(COL_INPUT_DATA_EMISSIONS)
-                        emission_dt = emission_df.index[1] - emission_df.index[0]
-                        emission_ixs = pd.Index(np.arange(t_1, t_2 + emission_dt, emission_dt))
-                        combined_ixs = combined_ixs.append(emission_ixs).drop_duplicates().sort_values()
-                    if plot_price:
-                        price_df = grid_input_data.get(COL_INPUT_DATA_PRICE)
-                        price_dt = price_df.index[1] - price_df.index[0]
-                        price_ixs = pd.Index(np.arange(t_1, t_2 + price_dt, price_dt))
-                        combined_ixs = combined_ixs.append(price_ixs).drop_duplicates().sort_values()
-
-                    el_gen_dem_combined = input_data_helper.get_el_gen_dem_data(gen_dem_df, combined_ixs,
-                                                                                scale_shift_years=scale_shift_years)
-                    residual_combined = el_gen_dem_combined[input_data_helper.RESIDUAL_LOAD]
-                    el_gen_dem_plot_ren = el_gen_dem_combined.loc[ren_ixs, :]
-                    if plot_ren:
-                        result_plot.add_generation_and_demand_trace(result_fig, i_row, 0, el_gen_dem_plot_ren,
-                                                                    False, True, None, TIMEZONE, False)
-                        i_row = i_row + 1
-                    if plot_emissions:
-                        residual_emissions = residual_combined[emission_ixs]
-                        emissions_plot = input_data_helper.get_emission_data(emission_df, emission_ixs,
-                                                                             residual_load=residual_emissions)
-                        em_x = pd.to_datetime(emissions_plot.index,
-                                              unit="s", origin='unix', utc=True).tz_convert(TIMEZONE)
-                        result_plot.add_result_trace(result_fig, i_row, 0, em_x, emissions_plot.values,
-                                                     result_plot.COLOR_EMISSIONS, False, True, None, TIMEZONE, False)
-                        i_row = i_row + 1
-                    if plot_price:
-                        residual_price = residual_combined[price_ixs]
-                        price_plot = input_data_helper.get_price_data(price_df, price_ixs, residual_load=residual_price)
-                        pr_x = pd.to_datetime(price_plot.index, unit="s", origin='unix', utc=True).tz_convert(TIMEZONE)
-                        result_plot.add_result_trace(result_fig, i_row, 0, pr_x, price_plot.values,
-                                                     result_plot.COLOR_PRICE, False, True, None, TIMEZONE, False)
-                        i_row = i_row + 1
-                    if plot_pv_load:
-                        # load the load profile data
-                        load_profile_df = grid_input_data.get(COL_INPUT_DATA_LOAD_PROFILE)
-                        load_profile_dt = load_profile_df.index[1] - load_profile_df.index[0]
-                        load_profile_ixs = pd.Index(np.arange(t_1, t_2 + load_profile_dt, load_profile_dt))
-                        combined_ixs = combined_ixs.append(load_profile_ixs).drop_duplicates().sort_values()
-                        combined_ixs = combined_ixs.append(p_grid_df.index).drop_duplicates().sort_values()
-
-                        # load PV base data, scale to PV_POWER_PEAK_KW kWp, generate data at the indexes that are needed
-                        pv_plot = input_data_helper.get_el_gen_pv_data(gen_dem_df, combined_ixs) * PV_POWER_PEAK_KW
-                        load_profile_plot = input_data_helper.get_load_profile_data(load_profile_df, combined_ixs)
-
-                        result_plot.add_pv_and_load_profile_trace(result_fig, i_row, 0, pv_plot, load_profile_plot,
-                                                                  p_grid_df, False, True, None, TIMEZONE, False)
-
-                        i_row = i_row + 1
-                if plot_frequency and not minimal_plot:
-                    freq_df = grid_input_data[COL_INPUT_DATA_FREQUENCY]
-                    freq_dt = freq_df.index[1] - freq_df.index[0]
-                    freq_ixs = pd.Index(np.arange(t_1, t_2 + freq_dt, freq_dt))
-                    freq_plot = input_data_helper.get_freq_data(freq_df, freq_ixs)
-                    fr_x = pd.to_datetime(freq_plot.index, unit="s", origin='unix', utc=True).tz_convert(TIMEZONE)
-                    result_plot.add_result_trace(result_fig, i_row, 0, fr_x, freq_plot.values,
-                                                 result_plot.COLOR_FREQUENCY, False, True, None, TIMEZONE, False)
-                    # i_row = i_row + 1
-
-                result_plot.export_figure(result_fig, EXPORT_HTML, EXPORT_IMAGE, EXPORT_PATH, filename_base,
-                                          OPEN_IN_BROWSER, append_date=False)
-            except Exception:  # prevent program termination -> we want to continue with the other scenarios regardless
-                num_errors = num_errors + 1
-                logging.log.error("Scenario %u - Python Error during plot generation / export:\n%s"
-                                  % (sc_id, traceback.format_exc()))
-
-        # --- reporting to main thread ---------------------------------------------------------------------------------
-        report_msg = (f"%s - Scenario %u done - %u infos, %u warnings, %u errors%s"
-                      % (filename_base, sc_id, num_infos, num_warnings, num_errors, result_string))
-        report_level = logger.INFO
-        if num_errors > 0:
-            report_level = logger.ERROR
-        elif num_warnings > 0:
-            report_level = logger.WARNING
-        logging.log.log(level=report_level, msg=report_msg)
-
-        job_report = {"msg": report_msg, "level": report_level}
-        thread_report_queue.put(job_report)
-
-    modeling_task_queue.close()
-    logging.log.info("Thread %u - no more jobs - exiting" % processor_number)
+                    result_plot.add_pv_and_load_profile_trace(result_fig, i_row, 0, pv_plot, load_profile_plot,
+                                                              p_grid_df, False, True, None, TIMEZONE, False)
+
+                    i_row = i_row + 1
+            if plot_frequency and not minimal_plot:
+                freq_df = grid_input_data[COL_INPUT_DATA_FREQUENCY]
+                freq_dt = freq_df.index[1] - freq_df.index[0]
+                freq_ixs = pd.Index(np.arange(t_1, t_2 + freq_dt, freq_dt))
+                freq_plot = input_data_helper.get_freq_data(freq_df, freq_ixs)
+                fr_x = pd.to_datetime(freq_plot.index, unit="s", origin='unix', utc=True).tz_convert(TIMEZONE)
+                result_plot.add_result_trace(result_fig, i_row, 0, fr_x, freq_plot.values,
+                                             result_plot.COLOR_FREQUENCY, False, True, None, TIMEZONE, False)
+                # i_row = i_row + 1
+
+            result_plot.export_figure(result_fig, EXPORT_HTML, EXPORT_IMAGE, EXPORT_PATH, filename_base,
+                                      OPEN_IN_BROWSER, append_date=False)
+        except Exception:  # prevent program termination -> we want to continue with the other scenarios regardless
+            num_errors = num_errors + 1
+            logging.log.error("Scenario %u - Python Error during plot generation / export:\n%s"
+                              % (sc_id, traceback.format_exc()))
+
+    # --- reporting to main process ------------------------------------------------------------------------------------
+    report_msg = (f"%s - Scenario %u done - %u infos, %u warnings, %u errors%s"
+                  % (filename_base, sc_id, num_infos, num_warnings, num_errors, result_string))
+    report_level = logger.INFO
+    if num_errors > 0:
+        report_level = logger.ERROR
+    elif num_warnings > 0:
+        report_level = logger.WARNING
+    logging.log.log(level=report_level, msg=report_msg)
+
+    if checkpoint_filename is not None:
+        checkpoint_helper.set_completed(checkpoint_filename)
+    return scheduler_helper.JobResult(sc_id, report_level, report_msg)
 
 
 def simulate_day(scenario, date, t_start, car_usage_day_type, temp_ambient_df, cap_aged, aging_states, temp_cell, soc,
@@ -1450,7 +1547,7 @@ def simulate_two_trip_day(scenario, dst_loc, date, t_start, temp_ambient_df, cap
         num_warnings = num_warnings + 1
         logging.log.warning("Scenario %s: unexpected destination %s for two-trip day -> using full WLTP profile"
                             % (sc_id, dst_loc))
-        driving_profile = bat.wltp_profiles.full  # fallback
+        driving_profile = DRIVING_PROFILE_WORK  # fallback (= full WLTP profile)
 
     # while the EV rests, do things according to HOME charging strategy until the earliest configured departure
     t_earliest_departure = drv.get_earliest_departure_unix_ts(date, dep_range_h, TIMEZONE)
@@ -1546,7 +1643,7 @@ def simulate_trip_day(scenario, date, t_start, temp_ambient_df, cap_aged, aging_
         v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start = (
             bat.apply_cp_cv(t_start, T_RESOLUTION_ACTIVE, chg_v_lim, chg_p_cell, chg_i_co, t_conditioning_fast_charging,
                             v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df,
-                            cap_aged, aging_states, temp_cell, soc))
+                            cap_aged, aging_states, temp_cell, soc, adaptive_tol=ACTIVE_ADAPTIVE_TOL))
 
         grid_params, p_grid_df = calc_grid_params_ex_ante(scenario, grid_params, grid_input_data, p_cell_df, p_grid_df,
                                                           t_chg_start, t_start)
@@ -1644,7 +1741,7 @@ def simulate_rest(scenario, loc, t_start, t_earliest_departure, temp_ambient_df,
             v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start = (
                 bat.apply_cp_cv(t_start, T_RESOLUTION_ACTIVE, chg_v_lim, chg_p_cell, chg_i_co, t_when_charging,
                                 v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states,
-                                temp_cell, soc, t_end_max=t_earliest_departure))
+                                temp_cell, soc, t_end_max=t_earliest_departure, adaptive_tol=ACTIVE_ADAPTIVE_TOL))
         elif chg_strat_loc == sc.CHG_STRAT.V2G_OPT_FREQ:
             # frequency control until t_earliest_departure
             # get freq in range [t_start, t_earliest_departure)
@@ -1771,11 +1868,12 @@ def solar_charging(sc_loc, chg_soc_low, t_start, t_earliest_departure, temp_ambi
     t_interval_start_ser = pd.Series(t_interval_start_list, index=t_interval_start_list)
     t_analyze_from = t_interval_start_list[0]
     t_analyze_to = t_interval_start_list[-1] + 2 * load_profile_dt
-    el_gen_dem_data_df = grid_input_data.get(COL_INPUT_DATA_EL_GEN_DEM)
+    grid_signals_df = grid_input_data.get(COL_INPUT_DATA_GRID_SIGNALS)
     ixs_analyze = pd.Index(np.arange(t_analyze_from, t_analyze_to, load_profile_dt))
     t_analyze = pd.Series(ixs_analyze, index=ixs_analyze)
     t_fetch_ser = pd.concat([t_interval_start_ser, t_analyze], axis=0).drop_duplicates().sort_index()
-    pv_df = input_data_helper.get_el_gen_pv_data(el_gen_dem_data_df, t_fetch_ser) * PV_POWER_PEAK_KW
+    pv_df = input_data_helper.get_grid_signal(grid_signals_df, input_data_helper.GRID_SIGNAL_PV,
+                                              t_fetch_ser) * PV_POWER_PEAK_KW
 
     # get load profile data
     try:
@@ -1898,7 +1996,7 @@ def solar_charging(sc_loc, chg_soc_low, t_start, t_earliest_departure, temp_ambi
                 = bat.apply_cp_cv(t_start, t_resolution_active, chg_v_lim, p_opt_cell, i_co_pv_chg,  # t_when_charging,
                                   temp_when_charging_list[i],  # try to speed up simulation -> tested, works
                                   v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states,
-                                  temp_cell, soc, t_end_max=t_interval_end)
+                                  temp_cell, soc, t_end_max=t_interval_end, adaptive_tol=ACTIVE_ADAPTIVE_TOL)
             # if i_cell_df.iloc[-1] <= chg_i_co:  # charging stopped because cut-off current limit was reached
             #     battery_full = True
             if t_start < t_interval_end:  # charging stopped because cut-off current limit was reached
@@ -1909,7 +2007,7 @@ def solar_charging(sc_loc, chg_soc_low, t_start, t_earliest_departure, temp_ambi
                 = bat.apply_cp_cv(t_start, t_resolution_active, v_lim_low, p_opt_cell, -i_co_pv_chg,  # temp_ambient_df,
                                   temp_ambient_list[i],  # try to speed up simulation -> tested, works
                                   v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states,
-                                  temp_cell, soc, t_end_max=t_interval_end)
+                                  temp_cell, soc, t_end_max=t_interval_end, adaptive_tol=ACTIVE_ADAPTIVE_TOL)
             # if i_cell_df.iloc[-1] >= chg_i_co:  # discharging stopped because cut-off current limit was reached
             #     battery_empty = True
             if t_start < t_interval_end:  # discharging stopped because cut-off current limit was reached
@@ -1942,7 +2040,7 @@ def solar_charging(sc_loc, chg_soc_low, t_start, t_earliest_departure, temp_ambi
         v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start \
             = bat.apply_cp_cv(t_start, t_resolution_active, chg_v_lim, chg_p_cell, chg_i_co, t_when_charging,
                               v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states,
-                              temp_cell, soc, t_end_max=t_earliest_departure)
+                              temp_cell, soc, t_end_max=t_earliest_departure, adaptive_tol=ACTIVE_ADAPTIVE_TOL)
 
     return v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start
 
@@ -2021,16 +2119,16 @@ def smart_charging(scenario, sc_loc, chg_strat_loc, chg_soc_low, t_start, t_earl
             v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start \
                 = bat.apply_cp_cv(t_start, t_resolution_active, chg_v_lim, p_opt_cell, chg_i_co, t_when_charging,
                                   v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states,
-                                  temp_cell, soc, t_end_max=t_interval_end)
-            if i_cell_df.iloc[-1] <= chg_i_co:  # charging stopped because cut-off current limit was reached
+                                  temp_cell, soc, t_end_max=t_interval_end, adaptive_tol=ACTIVE_ADAPTIVE_TOL)
+            if bat.get_log_last(i_cell_df)[1] <= chg_i_co:  # charging stopped because cut-off current limit was reached
                 battery_full = True
             battery_empty = False
         elif (p_opt_cell < 0.0) and not battery_empty:  # discharge
             v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states, temp_cell, soc, t_start \
                 = bat.apply_cp_cv(t_start, t_resolution_active, v_lim_low, p_opt_cell, -chg_i_co, temp_ambient_df,
                                   v_cell_df, i_cell_df, p_cell_df, temp_cell_df, soc_df, cap_aged, aging_states,
-                                  temp_cell, soc, t_end_max=t_interval_end)
-            if i_cell_df.iloc[-1] >= chg_i_co:  # discharging stopped because cut-off current limit was reached
+                                  temp_cell, soc, t_end_max=t_interval_end, adaptive_tol=ACTIVE_ADAPTIVE_TOL)
+            if bat.get_log_last(i_cell_df)[1] >= chg_i_co:  # discharging stopped, cut-off current limit was reached
                 battery_empty = True
             battery_full = False
         # else: p_opt_cell == 0.0 -> do nothing
@@ -2048,50 +2146,47 @@ def smart_charging(scenario, sc_loc, chg_strat_loc, chg_soc_low, t_start, t_earl
 
 
 def calc_grid_params_ex_ante(scenario, grid_params, grid_input_data, p_cell_df, p_grid_df, t_chg_start, t_next):
-    new_ixs = p_cell_df[p_cell_df.index > t_chg_start].index
-    if len(new_ixs) == 0:
+    # p_cell_df can be a bat.LogSink or a pandas.Series -> only use the (sorted) index and values since t_chg_start
+    new_ixs, new_p_cell = bat.get_log_since(p_cell_df, t_chg_start)
+    if new_ixs.shape[0] == 0:
         return grid_params, p_grid_df  # nothing new happened
-    new_p_grid = p_cell_df[new_ixs].copy() * bat.wltp_profiles.P_CELL_W_TO_P_EV_KW
-    all_ixs = p_grid_df.index.union(new_ixs)
-    p_grid_df = p_grid_df.reindex(all_ixs)
-    p_grid_df[new_ixs] = new_p_grid  # test if this works
+    new_ixs = pd.Index(bat.get_log_index(new_ixs))
+    new_p_grid = pd.Series(new_p_cell * bat.wltp_profiles.P_CELL_W_TO_P_EV_KW, index=new_ixs)
     dt_s = -pd.Series(new_ixs, index=new_ixs).diff(-1)  # time periods in which p_cell/grid_df are applied
     dt_s.iloc[-1] = t_next - new_ixs[-1]
-    cond_chg = (p_grid_df[new_ixs] > 0.0)
-    cond_dischg = (p_grid_df[new_ixs] < 0.0)
+    cond_chg = (new_p_grid > 0.0)
+    cond_dischg = (new_p_grid < 0.0)
 
     # charging (P > 0) -> p_grid is higher because of charger losses
-    p_grid_df.loc[new_ixs[cond_chg]] = p_grid_df[new_ixs[cond_chg]] / CHG_EFFICIENCY
+    new_p_grid[cond_chg] = new_p_grid[cond_chg] / CHG_EFFICIENCY
     # discharging (P < 0) -> p_grid is lower because of charger losses
-    p_grid_df.loc[new_ixs[cond_dischg]] = p_grid_df[new_ixs[cond_dischg]] * CHG_EFFICIENCY
+    new_p_grid[cond_dischg] = new_p_grid[cond_dischg] * CHG_EFFICIENCY
 
-    # determine residual load (might be required for emission and price estimation if no historic data is available
-    scale_shift_years = 0
-    if sc.SHIFT_BY_YEARS in scenario:
-        scale_shift_years = scenario.get(sc.SHIFT_BY_YEARS)
-    el_gen_dem_data_df = grid_input_data.get(COL_INPUT_DATA_EL_GEN_DEM)
-    el_gen_dem_roi = input_data_helper.get_el_gen_dem_data(el_gen_dem_data_df, new_ixs,
-                                                           scale_shift_years=scale_shift_years)
-    residual_roi = el_gen_dem_roi[input_data_helper.RESIDUAL_LOAD]
-
-    if scale_shift_years == 0:
-        # we don't transform historic energy demand/generation to future scenarios --> use historic emissions if
-        # available, use estimations if no data is available for the time
-        emission_roi = input_data_helper.get_emission_data(grid_input_data.get(COL_INPUT_DATA_EMISSIONS), new_ixs,
-                                                           residual_load=residual_roi)
-        price_roi = input_data_helper.get_price_data(grid_input_data.get(COL_INPUT_DATA_PRICE), new_ixs)
+    if isinstance(p_grid_df, bat.LogSink):  # log the grid power of the process, and 0 before and after it
+        if not (bat.get_log_last(p_grid_df)[0] >= t_chg_start):
+            p_grid_df.append([t_chg_start], [0.0])
+        p_grid_df.append_series(new_p_grid)
+        p_grid_df.append([t_next], [0.0])
     else:
-        # we shift renewable generation installation capacity to the future
-        # -> useless to use emission data of the past, use estimated data for all entries
-        emission_roi = input_data_helper.get_emission_estimate_based_on_residual_load(residual_roi)
-        price_roi = input_data_helper.get_price_estimate_based_on_residual_load(residual_roi)
+        all_ixs = p_grid_df.index.union(new_ixs)
+        p_grid_df = p_grid_df.reindex(all_ixs)
+        p_grid_df.loc[new_ixs] = new_p_grid
+
+    # residual load, emissions and electricity price of the grid energy (historic or estimated, depending on scenario)
+    grid_signals_df = grid_input_data.get(COL_INPUT_DATA_GRID_SIGNALS)
+    residual_roi = input_data_helper.get_grid_signal(grid_signals_df, input_data_helper.GRID_SIGNAL_RESIDUAL_LOAD,
+                                                     new_ixs)
+    emission_roi = input_data_helper.get_grid_signal(grid_signals_df,
+                                                     input_data_helper.GRID_SIGNAL_EMISSIONS_GRID_ENERGY, new_ixs)
+    price_roi = input_data_helper.get_grid_signal(grid_signals_df, input_data_helper.GRID_SIGNAL_PRICE_GRID_ENERGY,
+                                                  new_ixs)
 
     # calculate grid energy, CO2 emissions, and electricity price
     (E_grid, el_cost, emissions,
      E_grid_chg, el_cost_chg, emissions_chg, t_residual_chg_s, residual_chg,
      E_grid_dischg, el_cost_dischg, emissions_dischg, t_residual_dischg_s, residual_dischg) = grid_params
 
-    E_grid_df = p_grid_df[new_ixs] * dt_s / 3600.0  # kW * s / 3600 -> kWh
+    E_grid_df = new_p_grid * dt_s / 3600.0  # kW * s / 3600 -> kWh
     E_grid_delta = E_grid_df.sum()
     E_grid_chg_delta = E_grid_df[cond_chg].sum()
     E_grid_dischg_delta = E_grid_df[cond_dischg].sum()
@@ -2128,6 +2223,33 @@ def calc_grid_params_ex_ante(scenario, grid_params, grid_input_data, p_cell_df,
     return grid_params, p_grid_df
 
 
+# append the log entries after t_after (ix > t_after) to log_export (log_writer.PartitionedLogWriter, columns:
+# LOG_EXPORT_KEYS + COL_ARR_AGING_STATES), returns the last exported timestamp (t_after if there was nothing new).
+# The logs can be bat.LogSink objects or pandas.Series, the recent entries of an EnvelopeLog are exported exactly.
+def export_logs(log_export, t_after, p_grid_df, p_cell_df, i_cell_df, v_cell_df, soc_df, temp_cell_df, cap_aged_df,
+                aging_states_df):
+    export_dfs = []
+    for df in [p_grid_df, p_cell_df, i_cell_df, v_cell_df, soc_df, temp_cell_df, cap_aged_df]:
+        ixs, values = bat.get_log_since(df, t_after)
+        export_dfs.append(pd.Series(values, index=bat.get_log_index(ixs), dtype=np.float64))
+    # p_grid_df only contains charging (and 0 before/after it) -> 0 at the other timestamps of p_cell_df (like in .csv)
+    new_ixs = export_dfs[1].index[~export_dfs[1].index.isin(export_dfs[0].index)]
+    export_dfs[0] = pd.concat([export_dfs[0], pd.Series(0.0, index=new_ixs)]).sort_index(kind="stable")
+    export_df = pd.concat(export_dfs, axis=1, keys=LOG_EXPORT_KEYS)
+    export_df = pd.concat([export_df, aging_states_df[aging_states_df.index > t_after]], axis=1).sort_index()
+    if export_df.shape[0] == 0:
+        return t_after
+    export_df.index = bat.get_log_index(export_df.index)
+    log_export.write(export_df)
+    return export_df.index[-1]
+
+
+# timestamps of a log (in s) -> datetime in TIMEZONE for the plot (each log needs its own, since the timestamps of the
+# logs can differ, e.g., the min/max of the intervals of a bat.EnvelopeLog)
+def get_plot_x_data(df):
+    return pd.to_datetime(df.index, unit="s", origin='unix', utc=True).tz_convert(TIMEZONE)
+
+
 def get_charging_ppvi(sc_loc, is_before_trip=False):
     if is_before_trip:
         return get_charging_ppvi_before_trip(sc_loc)
@@ -2188,33 +2310,46 @@ def get_optimization_intervals(t_start, t_earliest_departure, dt=CHG_OPTIMIZE_IN
     return t_interval_arr_list
 
 
-def calculate_grid_conditions(scenario, chg_strat_loc, grid_input_data, t_interval_arr_list):
-    t_interval_start_list = np.array(t_interval_arr_list)[:, 0].tolist()
-    t_interval_start_ser = pd.Series(t_interval_start_list, index=t_interval_start_list)
-
-    # determine residual load (might be required for emission and price estimation if no historic data is available
+# precompute the grid signals of the scenario (e.g., residual load, emissions, price, PV) from ts_min_roi to ts_max_roi
+# (unix timestamps of the simulated days) once, so the charging processes only need to look them up, see
+# input_data_helper.get_grid_signal_timeline
+def get_grid_signal_timeline(scenario, grid_input_data, ts_min_roi, ts_max_roi):
     scale_shift_years = 0
     if sc.SHIFT_BY_YEARS in scenario:
         scale_shift_years = scenario.get(sc.SHIFT_BY_YEARS)
-    el_gen_dem_data_df = grid_input_data.get(COL_INPUT_DATA_EL_GEN_DEM)
-    el_gen_dem_roi = input_data_helper.get_el_gen_dem_data(el_gen_dem_data_df, t_interval_start_ser,
-                                                           scale_shift_years=scale_shift_years)
-    residual_roi = el_gen_dem_roi[input_data_helper.RESIDUAL_LOAD]
+    return input_data_helper.get_grid_signal_timeline(
+        grid_input_data.get(COL_INPUT_DATA_EL_GEN_DEM), grid_input_data.get(COL_INPUT_DATA_EMISSIONS),
+        grid_input_data.get(COL_INPUT_DATA_PRICE), ts_min_roi - GRID_SIGNAL_MARGIN_BEFORE_S,
+        ts_max_roi + GRID_SIGNAL_MARGIN_AFTER_S, scale_shift_years=scale_shift_years)
 
+
+# grid signal (column of the grid signal timeline) that the charging strategy chg_strat_loc optimizes
+def get_grid_signal_col(chg_strat_loc):
+    if (chg_strat_loc == sc.CHG_STRAT.V1G_OPT_EMISSION) or (chg_strat_loc == sc.CHG_STRAT.V2G_OPT_EMISSION):
+        return input_data_helper.GRID_SIGNAL_EMISSIONS
+    elif (chg_strat_loc == sc.CHG_STRAT.V1G_OPT_COST) or (chg_strat_loc == sc.CHG_STRAT.V2G_OPT_COST):
+        return input_data_helper.GRID_SIGNAL_PRICE
+    elif (chg_strat_loc == sc.CHG_STRAT.V1G_OPT_REN) or (chg_strat_loc == sc.CHG_STRAT.V2G_OPT_REN):
+        return input_data_helper.GRID_SIGNAL_RESIDUAL_LOAD
+    return None
+
+
+def calculate_grid_conditions(scenario, chg_strat_loc, grid_input_data, t_interval_arr_list):
+    t_interval_start_list = np.array(t_interval_arr_list)[:, 0].tolist()
+    t_interval_start_ser = pd.Series(t_interval_start_list, index=t_interval_start_list)
+
+    grid_signal_col = get_grid_signal_col(chg_strat_loc)
     if (chg_strat_loc == sc.CHG_STRAT.V1G_OPT_EMISSION) or (chg_strat_loc == sc.CHG_STRAT.V2G_OPT_EMISSION):
         best_case, worst_case = 50, 350  # 50, 600  # average emissions of electricity mix in gCO2eq/kWh, lower = better
-        grid_val_df = input_data_helper.get_emission_data(grid_input_data.get(COL_INPUT_DATA_EMISSIONS),
-                                                          t_interval_start_ser, residual_load=residual_roi)
     elif (chg_strat_loc == sc.CHG_STRAT.V1G_OPT_COST) or (chg_strat_loc == sc.CHG_STRAT.V2G_OPT_COST):
         best_case, worst_case = -5, 8  # -5, 25  # electricity price in ct/kWh, lower = better
-        grid_val_df = input_data_helper.get_price_data(grid_input_data.get(COL_INPUT_DATA_PRICE),
-                                                       t_interval_start_ser, residual_load=residual_roi)
     elif (chg_strat_loc == sc.CHG_STRAT.V1G_OPT_REN) or (chg_strat_loc == sc.CHG_STRAT.V2G_OPT_REN):
         best_case, worst_case = -20, 30  # -20, 70  # residual load in GW, lower (or more negative = excess) = better
-        grid_val_df = residual_roi
     else:
         print("Error: calculate_grid_conditions() not implemented for chg_strat_loc = %s" % str(chg_strat_loc))
         return None
+    grid_val_df = input_data_helper.get_grid_signal(grid_input_data.get(COL_INPUT_DATA_GRID_SIGNALS), grid_signal_col,
+                                                    t_interval_start_ser)
     grid_conditions = (grid_val_df - worst_case) / (best_case - worst_case)
     grid_conditions[grid_conditions > 1.0] = 1.0
     grid_conditions[grid_conditions < 0.0] = 0.0
@@ -2234,17 +2369,10 @@ def calculate_relative_grid_conditions(scenario, chg_strat_loc, grid_input_data,
     if any(t_interval_end_ser <= t_interval_start_ser) or (not all(gap_less)):
         print("debug")
     # -------------
-    t_analyze_from = t_interval_start_list[0] - 6 * 24 * 3600  # analyze data from 6 days ago ...
-    t_analyze_to = t_interval_start_list[0] + 1 * 24 * 3600  # .. to 24 h ahead ("forecast")
-
-    # determine residual load (might be required for emission and price estimation if no historic data is available
-    scale_shift_years = 0
-    if sc.SHIFT_BY_YEARS in scenario:
-        scale_shift_years = scenario.get(sc.SHIFT_BY_YEARS)
-    el_gen_dem_data_df = grid_input_data.get(COL_INPUT_DATA_EL_GEN_DEM)
+    t_analyze_from = t_interval_start_list[0] - GRID_CONDITION_LOOK_BACK_S  # analyze data from 6 days ago ...
+    t_analyze_to = t_interval_start_list[0] + GRID_CONDITION_LOOK_AHEAD_S  # .. to 24 h ahead ("forecast")
 
-    emission_df = pd.Series(dtype=np.float64)
-    price_df = pd.Series(dtype=np.float64)
+    grid_signal_col = get_grid_signal_col(chg_strat_loc)
     if (chg_strat_loc == sc.CHG_STRAT.V1G_OPT_EMISSION) or (chg_strat_loc == sc.CHG_STRAT.V2G_OPT_EMISSION):
         # average emissions of electricity mix in gCO2eq/kWh, lower = better
         emission_df = grid_input_data.get(COL_INPUT_DATA_EMISSIONS)
@@ -2253,50 +2381,53 @@ def calculate_relative_grid_conditions(scenario, chg_strat_loc, grid_input_data,
         price_df = grid_input_data.get(COL_INPUT_DATA_PRICE)
         dt = price_df.index[1] - price_df.index[0]
     elif (chg_strat_loc == sc.CHG_STRAT.V1G_OPT_REN) or (chg_strat_loc == sc.CHG_STRAT.V2G_OPT_REN):
+        el_gen_dem_data_df = grid_input_data.get(COL_INPUT_DATA_EL_GEN_DEM)
         dt = el_gen_dem_data_df.index[1] - el_gen_dem_data_df.index[0]
     else:
         print("Error: calculate_grid_conditions() not implemented for chg_strat_loc = %s" % str(chg_strat_loc))
         return None
-    ixs_analyze = pd.Index(np.arange(t_analyze_from, t_analyze_to, dt))
-    t_analyze = pd.Series(ixs_analyze, index=ixs_analyze)
-    t_fetch_ser = pd.concat([t_interval_start_ser, t_analyze], axis=0).drop_duplicates().sort_index()
-    el_gen_dem_fetch = input_data_helper.get_el_gen_dem_data(el_gen_dem_data_df, t_fetch_ser,
-                                                             scale_shift_years=scale_shift_years)
-    el_gen_dem_roi = el_gen_dem_fetch.loc[t_interval_start_ser.index, :]
-    residual_roi = el_gen_dem_roi[input_data_helper.RESIDUAL_LOAD]
-    el_gen_dem_analyze = el_gen_dem_fetch.loc[t_analyze.index, :]
-    residual_analyze = el_gen_dem_analyze[input_data_helper.RESIDUAL_LOAD]
-
-    if (chg_strat_loc == sc.CHG_STRAT.V1G_OPT_EMISSION) or (chg_strat_loc == sc.CHG_STRAT.V2G_OPT_EMISSION):
-        # average emissions of electricity mix in gCO2eq/kWh, lower = better
-        analyze_df = input_data_helper.get_emission_data(emission_df, ixs_analyze, residual_load=residual_analyze)
-        best_case, worst_case = get_grid_condition_thresholds(analyze_df, True)
-        grid_val_roi = input_data_helper.get_emission_data(emission_df, t_interval_start_ser,
-                                                           residual_load=residual_roi)
-    elif (chg_strat_loc == sc.CHG_STRAT.V1G_OPT_COST) or (chg_strat_loc == sc.CHG_STRAT.V2G_OPT_COST):
-        analyze_df = input_data_helper.get_price_data(price_df, ixs_analyze, residual_load=residual_analyze)
-        best_case, worst_case = get_grid_condition_thresholds(analyze_df, True)
-        grid_val_roi = input_data_helper.get_price_data(price_df, t_interval_start_ser, residual_load=residual_roi)
-    elif (chg_strat_loc == sc.CHG_STRAT.V1G_OPT_REN) or (chg_strat_loc == sc.CHG_STRAT.V2G_OPT_REN):
-        best_case, worst_case = get_grid_condition_thresholds(residual_analyze, True)
-        grid_val_roi = residual_roi
-    else:
-        print("Error: calculate_grid_conditions() not implemented for chg_strat_loc = %s" % str(chg_strat_loc))
-        return None
+    # analyze the grid signal in the resolution of its input data (like the input data would be analyzed)
+    val_min, val_max = get_grid_signal_window(grid_input_data, grid_signal_col, dt, t_analyze_from, t_analyze_to)
+    best_case, worst_case = get_grid_condition_thresholds(val_min, val_max, True)
+    grid_val_roi = input_data_helper.get_grid_signal(grid_input_data.get(COL_INPUT_DATA_GRID_SIGNALS), grid_signal_col,
+                                                     t_interval_start_ser)
     grid_conditions = (grid_val_roi - worst_case) / (best_case - worst_case)
     grid_conditions[grid_conditions > 1.0] = 1.0
     grid_conditions[grid_conditions < 0.0] = 0.0
     return grid_conditions  # if worst_case -> 0, if best_case -> 1 (limited to [0, 1])
 
 
-def get_grid_condition_thresholds(df, lower_is_better):
+# minimum and maximum of the grid signal grid_signal_col, sampled every dt seconds from t_analyze_from to t_analyze_to.
+# If the samples are aligned to the grid signal timeline (dt is a multiple of its resolution), the sliding-window
+# extrema of the timeline are used (O(1), see input_data_helper.get_grid_signal_window_extrema). They are computed when
+# they are used the first time and stored in grid_input_data for the following charging processes of the scenario.
+def get_grid_signal_window(grid_input_data, grid_signal_col, dt, t_analyze_from, t_analyze_to):
+    grid_signals_df = grid_input_data.get(COL_INPUT_DATA_GRID_SIGNALS)
+    dt_timeline = grid_signals_df.index[1] - grid_signals_df.index[0]
+    if (dt % dt_timeline) != 0:  # samples hit different steps of the timeline in each window -> analyze the samples
+        analyze_df = input_data_helper.get_grid_signal(grid_signals_df, grid_signal_col,
+                                                       np.arange(t_analyze_from, t_analyze_to, dt))
+        return analyze_df.min(), analyze_df.max()
+
+    n_samples = len(np.arange(t_analyze_from, t_analyze_to, dt))
+    window_extrema = grid_input_data.get(COL_INPUT_DATA_GRID_SIGNAL_EXTREMA)
+    key = (grid_signal_col, dt, n_samples)
+    if key not in window_extrema:
+        window_extrema[key] = input_data_helper.get_grid_signal_window_extrema(grid_signals_df, grid_signal_col,
+                                                                               n_samples, int(dt // dt_timeline))
+    min_arr, max_arr = window_extrema.get(key)
+    pos = input_data_helper.get_grid_signal_pos(grid_signals_df, t_analyze_from)
+    return min_arr[pos], max_arr[pos]
+
+
+def get_grid_condition_thresholds(val_min, val_max, lower_is_better):
     if lower_is_better:
-        best_case = df.min()  # e.g., 100
-        worst_case = df.max()  # e.g., 600
+        best_case = val_min  # e.g., 100
+        worst_case = val_max  # e.g., 600
         # diff > 0 --> best_case will be increased by 10% of the difference, worst case decreased
     else:
-        best_case = df.max()  # e.g., 600
-        worst_case = df.min()  # e.g., 100
+        best_case = val_max  # e.g., 600
+        worst_case = val_min  # e.g., 100
         # diff < 0 --> best_case will be decreased by 10% of the difference, worst case increased
         #
     diff = worst_case - best_case
@@ -2327,4 +2458,7 @@ def get_grid_condition_thresholds(df, lower_is_better):
 
 
 if __name__ == "__main__":
-    run()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resume", action="store_true",
+                        help="continue the scenarios from their last checkpoint (see CHECKPOINT_INTERVAL_DAYS)")
+    run(parser.parse_args().resume)